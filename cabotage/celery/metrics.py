@@ -0,0 +1,76 @@
+"""Celery task metrics and the worker-side Prometheus exporter."""
+
+import logging
+import os
+import time
+
+from celery import signals
+
+from cabotage.server.metrics import (
+    TASK_DURATION_SECONDS,
+    TASK_QUEUE_WAIT_SECONDS,
+    mark_process_dead,
+    start_exporter,
+)
+
+log = logging.getLogger(__name__)
+
+ENQUEUED_AT_HEADER = "cabotage_enqueued_at"
+
+_started = {}
+
+
+def _stamp_enqueued_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(ENQUEUED_AT_HEADER, time.time())
+
+
+def _task_started(task_id=None, task=None, **kwargs):
+    if task is None:
+        return
+    _started[task_id] = time.perf_counter()
+    enqueued_at = getattr(task.request, ENQUEUED_AT_HEADER, None)
+    # Eager and retried tasks carry no (or a stale) publish time.
+    if enqueued_at is not None and not task.request.is_eager:
+        TASK_QUEUE_WAIT_SECONDS.labels(task.name).observe(
+            max(time.time() - float(enqueued_at), 0)
+        )
+
+
+def _task_finished(task_id=None, task=None, state=None, **kwargs):
+    start = _started.pop(task_id, None)
+    if start is not None and task is not None:
+        TASK_DURATION_SECONDS.labels(task.name, state or "UNKNOWN").observe(
+            time.perf_counter() - start
+        )
+
+
+def init_celery_metrics(celery_app, app):
+    signals.before_task_publish.connect(
+        _stamp_enqueued_at, weak=False, dispatch_uid="cabotage.metrics.publish"
+    )
+    signals.task_prerun.connect(
+        _task_started, weak=False, dispatch_uid="cabotage.metrics.prerun"
+    )
+    signals.task_postrun.connect(
+        _task_finished, weak=False, dispatch_uid="cabotage.metrics.postrun"
+    )
+
+    port = app.config.get("METRICS_WORKER_PORT")
+    if not port:
+        return
+
+    def start_worker_exporter(sender=None, **kwargs):
+        start_exporter(int(port))
+        log.info("Serving worker metrics on port %s", port)
+
+    def worker_process_exited(pid=None, **kwargs):
+        mark_process_dead(os.getpid())
+
+    # worker_ready only fires in the worker's main process, never in beat.
+    signals.worker_ready.connect(
+        start_worker_exporter, weak=False, dispatch_uid="cabotage.metrics.exporter"
+    )
+    signals.worker_process_shutdown.connect(
+        worker_process_exited, weak=False, dispatch_uid="cabotage.metrics.shutdown"
+    )
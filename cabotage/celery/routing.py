@@ -0,0 +1,82 @@
+"""Celery queue layout and task routing.
+
+Tasks are split by how urgently someone is waiting on them, so that a deploy
+started from the UI is never stuck behind housekeeping:
+
+- ``deploys``: deploys and Kubernetes changes made on behalf of a user
+- ``builds``: image, release and omnibus builds
+- ``webhooks``: inbound GitHub hook processing
+- ``notifications``: Slack/Discord message delivery
+- ``reconcile``: frequent periodic reconcilers and reapers
+- ``maintenance``: slow, infrequent cleanup and sync jobs
+
+Anything not listed stays on the default ``celery`` queue. See the Procfile
+for which worker consumes which queues.
+"""
+
+from kombu import Queue
+
+DEFAULT_QUEUE = "celery"
+
+QUEUES = (
+    DEFAULT_QUEUE,
+    "deploys",
+    "builds",
+    "webhooks",
+    "notifications",
+    "reconcile",
+    "maintenance",
+)
+
+TASK_ROUTES = {
+    "cabotage.celery.tasks.deploy.run_deploy": "deploys",
+    "cabotage.celery.tasks.deploy.cleanup_app_env_k8s": "deploys",
+    "cabotage.celery.tasks.deploy.apply_scale": "deploys",
+    "cabotage.celery.tasks.tailscale.deploy_tailscale_operator": "deploys",
+    "cabotage.celery.tasks.tailscale.teardown_tailscale_operator": "deploys",
+    "cabotage.celery.tasks.build.run_image_build": "builds",
+    "cabotage.celery.tasks.build.run_release_build": "builds",
+    "cabotage.celery.tasks.build.run_omnibus_build": "builds",
+    "cabotage.celery.tasks.github.process_github_hook": "webhooks",
+    "cabotage.celery.tasks.github.drain_github_hooks": "webhooks",
+    "cabotage.celery.tasks.notify.send_notification": "notifications",
+    "cabotage.celery.tasks.notify.dispatch_alert_notification": "notifications",
+    "cabotage.celery.tasks.notify.dispatch_pipeline_notification": "notifications",
+    "cabotage.celery.tasks.alerting.reconcile_alerts": "reconcile",
+    "cabotage.celery.tasks.audit.drain_audit_outbox": "reconcile",
+    "cabotage.celery.tasks.autoscale.evaluate_autoscaling": "reconcile",
+    "cabotage.celery.tasks.build_scheduler.dispatch_builds": "reconcile",
+    "cabotage.celery.tasks.maintain.reap_stale_builds": "reconcile",
+    "cabotage.celery.tasks.notify.reconcile_notifications": "reconcile",
+    "cabotage.celery.tasks.reap_jobs.reap_finished_jobs": "reconcile",
+    "cabotage.celery.tasks.resources.reconcile_backing_services": "reconcile",
+    "cabotage.celery.tasks.tailscale.reconcile_tailscale_integration_states": (
+        "reconcile"
+    ),
+    "cabotage.celery.tasks.github.sync_github_app_installations": "maintenance",
+    "cabotage.celery.tasks.maintain.reap_pods": "maintenance",
+    "cabotage.celery.tasks.prune_images.prune_images": "maintenance",
+    "cabotage.celery.tasks.prune_images.prune_application_repositories": (
+        "maintenance"
+    ),
+    "cabotage.celery.tasks.tailscale.refresh_tailscale_oidc_tokens": "maintenance",
+}
+
+# With the Redis broker 0 is the highest priority. Work started by someone
+# clicking a button jumps ahead of automated work on the same queue.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DEFAULT = 5
+
+
+def configure_routing(celery_app):
+    celery_app.conf.task_queues = [Queue(name) for name in QUEUES]
+    celery_app.conf.task_default_queue = DEFAULT_QUEUE
+    celery_app.conf.task_routes = {
+        name: {"queue": queue} for name, queue in TASK_ROUTES.items()
+    }
+    celery_app.conf.task_default_priority = PRIORITY_DEFAULT
+    celery_app.conf.broker_transport_options = {
+        **(celery_app.conf.broker_transport_options or {}),
+        "priority_steps": list(range(10)),
+        "queue_order_strategy": "priority",
+    }
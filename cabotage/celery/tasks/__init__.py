@@ -5,6 +5,7 @@ from .build import (
 )
 
 from .deploy import (
+    apply_scale,  # noqa: F401
     cleanup_app_env_k8s,  # noqa: F401
     run_deploy,  # noqa: F401
 )
@@ -22,7 +23,10 @@ from .prune_images import (
     prune_images,  # noqa: F401
 )
 
-from .github import process_github_hook  # noqa: F401
+from .github import (
+    drain_github_hooks,  # noqa: F401
+    process_github_hook,  # noqa: F401
+)
 
 from .tailscale import (
     deploy_tailscale_operator,  # noqa: F401
@@ -33,6 +37,12 @@ from .tailscale import (
 
 from .alerting import reconcile_alerts  # noqa: F401
 
+from .audit import drain_audit_outbox  # noqa: F401
+
+from .autoscale import evaluate_autoscaling  # noqa: F401
+
+from .build_scheduler import dispatch_builds  # noqa: F401
+
 from .resources import (
     reconcile_backing_services,  # noqa: F401
 )
@@ -1,35 +1,122 @@
 """Celery task to reconcile alerts with Alertmanager.
 
 Polls the Alertmanager v2 API for all currently active alerts, upserts them
-into the local alerts table, and marks any locally-firing alerts that are
-no longer present in Alertmanager as resolved.
+into the local alerts table in one statement, and marks any locally-firing
+alerts that are no longer present in Alertmanager as resolved in another.
+
+Polling is incremental: a digest of the response is kept in redis, and when
+Alertmanager reports the same alerts as last time the database pass is
+skipped and the poll interval backs off. Any change drops the interval back
+to the minimum. A full pass is still forced periodically so notification
+dispatch retries and local drift get picked up.
 """
 
+import hashlib
+import json
 import logging
-from datetime import UTC, datetime
+import time
 
+import redis
 import requests
 from celery import shared_task
 from flask import current_app
 
 from cabotage.server import db
-from cabotage.server.models.projects import Alert
+from cabotage.server.metrics import reconcile_rows, timed_reconcile
 from cabotage.server.alerting.ingest import (
-    _record_activity,
+    bulk_upsert_alerts,
     parse_alertmanager_timestamp,
-    upsert_alert,
+    resolve_missing_alerts,
 )
 from cabotage.celery.tasks.notify import dispatch_alert_notification
+from cabotage.utils.build_log_stream import get_redis_client
 
 log = logging.getLogger(__name__)
 
+POLL_STATE_KEY = "alertmanager:poll"
+POLL_STATE_TTL = 3600
+
+
+def _load_poll_state(redis_client):
+    try:
+        raw = redis_client.hgetall(POLL_STATE_KEY)
+    except redis.RedisError:
+        log.warning("Failed to load Alertmanager poll state", exc_info=True)
+        return {}
+    state = {k.decode(): v.decode() for k, v in raw.items()}
+    for key in ("interval", "next_poll_at", "full_at"):
+        if key in state:
+            state[key] = float(state[key])
+    return state
+
+
+def _save_poll_state(redis_client, state):
+    try:
+        redis_client.hset(POLL_STATE_KEY, mapping={k: str(v) for k, v in state.items()})
+        redis_client.expire(POLL_STATE_KEY, POLL_STATE_TTL)
+    except redis.RedisError:
+        log.warning("Failed to save Alertmanager poll state", exc_info=True)
+
+
+def _alerts_query_params():
+    """Alertmanager ``filter``/``receiver`` params scoping the poll."""
+    params = {}
+    matchers = current_app.config.get("ALERTMANAGER_FILTER")
+    if isinstance(matchers, str):
+        matchers = matchers.split(";")
+    matchers = [m.strip() for m in matchers or () if m.strip()]
+    if matchers:
+        params["filter"] = matchers
+    receiver = current_app.config.get("ALERTMANAGER_RECEIVER")
+    if receiver:
+        params["receiver"] = receiver
+    return params
+
+
+def alerts_digest(active_alerts):
+    """Order-independent digest of the alerts as reconciliation sees them.
+
+    ``updatedAt`` and the projected ``endsAt`` of active alerts move on
+    every rule evaluation without anything meaningful changing, so they are
+    left out.
+    """
+    entries = []
+    for alert_data in active_alerts:
+        status = alert_data.get("status", {})
+        state = status.get("state") if isinstance(status, dict) else status
+        entries.append(
+            [
+                alert_data.get("fingerprint", ""),
+                alert_data.get("startsAt"),
+                state,
+                alert_data.get("endsAt") if state == "resolved" else None,
+                alert_data.get("labels", {}),
+                alert_data.get("annotations", {}),
+                alert_data.get("generatorURL"),
+            ]
+        )
+    entries.sort(key=lambda e: (e[0], e[1] or ""))
+    payload = json.dumps(entries, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
 
 @shared_task()
-def reconcile_alerts():
+@timed_reconcile("alerts")
+def reconcile_alerts(force=False):
     alertmanager_url = current_app.config.get("ALERTMANAGER_URL")
     if not alertmanager_url:
         return
 
+    min_interval = float(current_app.config["ALERTMANAGER_POLL_MIN_INTERVAL"])
+    max_interval = float(current_app.config["ALERTMANAGER_POLL_MAX_INTERVAL"])
+    full_interval = float(current_app.config["ALERTMANAGER_FULL_RECONCILE_INTERVAL"])
+
+    redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
+    state = _load_poll_state(redis_client)
+    now = time.time()
+    if not force and now < state.get("next_poll_at", 0):
+        return
+
     verify = current_app.config.get("ALERTMANAGER_VERIFY")
     if verify is None:
         verify = True
@@ -44,6 +131,7 @@ def reconcile_alerts():
         resp = requests.get(
             f"{alertmanager_url.rstrip('/')}/api/v2/alerts",
             headers=headers,
+            params=_alerts_query_params(),
             verify=verify,
             timeout=30,
         )
@@ -53,10 +141,21 @@ def reconcile_alerts():
         return
 
     active_alerts = resp.json()
+    reconcile_rows("alerts", len(active_alerts))
+
+    digest = alerts_digest(active_alerts)
+    if not force and digest == state.get("digest") and now < state.get("full_at", 0):
+        interval = min(state.get("interval", min_interval) * 2, max_interval)
+        _save_poll_state(
+            redis_client,
+            {**state, "interval": interval, "next_poll_at": now + interval},
+        )
+        log.debug("Alertmanager alerts unchanged, next poll in %.0fs", interval)
+        return
 
     # Track which fingerprints are still active in Alertmanager
     seen_fingerprints = set()
-    dispatch_ids = []
+    batch = []
 
     for alert_data in active_alerts:
         labels = alert_data.get("labels", {})
@@ -74,33 +173,38 @@ def reconcile_alerts():
             state = status
         am_status = "firing" if state == "active" else state
 
-        _processed, dispatch_id = upsert_alert(
-            fingerprint=fingerprint,
-            status=am_status,
-            alertname=labels.get("alertname", "unknown"),
-            labels=labels,
-            annotations=alert_data.get("annotations", {}),
-            starts_at=starts_at,
-            ends_at=parse_alertmanager_timestamp(alert_data.get("endsAt")),
-            generator_url=alert_data.get("generatorURL"),
+        batch.append(
+            {
+                "fingerprint": fingerprint,
+                "status": am_status,
+                "alertname": labels.get("alertname", "unknown"),
+                "labels": labels,
+                "annotations": alert_data.get("annotations", {}),
+                "starts_at": starts_at,
+                "ends_at": parse_alertmanager_timestamp(alert_data.get("endsAt")),
+                "generator_url": alert_data.get("generatorURL"),
+            }
         )
-        if dispatch_id:
-            dispatch_ids.append(dispatch_id)
+
+    dispatch_ids = bulk_upsert_alerts(batch)
 
     # Resolve any locally-firing alerts that are no longer in Alertmanager
-    firing_alerts = Alert.query.filter_by(status="firing").all()
-    now = datetime.now(UTC).replace(tzinfo=None)
-    resolved_count = 0
-    for alert in firing_alerts:
-        if (alert.fingerprint, alert.starts_at) not in seen_fingerprints:
-            alert.status = "resolved"
-            alert.ends_at = now
-            _record_activity("resolved", alert, alert.application)
-            dispatch_ids.append(alert.id)
-            resolved_count += 1
+    resolved_ids = resolve_missing_alerts(seen_fingerprints)
+    dispatch_ids.extend(resolved_ids)
+    resolved_count = len(resolved_ids)
 
     db.session.commit()
 
+    _save_poll_state(
+        redis_client,
+        {
+            "digest": digest,
+            "interval": min_interval,
+            "next_poll_at": now + min_interval,
+            "full_at": now + full_interval,
+        },
+    )
+
     # Dispatch notifications after commit so workers can see the data
     for alert_id in dispatch_ids:
         dispatch_alert_notification.delay(str(alert_id))
@@ -0,0 +1,79 @@
+"""Celery task draining the audit event outbox into Activity rows."""
+
+import datetime
+import json
+import logging
+import uuid
+
+from celery import shared_task
+from flask import current_app
+
+from cabotage.server import db
+from cabotage.server.audit import OUTBOX_KEY, write_audit_events
+from cabotage.server.metrics import reconcile_rows, timed_reconcile
+from cabotage.utils.build_log_stream import get_redis_client
+
+log = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_LOCK_TIMEOUT = 300
+
+
+def _parse_event(fields):
+    """Decode an outbox entry, raising ValueError if it can't be written."""
+    try:
+        event = json.loads(fields[b"event"])
+        uuid.UUID(event["user_id"])
+        datetime.datetime.fromisoformat(event["timestamp"])
+    except (KeyError, TypeError, AttributeError, ValueError) as exc:
+        raise ValueError(str(exc)) from exc
+    if not event.get("verb"):
+        raise ValueError("missing verb")
+    return event
+
+
+@shared_task()
+@timed_reconcile("audit_outbox")
+def drain_audit_outbox(batch_size=OUTBOX_BATCH_SIZE):
+    redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
+    lock = redis_client.lock(f"{OUTBOX_KEY}:drain", timeout=OUTBOX_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        return 0
+
+    written = 0
+    try:
+        while True:
+            # Each batch gets a fresh lease so a slow drain isn't overlapped
+            # by the next scheduled run.
+            lock.reacquire()
+            entries = redis_client.xrange(OUTBOX_KEY, count=batch_size)
+            if not entries:
+                break
+            events = []
+            for entry_id, fields in entries:
+                try:
+                    events.append(_parse_event(fields))
+                except ValueError:
+                    log.warning(
+                        "Dropping malformed audit outbox entry %s",
+                        entry_id,
+                        exc_info=True,
+                    )
+            try:
+                written += write_audit_events(events)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                log.exception("Failed to write audit events, will retry")
+                break
+            # Only acknowledge once the rows are durable.
+            redis_client.xdel(OUTBOX_KEY, *[entry_id for entry_id, _ in entries])
+            if len(entries) < batch_size:
+                break
+    finally:
+        lock.release()
+
+    reconcile_rows("audit_outbox", written)
+    if written:
+        log.info("Wrote %d audit events from the outbox", written)
+    return written
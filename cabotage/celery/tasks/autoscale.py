@@ -0,0 +1,164 @@
+"""Celery task evaluating process autoscaling policies.
+
+Each pass reads the usage of every process that has a policy from Mimir
+and runs it through :mod:`cabotage.server.autoscaling`. Processes that need
+a new count are scaled through ``queue_scale``, the path the scale form
+uses, so the change is recorded as scale activity and applied by
+``apply_scale``. Per-process evaluation state is kept in redis. It carries
+the hysteresis from one pass to the next and backs the autoscale signal
+endpoint.
+"""
+
+import json
+import logging
+
+import redis
+from celery import shared_task
+from flask import current_app
+from sqlalchemy.orm.attributes import flag_modified
+
+from cabotage.server import db
+from cabotage.server.autoscaling import (
+    METRICS,
+    MimirMetricsSource,
+    evaluate_process,
+)
+from cabotage.server.metrics import reconcile_rows, timed_reconcile
+from cabotage.server.models.projects import (
+    DEFAULT_POD_CLASS,
+    ApplicationEnvironment,
+)
+from cabotage.celery.tasks.deploy import queue_scale
+from cabotage.utils.build_log_stream import get_redis_client
+
+log = logging.getLogger(__name__)
+
+AUTOSCALE_STATE_TTL = 86400
+AUTOSCALE_LOCK_KEY = "autoscale:evaluate"
+AUTOSCALE_LOCK_TIMEOUT = 300
+
+
+def autoscale_state_key(application_environment_id):
+    return f"autoscale:{application_environment_id}"
+
+
+def load_autoscale_state(redis_client, application_environment_id):
+    """Return ``{process_name: state}`` from the last evaluation."""
+    try:
+        raw = redis_client.hgetall(autoscale_state_key(application_environment_id))
+    except redis.RedisError:
+        log.warning("Failed to load autoscale state", exc_info=True)
+        return {}
+    return {k.decode(): json.loads(v) for k, v in raw.items()}
+
+
+def save_autoscale_state(redis_client, application_environment_id, states):
+    if not states:
+        return
+    key = autoscale_state_key(application_environment_id)
+    try:
+        redis_client.hset(
+            key, mapping={name: json.dumps(state) for name, state in states.items()}
+        )
+        redis_client.expire(key, AUTOSCALE_STATE_TTL)
+    except redis.RedisError:
+        log.warning("Failed to save autoscale state", exc_info=True)
+
+
+def autoscale_application_environment(app_env, metrics_source, redis_client, now=None):
+    """Evaluate ``app_env``'s policies and scale the processes that need it.
+
+    ``metrics_source`` provides ``process_usage(app_env, metric, processes)``.
+    Returns the scale changes that were committed, if any.
+    """
+    config = current_app.config
+    policies = app_env.autoscale_policies or {}
+    previous = load_autoscale_state(redis_client, app_env.id)
+
+    usage = {}
+    for metric in METRICS:
+        names = [name for name, p in policies.items() if p.get("metric") == metric]
+        if names:
+            usage.update(metrics_source.process_usage(app_env, metric, names))
+
+    states = {}
+    changes = {}
+    for process_name, policy in sorted(policies.items()):
+        current = (app_env.process_counts or {}).get(process_name, 0)
+        desired, state = evaluate_process(
+            policy,
+            current,
+            usage.get(process_name),
+            previous.get(process_name, {}),
+            tolerance=float(config["AUTOSCALE_TOLERANCE"]),
+            scale_down_window=float(config["AUTOSCALE_SCALE_DOWN_WINDOW"]),
+            cooldown=float(config["AUTOSCALE_COOLDOWN"]),
+            pod_class=(app_env.process_pod_classes or {}).get(
+                process_name, DEFAULT_POD_CLASS
+            ),
+            now=now,
+        )
+        states[process_name] = state
+        if desired is None:
+            continue
+        if policy.get("dry_run"):
+            log.info(
+                "Autoscale dry run: would scale %s of %s from %d to %d",
+                process_name,
+                app_env.id,
+                current,
+                desired,
+            )
+            continue
+        changes[process_name] = {
+            "process_count": {"old_value": current, "new_value": desired}
+        }
+        app_env.process_counts[process_name] = desired
+        state["last_scaled_at"] = state["evaluated_at"]
+        state["below_since"] = None
+
+    if changes:
+        flag_modified(app_env, "process_counts")
+        queue_scale(app_env, changes, {"trigger": "autoscale"})
+        log.info("Autoscaled %s: %s", app_env.id, changes)
+    save_autoscale_state(redis_client, app_env.id, states)
+    return changes
+
+
+@shared_task()
+@timed_reconcile("autoscale")
+def evaluate_autoscaling():
+    if not current_app.config.get("MIMIR_URL"):
+        return 0
+    redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
+    lock = redis_client.lock(AUTOSCALE_LOCK_KEY, timeout=AUTOSCALE_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        return 0
+
+    scaled = 0
+    try:
+        app_envs = ApplicationEnvironment.query.filter(
+            ApplicationEnvironment.deleted_at.is_(None),
+            ApplicationEnvironment.autoscale_policies != {},
+        ).all()
+        reconcile_rows("autoscale", len(app_envs))
+        metrics_source = MimirMetricsSource(
+            window=int(current_app.config["AUTOSCALE_METRIC_WINDOW"])
+        )
+        for app_env in app_envs:
+            if (
+                app_env.application.deleted_at is not None
+                or app_env.environment.deleted_at is not None
+            ):
+                continue
+            try:
+                if autoscale_application_environment(
+                    app_env, metrics_source, redis_client
+                ):
+                    scaled += 1
+            except Exception:
+                db.session.rollback()
+                log.exception("Failed to evaluate autoscaling for %s", app_env.id)
+    finally:
+        lock.release()
+    return scaled
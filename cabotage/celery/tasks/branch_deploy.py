@@ -600,13 +600,13 @@ def _build_images_for_app_envs(app_envs, commit_sha, installation_id):
     db.session.commit()
 
     from flask import current_app
-    from cabotage.celery.tasks import run_image_build, run_omnibus_build
+    from cabotage.celery.tasks.build_scheduler import schedule_build
 
     for image in images:
         if current_app.config.get("CABOTAGE_OMNIBUS_BUILDS"):
-            run_omnibus_build.delay(image_id=image.id)
+            schedule_build("omnibus", image)
         else:
-            run_image_build.delay(image_id=image.id)
+            schedule_build("image", image)
 
 
 def _app_env_status(app_env):
@@ -1,4 +1,5 @@
 import datetime
+import hashlib
 import json
 import logging
 import os
@@ -6,6 +7,8 @@ import re
 import secrets
 import shlex
 import subprocess  # nosec
+import time
+from contextlib import contextmanager
 
 from celery import shared_task
 from base64 import b64encode, b64decode
@@ -27,6 +30,11 @@ from github.Auth import AppAuth as GithubAppAuth
 from github.GithubException import GithubException, UnknownObjectException
 from github.GithubIntegration import GithubIntegration
 
+from cabotage.celery.tasks.build_scheduler import (
+    schedule_build,
+    scheduled_build,
+    set_build_waiting,
+)
 from cabotage.celery.tasks.deploy import (
     _safe_labels_from_application,
     run_deploy,
@@ -45,6 +53,8 @@ from cabotage.server import (
     kubernetes as kubernetes_ext,
 )
 
+from cabotage.server.ext.config_writer import config_read_cache
+from cabotage.server.metrics import time_stage
 from cabotage.server.models.projects import (
     activity_plugin,
     Environment,
@@ -66,6 +76,7 @@ from cabotage.utils.build_log_stream import (
     stream_key,
 )
 from cabotage.utils.release_build_context import RELEASE_DOCKERFILE_TEMPLATE
+from cabotage.utils import buildkitd_pool, source_snapshot
 from cabotage.utils.github import (
     CheckRun,
     cabotage_url,
@@ -159,7 +170,7 @@ def _queue_autodeploy_release_for_image(image):
         Image=f"images/{image.id}",
         Release=f"releases/{release.id}",
     )
-    run_release_build.delay(release_id=release.id)
+    schedule_build("release", release)
     try:
         dispatch_autodeploy_notification(
             "release_building",
@@ -201,7 +212,7 @@ def resume_branch_deploy_releases_for_environment(environment_id):
                 "waiting_for_backing_services"
             ):
                 _clear_image_waiting_for_backing_services(image)
-                run_omnibus_build.delay(image_id=image.id)
+                schedule_build("omnibus", image)
         elif image.built:
             _queue_autodeploy_release_for_image(image)
 
@@ -333,34 +344,69 @@ class BuildkitEnv:
             buildkitd_config["registry"][self.registry]["http"] = True
         self.buildkitd_toml = toml.dumps(buildkitd_config)
 
-    def verify_registry_tag(self, repository_name, tag):
-        """Verify a tag was pushed to the registry. Returns the digest."""
-
+    def _registry_client(self, repository_name, access):
         def auth(dxf, response):
-            dxf.token = generate_docker_registry_jwt(
-                access=[
-                    {
-                        "type": "repository",
-                        "name": repository_name,
-                        "actions": ["pull"],
-                    }
-                ]
-            )
+            dxf.token = generate_docker_registry_jwt(access=access)
 
         _tlsverify = False
         if self.registry_secure:
             _tlsverify = self.registry_ca
             if _tlsverify == "True":
                 _tlsverify = True
-        client = DXF(
+        return DXF(
             host=self.registry,
             repo=repository_name,
             auth=auth,
             insecure=(not self.registry_secure),
             tlsverify=_tlsverify,
         )
+
+    def verify_registry_tag(self, repository_name, tag):
+        """Verify a tag was pushed to the registry. Returns the digest."""
+        client = self._registry_client(
+            repository_name,
+            [{"type": "repository", "name": repository_name, "actions": ["pull"]}],
+        )
         return client.get_digest(tag)
 
+    def copy_registry_image(self, source_repository, source_tag, repository_name, tag):
+        """Tag an image pushed to another repository. Returns the digest.
+
+        Blobs are mounted from the source repository, so nothing is pulled
+        or pushed but the manifests.
+        """
+        pull_source = {
+            "type": "repository",
+            "name": source_repository,
+            "actions": ["pull"],
+        }
+        source = self._registry_client(source_repository, [pull_source])
+        target = self._registry_client(
+            repository_name,
+            [
+                {
+                    "type": "repository",
+                    "name": repository_name,
+                    "actions": ["push", "pull"],
+                },
+                pull_source,
+            ],
+        )
+
+        def copy(reference, alias):
+            manifest, _ = source.get_manifest_and_response(reference)
+            parsed = json.loads(manifest)
+            # Indexes reference per-platform and attestation manifests.
+            for child in parsed.get("manifests", []):
+                copy(child["digest"], child["digest"])
+            for blob in [parsed.get("config"), *parsed.get("layers", [])]:
+                if blob:
+                    target.mount_blob(source_repository, blob["digest"])
+            target.set_manifest(alias, manifest)
+
+        copy(source_tag, tag)
+        return target.get_digest(tag)
+
     def tls_context_args(self):
         """Return --registry-auth-tlscontext args if needed, else empty list."""
         if self.registry_ca and not isinstance(self.registry_ca, bool):
@@ -472,15 +518,11 @@ def _fetch_image_source(image, access_token):
     image.procfile = procfile_body
     db.session.commit()
 
-    dockerfile_object = DockerfileParser()
+    # Parse in a private directory; the cwd is shared by every worker thread.
     with TemporaryDirectory() as tempdir:
-        previous_dir = os.getcwd()
-        os.chdir(tempdir)
-        try:
-            dockerfile_object.content = dockerfile_body
-            dockerfile_env_vars = list(dockerfile_object.envs.keys())
-        finally:
-            os.chdir(previous_dir)
+        dockerfile_object = DockerfileParser(path=tempdir)
+        dockerfile_object.content = dockerfile_body
+        dockerfile_env_vars = list(dockerfile_object.envs.keys())
     try:
         processes = procfile.loads(procfile_body)
     except ValueError as exc:
@@ -511,52 +553,118 @@ def _fetch_image_source(image, access_token):
     }
 
 
-def build_release_buildkit(release):
-    bke = BuildkitEnv(release.repository_name)
-    registry = bke.registry
-    buildkit_image = bke.buildkit_image
+def release_build_fingerprint(release, context, buildkit_image):
+    """Hash of the inputs that determine what a release build produces.
 
-    process_commands = "\n".join(
-        [
-            (
-                f"COPY envconsul-{process_name}.hcl "
-                f"/etc/cabotage/envconsul-{process_name}.hcl"
-            )
-            for process_name in release.envconsul_configurations
-        ]
+    That's the rendered build context and the digest of the image it
+    builds ``FROM``. Returns None when the image digest isn't known.
+    """
+    base_image = (release.image or {}).get("image_id")
+    if not base_image:
+        return None
+    inputs = {
+        "base_image": base_image,
+        "context": {
+            name: hashlib.sha256(contents.encode()).hexdigest()
+            for name, contents in context.items()
+        },
+        "buildkit_image": buildkit_image,
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def _reuse_identical_release(release, bke, fingerprint):
+    """Tag the image of an earlier release with the same fingerprint.
+
+    Returns the digest, or None when there's no such release or it can't
+    be copied, in which case ``release`` is built as usual.
+    """
+    if fingerprint is None:
+        return None
+    source = (
+        Release.query.filter(
+            Release.application_id == release.application_id,
+            Release.id != release.id,
+            Release.release_metadata["build_fingerprint"].astext == fingerprint,
+            Release.release_id.isnot(None),
+            Release.error.is_(False),
+            Release.deleted.is_(False),
+        )
+        .order_by(Release.created.desc())
+        .first()
     )
-    release.dockerfile = RELEASE_DOCKERFILE_TEMPLATE.format(
-        registry=registry,
-        image=release.image_snapshot,
-        process_commands=process_commands,
+    if source is None:
+        return None
+    source_ref = f"{source.repository_name}:release-{source.version}"
+    try:
+        digest = bke.copy_registry_image(
+            source.repository_name,
+            f"release-{source.version}",
+            release.repository_name,
+            f"release-{release.version}",
+        )
+    except Exception:
+        log.warning(
+            "Failed to reuse %s for release %s", source_ref, release.id, exc_info=True
+        )
+        return None
+    log.info("Reused %s for release %s", source_ref, release.id)
+    release.release_metadata = {
+        **(release.release_metadata or {}),
+        "reused_release_id": str(source.id),
+    }
+    release.release_build_log = (
+        f"Build context matches release {source_ref}, "
+        f"tagged {digest} instead of building.\n"
     )
-    db.session.add(release)
     db.session.commit()
+    return digest
 
-    insecure_reg = bke.insecure_reg
-    dockerconfigjson = bke.dockerconfigjson
-    buildkitd_toml = bke.buildkitd_toml
 
-    buildctl_command = [
-        "buildctl-daemonless.sh",
-    ]
-    buildctl_args = [
-        "build",
-        "--progress=plain",
-        "--frontend",
-        "dockerfile.v0",
-        "--output",
-        (
-            f"type=image,name={registry}/{release.repository_name}"
-            f":release-{release.version},push=true{insecure_reg}"
-        ),
-    ]
+def _run_release_build(release, bke, buildctl_command, buildctl_args):
+    """Build ``release`` on the buildkitd pool, as a Kubernetes Job or locally.
 
-    buildctl_args += bke.tls_context_args()
+    Returns the digest of the pushed release image.
+    """
+    buildkit_image = bke.buildkit_image
+    dockerconfigjson = bke.dockerconfigjson
+    buildkitd_toml = bke.buildkitd_toml
 
     db.session.add(release)
     try:
-        if current_app.config["KUBERNETES_ENABLED"]:
+        if _buildkitd_pool_enabled():
+            buildctl_args += [
+                "--local",
+                "dockerfile=context",
+                "--local",
+                "context=context",
+            ]
+            pool_build = dict(
+                application_id=str(release.application_id),
+                dockerconfigjson=dockerconfigjson,
+                context_files=release.release_build_context_configmap.data,
+                build_type="release",
+                build_job_id=release.build_job_id,
+                heartbeat_type="release_build",
+                heartbeat_id=str(release.id),
+            )
+            # The build runs for minutes. End the transaction so this thread
+            # doesn't hold a pooled connection (idle in transaction) while it
+            # waits for a daemon and streams the build.
+            db.session.commit()
+            try:
+                output = _run_on_buildkitd_pool([buildctl_args], **pool_build)
+            except subprocess.CalledProcessError as proc_exc:
+                db.session.refresh(release)
+                release.release_build_log = proc_exc.output
+                db.session.commit()
+                raise BuildError(
+                    f"Build subprocess failed with exit code {proc_exc.returncode}"
+                )
+            db.session.refresh(release)
+            release.release_build_log = output
+            db.session.commit()
+        elif current_app.config["KUBERNETES_ENABLED"]:
             buildctl_args += [
                 "--local",
                 "dockerfile=/context",
@@ -744,6 +852,10 @@ def build_release_buildkit(release):
                 redis_client = None
                 log_key = None
 
+            # The build runs for minutes. End the transaction so this thread
+            # doesn't hold a pooled connection (idle in transaction) while it
+            # waits; everything the job needs is already rendered.
+            db.session.commit()
             try:
                 job_complete, job_logs = run_job(
                     core_api_instance,
@@ -863,12 +975,79 @@ def build_release_buildkit(release):
         raise BuildError(f"Build failed: {exc}")
 
     try:
-        pushed_release = bke.verify_registry_tag(
+        return bke.verify_registry_tag(
             release.repository_name, f"release-{release.version}"
         )
     except Exception as exc:
         raise BuildError(f"Release push failed: {exc}")
 
+
+def build_release_buildkit(release):
+    bke = BuildkitEnv(release.repository_name)
+    registry = bke.registry
+    buildkit_image = bke.buildkit_image
+
+    process_commands = "\n".join(
+        [
+            (
+                f"COPY envconsul-{process_name}.hcl "
+                f"/etc/cabotage/envconsul-{process_name}.hcl"
+            )
+            for process_name in release.envconsul_configurations
+        ]
+    )
+    release.dockerfile = RELEASE_DOCKERFILE_TEMPLATE.format(
+        registry=registry,
+        image=release.image_snapshot,
+        process_commands=process_commands,
+    )
+    db.session.add(release)
+    db.session.commit()
+
+    insecure_reg = bke.insecure_reg
+
+    buildctl_command = [
+        "buildctl-daemonless.sh",
+    ]
+    buildctl_args = [
+        "build",
+        "--progress=plain",
+        "--frontend",
+        "dockerfile.v0",
+        "--output",
+        (
+            f"type=image,name={registry}/{release.repository_name}"
+            f":release-{release.version},push=true{insecure_reg}"
+        ),
+    ]
+
+    buildctl_args += bke.tls_context_args()
+
+    fingerprint = release_build_fingerprint(
+        release, release.release_build_context_configmap.data, buildkit_image
+    )
+    if fingerprint is not None:
+        release.release_metadata = {
+            **(release.release_metadata or {}),
+            "build_fingerprint": fingerprint,
+        }
+        db.session.commit()
+
+    with _build_fingerprint_lock(
+        "release",
+        fingerprint,
+        heartbeat_type="release_build",
+        heartbeat_id=str(release.id),
+    ):
+        pushed_release = _reuse_identical_release(release, bke, fingerprint)
+        if pushed_release is None:
+            pushed_release = _run_release_build(
+                release, bke, buildctl_command, buildctl_args
+            )
+            # Builds waiting on the fingerprint lock look for this.
+            release.release_id = pushed_release
+            db.session.commit()
+
     return {
         "release_id": pushed_release,
     }
@@ -1000,100 +1179,316 @@ def fetch_image_build_cache_volume_claim(core_api_instance, buildable):
     return volume_claim
 
 
-def build_image_buildkit(image: Image):
-    bke = BuildkitEnv(image.repository_name)
-    registry = bke.registry
-    buildkit_image = bke.buildkit_image
-    insecure_reg = bke.insecure_reg
-    dockerconfigjson = bke.dockerconfigjson
-    buildkitd_toml = bke.buildkitd_toml
+def _buildkitd_pool_enabled():
+    return bool(buildkitd_pool.parse_pool(current_app.config.get("BUILDKITD_POOL")))
 
-    access_token = _fetch_github_access_token(image.application)
-    source = _fetch_image_source(image, access_token)
-    git_ref = source["git_ref"]
-    dockerfile_name = source["dockerfile_name"]
-    dockerfile_body = source["dockerfile_body"]
-    procfile_body = source["procfile_body"]
-    processes = source["processes"]
-    dockerfile_env_vars = source["dockerfile_env_vars"]
 
-    # Now that the commit SHA is resolved, update the notification
-    if image.image_metadata and image.image_metadata.get("auto_deploy"):
+def _run_on_buildkitd_pool(
+    builds,
+    *,
+    application_id,
+    dockerconfigjson,
+    build_type,
+    build_job_id,
+    heartbeat_type,
+    heartbeat_id,
+    access_token=None,
+    context_files=None,
+):
+    """Run ``buildctl`` builds one after another on a pool daemon.
+
+    Each entry of ``builds`` is a list of ``buildctl`` arguments. They run
+    in a scratch directory holding the registry auth, the GitHub token at
+    ``.secret/github_access_token`` and ``context_files`` under
+    ``context/``. Returns the output, or raises CalledProcessError.
+    """
+    config = current_app.config
+    redis_client = get_redis_client(config["CELERY_BROKER_URL"])
+    pool = buildkitd_pool.BuildkitdPool.from_config(redis_client, config)
+    tls_args = []
+    if config.get("BUILDKITD_VERIFY"):
+        tls_args = ["--tlscacert", config["BUILDKITD_VERIFY"]]
+
+    with TemporaryDirectory() as tempdir:
+        os.makedirs(os.path.join(tempdir, ".docker"), exist_ok=True)
+        with open(os.path.join(tempdir, ".docker", "config.json"), "w") as f:
+            f.write(dockerconfigjson)
+        if access_token is not None:
+            os.makedirs(os.path.join(tempdir, ".secret"), exist_ok=True)
+            with open(
+                os.path.join(tempdir, ".secret", "github_access_token"), "w"
+            ) as f:
+                f.write(str(access_token))
+        if context_files:
+            os.makedirs(os.path.join(tempdir, "context"), exist_ok=True)
+            for file, contents in context_files.items():
+                with open(os.path.join(tempdir, "context", file), "w") as f:
+                    f.write(contents)
+
         try:
-            dispatch_autodeploy_notification(
-                "image_building",
-                image.id,
-                image.application,
-                image.application_environment,
-                image_url=cabotage_url(image.application, f"images/{image.id}"),
-                image_metadata=image.image_metadata,
-            )
-        except Exception:
-            log.warning(
-                "Failed to dispatch autodeploy image_building notification",
-                exc_info=True,
-            )
+            with pool.lease(
+                application_id,
+                wait_timeout=int(config["BUILDKITD_POOL_WAIT_TIMEOUT"]),
+                on_wait=lambda: refresh_heartbeat(
+                    redis_client, heartbeat_type, heartbeat_id
+                ),
+            ) as address:
+                commands = [
+                    ["buildctl", f"--addr={address}", *tls_args, *args]
+                    for args in builds
+                ]
+                command = commands[0]
+                if len(commands) > 1:
+                    command = [
+                        "/bin/sh",
+                        "-c",
+                        " && ".join(shlex.join(c) for c in commands),
+                    ]
+                return run_and_stream(
+                    command,
+                    env={**os.environ, "HOME": tempdir},
+                    cwd=tempdir,
+                    broker_url=config["CELERY_BROKER_URL"],
+                    build_type=build_type,
+                    build_job_id=build_job_id,
+                    heartbeat_type=heartbeat_type,
+                    heartbeat_id=heartbeat_id,
+                )
+        except buildkitd_pool.BuildkitdPoolBusy as exc:
+            raise BuildError(str(exc))
 
-    buildctl_command = [
-        "buildctl-daemonless.sh",
-    ]
-    buildctl_args = [
-        "build",
-        "--progress=plain",
-        "--frontend",
-        "dockerfile.v0",
-        "--opt",
-        f"filename=./{dockerfile_name}",
+
+def _source_snapshot_key(image):
+    """Snapshot key for ``image``'s build context, or None to build from git.
+
+    Only builds of a resolved commit running as Kubernetes jobs use the
+    source cache; anything else keeps handing BuildKit the git URL.
+    """
+    if not current_app.config["KUBERNETES_ENABLED"] or _buildkitd_pool_enabled():
+        return None
+    if not current_app.config.get("BUILD_SOURCE_CACHE_CLAIM"):
+        return None
+    if not image.commit_sha or image.commit_sha == "null":
+        return None
+    return source_snapshot.snapshot_key(
+        image.application.github_repository,
+        image.commit_sha,
+        image.application.subdirectory,
+    )
+
+
+def _source_snapshot_container(image, key):
+    return source_snapshot.fetch_snapshot_container(
+        current_app.config["BUILD_SOURCE_CACHE_IMAGE"],
+        key,
+        image.application.github_repository,
+        image.commit_sha,
+        subdirectory=image.application.subdirectory,
+        max_megabytes=current_app.config["BUILD_SOURCE_CACHE_MAX_MEGABYTES"],
+    )
+
+
+def _image_context_args(image, git_ref, snapshot_key):
+    if snapshot_key:
+        return source_snapshot.snapshot_context_args(snapshot_key)
+    return [
         "--opt",
-        (f"context={git_ref(image.application.github_repository, image.commit_sha)}"),
-        "--import-cache",
-        (
-            f"type=registry,ref={registry}/{image.repository_name}"
-            f":image-buildcache{insecure_reg}"
-        ),
-        "--export-cache",
-        (
-            f"type=registry,ref={registry}/{image.repository_name}"
-            f":image-buildcache{insecure_reg},mode=min"
-        ),
-        "--output",
-        (
-            f"type=image,name={registry}/{image.repository_name}"
-            f":image-{image.version},push=true{insecure_reg}"
-        ),
+        f"context={git_ref(image.application.github_repository, image.commit_sha)}",
     ]
 
-    buildctl_args.append("--opt")
-    buildctl_args.append(shlex.quote(f"build-arg:SOURCE_COMMIT={image.commit_sha}"))
 
-    for k, v in image.buildargs(config_writer).items():
-        buildctl_args.append("--opt")
-        buildctl_args.append(shlex.quote(f"build-arg:{k}={v}"))
+# Longer than a build job may run, so a lock is never lost mid-build.
+BUILD_DEDUP_TIMEOUT = 2400
+# Well inside the heartbeat TTL, so a waiting build keeps its heartbeat.
+BUILD_DEDUP_POLL_INTERVAL = 30
 
-    buildctl_args += bke.tls_context_args()
 
-    try:
-        if current_app.config["KUBERNETES_ENABLED"]:
-            api_client = kubernetes_ext.kubernetes_client
-            core_api_instance = kubernetes.client.CoreV1Api(api_client)
-            batch_api_instance = kubernetes.client.BatchV1Api(api_client)
-            # Create PersistentVolumeClaim
-            volume_claim = fetch_image_build_cache_volume_claim(
-                core_api_instance, image
-            )
-            if image.application.github_repository_is_private:
-                buildctl_args.append("--secret")
-                buildctl_args.append(
-                    "id=GIT_AUTH_TOKEN,src=/home/user/.secret/github_access_token"
-                )
-            docker_secret_object = kubernetes.client.V1Secret(
-                type="kubernetes.io/dockerconfigjson",
-                metadata=kubernetes.client.V1ObjectMeta(
-                    name=f"buildkit-registry-auth-{image.build_job_id}",
-                ),
-                data={
-                    ".dockerconfigjson": b64encode(dockerconfigjson.encode()).decode(),
-                },
+def image_build_fingerprint(image, dockerfile_name, buildargs, buildkit_image):
+    """Hash of the inputs that determine what an image build produces.
+
+    Builds of the same application with the same fingerprint produce the
+    same image, so only one of them has to run. Returns None when the
+    commit isn't resolved.
+    """
+    if not image.commit_sha or image.commit_sha == "null":
+        return None
+    buildargs_hash = hashlib.sha256(
+        json.dumps(buildargs, sort_keys=True).encode()
+    ).hexdigest()
+    inputs = {
+        "repository": image.application.github_repository,
+        "sha": image.commit_sha,
+        "subdirectory": image.application.subdirectory or "",
+        "dockerfile": dockerfile_name,
+        "buildargs": buildargs_hash,
+        "buildkit_image": buildkit_image,
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+@contextmanager
+def _build_fingerprint_lock(kind, fingerprint, heartbeat_type=None, heartbeat_id=None):
+    """Hold ``kind`` builds of one fingerprint back while another one runs.
+
+    A build that waited here finds the other build's output when it gets
+    the lock, and reuses it. The wait is split into short polls that
+    refresh the build's heartbeat, so the build isn't reaped as stalled
+    while it waits, and the build's scheduler slot is given up to the next
+    queued build meanwhile. Builds go ahead unserialized without redis.
+    """
+    lock = None
+    if fingerprint is not None:
+        try:
+            redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
+            lock = redis_client.lock(
+                f"{kind}-build:{fingerprint}", timeout=BUILD_DEDUP_TIMEOUT
+            )
+            deadline = time.monotonic() + BUILD_DEDUP_TIMEOUT
+            waiting = False
+            try:
+                while True:
+                    if heartbeat_type is not None:
+                        refresh_heartbeat(redis_client, heartbeat_type, heartbeat_id)
+                    remaining = deadline - time.monotonic()
+                    if lock.acquire(
+                        blocking_timeout=max(
+                            0, min(BUILD_DEDUP_POLL_INTERVAL, remaining)
+                        )
+                    ):
+                        break
+                    if remaining <= BUILD_DEDUP_POLL_INTERVAL:
+                        lock = None
+                        break
+                    if not waiting and heartbeat_id is not None:
+                        set_build_waiting(redis_client, kind, heartbeat_id, True)
+                        waiting = True
+            finally:
+                if waiting:
+                    set_build_waiting(redis_client, kind, heartbeat_id, False)
+        except Exception:
+            log.warning("Failed to lock %s build fingerprint", kind, exc_info=True)
+            lock = None
+    try:
+        yield
+    finally:
+        if lock is not None:
+            try:
+                lock.release()
+            except Exception:
+                log.warning("Failed to release %s build fingerprint lock", kind)
+
+
+def _reuse_identical_image(image, bke, fingerprint):
+    """Tag the image of an earlier build with the same fingerprint.
+
+    Returns the digest, or None when there's no such image or it can't be
+    copied, in which case ``image`` is built as usual.
+    """
+    if fingerprint is None:
+        return None
+    source = (
+        Image.query.filter(
+            Image.application_id == image.application_id,
+            Image.id != image.id,
+            Image.image_metadata["build_fingerprint"].astext == fingerprint,
+            Image.image_id.isnot(None),
+            Image.error.is_(False),
+            Image.deleted.is_(False),
+        )
+        .order_by(Image.created.desc())
+        .first()
+    )
+    if source is None:
+        return None
+    source_ref = f"{source.repository_name}:image-{source.version}"
+    try:
+        digest = bke.copy_registry_image(
+            source.repository_name,
+            f"image-{source.version}",
+            image.repository_name,
+            f"image-{image.version}",
+        )
+    except Exception:
+        log.warning(
+            "Failed to reuse %s for image %s", source_ref, image.id, exc_info=True
+        )
+        return None
+    log.info("Reused %s for image %s", source_ref, image.id)
+    image.image_metadata = {
+        **(image.image_metadata or {}),
+        "reused_image_id": str(source.id),
+    }
+    image.image_build_log = (
+        f"Build inputs match image {source_ref}, tagged {digest} instead of building.\n"
+    )
+    db.session.commit()
+    return digest
+
+
+def _run_image_build(
+    image, bke, buildctl_command, buildctl_args, access_token, snapshot_key
+):
+    """Build ``image`` on the buildkitd pool, as a Kubernetes Job or locally.
+
+    Returns the digest of the pushed image.
+    """
+    buildkit_image = bke.buildkit_image
+    dockerconfigjson = bke.dockerconfigjson
+    buildkitd_toml = bke.buildkitd_toml
+
+    try:
+        if _buildkitd_pool_enabled():
+            if image.application.github_repository_is_private:
+                buildctl_args.append("--secret")
+                buildctl_args.append(
+                    "id=GIT_AUTH_TOKEN,src=.secret/github_access_token"
+                )
+            pool_build = dict(
+                application_id=str(image.application_id),
+                dockerconfigjson=dockerconfigjson,
+                access_token=access_token,
+                build_type="image",
+                build_job_id=image.build_job_id,
+                heartbeat_type="image_build",
+                heartbeat_id=str(image.id),
+            )
+            # The build runs for minutes. End the transaction so this thread
+            # doesn't hold a pooled connection (idle in transaction) while it
+            # waits for a daemon and streams the build.
+            db.session.commit()
+            try:
+                output = _run_on_buildkitd_pool([buildctl_args], **pool_build)
+            except subprocess.CalledProcessError as proc_exc:
+                db.session.refresh(image)
+                image.image_build_log = proc_exc.output
+                db.session.commit()
+                raise BuildError(
+                    f"Build subprocess failed with exit code {proc_exc.returncode}"
+                )
+            db.session.refresh(image)
+            image.image_build_log = output
+            db.session.commit()
+        elif current_app.config["KUBERNETES_ENABLED"]:
+            api_client = kubernetes_ext.kubernetes_client
+            core_api_instance = kubernetes.client.CoreV1Api(api_client)
+            batch_api_instance = kubernetes.client.BatchV1Api(api_client)
+            # Create PersistentVolumeClaim
+            volume_claim = fetch_image_build_cache_volume_claim(
+                core_api_instance, image
+            )
+            if image.application.github_repository_is_private:
+                buildctl_args.append("--secret")
+                buildctl_args.append(
+                    "id=GIT_AUTH_TOKEN,src=/home/user/.secret/github_access_token"
+                )
+            docker_secret_object = kubernetes.client.V1Secret(
+                type="kubernetes.io/dockerconfigjson",
+                metadata=kubernetes.client.V1ObjectMeta(
+                    name=f"buildkit-registry-auth-{image.build_job_id}",
+                ),
+                data={
+                    ".dockerconfigjson": b64encode(dockerconfigjson.encode()).decode(),
+                },
             )
             github_secret_object = kubernetes.client.V1Secret(
                 metadata=kubernetes.client.V1ObjectMeta(
@@ -1113,6 +1508,17 @@ def build_image_buildkit(image: Image):
                     "buildkitd.toml": buildkitd_toml,
                 },
             )
+            init_containers, source_mounts, source_volumes = [], [], []
+            if snapshot_key:
+                init_containers.append(_source_snapshot_container(image, snapshot_key))
+                source_mounts.append(
+                    source_snapshot.snapshot_context_mount(snapshot_key)
+                )
+                source_volumes.append(
+                    source_snapshot.snapshot_volume(
+                        current_app.config["BUILD_SOURCE_CACHE_CLAIM"]
+                    )
+                )
             safe_labels = _safe_labels_from_application(image.application)
             job_object = kubernetes.client.V1Job(
                 metadata=kubernetes.client.V1ObjectMeta(
@@ -1191,9 +1597,11 @@ def build_image_buildkit(image: Image):
                                             mount_path="/home/user/.local/share/buildkit",
                                             name="build-cache",
                                         ),
+                                        *source_mounts,
                                     ],
                                 ),
                             ],
+                            init_containers=init_containers or None,
                             volumes=[
                                 kubernetes.client.V1Volume(
                                     name="buildkitd-toml",
@@ -1237,6 +1645,7 @@ def build_image_buildkit(image: Image):
                                         claim_name=volume_claim.metadata.name
                                     ),
                                 ),
+                                *source_volumes,
                             ],
                         ),
                     ),
@@ -1261,6 +1670,10 @@ def build_image_buildkit(image: Image):
                 redis_client = None
                 log_key = None
 
+            # The build runs for minutes. End the transaction so this thread
+            # doesn't hold a pooled connection (idle in transaction) while it
+            # waits; everything the job needs is already rendered.
+            db.session.commit()
             try:
                 job_complete, job_logs = run_job(
                     core_api_instance,
@@ -1383,12 +1796,106 @@ def build_image_buildkit(image: Image):
         raise BuildError(f"Build failed: {exc}")
 
     try:
-        pushed_image = bke.verify_registry_tag(
-            image.repository_name, f"image-{image.version}"
-        )
+        return bke.verify_registry_tag(image.repository_name, f"image-{image.version}")
     except Exception as exc:
         raise BuildError(f"Image push failed: {exc}")
 
+
+def build_image_buildkit(image: Image):
+    bke = BuildkitEnv(image.repository_name)
+    registry = bke.registry
+    buildkit_image = bke.buildkit_image
+    insecure_reg = bke.insecure_reg
+
+    access_token = _fetch_github_access_token(image.application)
+    source = _fetch_image_source(image, access_token)
+    git_ref = source["git_ref"]
+    dockerfile_name = source["dockerfile_name"]
+    dockerfile_body = source["dockerfile_body"]
+    procfile_body = source["procfile_body"]
+    processes = source["processes"]
+    dockerfile_env_vars = source["dockerfile_env_vars"]
+    snapshot_key = _source_snapshot_key(image)
+
+    # Now that the commit SHA is resolved, update the notification
+    if image.image_metadata and image.image_metadata.get("auto_deploy"):
+        try:
+            dispatch_autodeploy_notification(
+                "image_building",
+                image.id,
+                image.application,
+                image.application_environment,
+                image_url=cabotage_url(image.application, f"images/{image.id}"),
+                image_metadata=image.image_metadata,
+            )
+        except Exception:
+            log.warning(
+                "Failed to dispatch autodeploy image_building notification",
+                exc_info=True,
+            )
+
+    buildctl_command = [
+        "buildctl-daemonless.sh",
+    ]
+    buildctl_args = [
+        "build",
+        "--progress=plain",
+        "--frontend",
+        "dockerfile.v0",
+        "--opt",
+        f"filename=./{dockerfile_name}",
+        *_image_context_args(image, git_ref, snapshot_key),
+        "--import-cache",
+        (
+            f"type=registry,ref={registry}/{image.repository_name}"
+            f":image-buildcache{insecure_reg}"
+        ),
+        "--export-cache",
+        (
+            f"type=registry,ref={registry}/{image.repository_name}"
+            f":image-buildcache{insecure_reg},mode=min"
+        ),
+        "--output",
+        (
+            f"type=image,name={registry}/{image.repository_name}"
+            f":image-{image.version},push=true{insecure_reg}"
+        ),
+    ]
+
+    buildctl_args.append("--opt")
+    buildctl_args.append(shlex.quote(f"build-arg:SOURCE_COMMIT={image.commit_sha}"))
+
+    with config_read_cache(config_writer) as reader:
+        reader.prefetch(image.buildarg_configurations())
+        buildargs = image.buildargs(reader)
+    for k, v in buildargs.items():
+        buildctl_args.append("--opt")
+        buildctl_args.append(shlex.quote(f"build-arg:{k}={v}"))
+
+    buildctl_args += bke.tls_context_args()
+
+    fingerprint = image_build_fingerprint(
+        image, dockerfile_name, buildargs, buildkit_image
+    )
+    if fingerprint is not None:
+        image.image_metadata = {
+            **(image.image_metadata or {}),
+            "build_fingerprint": fingerprint,
+        }
+        db.session.commit()
+
+    with _build_fingerprint_lock(
+        "image", fingerprint, heartbeat_type="image_build", heartbeat_id=str(image.id)
+    ):
+        pushed_image = _reuse_identical_image(image, bke, fingerprint)
+        if pushed_image is None:
+            pushed_image = _run_image_build(
+                image, bke, buildctl_command, buildctl_args, access_token, snapshot_key
+            )
+            # Builds waiting on the fingerprint lock look for this.
+            image.image_id = pushed_image
+            db.session.commit()
+
     return {
         "image_id": pushed_image,
         "processes": processes,
@@ -1417,6 +1924,7 @@ def build_omnibus_buildkit(image, release):
     dockerfile_name = source["dockerfile_name"]
     processes = source["processes"]
     dockerfile_env_vars = source["dockerfile_env_vars"]
+    snapshot_key = _source_snapshot_key(image)
 
     # Now that the commit SHA is resolved, update the notification
     if image.image_metadata and image.image_metadata.get("auto_deploy"):
@@ -1446,8 +1954,7 @@ def build_omnibus_buildkit(image, release):
         "dockerfile.v0",
         "--opt",
         f"filename=./{dockerfile_name}",
-        "--opt",
-        (f"context={git_ref(image.application.github_repository, image.commit_sha)}"),
+        *_image_context_args(image, git_ref, snapshot_key),
         "--import-cache",
         (
             f"type=registry,ref={registry}/{image.repository_name}"
@@ -1470,16 +1977,24 @@ def build_omnibus_buildkit(image, release):
         shlex.quote(f"build-arg:SOURCE_COMMIT={image.commit_sha}")
     )
 
-    for k, v in image.buildargs(config_writer).items():
+    with config_read_cache(config_writer) as reader:
+        reader.prefetch(image.buildarg_configurations())
+        buildargs = image.buildargs(reader)
+    for k, v in buildargs.items():
         image_buildctl_args.append("--opt")
         image_buildctl_args.append(shlex.quote(f"build-arg:{k}={v}"))
 
     image_buildctl_args += bke.tls_context_args()
 
+    use_pool = _buildkitd_pool_enabled()
+    # Pool builds run buildctl from a scratch directory on the worker.
+    secret_dir = ".secret" if use_pool else "/home/user/.secret"
+    context_dir = "context" if use_pool else "/context"
+
     if image.application.github_repository_is_private:
         image_buildctl_args.append("--secret")
         image_buildctl_args.append(
-            "id=GIT_AUTH_TOKEN,src=/home/user/.secret/github_access_token"
+            f"id=GIT_AUTH_TOKEN,src={secret_dir}/github_access_token"
         )
 
     # --- Prepare release data ---
@@ -1530,302 +2045,359 @@ def build_omnibus_buildkit(image, release):
             f":release-{release.version},push=true{insecure_reg}"
         ),
         "--local",
-        "dockerfile=/context",
+        f"dockerfile={context_dir}",
         "--local",
-        "context=/context",
+        f"context={context_dir}",
     ]
 
     release_buildctl_args += bke.tls_context_args()
 
-    # --- Build the single K8s Job ---
-    if not current_app.config["KUBERNETES_ENABLED"]:
-        raise BuildError("Omnibus build requires KUBERNETES_ENABLED")
-
-    try:
-        api_client = kubernetes_ext.kubernetes_client
-        core_api_instance = kubernetes.client.CoreV1Api(api_client)
-        batch_api_instance = kubernetes.client.BatchV1Api(api_client)
-        # Single PVC mount for both build steps
-        volume_claim = fetch_image_build_cache_volume_claim(core_api_instance, image)
-        docker_secret_object = kubernetes.client.V1Secret(
-            type="kubernetes.io/dockerconfigjson",
-            metadata=kubernetes.client.V1ObjectMeta(
-                name=f"buildkit-registry-auth-{image.build_job_id}",
-            ),
-            data={
-                ".dockerconfigjson": b64encode(dockerconfigjson.encode()).decode(),
-            },
-        )
-        github_secret_object = kubernetes.client.V1Secret(
-            metadata=kubernetes.client.V1ObjectMeta(
-                name=f"github-access-token-{image.build_job_id}",
-            ),
-            data={
-                "github_access_token": b64encode(str(access_token).encode()).decode(),
-            },
-        )
-        buildkitd_toml_configmap_object = kubernetes.client.V1ConfigMap(
-            metadata=kubernetes.client.V1ObjectMeta(
-                name=f"buildkitd-toml-{image.build_job_id}",
-            ),
-            data={
-                "buildkitd.toml": buildkitd_toml,
-            },
-        )
-        context_configmap_object = release.release_build_context_configmap
-        # Override the configmap name to use image.build_job_id for consistency
-        context_configmap_object.metadata.name = f"build-context-{image.build_job_id}"
-
-        shared_env = [
-            kubernetes.client.V1EnvVar(
-                name="BUILDKITD_FLAGS",
-                value="--config /home/user/.config/buildkit/buildkitd.toml --oci-worker-no-process-sandbox",  # noqa: E501
-            ),
-        ]
-        shared_security_context = kubernetes.client.V1SecurityContext(
-            seccomp_profile=kubernetes.client.V1SeccompProfile(
-                type="Unconfined",
-            ),
-            run_as_user=1000,
-            run_as_group=1000,
+    if use_pool:
+        pool_build = dict(
+            application_id=str(image.application_id),
+            dockerconfigjson=dockerconfigjson,
+            access_token=access_token,
+            context_files=release.release_build_context_configmap.data,
+            build_type="omnibus",
+            build_job_id=image.build_job_id,
+            heartbeat_type="omnibus_build",
+            heartbeat_id=str(image.id),
         )
-        shared_volume_mounts = [
-            kubernetes.client.V1VolumeMount(
-                mount_path="/home/user/.local/share/buildkit",
-                name="build-cache",
-            ),
-            kubernetes.client.V1VolumeMount(
-                mount_path="/home/user/.config/buildkit",
-                name="buildkitd-toml",
-            ),
-            kubernetes.client.V1VolumeMount(
-                mount_path="/home/user/.docker",
-                name="buildkit-registry-auth",
-            ),
-        ]
+        # The build runs for minutes. End the transaction so this thread
+        # doesn't hold a pooled connection (idle in transaction) while it
+        # waits for a daemon and streams the build.
+        db.session.commit()
+        try:
+            output = _run_on_buildkitd_pool(
+                [image_buildctl_args, release_buildctl_args], **pool_build
+            )
+        except subprocess.CalledProcessError as proc_exc:
+            db.session.refresh(image)
+            image.image_build_log = proc_exc.output
+            db.session.refresh(release)
+            release.release_build_log = proc_exc.output
+            db.session.commit()
+            raise BuildError(
+                f"Build subprocess failed with exit code {proc_exc.returncode}"
+            )
+        db.session.refresh(image)
+        image.image_build_log = output
+        db.session.refresh(release)
+        release.release_build_log = output
+        db.session.commit()
+    elif not current_app.config["KUBERNETES_ENABLED"]:
+        raise BuildError("Omnibus build requires KUBERNETES_ENABLED")
+    else:
+        # --- Build the single K8s Job ---
+        try:
+            api_client = kubernetes_ext.kubernetes_client
+            core_api_instance = kubernetes.client.CoreV1Api(api_client)
+            batch_api_instance = kubernetes.client.BatchV1Api(api_client)
+            # Single PVC mount for both build steps
+            volume_claim = fetch_image_build_cache_volume_claim(
+                core_api_instance, image
+            )
+            docker_secret_object = kubernetes.client.V1Secret(
+                type="kubernetes.io/dockerconfigjson",
+                metadata=kubernetes.client.V1ObjectMeta(
+                    name=f"buildkit-registry-auth-{image.build_job_id}",
+                ),
+                data={
+                    ".dockerconfigjson": b64encode(dockerconfigjson.encode()).decode(),
+                },
+            )
+            github_secret_object = kubernetes.client.V1Secret(
+                metadata=kubernetes.client.V1ObjectMeta(
+                    name=f"github-access-token-{image.build_job_id}",
+                ),
+                data={
+                    "github_access_token": b64encode(
+                        str(access_token).encode()
+                    ).decode(),
+                },
+            )
+            buildkitd_toml_configmap_object = kubernetes.client.V1ConfigMap(
+                metadata=kubernetes.client.V1ObjectMeta(
+                    name=f"buildkitd-toml-{image.build_job_id}",
+                ),
+                data={
+                    "buildkitd.toml": buildkitd_toml,
+                },
+            )
+            context_configmap_object = release.release_build_context_configmap
+            # Override the configmap name to use image.build_job_id for consistency
+            context_configmap_object.metadata.name = (
+                f"build-context-{image.build_job_id}"
+            )
 
-        # Init container: image build
-        image_build_container = kubernetes.client.V1Container(
-            name="image-build",
-            image=buildkit_image,
-            command=buildctl_command,
-            args=image_buildctl_args,
-            env=shared_env,
-            security_context=shared_security_context,
-            volume_mounts=shared_volume_mounts
-            + [
+            shared_env = [
+                kubernetes.client.V1EnvVar(
+                    name="BUILDKITD_FLAGS",
+                    value="--config /home/user/.config/buildkit/buildkitd.toml --oci-worker-no-process-sandbox",  # noqa: E501
+                ),
+            ]
+            shared_security_context = kubernetes.client.V1SecurityContext(
+                seccomp_profile=kubernetes.client.V1SeccompProfile(
+                    type="Unconfined",
+                ),
+                run_as_user=1000,
+                run_as_group=1000,
+            )
+            shared_volume_mounts = [
                 kubernetes.client.V1VolumeMount(
-                    mount_path="/home/user/.secret",
-                    name="build-secrets",
+                    mount_path="/home/user/.local/share/buildkit",
+                    name="build-cache",
                 ),
-            ],
-        )
-
-        # Main container: release build
-        release_build_container = kubernetes.client.V1Container(
-            name="build",
-            image=buildkit_image,
-            command=buildctl_command,
-            args=release_buildctl_args,
-            env=shared_env,
-            security_context=shared_security_context,
-            volume_mounts=shared_volume_mounts
-            + [
                 kubernetes.client.V1VolumeMount(
-                    mount_path="/context/Dockerfile",
-                    sub_path="Dockerfile",
-                    name="build-context",
+                    mount_path="/home/user/.config/buildkit",
+                    name="buildkitd-toml",
                 ),
                 kubernetes.client.V1VolumeMount(
-                    mount_path="/context/entrypoint.sh",
-                    sub_path="entrypoint.sh",
-                    name="build-context",
+                    mount_path="/home/user/.docker",
+                    name="buildkit-registry-auth",
                 ),
-                *[
+            ]
+
+            init_containers, source_mounts, source_volumes = [], [], []
+            if snapshot_key:
+                init_containers.append(_source_snapshot_container(image, snapshot_key))
+                source_mounts.append(
+                    source_snapshot.snapshot_context_mount(snapshot_key)
+                )
+                source_volumes.append(
+                    source_snapshot.snapshot_volume(
+                        current_app.config["BUILD_SOURCE_CACHE_CLAIM"]
+                    )
+                )
+
+            # Init container: image build
+            image_build_container = kubernetes.client.V1Container(
+                name="image-build",
+                image=buildkit_image,
+                command=buildctl_command,
+                args=image_buildctl_args,
+                env=shared_env,
+                security_context=shared_security_context,
+                volume_mounts=shared_volume_mounts
+                + [
+                    kubernetes.client.V1VolumeMount(
+                        mount_path="/home/user/.secret",
+                        name="build-secrets",
+                    ),
+                ]
+                + source_mounts,
+            )
+
+            # Main container: release build
+            release_build_container = kubernetes.client.V1Container(
+                name="build",
+                image=buildkit_image,
+                command=buildctl_command,
+                args=release_buildctl_args,
+                env=shared_env,
+                security_context=shared_security_context,
+                volume_mounts=shared_volume_mounts
+                + [
                     kubernetes.client.V1VolumeMount(
-                        mount_path=f"/context/envconsul-{process_name}.hcl",
-                        sub_path=f"envconsul-{process_name}.hcl",
+                        mount_path="/context/Dockerfile",
+                        sub_path="Dockerfile",
                         name="build-context",
-                    )
-                    for process_name in release.envconsul_configurations
+                    ),
+                    kubernetes.client.V1VolumeMount(
+                        mount_path="/context/entrypoint.sh",
+                        sub_path="entrypoint.sh",
+                        name="build-context",
+                    ),
+                    *[
+                        kubernetes.client.V1VolumeMount(
+                            mount_path=f"/context/envconsul-{process_name}.hcl",
+                            sub_path=f"envconsul-{process_name}.hcl",
+                            name="build-context",
+                        )
+                        for process_name in release.envconsul_configurations
+                    ],
                 ],
-            ],
-        )
+            )
 
-        safe_labels = _safe_labels_from_application(image.application)
-        job_object = kubernetes.client.V1Job(
-            metadata=kubernetes.client.V1ObjectMeta(
-                name=f"omnibusbuild-{image.build_job_id}",
-                labels={
-                    "organization": image.application.project.organization.slug,
-                    "project": image.application.project.slug,
-                    "application": image.application.slug,
-                    "process": "build",
-                    "build_id": image.build_job_id,
-                    "build-job.cabotage.io": "true",
-                    **safe_labels,
-                },
-            ),
-            spec=kubernetes.client.V1JobSpec(
-                active_deadline_seconds=3600,
-                backoff_limit=0,
-                parallelism=1,
-                completions=1,
-                template=kubernetes.client.V1PodTemplateSpec(
-                    metadata=kubernetes.client.V1ObjectMeta(
-                        labels={
-                            "organization": image.application.project.organization.slug,  # noqa: E501
-                            "project": image.application.project.slug,
-                            "application": image.application.slug,
-                            "process": "build",
-                            "build_id": image.build_job_id,
-                            "ca-admission.cabotage.io": "true",
-                            "resident-pod.cabotage.io": "true",
-                            **safe_labels,
-                        },
-                        annotations={
-                            "container.apparmor.security.beta.kubernetes.io/image-build": "unconfined",  # noqa: E501
-                            "container.apparmor.security.beta.kubernetes.io/build": "unconfined",  # noqa: E501
-                        },
-                    ),
-                    spec=kubernetes.client.V1PodSpec(
-                        restart_policy="Never",
-                        termination_grace_period_seconds=0,
-                        security_context=kubernetes.client.V1PodSecurityContext(
-                            fs_group=1000,
-                            fs_group_change_policy="OnRootMismatch",
+            safe_labels = _safe_labels_from_application(image.application)
+            job_object = kubernetes.client.V1Job(
+                metadata=kubernetes.client.V1ObjectMeta(
+                    name=f"omnibusbuild-{image.build_job_id}",
+                    labels={
+                        "organization": image.application.project.organization.slug,
+                        "project": image.application.project.slug,
+                        "application": image.application.slug,
+                        "process": "build",
+                        "build_id": image.build_job_id,
+                        "build-job.cabotage.io": "true",
+                        **safe_labels,
+                    },
+                ),
+                spec=kubernetes.client.V1JobSpec(
+                    active_deadline_seconds=3600,
+                    backoff_limit=0,
+                    parallelism=1,
+                    completions=1,
+                    template=kubernetes.client.V1PodTemplateSpec(
+                        metadata=kubernetes.client.V1ObjectMeta(
+                            labels={
+                                "organization": image.application.project.organization.slug,  # noqa: E501
+                                "project": image.application.project.slug,
+                                "application": image.application.slug,
+                                "process": "build",
+                                "build_id": image.build_job_id,
+                                "ca-admission.cabotage.io": "true",
+                                "resident-pod.cabotage.io": "true",
+                                **safe_labels,
+                            },
+                            annotations={
+                                "container.apparmor.security.beta.kubernetes.io/image-build": "unconfined",  # noqa: E501
+                                "container.apparmor.security.beta.kubernetes.io/build": "unconfined",  # noqa: E501
+                            },
                         ),
-                        init_containers=[image_build_container],
-                        containers=[release_build_container],
-                        volumes=[
-                            kubernetes.client.V1Volume(
-                                name="build-cache",
-                                persistent_volume_claim=kubernetes.client.V1PersistentVolumeClaimVolumeSource(
-                                    claim_name=volume_claim.metadata.name
-                                ),
+                        spec=kubernetes.client.V1PodSpec(
+                            restart_policy="Never",
+                            termination_grace_period_seconds=0,
+                            security_context=kubernetes.client.V1PodSecurityContext(
+                                fs_group=1000,
+                                fs_group_change_policy="OnRootMismatch",
                             ),
-                            kubernetes.client.V1Volume(
-                                name="buildkitd-toml",
-                                config_map=kubernetes.client.V1ConfigMapVolumeSource(
-                                    name=f"buildkitd-toml-{image.build_job_id}",
-                                    items=[
-                                        kubernetes.client.V1KeyToPath(
-                                            key="buildkitd.toml",
-                                            path="buildkitd.toml",
-                                        ),
-                                    ],
+                            init_containers=init_containers + [image_build_container],
+                            containers=[release_build_container],
+                            volumes=[
+                                kubernetes.client.V1Volume(
+                                    name="build-cache",
+                                    persistent_volume_claim=kubernetes.client.V1PersistentVolumeClaimVolumeSource(
+                                        claim_name=volume_claim.metadata.name
+                                    ),
                                 ),
-                            ),
-                            kubernetes.client.V1Volume(
-                                name="buildkit-registry-auth",
-                                secret=kubernetes.client.V1SecretVolumeSource(
-                                    secret_name=f"buildkit-registry-auth-{image.build_job_id}",
-                                    items=[
-                                        kubernetes.client.V1KeyToPath(
-                                            key=".dockerconfigjson",
-                                            path="config.json",
-                                        ),
-                                    ],
+                                kubernetes.client.V1Volume(
+                                    name="buildkitd-toml",
+                                    config_map=kubernetes.client.V1ConfigMapVolumeSource(
+                                        name=f"buildkitd-toml-{image.build_job_id}",
+                                        items=[
+                                            kubernetes.client.V1KeyToPath(
+                                                key="buildkitd.toml",
+                                                path="buildkitd.toml",
+                                            ),
+                                        ],
+                                    ),
                                 ),
-                            ),
-                            kubernetes.client.V1Volume(
-                                name="build-secrets",
-                                secret=kubernetes.client.V1SecretVolumeSource(
-                                    secret_name=f"github-access-token-{image.build_job_id}",
-                                    items=[
-                                        kubernetes.client.V1KeyToPath(
-                                            key="github_access_token",
-                                            path="github_access_token",
-                                        ),
-                                    ],
+                                kubernetes.client.V1Volume(
+                                    name="buildkit-registry-auth",
+                                    secret=kubernetes.client.V1SecretVolumeSource(
+                                        secret_name=f"buildkit-registry-auth-{image.build_job_id}",
+                                        items=[
+                                            kubernetes.client.V1KeyToPath(
+                                                key=".dockerconfigjson",
+                                                path="config.json",
+                                            ),
+                                        ],
+                                    ),
                                 ),
-                            ),
-                            kubernetes.client.V1Volume(
-                                name="build-context",
-                                config_map=kubernetes.client.V1ConfigMapVolumeSource(
-                                    name=f"build-context-{image.build_job_id}"
+                                kubernetes.client.V1Volume(
+                                    name="build-secrets",
+                                    secret=kubernetes.client.V1SecretVolumeSource(
+                                        secret_name=f"github-access-token-{image.build_job_id}",
+                                        items=[
+                                            kubernetes.client.V1KeyToPath(
+                                                key="github_access_token",
+                                                path="github_access_token",
+                                            ),
+                                        ],
+                                    ),
                                 ),
-                            ),
-                        ],
+                                kubernetes.client.V1Volume(
+                                    name="build-context",
+                                    config_map=kubernetes.client.V1ConfigMapVolumeSource(
+                                        name=f"build-context-{image.build_job_id}"
+                                    ),
+                                ),
+                                *source_volumes,
+                            ],
+                        ),
                     ),
                 ),
-            ),
-        )
-
-        build_namespace = _build_namespace(image.application_environment)
-        core_api_instance.create_namespaced_config_map(
-            build_namespace, buildkitd_toml_configmap_object
-        )
-        core_api_instance.create_namespaced_config_map(
-            build_namespace, context_configmap_object
-        )
-        core_api_instance.create_namespaced_secret(
-            build_namespace, docker_secret_object
-        )
-        core_api_instance.create_namespaced_secret(
-            build_namespace, github_secret_object
-        )
-
-        try:
-            redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
-            log_key = stream_key("omnibus", image.build_job_id)
-        except Exception:  # nosec B110
-            redis_client = None
-            log_key = None
-
-        try:
-            job_complete, job_logs = run_job(
-                core_api_instance,
-                batch_api_instance,
-                build_namespace,
-                job_object,
-                redis_client=redis_client,
-                log_key=log_key,
-                heartbeat_type="omnibus_build",
-                heartbeat_id=str(image.id),
             )
-            if redis_client and log_key:
-                try:
-                    publish_end(redis_client, log_key, error=not job_complete)
-                except Exception:
-                    log.warning(
-                        "Failed to publish log stream end for omnibus build",
-                        exc_info=True,
-                    )
-        finally:
-            core_api_instance.delete_namespaced_secret(
-                f"buildkit-registry-auth-{image.build_job_id}",
-                build_namespace,
-                propagation_policy="Foreground",
+
+            build_namespace = _build_namespace(image.application_environment)
+            core_api_instance.create_namespaced_config_map(
+                build_namespace, buildkitd_toml_configmap_object
             )
-            core_api_instance.delete_namespaced_secret(
-                f"github-access-token-{image.build_job_id}",
-                build_namespace,
-                propagation_policy="Foreground",
+            core_api_instance.create_namespaced_config_map(
+                build_namespace, context_configmap_object
             )
-            core_api_instance.delete_namespaced_config_map(
-                f"buildkitd-toml-{image.build_job_id}",
-                build_namespace,
-                propagation_policy="Foreground",
+            core_api_instance.create_namespaced_secret(
+                build_namespace, docker_secret_object
             )
-            core_api_instance.delete_namespaced_config_map(
-                f"build-context-{image.build_job_id}",
-                build_namespace,
-                propagation_policy="Foreground",
+            core_api_instance.create_namespaced_secret(
+                build_namespace, github_secret_object
             )
 
-        db.session.refresh(image)
-        image.image_build_log = job_logs
-        db.session.commit()
-        db.session.refresh(release)
-        release.release_build_log = job_logs
-        db.session.commit()
-        if not job_complete:
-            raise BuildError("Omnibus build failed!")
-    except BuildError:
-        raise
-    except Exception as exc:
-        raise BuildError(f"Build failed: {exc}")
+            try:
+                redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
+                log_key = stream_key("omnibus", image.build_job_id)
+            except Exception:  # nosec B110
+                redis_client = None
+                log_key = None
+
+            # The build runs for minutes. End the transaction so this thread
+            # doesn't hold a pooled connection (idle in transaction) while it
+            # waits; everything the job needs is already rendered.
+            db.session.commit()
+            try:
+                job_complete, job_logs = run_job(
+                    core_api_instance,
+                    batch_api_instance,
+                    build_namespace,
+                    job_object,
+                    redis_client=redis_client,
+                    log_key=log_key,
+                    heartbeat_type="omnibus_build",
+                    heartbeat_id=str(image.id),
+                )
+                if redis_client and log_key:
+                    try:
+                        publish_end(redis_client, log_key, error=not job_complete)
+                    except Exception:
+                        log.warning(
+                            "Failed to publish log stream end for omnibus build",
+                            exc_info=True,
+                        )
+            finally:
+                core_api_instance.delete_namespaced_secret(
+                    f"buildkit-registry-auth-{image.build_job_id}",
+                    build_namespace,
+                    propagation_policy="Foreground",
+                )
+                core_api_instance.delete_namespaced_secret(
+                    f"github-access-token-{image.build_job_id}",
+                    build_namespace,
+                    propagation_policy="Foreground",
+                )
+                core_api_instance.delete_namespaced_config_map(
+                    f"buildkitd-toml-{image.build_job_id}",
+                    build_namespace,
+                    propagation_policy="Foreground",
+                )
+                core_api_instance.delete_namespaced_config_map(
+                    f"build-context-{image.build_job_id}",
+                    build_namespace,
+                    propagation_policy="Foreground",
+                )
+
+            db.session.refresh(image)
+            image.image_build_log = job_logs
+            db.session.commit()
+            db.session.refresh(release)
+            release.release_build_log = job_logs
+            db.session.commit()
+            if not job_complete:
+                raise BuildError("Omnibus build failed!")
+        except BuildError:
+            raise
+        except Exception as exc:
+            raise BuildError(f"Build failed: {exc}")
 
     try:
         pushed_image = bke.verify_registry_tag(
@@ -1848,6 +2420,7 @@ def build_omnibus_buildkit(image, release):
 
 
 @shared_task()
+@scheduled_build("image")
 def run_image_build(image_id: str, buildkit: bool = False):
     from cabotage.utils.config_templates import TemplateResolutionError
 
@@ -1907,7 +2480,8 @@ def run_image_build(image_id: str, buildkit: bool = False):
 
     try:
         try:
-            build_metadata = build_image_buildkit(image)
+            with time_stage("image_build", application.project.organization.slug):
+                build_metadata = build_image_buildkit(image)
             if (
                 image.image_metadata
                 and "installation_id" in image.image_metadata
@@ -2037,6 +2611,7 @@ def run_image_build(image_id: str, buildkit: bool = False):
 
 
 @shared_task()
+@scheduled_build("release")
 def run_release_build(release_id: str):
     from cabotage.utils.config_templates import TemplateResolutionError
 
@@ -2064,7 +2639,10 @@ def run_release_build(release_id: str):
             )
 
         try:
-            build_metadata = build_release_buildkit(release)
+            with time_stage(
+                "release_build", release.application.project.organization.slug
+            ):
+                build_metadata = build_release_buildkit(release)
             release.release_id = build_metadata["release_id"]
             release.built = True
             if (
@@ -2300,6 +2878,7 @@ def run_release_build(release_id: str):
 
 
 @shared_task()
+@scheduled_build("omnibus")
 def run_omnibus_build(image_id: str):
     """Build image + release in a single K8s Job for auto-deploys.
 
@@ -2425,7 +3004,10 @@ def run_omnibus_build(image_id: str):
             db.session.add(activity)
             db.session.commit()
 
-            build_metadata = build_omnibus_buildkit(image, release)
+            with time_stage(
+                "omnibus_build", image.application.project.organization.slug
+            ):
+                build_metadata = build_omnibus_buildkit(image, release)
 
             if (
                 image.image_metadata
@@ -0,0 +1,340 @@
+"""Admission control for image, release and omnibus builds.
+
+Builds are not sent to the ``builds`` queue directly. They are handed to
+:func:`schedule_build`, which files a ticket in redis and admits as many
+tickets as the limits allow:
+
+- at most ``BUILD_CONCURRENCY_LIMIT`` builds run at once across the install
+- at most ``BUILD_ORGANIZATION_CONCURRENCY_LIMIT`` run for one organization
+
+Free slots go to production builds before previews (branch deploys and
+ephemeral environments). Within a priority, the organization with the
+fewest running builds goes first, then the oldest ticket. So one
+organization pushing many previews can't hold everyone else back.
+
+A build frees its slot when its task finishes (see :func:`scheduled_build`).
+If a worker dies mid-build, the ``dispatch_builds`` beat task reclaims the
+slot once the build's heartbeat has lapsed. A build that was admitted but
+never started keeps its slot until ``START_TIMEOUT_SECONDS`` have passed,
+however long it waits for a worker. A build waiting on an identical build
+(see ``_build_fingerprint_lock``) gives its slot up until it is done
+waiting. Tickets live in redis, so the
+queue survives worker restarts. Without redis, builds are sent straight to
+the queue as before.
+"""
+
+import functools
+import json
+import logging
+import time
+
+from celery import shared_task
+from flask import current_app
+
+from cabotage.celery.routing import PRIORITY_DEFAULT
+from cabotage.server.metrics import (
+    BUILD_QUEUE_DEPTH,
+    BUILD_QUEUE_WAIT_SECONDS,
+    BUILDS_RUNNING,
+    reconcile_rows,
+    timed_reconcile,
+)
+from cabotage.utils.build_log_stream import (
+    get_redis_client,
+    heartbeat_key,
+    refresh_heartbeat,
+)
+
+log = logging.getLogger(__name__)
+
+QUEUED_KEY = "build-scheduler:queued"
+RUNNING_KEY = "build-scheduler:running"
+DISPATCH_LOCK_KEY = "build-scheduler:dispatch"
+
+PRIORITIES = ("production", "preview")
+
+# How long an admitted build may wait for a worker to pick it up before its
+# task is presumed lost.
+START_TIMEOUT_SECONDS = 3600
+
+HEARTBEAT_TYPES = {
+    "image": "image_build",
+    "release": "release_build",
+    "omnibus": "omnibus_build",
+}
+
+
+def ticket_id(kind, object_id):
+    return f"{kind}:{object_id}"
+
+
+def build_priority(buildable):
+    """``preview`` for branch deploys and ephemeral environments."""
+    metadata = (
+        getattr(buildable, "image_metadata", None)
+        or getattr(buildable, "release_metadata", None)
+        or {}
+    )
+    app_env = buildable.application_environment
+    if metadata.get("branch_deploy") or (app_env and app_env.environment.ephemeral):
+        return "preview"
+    return "production"
+
+
+def _task(kind):
+    from cabotage.celery.tasks.build import (
+        run_image_build,
+        run_omnibus_build,
+        run_release_build,
+    )
+
+    return {
+        "image": run_image_build,
+        "release": run_release_build,
+        "omnibus": run_omnibus_build,
+    }[kind]
+
+
+def _object_kwarg(kind):
+    return "release_id" if kind == "release" else "image_id"
+
+
+def pick_admissions(queued, running, limit, organization_limit):
+    """Tickets from ``queued`` to start now, in order.
+
+    Both arguments map ticket ids to tickets. Running tickets marked
+    ``waiting`` don't count against the limits.
+    """
+    active = [ticket for ticket in running.values() if not ticket.get("waiting")]
+    running_by_org = {}
+    for ticket in active:
+        org = ticket["organization_id"]
+        running_by_org[org] = running_by_org.get(org, 0) + 1
+    capacity = limit - len(active)
+    waiting = dict(queued)
+    admitted = []
+    while capacity > 0 and waiting:
+        candidates = [
+            (tid, ticket)
+            for tid, ticket in waiting.items()
+            if running_by_org.get(ticket["organization_id"], 0) < organization_limit
+        ]
+        if not candidates:
+            break
+        tid, ticket = min(
+            candidates,
+            key=lambda item: (
+                PRIORITIES.index(item[1]["priority"]),
+                running_by_org.get(item[1]["organization_id"], 0),
+                item[1]["enqueued_at"],
+            ),
+        )
+        del waiting[tid]
+        admitted.append(tid)
+        running_by_org[ticket["organization_id"]] = (
+            running_by_org.get(ticket["organization_id"], 0) + 1
+        )
+        capacity -= 1
+    return admitted
+
+
+def _load(redis_client, key):
+    return {k.decode(): json.loads(v) for k, v in redis_client.hgetall(key).items()}
+
+
+def _is_lost(redis_client, ticket, now):
+    if "started_at" not in ticket:
+        return now - ticket["admitted_at"] > START_TIMEOUT_SECONDS
+    return not redis_client.exists(
+        heartbeat_key(HEARTBEAT_TYPES[ticket["kind"]], ticket["id"])
+    )
+
+
+def _reclaim_lost_builds(redis_client, running, now):
+    """Drop admitted builds whose worker stopped sending heartbeats.
+
+    Builds that haven't started yet are waiting for a worker, not lost,
+    until ``START_TIMEOUT_SECONDS`` after admission.
+    """
+    lost = [
+        tid for tid, ticket in running.items() if _is_lost(redis_client, ticket, now)
+    ]
+    if lost:
+        log.warning("Reclaiming build slots with no heartbeat: %s", lost)
+        redis_client.hdel(RUNNING_KEY, *lost)
+        for tid in lost:
+            del running[tid]
+
+
+def admit_builds(redis_client, now=None):
+    """Start every queued build the limits allow. Returns how many started."""
+    now = time.time() if now is None else now
+    config = current_app.config
+    lock = redis_client.lock(DISPATCH_LOCK_KEY, timeout=60, blocking_timeout=10)
+    if not lock.acquire():
+        return 0
+    try:
+        queued = _load(redis_client, QUEUED_KEY)
+        running = _load(redis_client, RUNNING_KEY)
+        _reclaim_lost_builds(redis_client, running, now)
+        admitted = pick_admissions(
+            queued,
+            running,
+            int(config["BUILD_CONCURRENCY_LIMIT"]),
+            int(config["BUILD_ORGANIZATION_CONCURRENCY_LIMIT"]),
+        )
+        started = []
+        for tid in admitted:
+            ticket = queued.pop(tid)
+            running[tid] = {**ticket, "admitted_at": now}
+            redis_client.hset(RUNNING_KEY, tid, json.dumps(running[tid]))
+            redis_client.hdel(QUEUED_KEY, tid)
+            try:
+                _task(ticket["kind"]).apply_async(
+                    kwargs=ticket["task_kwargs"], priority=ticket["celery_priority"]
+                )
+            except Exception:
+                # Put the ticket back so the next dispatch retries it, rather
+                # than holding a slot for a build that was never sent.
+                log.warning("Failed to send build %s, requeueing", tid, exc_info=True)
+                redis_client.hset(QUEUED_KEY, tid, json.dumps(ticket))
+                redis_client.hdel(RUNNING_KEY, tid)
+                queued[tid] = ticket
+                del running[tid]
+                continue
+            started.append(tid)
+            BUILD_QUEUE_WAIT_SECONDS.labels(ticket["kind"], ticket["priority"]).observe(
+                now - ticket["enqueued_at"]
+            )
+    finally:
+        try:
+            lock.release()
+        except Exception:
+            log.warning("Failed to release build scheduler lock")
+
+    for priority in PRIORITIES:
+        BUILD_QUEUE_DEPTH.labels(priority).set(
+            sum(1 for t in queued.values() if t["priority"] == priority)
+        )
+    BUILDS_RUNNING.set(sum(1 for t in running.values() if not t.get("waiting")))
+    return len(started)
+
+
+def schedule_build(kind, buildable, priority=PRIORITY_DEFAULT, **task_kwargs):
+    """Queue a build of ``buildable`` (an Image, or a Release for ``release``).
+
+    ``task_kwargs`` are passed to the build task on top of the object id,
+    and ``priority`` is the Celery priority it's sent with once admitted.
+    """
+    task_kwargs[_object_kwarg(kind)] = str(buildable.id)
+    ticket = {
+        "kind": kind,
+        "id": str(buildable.id),
+        "organization_id": str(buildable.application.project.organization_id),
+        "priority": build_priority(buildable),
+        "enqueued_at": time.time(),
+        "task_kwargs": task_kwargs,
+        "celery_priority": priority,
+    }
+    try:
+        redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
+        redis_client.hset(QUEUED_KEY, ticket_id(kind, buildable.id), json.dumps(ticket))
+    except Exception:
+        log.warning(
+            "Build scheduler unavailable, starting %s build %s directly",
+            kind,
+            buildable.id,
+            exc_info=True,
+        )
+        _task(kind).apply_async(kwargs=task_kwargs, priority=priority)
+        return
+    try:
+        admit_builds(redis_client)
+    except Exception:
+        log.warning("Failed to admit builds, dispatch_builds will retry", exc_info=True)
+
+
+def queued_build_ids(redis_client):
+    """Ticket ids of builds still waiting for a slot."""
+    try:
+        return {key.decode() for key in redis_client.hkeys(QUEUED_KEY)}
+    except Exception:
+        log.warning("Failed to read the build queue", exc_info=True)
+        return set()
+
+
+def start_build(kind, object_id):
+    """Mark the slot held by a build as started, and send its first heartbeat.
+
+    From here on the slot is reclaimed as soon as the heartbeat lapses.
+    """
+    try:
+        redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
+        refresh_heartbeat(redis_client, HEARTBEAT_TYPES[kind], str(object_id))
+        tid = ticket_id(kind, object_id)
+        raw = redis_client.hget(RUNNING_KEY, tid)
+        if raw is not None:
+            ticket = {**json.loads(raw), "started_at": time.time()}
+            redis_client.hset(RUNNING_KEY, tid, json.dumps(ticket))
+    except Exception:
+        log.warning("Failed to mark %s build %s started", kind, object_id)
+
+
+def set_build_waiting(redis_client, kind, object_id, waiting):
+    """Mark a build as waiting on another build, or done waiting.
+
+    A waiting build gives its slot up to the next queued build. Once done
+    waiting it takes the slot back even if that puts it over the limits,
+    since it usually only has to copy the other build's output.
+    """
+    try:
+        tid = ticket_id(kind, object_id)
+        raw = redis_client.hget(RUNNING_KEY, tid)
+        if raw is None:
+            return
+        ticket = json.loads(raw)
+        ticket.pop("waiting", None)
+        if waiting:
+            ticket["waiting"] = True
+        redis_client.hset(RUNNING_KEY, tid, json.dumps(ticket))
+        if waiting:
+            admit_builds(redis_client)
+    except Exception:
+        log.warning("Failed to mark %s build %s waiting", kind, object_id)
+
+
+def finish_build(kind, object_id):
+    """Free the slot held by a build, and start whatever fits in it."""
+    try:
+        redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
+        redis_client.hdel(RUNNING_KEY, ticket_id(kind, object_id))
+        admit_builds(redis_client)
+    except Exception:
+        log.warning("Failed to free build slot for %s %s", kind, object_id)
+
+
+def scheduled_build(kind):
+    """Decorate a build task to hold its scheduler slot while it runs."""
+    object_kwarg = _object_kwarg(kind)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            object_id = kwargs[object_kwarg] if object_kwarg in kwargs else args[0]
+            start_build(kind, object_id)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                finish_build(kind, object_id)
+
+        return wrapper
+
+    return decorator
+
+
+@shared_task()
+@timed_reconcile("build_scheduler")
+def dispatch_builds():
+    redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
+    reconcile_rows("build_scheduler", redis_client.hlen(QUEUED_KEY))
+    return admit_builds(redis_client)
@@ -1,10 +1,15 @@
+import contextvars
+import datetime
 import logging
 import secrets
 import time
+import uuid
 
 from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import kubernetes
+import redis
 import yaml
 
 from celery import shared_task
@@ -20,7 +25,11 @@ from cabotage.server import (
     kubernetes as kubernetes_ext,
 )
 
+from cabotage.server.ext.config_writer import cached_reader, config_read_cache
+from cabotage.server.metrics import time_stage
 from cabotage.server.models.projects import (
+    activity_plugin,
+    ApplicationEnvironment,
     Configuration,
     Deployment,
     EnvironmentConfiguration,
@@ -50,6 +59,7 @@ from cabotage.utils.github import (
     cabotage_url,
     post_deployment_status_update,
 )
+from cabotage.celery.routing import PRIORITY_DEFAULT
 from cabotage.celery.tasks.notify import (
     dispatch_autodeploy_notification,
     dispatch_pipeline_notification,
@@ -57,6 +67,8 @@ from cabotage.celery.tasks.notify import (
 
 log = logging.getLogger(__name__)
 
+Activity = activity_plugin.activity_cls
+
 
 class DeployError(RuntimeError):
     pass
@@ -1956,24 +1968,29 @@ def render_podspec(release, process_name, service_account_name):
             )
         )
 
+    configuration_objects = release.configuration_objects
     if (
         not (
             process_name.startswith("release") or process_name.startswith("postdeploy")
         )
-        and "DD_API_KEY" in release.configuration_objects
+        and "DD_API_KEY" in configuration_objects
     ):
-        try:
-            dd_api_key = release.configuration_objects["DD_API_KEY"].read_value(
-                config_writer
+        reader = cached_reader(config_writer)
+        if reader is not config_writer:
+            reader.prefetch(
+                [
+                    configuration_objects["DD_API_KEY"],
+                    configuration_objects.get("DD_IMAGE"),
+                ]
             )
+        try:
+            dd_api_key = configuration_objects["DD_API_KEY"].read_value(reader)
         except KeyError:
             print("unable to read DD_API_KEY")
         dd_image = None
-        if "DD_IMAGE" in release.configuration_objects:
+        if "DD_IMAGE" in configuration_objects:
             try:
-                dd_image = release.configuration_objects["DD_IMAGE"].read_value(
-                    config_writer
-                )
+                dd_image = configuration_objects["DD_IMAGE"].read_value(reader)
             except KeyError:
                 print("unable to read DD_IMAGE")
         if dd_api_key:
@@ -2069,18 +2086,21 @@ def fetch_deployment(
     deployment_object = render_deployment(
         namespace, release, service_account_name, process_name, deployment_id=0
     )
+    return read_deployment(
+        apps_api_instance, namespace, deployment_object.metadata.name
+    )
+
+
+def read_deployment(apps_api_instance, namespace, name):
     deployment = None
     try:
-        deployment = apps_api_instance.read_namespaced_deployment(
-            deployment_object.metadata.name, namespace
-        )
+        deployment = apps_api_instance.read_namespaced_deployment(name, namespace)
     except ApiException as exc:
         if exc.status == 404:
             pass
         else:
             raise DeployError(
-                "Unexpected exception fetching Deployment/"
-                f"{deployment_object.metadata.name} in {namespace}: {exc}"
+                f"Unexpected exception fetching Deployment/{name} in {namespace}: {exc}"
             )
     return deployment
 
@@ -2174,8 +2194,8 @@ def create_deployment(
             )
 
 
-def scale_deployment(namespace, release, process_name, replicas):
-    api_client = kubernetes_ext.kubernetes_client
+def scale_deployment(namespace, release, process_name, replicas, api_client=None):
+    api_client = api_client or kubernetes_ext.kubernetes_client
     apps_api_instance = kubernetes.client.AppsV1Api(api_client)
     deployment_name = f"{k8s_resource_prefix(release)}-{process_name}"
     deployment = None
@@ -2195,10 +2215,12 @@ def scale_deployment(namespace, release, process_name, replicas):
         )
 
 
-def resize_deployment(namespace, release, process_name, pod_class_name):
+def resize_deployment(
+    namespace, release, process_name, pod_class_name, api_client=None
+):
     """Patch a deployment's container resources to match a new pod class."""
     pod_class = pod_classes[pod_class_name]
-    api_client = kubernetes_ext.kubernetes_client
+    api_client = api_client or kubernetes_ext.kubernetes_client
     apps_api_instance = kubernetes.client.AppsV1Api(api_client)
     deployment_name = f"{k8s_resource_prefix(release)}-{process_name}"
     try:
@@ -2419,9 +2441,9 @@ def create_cronjob(
             )
 
 
-def suspend_cronjob(namespace, release, process_name, suspend):
+def suspend_cronjob(namespace, release, process_name, suspend, api_client=None):
     """Suspend or unsuspend a CronJob."""
-    api_client = kubernetes_ext.kubernetes_client
+    api_client = api_client or kubernetes_ext.kubernetes_client
     batch_api_instance = kubernetes.client.BatchV1Api(api_client)
     cronjob_name = f"{k8s_resource_prefix(release)}-{process_name}"
     try:
@@ -2434,10 +2456,10 @@ def suspend_cronjob(namespace, release, process_name, suspend):
     batch_api_instance.patch_namespaced_cron_job(cronjob_name, namespace, patch)
 
 
-def resize_cronjob(namespace, release, process_name, pod_class_name):
+def resize_cronjob(namespace, release, process_name, pod_class_name, api_client=None):
     """Patch a CronJob's container resources to match a new pod class."""
     pod_class = pod_classes[pod_class_name]
-    api_client = kubernetes_ext.kubernetes_client
+    api_client = api_client or kubernetes_ext.kubernetes_client
     batch_api_instance = kubernetes.client.BatchV1Api(api_client)
     cronjob_name = f"{k8s_resource_prefix(release)}-{process_name}"
     try:
@@ -2476,6 +2498,212 @@ def resize_cronjob(namespace, release, process_name, pod_class_name):
     batch_api_instance.patch_namespaced_cron_job(cronjob_name, namespace, patch)
 
 
+SCALE_STATUS_TTL = 3600
+SCALE_CONCURRENCY = 8
+# Scales of one application environment are applied one at a time, so a
+# slow older scale can't patch Kubernetes after a newer one has.
+SCALE_LOCK_TIMEOUT = 300
+
+
+def scale_status_key(operation_id):
+    return f"scale:{operation_id}"
+
+
+def set_scale_status(redis_client, operation_id, **fields):
+    """Record progress of a scale operation for the UI to poll.
+
+    The hash holds an overall ``state`` (queued, running, done, failed) and
+    one ``process:<name>`` field per affected process.
+    """
+    key = scale_status_key(operation_id)
+    try:
+        redis_client.hset(key, mapping=fields)
+        redis_client.expire(key, SCALE_STATUS_TTL)
+    except redis.RedisError:
+        log.warning("Unable to record status of scale %s", operation_id)
+
+
+def _apply_scale_change(namespace, release, process_name, change, api_client):
+    if process_name.startswith("job"):
+        if "process_count" in change:
+            suspend_cronjob(
+                namespace,
+                release,
+                process_name,
+                suspend=change["process_count"]["new_value"] == 0,
+                api_client=api_client,
+            )
+        if "pod_class" in change:
+            resize_cronjob(
+                namespace,
+                release,
+                process_name,
+                change["pod_class"]["new_value"],
+                api_client=api_client,
+            )
+    else:
+        if "process_count" in change:
+            scale_deployment(
+                namespace,
+                release,
+                process_name,
+                change["process_count"]["new_value"],
+                api_client=api_client,
+            )
+        if "pod_class" in change:
+            resize_deployment(
+                namespace,
+                release,
+                process_name,
+                change["pod_class"]["new_value"],
+                api_client=api_client,
+            )
+
+
+def _current_scale_changes(app_env, changes):
+    """Point each change in ``changes`` at ``app_env``'s current value.
+
+    Scales queued in quick succession may run out of order, so the values a
+    scale was queued with can already be stale; the committed process counts
+    and pod classes are what Kubernetes should end up with.
+    """
+    current = {
+        "process_count": lambda name: (app_env.process_counts or {}).get(name, 0),
+        "pod_class": lambda name: (app_env.process_pod_classes or {}).get(
+            name, DEFAULT_POD_CLASS
+        ),
+    }
+    return {
+        process_name: {
+            field: {**change, "new_value": current[field](process_name)}
+            for field, change in process_changes.items()
+        }
+        for process_name, process_changes in changes.items()
+    }
+
+
+@shared_task()
+def apply_scale(operation_id, application_environment_id, changes):
+    """Apply committed process count and pod class changes to Kubernetes.
+
+    ``changes`` is the ``{process: {field: {old_value, new_value}}}`` mapping
+    recorded on the scale Activity; the processes it names are patched
+    concurrently to the application environment's current counts and pod
+    classes.
+    """
+    redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
+    lock = redis_client.lock(
+        f"scale-lock:{application_environment_id}",
+        timeout=SCALE_LOCK_TIMEOUT,
+        blocking_timeout=SCALE_LOCK_TIMEOUT,
+    )
+    if not lock.acquire():
+        raise DeployError(
+            f"Timed out waiting for another scale of {application_environment_id}"
+        )
+    try:
+        _apply_scale(redis_client, operation_id, application_environment_id, changes)
+    finally:
+        try:
+            lock.release()
+        except redis.RedisError:
+            log.warning("Scale lock for %s expired", application_environment_id)
+
+
+def _apply_scale(redis_client, operation_id, application_environment_id, changes):
+    app_env = ApplicationEnvironment.query.filter_by(
+        id=application_environment_id
+    ).first()
+    latest = app_env.latest_release_built if app_env is not None else None
+    if latest is None or not changes:
+        set_scale_status(redis_client, operation_id, state="done")
+        return
+
+    set_scale_status(redis_client, operation_id, state="running")
+    changes = _current_scale_changes(app_env, changes)
+    namespace = k8s_namespace(latest)
+    # Load the release's application and project, and connect the client,
+    # before fanning out: the workers must not touch the session, which
+    # isn't safe to share between threads.
+    k8s_resource_prefix(latest)
+    api_client = kubernetes_ext.kubernetes_client
+
+    failed = []
+    with ThreadPoolExecutor(
+        max_workers=min(SCALE_CONCURRENCY, len(changes))
+    ) as executor:
+        futures = {
+            executor.submit(
+                contextvars.copy_context().run,
+                _apply_scale_change,
+                namespace,
+                latest,
+                process_name,
+                change,
+                api_client,
+            ): process_name
+            for process_name, change in changes.items()
+        }
+        for future in as_completed(futures):
+            process_name = futures[future]
+            try:
+                future.result()
+            except Exception as exc:
+                log.exception("Failed to scale %s for %s", process_name, latest)
+                failed.append(process_name)
+                status = f"failed: {exc}"
+            else:
+                status = "done"
+            set_scale_status(
+                redis_client, operation_id, **{f"process:{process_name}": status}
+            )
+
+    set_scale_status(redis_client, operation_id, state="failed" if failed else "done")
+    if failed:
+        raise DeployError(f"Failed to scale {', '.join(sorted(failed))}")
+
+
+def queue_scale(app_env, changes, data, priority=PRIORITY_DEFAULT):
+    """Commit a scale of ``app_env`` and queue :func:`apply_scale` for it.
+
+    ``changes`` must already be set on ``app_env``'s process counts and pod
+    classes. ``data`` is merged into the scale Activity. Returns the
+    operation id to poll, or None when Kubernetes is disabled.
+    """
+    activity = Activity(
+        verb="scale",
+        object=app_env.application,
+        data={
+            **data,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "changes": changes,
+        },
+    )
+    db.session.add(app_env)
+    db.session.add(activity)
+    db.session.commit()
+
+    if not current_app.config["KUBERNETES_ENABLED"]:
+        return None
+    operation_id = uuid.uuid4().hex
+    set_scale_status(
+        get_redis_client(current_app.config["CELERY_BROKER_URL"]),
+        operation_id,
+        state="queued",
+        application_id=str(app_env.application_id),
+        **{f"process:{name}": "pending" for name in changes},
+    )
+    apply_scale.apply_async(
+        kwargs={
+            "operation_id": operation_id,
+            "application_environment_id": str(app_env.id),
+            "changes": changes,
+        },
+        priority=priority,
+    )
+    return operation_id
+
+
 def fetch_job_logs(core_api_instance, namespace, job_object):
     label_selector = ",".join(
         [f"{k}={v}" for k, v in job_object.spec.template.metadata.labels.items()]
@@ -2523,6 +2751,60 @@ def delete_job(batch_api_instance, namespace, job_object):
         )
 
 
+# Longest stretch a job wait goes without refreshing its heartbeat.
+JOB_WATCH_INTERVAL = 10
+
+
+def _job_finished(job):
+    return bool(job.status.succeeded or job.status.failed)
+
+
+def _watch_until(list_fn, done, timeout=None, heartbeat=None, **list_kwargs):
+    """Watch objects from ``list_fn`` until ``done(obj)`` holds for one.
+
+    Changes are pushed by the API server, so a wait costs one long-lived
+    request per JOB_WATCH_INTERVAL rather than a request per second, and a
+    worker thread waiting here is idle. Returns the matching object, or None
+    if ``timeout`` seconds pass first or a watched object is deleted.
+    ``heartbeat`` is called between watch windows.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        window = JOB_WATCH_INTERVAL
+        if deadline is not None:
+            window = min(window, deadline - time.monotonic())
+            if window <= 0:
+                return None
+        watch = kubernetes.watch.Watch()
+        try:
+            for event in watch.stream(
+                list_fn,
+                timeout_seconds=max(int(window), 1),
+                _request_timeout=window + JOB_WATCH_INTERVAL,
+                **list_kwargs,
+            ):
+                if event["type"] == "DELETED":
+                    watch.stop()
+                    return None
+                if done(event["object"]):
+                    watch.stop()
+                    return event["object"]
+        except ApiException as exc:
+            # 410 Gone: our resourceVersion expired, start a fresh watch.
+            if exc.status != 410:
+                raise
+        if heartbeat is not None:
+            heartbeat()
+
+
+def _job_heartbeat(redis_client, heartbeat_type, heartbeat_id, heartbeat_ttl):
+    if not (redis_client and heartbeat_type and heartbeat_id):
+        return None
+    return lambda: refresh_heartbeat(
+        redis_client, heartbeat_type, heartbeat_id, ttl=heartbeat_ttl
+    )
+
+
 def run_job(
     core_api_instance,
     batch_api_instance,
@@ -2556,26 +2838,23 @@ def run_job(
         )
 
     try:
-        while True:
-            job_status = _retry_on_404(
-                batch_api_instance.read_namespaced_job_status,
-                job_object.metadata.name,
-                namespace,
+        job_status = _watch_until(
+            batch_api_instance.list_namespaced_job,
+            _job_finished,
+            heartbeat=_job_heartbeat(
+                redis_client, heartbeat_type, heartbeat_id, heartbeat_ttl
+            ),
+            namespace=namespace,
+            field_selector=f"metadata.name={job_object.metadata.name}",
+        )
+        if job_status is None:
+            raise DeployError(
+                f"Job/{job_object.metadata.name} in {namespace} was deleted "
+                "before it finished"
             )
-            if job_status.status.failed and job_status.status.failed > 0:
-                job_logs = fetch_job_logs(core_api_instance, namespace, job_status)
-                delete_job(batch_api_instance, namespace, job_object)
-                return False, job_logs
-            elif job_status.status.succeeded and job_status.status.succeeded > 0:
-                job_logs = fetch_job_logs(core_api_instance, namespace, job_status)
-                delete_job(batch_api_instance, namespace, job_object)
-                return True, job_logs
-            else:
-                if heartbeat_type and heartbeat_id and redis_client:
-                    refresh_heartbeat(
-                        redis_client, heartbeat_type, heartbeat_id, ttl=heartbeat_ttl
-                    )
-                time.sleep(1)
+        job_logs = fetch_job_logs(core_api_instance, namespace, job_status)
+        delete_job(batch_api_instance, namespace, job_object)
+        return bool(job_status.status.succeeded), job_logs
     finally:
         try:
             delete_job(batch_api_instance, namespace, job_object)
@@ -2597,29 +2876,29 @@ def _run_job_streaming(
     """Run a k8s job, streaming pod logs line-by-line to Redis."""
     job_name = job_object.metadata.name
     log_lines = []
+    heartbeat = _job_heartbeat(
+        redis_client, heartbeat_type, heartbeat_id, heartbeat_ttl
+    )
 
     try:
         # Wait for the job's pod to appear and reach Running state
         label_selector = ",".join(
             f"{k}={v}" for k, v in job_object.spec.template.metadata.labels.items()
         )
-        pod = None
-        for _ in range(120):  # up to ~2 minutes waiting for pod
-            try:
-                pods = core_api_instance.list_namespaced_pod(
-                    namespace, label_selector=label_selector
-                )
-                if pods.items:
-                    pod = pods.items[0]
-                    if pod.status.phase in ("Running", "Succeeded", "Failed"):
-                        break
-            except ApiException:
-                pass
-            if heartbeat_type and heartbeat_id:
-                refresh_heartbeat(
-                    redis_client, heartbeat_type, heartbeat_id, ttl=heartbeat_ttl
-                )
-            time.sleep(1)
+        seen = {}
+
+        def pod_started(pod):
+            seen["pod"] = pod
+            return pod.status.phase in ("Running", "Succeeded", "Failed")
+
+        pod = _watch_until(
+            core_api_instance.list_namespaced_pod,
+            pod_started,
+            timeout=120,
+            heartbeat=heartbeat,
+            namespace=namespace,
+            label_selector=label_selector,
+        ) or seen.get("pod")
 
         if pod is None:
             raise DeployError(
@@ -2647,32 +2926,22 @@ def _run_job_streaming(
                 line = line.rstrip("\n")
                 publish_log_line(redis_client, log_key, line)
                 log_lines.append(line)
-                if heartbeat_type and heartbeat_id:
-                    refresh_heartbeat(
-                        redis_client, heartbeat_type, heartbeat_id, ttl=heartbeat_ttl
-                    )
+                if heartbeat is not None:
+                    heartbeat()
         except ApiException:
             # Pod may have already terminated; logs were collected above
             pass
 
-        # Poll for final job status — k8s may not have updated it yet
-        succeeded = False
-        for _ in range(30):
-            job_status = _retry_on_404(
-                batch_api_instance.read_namespaced_job_status,
-                job_name,
-                namespace,
-            )
-            if job_status.status.succeeded and job_status.status.succeeded > 0:
-                succeeded = True
-                break
-            if job_status.status.failed and job_status.status.failed > 0:
-                break
-            if heartbeat_type and heartbeat_id:
-                refresh_heartbeat(
-                    redis_client, heartbeat_type, heartbeat_id, ttl=heartbeat_ttl
-                )
-            time.sleep(1)
+        # Wait for final job status — k8s may not have updated it yet
+        job_status = _watch_until(
+            batch_api_instance.list_namespaced_job,
+            _job_finished,
+            timeout=30,
+            heartbeat=heartbeat,
+            namespace=namespace,
+            field_selector=f"metadata.name={job_name}",
+        )
+        succeeded = bool(job_status and job_status.status.succeeded)
 
         # Build log string matching fetch_job_logs format
         log_string = f"Job Pod {pod.metadata.name}:\n"
@@ -2890,15 +3159,25 @@ def deploy_release(deployment):
                 ],
             ),
         )
-        for release_command in deployment.release_object.release_commands:
-            log(f"Running release command {release_command}")
-            job_object = render_job(
-                namespace.metadata.name,
-                deployment.release_object,
-                service_account.metadata.name,
+        release_commands = [
+            (
                 release_command,
-                deployment.job_id,
+                render_job(
+                    namespace.metadata.name,
+                    deployment.release_object,
+                    service_account.metadata.name,
+                    release_command,
+                    deployment.job_id,
+                ),
             )
+            for release_command in deployment.release_object.release_commands
+        ]
+        # Jobs run for minutes. Nothing is left pending here, so end the
+        # transaction before waiting rather than holding a pooled connection
+        # idle in transaction.
+        db.session.commit()
+        for release_command, job_object in release_commands:
+            log(f"Running release command {release_command}")
             job_complete, job_logs = run_job(
                 core_api_instance,
                 batch_api_instance,
@@ -2944,11 +3223,18 @@ def deploy_release(deployment):
             )
 
         log("Waiting on deployment to rollout...")
-        start = time.time()
         timeout = deployment.application_environment.effective_deployment_timeout
-        _go = {
-            process_name: False for process_name in deployment.release_object.processes
+        resource_prefix = k8s_resource_prefix(deployment.release_object)
+        deployment_names = {
+            process_name: f"{resource_prefix}-{process_name}"
+            for process_name in deployment.release_object.processes
         }
+        # A rollout can take the whole deployment timeout. End the
+        # transaction so this thread doesn't hold a pooled connection (idle
+        # in transaction) while it polls; the loop only talks to Kubernetes.
+        db.session.commit()
+        start = time.time()
+        _go = {process_name: False for process_name in deployment_names}
         _last_status = {}
         while time.time() - start < timeout:
             time.sleep(2)
@@ -2956,15 +3242,11 @@ def deploy_release(deployment):
                 refresh_heartbeat(
                     redis_client, "deploy", deployment_id_str, ttl=heartbeat_ttl
                 )
-            for process_name in deployment.release_object.processes:
+            for process_name, deployment_name in deployment_names.items():
                 if _go[process_name]:
                     continue
-                dep_obj = fetch_deployment(
-                    apps_api_instance,
-                    namespace.metadata.name,
-                    deployment.release_object,
-                    service_account.metadata.name,
-                    process_name,
+                dep_obj = read_deployment(
+                    apps_api_instance, namespace.metadata.name, deployment_name
                 )
                 if dep_obj is None:
                     continue
@@ -3014,35 +3296,52 @@ def deploy_release(deployment):
             log=log,
         )
 
-        # Prune stale keys from process_counts and process_pod_classes
+        # Prune stale keys from process_counts, process_pod_classes and
+        # autoscale_policies
         app_env = deployment.application_environment
         active_set = set(active_process_names) | set(active_job_names)
         pc = dict(app_env.process_counts or {})
         ppc = dict(app_env.process_pod_classes or {})
+        asp = dict(app_env.autoscale_policies or {})
         stale_pc = set(pc.keys()) - active_set
         stale_ppc = set(ppc.keys()) - active_set
-        if stale_pc or stale_ppc:
+        stale_asp = set(asp.keys()) - active_set
+        if stale_pc or stale_ppc or stale_asp:
             for k in stale_pc:
                 del pc[k]
             for k in stale_ppc:
                 del ppc[k]
+            for k in stale_asp:
+                del asp[k]
             app_env.process_counts = pc
             app_env.process_pod_classes = ppc
+            app_env.autoscale_policies = asp
             flag_modified(app_env, "process_counts")
             flag_modified(app_env, "process_pod_classes")
+            flag_modified(app_env, "autoscale_policies")
             db.session.commit()
             if log is not None:
-                log(f"Pruned stale process keys: {stale_pc | stale_ppc}")
+                log(f"Pruned stale process keys: {stale_pc | stale_ppc | stale_asp}")
 
-        for postdeploy_command in deployment.release_object.postdeploy_commands:
-            log(f"Running postdeploy command {postdeploy_command}")
-            job_object = render_job(
-                namespace.metadata.name,
-                deployment.release_object,
-                service_account.metadata.name,
+        postdeploy_commands = [
+            (
                 postdeploy_command,
-                deployment.job_id,
+                render_job(
+                    namespace.metadata.name,
+                    deployment.release_object,
+                    service_account.metadata.name,
+                    postdeploy_command,
+                    deployment.job_id,
+                ),
             )
+            for postdeploy_command in deployment.release_object.postdeploy_commands
+        ]
+        # Jobs run for minutes. Nothing is left pending here, so end the
+        # transaction before waiting rather than holding a pooled connection
+        # idle in transaction.
+        db.session.commit()
+        for postdeploy_command, job_object in postdeploy_commands:
+            log(f"Running postdeploy command {postdeploy_command}")
             job_complete, job_logs = run_job(
                 core_api_instance,
                 batch_api_instance,
@@ -3405,7 +3704,11 @@ def run_deploy(deployment_id=None):
         raise KeyError(f"Deployment with ID {deployment_id} not found!")
     error_detail = ""
     try:
-        deploy_release(deployment)
+        with (
+            time_stage("deploy", deployment.application.project.organization.slug),
+            config_read_cache(config_writer),
+        ):
+            deploy_release(deployment)
     except DeployError as exc:
         error_detail = str(exc)
         print(error_detail)
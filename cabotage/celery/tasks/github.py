@@ -1,6 +1,8 @@
 import datetime
+import json
 import logging
 
+import redis
 from celery import shared_task
 from flask import current_app
 from sqlalchemy import and_, or_
@@ -10,6 +12,7 @@ from cabotage.server import (
     db,
     github_app,
 )
+from cabotage.server.metrics import reconcile_rows, timed_reconcile
 from cabotage.server.models.projects import (
     activity_plugin,
     Environment,
@@ -29,15 +32,13 @@ from cabotage.server.user.github_installations import (
     sync_application_repository_metadata,
     sync_installation_repositories,
 )
-from cabotage.celery.tasks import (
-    run_image_build,
-    run_omnibus_build,
-)
+from cabotage.celery.tasks.build_scheduler import schedule_build
 from cabotage.celery.tasks.branch_deploy import (
     create_branch_deploy,
     sync_branch_deploy,
     teardown_branch_deploy,
 )
+from cabotage.utils.build_log_stream import get_redis_client
 from cabotage.utils.github import (
     cabotage_url,
     github_session,
@@ -49,6 +50,11 @@ from cabotage.celery.tasks.notify import dispatch_autodeploy_notification
 Activity = activity_plugin.activity_cls
 logger = logging.getLogger(__name__)
 
+HOOK_INBOX_KEY = "github:hooks:inbox"
+HOOK_DRAIN_SCHEDULED_KEY = "github:hooks:drain-scheduled"
+HOOK_BATCH_SIZE = 500
+HOOK_LOCK_TIMEOUT = 60
+
 
 class HookError(Exception):
     pass
@@ -243,9 +249,9 @@ def process_deployment_hook(hook):
         db.session.commit()
 
         if current_app.config.get("CABOTAGE_OMNIBUS_BUILDS"):
-            run_omnibus_build.delay(image_id=image.id)
+            schedule_build("omnibus", image)
         else:
-            run_image_build.delay(image_id=image.id)
+            schedule_build("image", image)
 
         post_deployment_status_update(
             access_token["token"],
@@ -1253,9 +1259,7 @@ def process_pull_request_hook(hook):
             sync_branch_deploy(project, pr_number, head_sha, installation_id)
 
 
-@shared_task()
-def process_github_hook(hook_id):
-    hook = Hook.query.filter_by(id=hook_id).first()
+def _process_hook(hook):
     event = hook.headers["X-Github-Event"]
     if event == "deployment":
         commit_sha = hook.payload.get("deployment", {}).get("sha")
@@ -1306,3 +1310,150 @@ def process_github_hook(hook_id):
         process_pull_request_hook(hook)
         hook.processed = True
         db.session.commit()
+
+
+@shared_task()
+def process_github_hook(hook_id):
+    hook = Hook.query.filter_by(id=hook_id).first()
+    return _process_hook(hook)
+
+
+def enqueue_github_hook(redis_client, headers, body):
+    """Append a validated delivery to the inbox and schedule a drain.
+
+    Deliveries arriving within GITHUB_HOOK_COALESCE_SECONDS of each other
+    share one drain_github_hooks run.
+    """
+    redis_client.xadd(HOOK_INBOX_KEY, {"headers": json.dumps(headers), "payload": body})
+    delay = current_app.config["GITHUB_HOOK_COALESCE_SECONDS"]
+    if redis_client.set(HOOK_DRAIN_SCHEDULED_KEY, "1", nx=True, ex=delay + 30):
+        try:
+            drain_github_hooks.apply_async(countdown=delay)
+        except Exception:
+            # The delivery is already queued; the periodic drain picks it up.
+            logger.exception("Failed to schedule webhook drain")
+
+
+def _coalesce_key(hook):
+    """Deliveries that share one evaluation, or None if each must run."""
+    if hook.headers.get("X-Github-Event") != "check_suite":
+        return None
+    return (
+        hook.payload.get("installation", {}).get("id"),
+        hook.payload.get("repository", {}).get("full_name"),
+        hook.payload.get("check_suite", {}).get("head_sha"),
+    )
+
+
+def coalesce_hooks(hooks):
+    """Split hooks into ``(to_process, superseded)``, preserving order.
+
+    Every check_suite completion for one (installation, repository, sha)
+    re-runs the same evaluation of that commit's required checks, so only
+    the last one in a batch that could deploy (a successful suite from
+    another app) is processed. Redelivered hooks (same X-GitHub-Delivery)
+    are processed once.
+    """
+    own_app_id = str(github_app.app_id)
+    last = {}
+    for hook in hooks:
+        key = _coalesce_key(hook)
+        if key is None:
+            continue
+        suite = hook.payload.get("check_suite", {})
+        suite_app_id = suite.get("app", {}).get("id")
+        if suite.get("conclusion") == "success" and str(suite_app_id) != own_app_id:
+            last[key] = hook
+        else:
+            last.setdefault(key, None)
+
+    to_process, superseded, deliveries = [], [], set()
+    for hook in hooks:
+        delivery = hook.headers.get("X-Github-Delivery")
+        key = _coalesce_key(hook)
+        if (delivery and delivery in deliveries) or (
+            key is not None and last[key] is not hook
+        ):
+            superseded.append(hook)
+        else:
+            to_process.append(hook)
+        if delivery:
+            deliveries.add(delivery)
+    return to_process, superseded
+
+
+def _dispatch_hooks(hooks):
+    """Mark superseded deliveries processed and queue the rest."""
+    to_process, superseded = coalesce_hooks(hooks)
+    for hook in superseded:
+        key = _coalesce_key(hook)
+        if key is not None:
+            hook.commit_sha = key[2]
+        hook.processed = True
+    db.session.commit()
+    if superseded:
+        logger.info(
+            "Coalesced %d of %d webhook deliveries", len(superseded), len(hooks)
+        )
+
+    for hook in to_process:
+        try:
+            process_github_hook.delay(hook.id)
+        except Exception:
+            logger.exception("Failed to dispatch webhook %s", hook.id)
+
+
+@shared_task()
+@timed_reconcile("github_hooks")
+def drain_github_hooks(batch_size=HOOK_BATCH_SIZE):
+    """Insert queued webhook deliveries in batches and dispatch them.
+
+    Each batch is dispatched as soon as it is stored, so a worker lost
+    mid-drain leaves no stored delivery behind unqueued.
+    """
+    redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
+    # Deliveries from here on schedule a fresh drain.
+    redis_client.delete(HOOK_DRAIN_SCHEDULED_KEY)
+    lock = redis_client.lock(f"{HOOK_INBOX_KEY}:drain", timeout=HOOK_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        return 0
+
+    stored = 0
+    try:
+        while True:
+            entries = redis_client.xrange(HOOK_INBOX_KEY, count=batch_size)
+            if not entries:
+                break
+            batch = []
+            for entry_id, fields in entries:
+                try:
+                    batch.append(
+                        Hook(
+                            headers=json.loads(fields[b"headers"]),
+                            payload=json.loads(fields[b"payload"]),
+                        )
+                    )
+                except (KeyError, ValueError):
+                    logger.warning("Dropping malformed webhook entry %s", entry_id)
+            try:
+                db.session.add_all(batch)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                logger.exception("Failed to store webhook deliveries, will retry")
+                break
+            # Only acknowledge once the rows are durable.
+            redis_client.xdel(HOOK_INBOX_KEY, *[entry_id for entry_id, _ in entries])
+            stored += len(batch)
+            if batch:
+                _dispatch_hooks(batch)
+            if len(entries) < batch_size:
+                break
+    finally:
+        try:
+            lock.release()
+        except redis.RedisError:
+            logger.warning("Webhook drain lock expired before the drain finished")
+
+    reconcile_rows("github_hooks", stored)
+    return stored
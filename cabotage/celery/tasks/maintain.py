@@ -7,7 +7,9 @@ from celery import shared_task
 from flask import current_app
 
 from cabotage.server import db, github_app, kubernetes as kubernetes_ext
+from cabotage.server.metrics import reconcile_rows, timed_reconcile
 from cabotage.server.models.projects import Deployment, Image, Release
+from cabotage.celery.tasks.build_scheduler import queued_build_ids, ticket_id
 from cabotage.celery.tasks.notify import (
     dispatch_autodeploy_notification,
     dispatch_pipeline_notification,
@@ -76,12 +78,15 @@ def _dispatch_reap_failure(obj, obj_type, notification_type):
 
 
 @shared_task()
+@timed_reconcile("stale_builds")
 def reap_stale_builds():
     """Find stuck image builds, release builds, and deploys with no heartbeat."""
     redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
     cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
         seconds=90
     )
+    # Builds waiting for a scheduler slot haven't started, so have no heartbeat.
+    queued = queued_build_ids(redis_client)
 
     # Images: built=False, error=False, updated < cutoff, no heartbeat
     stuck_images = Image.query.filter(
@@ -90,6 +95,8 @@ def reap_stale_builds():
         Image.updated < cutoff,
     ).all()
     for image in stuck_images:
+        if {ticket_id("image", image.id), ticket_id("omnibus", image.id)} & queued:
+            continue
         key = heartbeat_key("image_build", str(image.id))
         if not redis_client.exists(key):
             image.error = True
@@ -135,6 +142,8 @@ def reap_stale_builds():
         Release.updated < cutoff,
     ).all()
     for release in stuck_releases:
+        if ticket_id("release", release.id) in queued:
+            continue
         key = heartbeat_key("release_build", str(release.id))
         if not redis_client.exists(key):
             release.error = True
@@ -218,10 +227,15 @@ def reap_stale_builds():
                     )
             _dispatch_reap_failure(deployment, "Deployment", "pipeline.deploy")
 
+    reconcile_rows(
+        "stale_builds",
+        len(stuck_images) + len(stuck_releases) + len(stuck_deployments),
+    )
     db.session.commit()
 
 
 @shared_task()
+@timed_reconcile("pods")
 def reap_pods():
     if not current_app.config["KUBERNETES_ENABLED"]:
         return
@@ -230,6 +244,7 @@ def reap_pods():
     pods = core_api_instance.list_pod_for_all_namespaces(
         label_selector="resident-pod.cabotage.io=true",
     )
+    reconcile_rows("pods", len(pods.items))
     if not pods.items:
         return
     candidate = sorted(pods.items, key=lambda pod: pod.status.start_time)[0]
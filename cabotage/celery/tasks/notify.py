@@ -24,6 +24,7 @@ from cabotage.server.integrations.slack_oauth import (
     _send_slack_message,
     _update_slack_message,
 )
+from cabotage.server.metrics import reconcile_rows, timed_reconcile
 from cabotage.server.models.auth import Organization
 from cabotage.server.models.notifications import (
     NotificationRoute,
@@ -802,6 +803,7 @@ _TERMINAL_CHECKS = {
 
 
 @shared_task()
+@timed_reconcile("notifications")
 def reconcile_notifications():
     """Find stale notifications whose source objects have reached a terminal
     state and re-dispatch to update the message.
@@ -816,6 +818,7 @@ def reconcile_notifications():
     stale = SentNotification.query.filter(
         SentNotification.updated_at < cutoff,
     ).all()
+    reconcile_rows("notifications", len(stale))
 
     reconciled = 0
     for sent in stale:
@@ -1,31 +1,110 @@
+"""Celery tasks to garbage collect image and release tags from the registry.
+
+``prune_images`` pages through applications by id and fans each page out to
+a ``prune_application_repositories`` task, so large registries are pruned
+in parallel across workers and an interrupted run can be resumed from the
+last application id it reported.
+
+Which tags survive is decided from the database rather than tag order: the
+live set is built from each environment's deployments, releases and images
+(see ``_live_tags``), and everything else is deleted by manifest digest.
+Within a repository, registry calls run on a small thread pool sharing a
+single cached registry token.
+"""
+
+import logging
 import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
 from celery import shared_task
-from dxf import DXF
+from dxf import DXF, hash_bytes
 from flask import current_app
+from flask.globals import app_ctx
 
-from cabotage.server.models.projects import Application
+from cabotage.server.models.auth import Organization
+from cabotage.server.models.projects import (
+    Application,
+    Deployment,
+    Image,
+    Project,
+    Release,
+)
 from cabotage.utils.docker_auth import generate_docker_registry_jwt
 
+log = logging.getLogger(__name__)
+
+DEFAULT_PRUNE_RETAIN = 5
+DEFAULT_PRUNE_CONCURRENCY = 4
+DEFAULT_PRUNE_CHUNK_SIZE = 25
+
+# Registry JWTs are valid for 600s; refresh a little early.
+REGISTRY_TOKEN_TTL = 540
+
+PRUNED_PREFIXES = ("image-", "release-")
+
 
 def natsort(s):
     return [int(t) if t.isdigit() else t.lower() for t in re.split(r"(\d+)", s)]
 
 
-def _prune_repository(repository_name, dry_run=False):
-    def auth(dxf, response):
-        dxf.token = generate_docker_registry_jwt(
-            access=[
-                {
-                    "type": "repository",
-                    "name": repository_name,
-                    "actions": ["*"],
-                }
-            ]
-        )
+def _config_int(key, default):
+    try:
+        return int(current_app.config.get(key, default))
+    except (ValueError, TypeError):
+        return default
+
 
+def _prune_retain():
+    return max(_config_int("REGISTRY_PRUNE_RETAIN", DEFAULT_PRUNE_RETAIN), 0)
+
+
+def _prune_concurrency():
+    return max(_config_int("REGISTRY_PRUNE_CONCURRENCY", DEFAULT_PRUNE_CONCURRENCY), 1)
+
+
+def _prune_chunk_size():
+    return max(_config_int("REGISTRY_PRUNE_CHUNK_SIZE", DEFAULT_PRUNE_CHUNK_SIZE), 1)
+
+
+class RepositoryToken:
+    """Registry JWT for a single repository, minted once and reused.
+
+    DXF calls its ``auth`` hook on every 401 challenge; without caching each
+    challenge costs a Vault signing round trip.
+    """
+
+    def __init__(self, repository_name, ttl=REGISTRY_TOKEN_TTL):
+        self.repository_name = repository_name
+        self.ttl = ttl
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._token is None or time.monotonic() >= self._expires_at:
+                self._token = generate_docker_registry_jwt(
+                    access=[
+                        {
+                            "type": "repository",
+                            "name": self.repository_name,
+                            "actions": ["*"],
+                        }
+                    ]
+                )
+                self._expires_at = time.monotonic() + self.ttl
+            return self._token
+
+    def auth(self, dxf, response):
+        dxf.token = self.get()
+
+
+def _registry_client(repository_name, token):
     registry = current_app.config["REGISTRY_BUILD"]
     registry_secure = current_app.config["REGISTRY_SECURE"]
     _tlsverify = False
@@ -33,59 +112,318 @@ def _prune_repository(repository_name, dry_run=False):
         _tlsverify = current_app.config["REGISTRY_VERIFY"]
         if _tlsverify == "True":
             _tlsverify = True
-    client = DXF(
+    return DXF(
         host=registry,
         repo=repository_name,
-        auth=auth,
+        auth=token.auth,
         insecure=(not registry_secure),
         tlsverify=_tlsverify,
     )
+
+
+def _prunable_aliases(aliases):
+    """Aliases cabotage manages (``image-*``/``release-*``, minus build caches)."""
+    return sorted(
+        [
+            a
+            for a in aliases
+            if a.startswith(PRUNED_PREFIXES)
+            and a not in {f"{prefix}buildcache" for prefix in PRUNED_PREFIXES}
+        ],
+        key=natsort,
+    )
+
+
+def _live_tags(app_env, retain):
+    """Registry tags an application environment may still need.
+
+    The live set is the current deployment, the last ``retain`` successful
+    deployments (rollback targets), the last ``retain`` built releases and
+    images, and anything still building.
+    """
+    deployments = app_env.deployments.filter_by(complete=True, error=False).order_by(
+        Deployment.created.desc()
+    )
+    deployments = deployments.limit(retain).all()
+    current = app_env.latest_deployment
+    if current is not None:
+        deployments.append(current)
+
+    tags = set()
+    release_ids = set()
+    for deployment in deployments:
+        release = deployment.release or {}
+        if release.get("id"):
+            release_ids.add(uuid.UUID(release["id"]))
+        if (release.get("image") or {}).get("tag"):
+            tags.add(f"image-{release['image']['tag']}")
+
+    releases = (
+        app_env.releases.filter_by(built=True, deleted=False)
+        .order_by(Release.version.desc())
+        .limit(retain)
+        .all()
+    )
+    releases += app_env.releases.filter_by(built=False, error=False).all()
+    if release_ids:
+        releases += Release.query.filter(Release.id.in_(release_ids)).all()
+    for release in releases:
+        tags.add(f"release-{release.version}")
+        if (release.image or {}).get("tag"):
+            tags.add(f"image-{release.image['tag']}")
+
+    images = (
+        app_env.images.filter_by(built=True, deleted=False)
+        .order_by(Image.version.desc())
+        .limit(retain)
+        .all()
+    )
+    images += app_env.images.filter_by(built=False, error=False).all()
+    for image in images:
+        tags.add(f"image-{image.version}")
+    return tags
+
+
+def _describe_alias(client, alias):
+    """Return the manifest digest and ``{blob digest: size}`` for an alias."""
+    manifest, response = client.get_manifest_and_response(alias)
+    digest = response.headers.get("Docker-Content-Digest") or hash_bytes(
+        response.content
+    )
+    blobs = client.get_alias(manifest=manifest, sizes=True)
+    if isinstance(blobs, dict):
+        blobs = [blob for platform in blobs.values() for blob in platform]
+    return digest, dict(blobs)
+
+
+def _plan_gc(descriptions, live_tags):
+    """Decide which manifests to delete and how many bytes that frees.
+
+    ``descriptions`` maps each tag to ``(digest, blobs)``. A manifest is only
+    deleted when none of the tags pointing at it are live, since deleting by
+    digest removes every tag sharing it. Blob bytes are counted once, and
+    only for blobs no surviving manifest still references.
+    """
+    live_digests = {
+        digest for tag, (digest, _) in descriptions.items() if tag in live_tags
+    }
+    doomed = {}
+    kept_blobs = set()
+    retained = 0
+    for tag, (digest, blobs) in descriptions.items():
+        if digest in live_digests:
+            retained += 1
+            kept_blobs.update(blobs)
+        else:
+            doomed.setdefault(digest, {"tags": [], "blobs": blobs})
+            doomed[digest]["tags"].append(tag)
+
+    freed = {}
+    for manifest in doomed.values():
+        for blob, size in manifest["blobs"].items():
+            if blob not in kept_blobs:
+                freed[blob] = size
+    return {
+        "digests": sorted(doomed),
+        "tags": sum(len(m["tags"]) for m in doomed.values()),
+        "retained": retained,
+        "bytes": sum(freed.values()),
+    }
+
+
+def _empty_summary(repository_name):
+    return {
+        "repository": repository_name,
+        "deleted": 0,
+        "manifests": 0,
+        "retained": 0,
+        "bytes": 0,
+        "errors": 0,
+    }
+
+
+def _prune_repository(repository_name, live_tags, dry_run=False, concurrency=None):
+    """Garbage collect tags in one repository that are not in ``live_tags``.
+
+    Returns a summary dict with counts of deleted tags and manifests,
+    retained tags, reclaimed blob bytes, and failed registry calls.
+    """
+    if concurrency is None:
+        concurrency = _prune_concurrency()
+
+    summary = _empty_summary(repository_name)
+    token = RepositoryToken(repository_name)
     try:
-        aliases = client.list_aliases()
-        image_aliases = sorted(
-            [a for a in aliases if a.startswith("image-") and a != "image-buildcache"],
-            key=natsort,
-        )
-        release_aliases = sorted(
-            [
-                a
-                for a in aliases
-                if a.startswith("release-") and a != "release-buildcache"
-            ],
-            key=natsort,
-        )
-        for a in image_aliases:
-            if a in image_aliases[: -5 or None]:
-                try:
-                    print(f"deleting {repository_name}:{a}")
-                    if not dry_run:
-                        client.del_alias(a)
-                except requests.exceptions.HTTPError as e:
-                    print(e)
-                    pass
-            else:
-                print(f"retaining {repository_name}:{a}")
-        for a in release_aliases:
-            if a in release_aliases[: -5 or None]:
-                try:
-                    print(f"deleting {repository_name}:{a}")
-                    if not dry_run:
-                        client.del_alias(a)
-                except requests.exceptions.HTTPError as e:
-                    print(e)
-                    pass
-            else:
-                print(f"retaining {repository_name}:{a}")
+        aliases = _registry_client(repository_name, token).list_aliases()
     except requests.exceptions.HTTPError as e:
-        print(e)
-        pass
+        log.warning("Failed to list tags for %s: %s", repository_name, e)
+        summary["errors"] += 1
+        return summary
+
+    managed = _prunable_aliases(aliases)
+    if not set(managed) - set(live_tags):
+        summary["retained"] = len(managed)
+        return summary
+
+    # The app itself, not the context-local proxy, for the worker threads.
+    app = app_ctx.app
+    local = threading.local()
+
+    def _client():
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = _registry_client(repository_name, token)
+        return client
+
+    def _describe(alias):
+        with app.app_context():
+            try:
+                return alias, _describe_alias(_client(), alias)
+            except requests.exceptions.HTTPError as e:
+                log.warning("Failed to inspect %s:%s: %s", repository_name, alias, e)
+                return alias, None
+
+    def _delete(digest):
+        with app.app_context():
+            try:
+                _client().del_alias(digest)
+            except requests.exceptions.HTTPError as e:
+                log.warning("Failed to delete %s@%s: %s", repository_name, digest, e)
+                return False
+            return True
+
+    workers = min(concurrency, len(managed))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        descriptions = {}
+        for alias, description in pool.map(_describe, managed):
+            if description is None:
+                summary["errors"] += 1
+                if alias in live_tags:
+                    # Without the live manifest's digest we cannot tell what
+                    # shares it, so leave the whole repository alone.
+                    return summary
+            else:
+                descriptions[alias] = description
+
+        plan = _plan_gc(descriptions, live_tags)
+        if dry_run:
+            failed = set()
+        else:
+            results = pool.map(_delete, plan["digests"])
+            failed = {
+                d for d, ok in zip(plan["digests"], results, strict=True) if not ok
+            }
+
+    if failed:
+        # Tags on manifests we failed to delete are still there; re-plan with
+        # them kept so the summary only counts what was actually reclaimed.
+        survivors = {t for t, (d, _) in descriptions.items() if d in failed}
+        plan = _plan_gc(descriptions, set(live_tags) | survivors)
+        summary["errors"] += len(failed)
+    summary["deleted"] = plan["tags"]
+    summary["manifests"] = len(plan["digests"])
+    summary["retained"] = plan["retained"]
+    summary["bytes"] = plan["bytes"]
+
+    log.info(
+        "%s %s: %d tags / %d manifests (%d bytes) removed, %d retained, %d errors",
+        "Would garbage collect" if dry_run else "Garbage collected",
+        repository_name,
+        summary["deleted"],
+        summary["manifests"],
+        summary["bytes"],
+        summary["retained"],
+        summary["errors"],
+    )
+    return summary
+
+
+def _merge_summaries(summaries):
+    totals = {
+        "repositories": 0,
+        "deleted": 0,
+        "manifests": 0,
+        "retained": 0,
+        "bytes": 0,
+        "errors": 0,
+    }
+    for summary in summaries:
+        totals["repositories"] += summary.get("repositories", 1)
+        for key in ("deleted", "manifests", "retained", "bytes", "errors"):
+            totals[key] += summary[key]
+    return totals
 
 
 @shared_task()
-def prune_images(dry_run=False):
-    for app in reversed(Application.query.all()):
-        if app.project.organization is not None:
-            for app_env in app.application_environments:
-                _prune_repository(
-                    app.registry_repository_name(app_env), dry_run=dry_run
-                )
+def prune_application_repositories(application_ids, dry_run=False):
+    """Garbage collect every repository for a chunk of applications.
+
+    Environments that don't use their own namespace share a repository, so
+    live tags are collected per repository before anything is deleted.
+    """
+    retain = _prune_retain()
+    applications = Application.query.filter(
+        Application.id.in_([uuid.UUID(str(i)) for i in application_ids])
+    )
+    repositories = {}
+    for app in applications:
+        if app.project.organization is None:
+            continue
+        for app_env in app.application_environments:
+            live = repositories.setdefault(app.registry_repository_name(app_env), set())
+            live.update(_live_tags(app_env, retain))
+
+    summaries = [
+        _prune_repository(repository_name, live_tags, dry_run=dry_run)
+        for repository_name, live_tags in repositories.items()
+    ]
+    totals = _merge_summaries(summaries)
+    log.info(
+        "Registry prune chunk (%d applications, last %s): %d repositories, "
+        "%d tags, %d bytes, %d errors",
+        len(application_ids),
+        application_ids[-1] if application_ids else None,
+        totals["repositories"],
+        totals["deleted"],
+        totals["bytes"],
+        totals["errors"],
+    )
+    return totals
+
+
+def _application_id_chunks(chunk_size, after=None):
+    """Yield lists of application ids in id order, ``chunk_size`` at a time."""
+    query = (
+        Application.query.with_entities(Application.id)
+        .join(Project, Application.project_id == Project.id)
+        .join(Organization, Project.organization_id == Organization.id)
+        .order_by(Application.id)
+    )
+    while True:
+        page = query
+        if after is not None:
+            page = page.filter(Application.id > uuid.UUID(str(after)))
+        ids = [str(row.id) for row in page.limit(chunk_size)]
+        if not ids:
+            return
+        yield ids
+        after = ids[-1]
+
+
+@shared_task()
+def prune_images(dry_run=False, after=None, chunk_size=None):
+    """Fan registry pruning out across workers, one task per chunk of apps.
+
+    Pass ``after`` (an application id from a previous run's log) to resume
+    an interrupted prune.
+    """
+    if chunk_size is None:
+        chunk_size = _prune_chunk_size()
+    chunks = 0
+    for ids in _application_id_chunks(chunk_size, after=after):
+        prune_application_repositories.delay(ids, dry_run=dry_run)
+        chunks += 1
+        log.info(
+            "Queued registry prune chunk %d (through application %s)", chunks, ids[-1]
+        )
+    return chunks
@@ -16,6 +16,7 @@ from celery import shared_task
 from flask import current_app
 
 from cabotage.server import db, kubernetes as kubernetes_ext
+from cabotage.server.metrics import reconcile_rows, timed_reconcile
 from cabotage.server.models.projects import (
     Application,
     ApplicationEnvironment,
@@ -127,6 +128,7 @@ def _reap_limit():
 
 
 @shared_task()
+@timed_reconcile("jobs")
 def reap_finished_jobs():
     """Find finished CronJob-spawned Jobs, log metadata, and delete them."""
     if not current_app.config.get("KUBERNETES_ENABLED"):
@@ -146,6 +148,7 @@ def reap_finished_jobs():
         current_app.logger.error(f"Failed to list jobs: {exc}")
         return
 
+    reconcile_rows("jobs", len(jobs.items))
     reaped = 0
     for job in jobs.items:
         if reaped >= limit:
@@ -10,7 +10,7 @@ import kubernetes
 from celery import shared_task
 from flask import current_app, has_app_context
 from kubernetes.client.rest import ApiException
-from sqlalchemy import text
+from sqlalchemy import and_, or_, text
 
 from cabotage.server import (
     config_writer,
@@ -18,6 +18,7 @@ from cabotage.server import (
     kubernetes as kubernetes_ext,
 )
 from cabotage.server.config import validate_tenant_postgres_backup_config
+from cabotage.server.metrics import reconcile_rows, timed_reconcile
 from cabotage.server.models.resources import (
     postgres_size_classes,
     redis_size_classes,
@@ -1577,6 +1578,7 @@ _RECONCILERS = {
 
 
 @shared_task()
+@timed_reconcile("backing_services")
 def reconcile_backing_services():
     """Periodic task: converge all backing service resources to desired state."""
     from cabotage.server.models.resources import Resource
@@ -1594,6 +1596,7 @@ def reconcile_backing_services():
             Resource.provisioning_status != "deleting",
             Resource.provisioning_status != "deleted",
         ).all()
+        reconcile_rows("backing_services", len(resources))
 
         if not resources:
             return
@@ -1701,12 +1704,45 @@ def _redis_config_entries(resource, namespace, name, password):
     return entries
 
 
+def _write_resource_env_configs(namespace, prefix, configs):
+    """Write ``configs`` in one batch, falling back to one at a time.
+
+    Returns key slugs in the same order, with None for any config that
+    could not be written.
+    """
+    try:
+        return config_writer.write_configurations(namespace, prefix, configs)
+    except Exception:
+        log.warning(
+            "Batched write of %d configs failed, writing one at a time",
+            len(configs),
+            exc_info=True,
+        )
+    key_slugs = []
+    for config in configs:
+        try:
+            key_slugs.append(
+                config_writer.write_configuration(namespace, prefix, config)
+            )
+        except Exception:
+            log.warning(
+                "Failed to write config %s to config_writer, storing direct",
+                config.name,
+                exc_info=True,
+            )
+            key_slugs.append(None)
+    return key_slugs
+
+
 def _sync_resource_env_configs(resource, entries):
     """Create or update EnvironmentConfiguration rows managed by a resource.
 
     entries: list of (name, value, secret) tuples.
     Existing configs for this resource are updated in place; missing ones
     are created; stale ones (not in entries) are deleted.
+
+    The current rows are loaded in one query and only entries that differ
+    are written to the config store, together in one batch.
     """
     from cabotage.server.models.projects import EnvironmentConfiguration
 
@@ -1716,24 +1752,30 @@ def _sync_resource_env_configs(resource, entries):
     prefix = project.k8s_identifier
 
     wanted_names = {name for name, _, _ in entries}
-    managed_configs = {
-        c.name: c
-        for c in EnvironmentConfiguration.query.filter_by(resource_id=resource.id).all()
-    }
+    current = EnvironmentConfiguration.query.filter(
+        or_(
+            EnvironmentConfiguration.resource_id == resource.id,
+            and_(
+                EnvironmentConfiguration.project_id == project.id,
+                EnvironmentConfiguration.environment_id == env.id,
+                EnvironmentConfiguration.name.in_(wanted_names),
+            ),
+        )
+    ).all()
+    managed_configs = {c.name: c for c in current if c.resource_id == resource.id}
     existing_by_name = {
         c.name: c
-        for c in EnvironmentConfiguration.query.filter_by(
-            project_id=project.id,
-            environment_id=env.id,
-        )
-        .filter(EnvironmentConfiguration.name.in_(wanted_names))
-        .all()
+        for c in current
+        if c.project_id == project.id
+        and c.environment_id == env.id
+        and c.name in wanted_names
     }
     created_count = 0
     claimed_count = 0
     wrote_count = 0
     deleted_count = 0
     preserved_legacy_count = 0
+    to_write = []
 
     for name, value, secret in entries:
         config = existing_by_name.get(name) or managed_configs.get(name)
@@ -1767,26 +1809,26 @@ def _sync_resource_env_configs(resource, entries):
 
         if should_write:
             config.value = value
+            to_write.append((config, value))
 
-        db.session.flush()
+    # Key paths are derived from version_id, so flush before writing.
+    db.session.flush()
 
-        if should_write:
-            try:
-                key_slugs = config_writer.write_configuration(namespace, prefix, config)
-                config.key_slug = key_slugs["config_key_slug"]
-                wrote_count += 1
-                if config.secret:
-                    config.value = "**secure**"
-                    config.secret_fingerprint = _secret_fingerprint(value)
-                else:
-                    config.build_key_slug = key_slugs["build_key_slug"]
-                    config.secret_fingerprint = None
-            except Exception:
-                log.warning(
-                    "Failed to write config %s to config_writer, storing direct",
-                    name,
-                    exc_info=True,
-                )
+    if to_write:
+        key_slugs = _write_resource_env_configs(
+            namespace, prefix, [config for config, _ in to_write]
+        )
+        for (config, value), slugs in zip(to_write, key_slugs, strict=True):
+            if slugs is None:
+                continue
+            config.key_slug = slugs["config_key_slug"]
+            wrote_count += 1
+            if config.secret:
+                config.value = "**secure**"
+                config.secret_fingerprint = _secret_fingerprint(value)
+            else:
+                config.build_key_slug = slugs["build_key_slug"]
+                config.secret_fingerprint = None
 
     # Remove configs no longer in the wanted set
     for name, config in managed_configs.items():
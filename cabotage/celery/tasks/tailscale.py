@@ -10,6 +10,7 @@ from cabotage.server import (
     db,
     kubernetes as kubernetes_ext,
 )
+from cabotage.server.metrics import reconcile_rows, timed_reconcile
 from cabotage.server.models.auth import TailscaleIntegration
 
 log = logging.getLogger(__name__)
@@ -232,11 +233,13 @@ def teardown_tailscale_operator(organization_id):
 
 
 @shared_task()
+@timed_reconcile("tailscale_integrations")
 def reconcile_tailscale_integration_states():
     """Periodic task: sync TailscaleIntegration.operator_state from CRD status."""
     integrations = TailscaleIntegration.query.filter(
         TailscaleIntegration.operator_state.in_(("pending", "deployed", "failed")),
     ).all()
+    reconcile_rows("tailscale_integrations", len(integrations))
     if not integrations:
         return
 
@@ -968,6 +968,39 @@ function initFlashMessages() {
   });
 }
 
+/* Scale operation progress (application page) */
+function initScaleOperationStatus() {
+  var el = document.getElementById('scale-operation-status');
+  if (!el) return;
+  var url = el.getAttribute('data-status-url');
+
+  function poll() {
+    fetch(url, { headers: { Accept: 'application/json' } })
+      .then(function (resp) {
+        if (!resp.ok) throw new Error(resp.status);
+        return resp.json();
+      })
+      .then(function (data) {
+        if (data.state === 'done') {
+          el.textContent = 'Process changes applied.';
+          el.classList.add('text-success');
+        } else if (data.state === 'failed') {
+          var failed = Object.keys(data.processes).filter(function (name) {
+            return data.processes[name].indexOf('failed') === 0;
+          });
+          el.textContent = 'Failed to apply changes to ' + failed.join(', ') + '.';
+          el.classList.add('text-error');
+        } else {
+          setTimeout(poll, 1000);
+        }
+      })
+      .catch(function () {
+        el.remove();
+      });
+  }
+  poll();
+}
+
 /* Environment Config Reference Insert (edit page) */
 function initEnvConfigRefInsert() {
   var buttons = document.querySelectorAll('.env-config-ref-insert');
@@ -2510,6 +2543,7 @@ document.addEventListener('DOMContentLoaded', function () {
   initDeleteModal('env-delete-btn', 'env-delete-var-modal', 'env-delete-var-form', 'env-delete-name-display', 'env-delete-config-id', 'env-delete-config-name', 'env-delete-config-value', 'env-delete-confirm', 'data-env-delete-var-close');
   initDeleteModal('app-delete-btn', 'app-delete-var-modal', 'app-delete-var-form', 'app-delete-name-display', 'app-delete-config-id', 'app-delete-config-name', 'app-delete-config-value', 'app-delete-confirm', 'data-app-delete-var-close');
   initFlashMessages();
+  initScaleOperationStatus();
   initAutoGrowTextareas();
   initEnvConfigRefInsert();
   initExpandModal();
@@ -155,7 +155,19 @@ def celery_init_app(app):
         },
         "alert-reconciler": {
             "task": "cabotage.celery.tasks.alerting.reconcile_alerts",
-            "schedule": 15.0,
+            # Ticks at the fastest poll interval; the task backs off itself.
+            "schedule": float(app.config["ALERTMANAGER_POLL_MIN_INTERVAL"]),
+            "args": None,
+        },
+        "github-hook-drain": {
+            "task": "cabotage.celery.tasks.github.drain_github_hooks",
+            # Deliveries schedule their own drain; this catches stragglers.
+            "schedule": 5.0,
+            "args": None,
+        },
+        "audit-outbox-drain": {
+            "task": "cabotage.celery.tasks.audit.drain_audit_outbox",
+            "schedule": 5.0,
             "args": None,
         },
         "notification-reconciler": {
@@ -168,6 +180,17 @@ def celery_init_app(app):
             "schedule": crontab(minute="17"),
             "args": None,
         },
+        "autoscale-evaluator": {
+            "task": "cabotage.celery.tasks.autoscale.evaluate_autoscaling",
+            "schedule": float(app.config["AUTOSCALE_INTERVAL"]),
+            "args": None,
+        },
+        "build-dispatcher": {
+            "task": "cabotage.celery.tasks.build_scheduler.dispatch_builds",
+            # Builds finishing admit the next ones; this reclaims lost slots.
+            "schedule": 15.0,
+            "args": None,
+        },
         "backing-service-reconciler": {
             "task": "cabotage.celery.tasks.resources.reconcile_backing_services",
             "schedule": 10.0,
@@ -175,6 +198,12 @@ def celery_init_app(app):
         },
     }
     app.extensions["celery"] = celery_app
+
+    from cabotage.celery.metrics import init_celery_metrics
+    from cabotage.celery.routing import configure_routing
+
+    configure_routing(celery_app)
+    init_celery_metrics(celery_app, app)
     return celery_app
 
 
@@ -293,6 +322,10 @@ def create_app():
 
     init_audit(app)
 
+    from cabotage.server.query_stats import init_query_stats
+
+    init_query_stats(app)
+
     mail.init_app(app)
     migrate.init_app(app, db)
 
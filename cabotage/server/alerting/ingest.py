@@ -1,13 +1,31 @@
 """Shared alert ingestion logic used by both the webhook endpoint and
 the reconciliation task."""
 
+import hashlib
+import json
 import logging
+import time
 from datetime import UTC, datetime
 
+from sqlalchemy import (
+    DateTime,
+    String,
+    bindparam,
+    case,
+    exists,
+    func,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import selectinload
+
 from cabotage.server import db
 from cabotage.server.models.projects import (
     Alert,
     Application,
+    ApplicationEnvironment,
     Project,
     activity_plugin,
 )
@@ -17,6 +35,14 @@ log = logging.getLogger(__name__)
 
 Activity = activity_plugin.activity_cls
 
+# Rows per upsert statement, and keys per lookup of existing rows. Each row
+# binds 16 parameters, and Postgres allows at most 65535 in one statement.
+UPSERT_BATCH_SIZE = 1000
+
+
+def _alerts_table():
+    return db.metadata.tables[Alert.__tablename__]
+
 
 def _record_activity(verb, alert, application=None):
     """Record an Activity entry for an alert state change."""
@@ -57,6 +83,30 @@ def parse_alertmanager_timestamp(ts):
         return None
 
 
+def alert_content_hash(status, ends_at, labels, annotations, generator_url):
+    """Hash of the alert fields Alertmanager owns.
+
+    Reconciliation compares this against the stored hash to skip writing
+    alerts that haven't changed since the last poll. The ``endsAt`` of a
+    firing alert is only a projected expiry that moves on every evaluation,
+    so it is ignored until the alert resolves.
+    """
+    if status != "resolved":
+        ends_at = None
+    payload = json.dumps(
+        [
+            status,
+            ends_at.isoformat() if ends_at else None,
+            labels,
+            annotations,
+            generator_url,
+        ],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
 def _resolve_app_env_from_namespace(application, namespace):
     """Try to resolve a specific ApplicationEnvironment from the namespace.
 
@@ -128,39 +178,34 @@ def _resolve_by_deployment(labels):
     if not deployment_name:
         return None, None
 
-    # Try each possible split of deployment_name into (project_k8s, app_k8s)
-    # and query with exact column equality (index-friendly). This avoids a
-    # SQL concat expression which prevents index usage.
-    parts = deployment_name.split("-")
-    for i in range(1, len(parts)):
-        proj_k8s = "-".join(parts[:i])
-        app_k8s = "-".join(parts[i:])
-
-        query = (
-            Application.query.join(Project)
-            .join(Project.organization)
-            .filter(
-                Application.deleted_at.is_(None),
-                Project.k8s_identifier == proj_k8s,
-                Application.k8s_identifier == app_k8s,
-            )
-        )
+    query = Application.query.filter(
+        Application.deleted_at.is_(None),
+        Application.resource_prefix == deployment_name,
+    )
 
-        if namespace:
-            for application in query.all():
-                app_env, matched = _resolve_app_env_from_namespace(
-                    application, namespace
-                )
-                if matched:
-                    return application, app_env
-        else:
-            application = query.first()
-            if application:
-                return application, application.default_app_env
+    if namespace:
+        for application in query.all():
+            app_env, matched = _resolve_app_env_from_namespace(application, namespace)
+            if matched:
+                return application, app_env
+    else:
+        application = query.first()
+        if application:
+            return application, application.default_app_env
 
     return None, None
 
 
+def _hyphen_substrings(name):
+    """Every run of whole hyphen-delimited parts of ``name``."""
+    parts = name.split("-")
+    return {
+        "-".join(parts[i:j])
+        for i in range(len(parts))
+        for j in range(i + 1, len(parts) + 1)
+    }
+
+
 def _resolve_by_traefik_service(labels):
     """Resolve via Traefik service label (ingress-level alerts).
 
@@ -169,8 +214,9 @@ def _resolve_by_traefik_service(labels):
 
     The resource_prefix is safe_k8s_name(project.k8s_identifier, app.k8s_identifier).
 
-    We match using hyphen-delimited boundaries to avoid false positives where
-    one app's k8s_identifier is a prefix of another's (e.g. "foo" vs "foobar").
+    Candidates are built from whole hyphen-delimited runs of the router name,
+    so "proj-foo" won't match "proj-foobar", and looked up in one query
+    against the indexed resource_prefix column.
     """
     service = labels.get("service", "")
     if not service or "@" not in service:
@@ -178,19 +224,10 @@ def _resolve_by_traefik_service(labels):
 
     router_name = service.split("@")[0]
 
-    # Wrap with delimiters so "proj-foo" won't match "proj-foobar"
-    resource_prefix = Project.k8s_identifier + "-" + Application.k8s_identifier
-    application = (
-        Application.query.join(Project)
-        .join(Project.organization)
-        .filter(
-            Application.deleted_at.is_(None),
-            db.literal(f"-{router_name}-").contains(
-                db.func.concat("-", resource_prefix, "-")
-            ),
-        )
-        .first()
-    )
+    application = Application.query.filter(
+        Application.deleted_at.is_(None),
+        Application.resource_prefix.in_(_hyphen_substrings(router_name)),
+    ).first()
     if application:
         namespace = labels.get("namespace")
         app_env, _matched = _resolve_app_env_from_namespace(application, namespace)
@@ -198,14 +235,73 @@ def _resolve_by_traefik_service(labels):
     return None, None
 
 
-def resolve_application(labels):
-    """Try to resolve an Application and ApplicationEnvironment from alert labels.
+RESOLUTION_CACHE_TTL = 60
+RESOLUTION_CACHE_MAX_ENTRIES = 4096
 
-    Tries in order:
-    1. Explicit slug labels (label_organization, label_project, label_application)
-    2. Deployment name + namespace (pod-level alerts like OOMKilled, CrashLoop)
-    3. Traefik service name (ingress-level alerts like high error rate)
+# Only these labels influence resolution, so they form the cache key.
+_RESOLUTION_LABELS = (
+    "label_organization",
+    "label_project",
+    "label_application",
+    "deployment",
+    "namespace",
+    "service",
+)
+
+
+class ResolutionCache:
+    """Short-lived cache of alert labels -> (application_id, app_env_id).
+
+    Alert bursts and the reconcile loop resolve the same handful of label
+    sets over and over; this keeps those to a primary-key lookup. Misses are
+    cached too, so alerts for unknown workloads don't hit the database on
+    every poll.
     """
+
+    def __init__(
+        self, ttl=RESOLUTION_CACHE_TTL, max_entries=RESOLUTION_CACHE_MAX_ENTRIES
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+
+    @staticmethod
+    def key(labels):
+        return tuple(labels.get(name) for name in _RESOLUTION_LABELS)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key, application_id, app_env_id):
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+        self._entries[key] = (time.monotonic() + self.ttl, (application_id, app_env_id))
+
+    def discard(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+resolution_cache = ResolutionCache()
+
+
+@listens_for(Application, "after_insert")
+@listens_for(ApplicationEnvironment, "after_insert")
+def _invalidate_resolution_cache(mapper, connection, target):
+    # A new app or app env can turn a cached miss into a match.
+    resolution_cache.clear()
+
+
+def _resolve_uncached(labels):
     for resolver in (
         _resolve_by_slug_labels,
         _resolve_by_deployment,
@@ -218,6 +314,43 @@ def resolve_application(labels):
     return None, None
 
 
+def resolve_application(labels):
+    """Try to resolve an Application and ApplicationEnvironment from alert labels.
+
+    Tries in order:
+    1. Explicit slug labels (label_organization, label_project, label_application)
+    2. Deployment name + namespace (pod-level alerts like OOMKilled, CrashLoop)
+    3. Traefik service name (ingress-level alerts like high error rate)
+
+    Results are memoized in ``resolution_cache``.
+    """
+    key = ResolutionCache.key(labels)
+    cached = resolution_cache.get(key)
+    if cached is not None:
+        application_id, app_env_id = cached
+        if application_id is None:
+            return None, None
+        application = db.session.get(Application, application_id)
+        app_env = (
+            db.session.get(ApplicationEnvironment, app_env_id) if app_env_id else None
+        )
+        if (
+            application is not None
+            and application.deleted_at is None
+            and (app_env_id is None or app_env is not None)
+        ):
+            return application, app_env
+        resolution_cache.discard(key)
+
+    application, app_env = _resolve_uncached(labels)
+    resolution_cache.set(
+        key,
+        application.id if application else None,
+        app_env.id if app_env else None,
+    )
+    return application, app_env
+
+
 def upsert_alert(
     *,
     fingerprint,
@@ -243,6 +376,9 @@ def upsert_alert(
     application, app_env = resolve_application(labels)
     app_id = application.id if application else None
     app_env_id = app_env.id if app_env else None
+    content_hash = alert_content_hash(
+        status, ends_at, labels, annotations, generator_url
+    )
 
     existing = Alert.query.filter_by(
         fingerprint=fingerprint,
@@ -257,6 +393,7 @@ def upsert_alert(
         existing.ends_at = ends_at
         existing.labels = labels
         existing.annotations = annotations
+        existing.content_hash = content_hash
         if app_id and not existing.application_id:
             existing.application_id = app_id
             existing.application_environment_id = app_env_id
@@ -279,6 +416,7 @@ def upsert_alert(
             receiver=receiver,
             application_id=app_id,
             application_environment_id=app_env_id,
+            content_hash=content_hash,
         )
         db.session.add(alert)
         if status == "firing":
@@ -287,3 +425,200 @@ def upsert_alert(
             return True, alert.id
 
     return True, None
+
+
+def bulk_upsert_alerts(alerts):
+    """Set-based ``upsert_alert`` for a batch of alerts.
+
+    ``alerts`` is a list of dicts with the same keys ``upsert_alert`` takes.
+    Existing rows are read in batches, alerts whose content hash and
+    application resolution are unchanged are skipped, and everything else
+    is written with ``INSERT ... ON CONFLICT DO UPDATE``. Resolved
+    alerts are never reopened.
+
+    Rows written here bypass the ORM, so they don't get alerts_version
+    history; state changes are still recorded as Activity.
+
+    Returns the ids of alerts that need a notification dispatched.
+    """
+    batch = {}
+    for alert in alerts:
+        if not alert["starts_at"]:
+            log.warning("Alert missing startsAt, skipping: %s", alert["fingerprint"])
+            continue
+        batch[(alert["fingerprint"], alert["starts_at"])] = alert
+    if not batch:
+        return []
+
+    keys = list(batch)
+    existing = {}
+    for start in range(0, len(keys), UPSERT_BATCH_SIZE):
+        existing.update(
+            ((row.fingerprint, row.starts_at), row)
+            for row in db.session.query(
+                Alert.id,
+                Alert.fingerprint,
+                Alert.starts_at,
+                Alert.status,
+                Alert.content_hash,
+                Alert.application_id,
+                Alert.last_notified_at,
+            ).filter(
+                tuple_(Alert.fingerprint, Alert.starts_at).in_(
+                    keys[start : start + UPSERT_BATCH_SIZE]
+                )
+            )
+        )
+
+    now = datetime.now(UTC).replace(tzinfo=None)
+    rows = []
+    new_firing = {}
+    newly_resolved = []
+    dispatch_ids = []
+    for key, alert in batch.items():
+        prior = existing.get(key)
+        if prior is not None and prior.status == "resolved":
+            continue
+
+        application = app_env = None
+        if prior is None or prior.application_id is None:
+            application, app_env = resolve_application(alert["labels"])
+        content_hash = alert_content_hash(
+            alert["status"],
+            alert["ends_at"],
+            alert["labels"],
+            alert["annotations"],
+            alert.get("generator_url"),
+        )
+
+        if prior is not None:
+            if prior.status == "firing":
+                if alert["status"] == "resolved":
+                    newly_resolved.append(prior.id)
+                elif alert["status"] == "firing" and not prior.last_notified_at:
+                    dispatch_ids.append(prior.id)
+            if prior.content_hash == content_hash and application is None:
+                continue
+        elif alert["status"] == "firing":
+            new_firing[key] = application
+
+        rows.append(
+            {
+                "fingerprint": alert["fingerprint"],
+                "status": alert["status"],
+                "alertname": alert["alertname"],
+                "labels": alert["labels"],
+                "annotations": alert["annotations"],
+                "starts_at": alert["starts_at"],
+                "ends_at": alert["ends_at"],
+                "generator_url": alert.get("generator_url"),
+                "group_key": alert.get("group_key"),
+                "receiver": alert.get("receiver"),
+                "application_id": application.id if application else None,
+                "application_environment_id": app_env.id if app_env else None,
+                "content_hash": content_hash,
+                "created": now,
+                "updated": now,
+                "version_id": 1,
+            }
+        )
+
+    inserted = {}
+    table = _alerts_table()
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        stmt = postgresql.insert(table).values(rows[start : start + UPSERT_BATCH_SIZE])
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.fingerprint, table.c.starts_at],
+            set_={
+                "status": excluded.status,
+                "ends_at": excluded.ends_at,
+                "labels": excluded.labels,
+                "annotations": excluded.annotations,
+                "content_hash": excluded.content_hash,
+                "application_id": func.coalesce(
+                    table.c.application_id, excluded.application_id
+                ),
+                "application_environment_id": case(
+                    (
+                        table.c.application_id.is_(None),
+                        excluded.application_environment_id,
+                    ),
+                    else_=table.c.application_environment_id,
+                ),
+                "updated": excluded.updated,
+                "version_id": table.c.version_id + 1,
+            },
+            where=table.c.status != "resolved",
+        ).returning(table.c.id, table.c.fingerprint, table.c.starts_at)
+        for row in db.session.execute(stmt):
+            inserted[(row.fingerprint, row.starts_at)] = row.id
+
+    activity_ids = [inserted[key] for key in new_firing if key in inserted]
+    activity_ids += newly_resolved
+    if activity_ids:
+        loaded = Alert.query.options(selectinload(Alert.application)).filter(
+            Alert.id.in_(activity_ids)
+        )
+        by_id = {alert.id: alert for alert in loaded}
+        for key, application in new_firing.items():
+            if key in inserted:
+                _record_activity("firing", by_id[inserted[key]], application)
+                dispatch_ids.append(inserted[key])
+        for alert_id in newly_resolved:
+            alert = by_id[alert_id]
+            _record_activity("resolved", alert, alert.application)
+            dispatch_ids.append(alert_id)
+
+    return dispatch_ids
+
+
+def resolve_missing_alerts(seen):
+    """Resolve firing alerts whose ``(fingerprint, starts_at)`` isn't in ``seen``.
+
+    Runs as a single ``UPDATE ... WHERE NOT EXISTS`` against the active set
+    and returns the ids of the alerts it resolved.
+    """
+    now = datetime.now(UTC).replace(tzinfo=None)
+    table = _alerts_table()
+    active = (
+        func.unnest(
+            bindparam(
+                "fingerprints",
+                [fingerprint for fingerprint, _ in seen],
+                type_=postgresql.ARRAY(String),
+            ),
+            bindparam(
+                "starts_ats",
+                [starts_at for _, starts_at in seen],
+                type_=postgresql.ARRAY(DateTime),
+            ),
+        )
+        .table_valued("fingerprint", "starts_at")
+        .render_derived()
+    )
+    stmt = (
+        update(table)
+        .where(
+            table.c.status == "firing",
+            ~exists().where(
+                active.c.fingerprint == table.c.fingerprint,
+                active.c.starts_at == table.c.starts_at,
+            ),
+        )
+        .values(
+            status="resolved",
+            ends_at=now,
+            updated=now,
+            version_id=table.c.version_id + 1,
+        )
+        .returning(table.c.id)
+    )
+    resolved_ids = [row.id for row in db.session.execute(stmt)]
+    if resolved_ids:
+        resolved = Alert.query.options(selectinload(Alert.application)).filter(
+            Alert.id.in_(resolved_ids)
+        )
+        for alert in resolved:
+            _record_activity("resolved", alert, alert.application)
+    return resolved_ids
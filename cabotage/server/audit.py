@@ -1,6 +1,18 @@
+"""Audit events for authentication and MFA changes.
+
+Signal handlers queue events for the current request. After the response is
+built they are appended to a redis stream outbox, and the
+``drain_audit_outbox`` task batch-inserts them as Activity rows, so request
+latency doesn't include audit bookkeeping. If redis is unavailable the
+events are written synchronously instead.
+"""
+
 import datetime
+import json
+import logging
 import threading
 
+import redis
 from flask import request as flask_request
 from flask_login import user_logged_out
 from flask_security import (
@@ -12,6 +24,12 @@ from flask_security import (
     wan_registered,
 )
 
+from cabotage.utils.build_log_stream import get_redis_client
+
+log = logging.getLogger(__name__)
+
+OUTBOX_KEY = "audit:outbox"
+
 _queue = threading.local()
 
 
@@ -51,12 +69,91 @@ def _on_mfa(action):
     return handler
 
 
-def init_audit(app):
+def append_to_outbox(redis_client, events):
+    pipe = redis_client.pipeline(transaction=False)
+    for evt in events:
+        pipe.xadd(OUTBOX_KEY, {"event": json.dumps(evt)})
+    pipe.execute()
+
+
+def write_audit_events(events):
+    """Insert Activity rows for queued audit events in one batch.
+
+    Each event gets its own continuum transaction row so ``issued_at`` and
+    ``remote_addr`` reflect when and where it happened, not when the outbox
+    was drained. The caller commits.
+    """
+    import sqlalchemy as sa
+    from sqlalchemy_continuum import transaction_class, version_class
+
     from cabotage.server import db
     from cabotage.server.models.auth import User
     from cabotage.server.models.projects import activity_plugin
 
     Activity = activity_plugin.activity_cls
+    Transaction = transaction_class(User)
+    UserVersion = version_class(User)
+
+    user_ids = {evt["user_id"] for evt in events}
+    known = {
+        str(user_id)
+        for (user_id,) in db.session.execute(
+            sa.select(User.id).where(User.id.in_(user_ids))
+        )
+    }
+    events = [evt for evt in events if evt["user_id"] in known]
+    if not events:
+        return 0
+
+    user_tx_ids = {
+        str(user_id): tx_id
+        for user_id, tx_id in db.session.execute(
+            sa.select(UserVersion.id, sa.func.max(UserVersion.transaction_id))
+            .where(UserVersion.id.in_(known))
+            .group_by(UserVersion.id)
+        )
+    }
+
+    tx_ids = db.session.scalars(
+        sa.insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+        [
+            {
+                "issued_at": datetime.datetime.fromisoformat(evt["timestamp"])
+                .astimezone(datetime.timezone.utc)
+                .replace(tzinfo=None),
+                "remote_addr": evt.get("remote_addr"),
+                "user_id": evt["user_id"],
+            }
+            for evt in events
+        ],
+    ).all()
+
+    rows = []
+    for evt, tx_id in zip(events, tx_ids, strict=True):
+        data = {
+            "user_id": evt["user_id"],
+            "timestamp": evt["timestamp"],
+        }
+        if evt.get("action"):
+            data["action"] = evt["action"]
+        if evt.get("remote_addr"):
+            data["remote_addr"] = evt["remote_addr"]
+        rows.append(
+            {
+                "verb": evt["verb"],
+                "transaction_id": tx_id,
+                "data": data,
+                "object_type": "User",
+                "object_id": evt["user_id"],
+                "object_tx_id": user_tx_ids.get(evt["user_id"]),
+            }
+        )
+    db.session.execute(sa.insert(Activity), rows)
+    return len(rows)
+
+
+def init_audit(app):
+    from cabotage.server import db
 
     @app.after_request
     def commit_audit_events(response):
@@ -65,20 +162,12 @@ def init_audit(app):
             return response
         _queue.events = []
         try:
-            for evt in events:
-                user = db.session.get(User, evt["user_id"])
-                if not user:
-                    continue
-                data = {
-                    "user_id": evt["user_id"],
-                    "timestamp": evt["timestamp"],
-                }
-                if evt["action"]:
-                    data["action"] = evt["action"]
-                if evt.get("remote_addr"):
-                    data["remote_addr"] = evt["remote_addr"]
-                a = Activity(verb=evt["verb"], object=user, data=data)
-                db.session.add(a)
+            append_to_outbox(get_redis_client(app.config["CELERY_BROKER_URL"]), events)
+            return response
+        except redis.RedisError:
+            log.warning("Audit outbox unavailable, writing inline", exc_info=True)
+        try:
+            write_audit_events(events)
             db.session.commit()
         except Exception:
             db.session.rollback()
@@ -4,6 +4,8 @@ Given a page of AuditLog entries, batch-fetches version records from
 sqlalchemy-continuum and computes field-level "what changed" diffs.
 """
 
+import csv as _csv
+import io as _io
 import json as _json
 from collections import defaultdict
 
@@ -218,6 +220,21 @@ def _compute_scale_changes(entries):
     return result
 
 
+def _compute_config_import_changes(entries):
+    """Extract variable names from raw_data for bulk configuration imports."""
+    result = {}
+    for e in entries:
+        raw = e.raw_data or {}
+        changes = [
+            {"field": f"variables {key}", "old": None, "new": ", ".join(raw[key])}
+            for key in ("created", "updated")
+            if raw.get(key)
+        ]
+        if changes:
+            result[e.id] = changes
+    return result
+
+
 def _compute_config_changes(entries):
     """Compute changes for Configuration create/edit events from version table."""
     if not entries:
@@ -602,6 +619,12 @@ def compute_audit_changes(entries):
         + groups.get(("Configuration", "delete"), [])
     )
     result.update(_compute_config_changes(config_entries))
+    result.update(
+        _compute_config_import_changes(
+            groups.get(("Application", "import"), [])
+            + groups.get(("Environment", "import"), [])
+        )
+    )
 
     # Ingress edits → version table + host/path version diffs
     result.update(_compute_ingress_changes(groups.get(("Ingress", "edit"), [])))
@@ -620,3 +643,96 @@ def compute_audit_changes(entries):
     result.update(_compute_release_changes(release_entries))
 
     return result
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_FIELDS = (
+    "id",
+    "timestamp",
+    "verb",
+    "detail",
+    "object_type",
+    "object_id",
+    "object_name",
+    "organization_id",
+    "project_id",
+    "project_name",
+    "application_id",
+    "app_name",
+    "application_environment_id",
+    "actor_username",
+    "actor_email",
+    "remote_addr",
+)
+
+
+def _export_record(entry, changes):
+    record = {}
+    for field in EXPORT_FIELDS:
+        value = getattr(entry, field)
+        if value is not None and not isinstance(value, (int, str)):
+            value = value.isoformat() if hasattr(value, "isoformat") else str(value)
+        record[field] = value
+    record["changes"] = changes
+    return record
+
+
+def iter_audit_export_batches(query, batch_size=EXPORT_BATCH_SIZE):
+    """Yield export records for ``query`` in id order, one batch at a time.
+
+    Pages by keyset on id so each batch is an index range scan, computes
+    change details per batch, and expunges the rows afterwards so memory
+    stays bounded regardless of how much history is exported. The
+    transaction is ended before each batch is handed out, so a slow
+    client doesn't hold one open for the whole download.
+    """
+    from cabotage.server.models.audit import AuditLog
+
+    last_id = None
+    while True:
+        q = query
+        if last_id is not None:
+            q = q.filter(AuditLog.id > last_id)
+        entries = q.order_by(AuditLog.id.asc()).limit(batch_size).all()
+        if not entries:
+            db.session.commit()
+            return
+        entry_changes = compute_audit_changes(entries)
+        batch = [_export_record(e, entry_changes.get(e.id, [])) for e in entries]
+        last_id = entries[-1].id
+        for e in entries:
+            db.session.expunge(e)
+        db.session.commit()
+        yield batch
+        if len(entries) < batch_size:
+            return
+
+
+def stream_audit_export(query, fmt, batch_size=EXPORT_BATCH_SIZE):
+    """Serialize an audit log query as NDJSON or CSV text chunks."""
+    if fmt == "csv":
+        buf = _io.StringIO()
+        writer = _csv.DictWriter(buf, fieldnames=EXPORT_FIELDS + ("changes",))
+        writer.writeheader()
+        yield buf.getvalue()
+        for batch in iter_audit_export_batches(query, batch_size):
+            buf.seek(0)
+            buf.truncate()
+            for record in batch:
+                writer.writerow(
+                    {
+                        **record,
+                        "changes": _json.dumps(record["changes"])
+                        if record["changes"]
+                        else "",
+                    }
+                )
+            yield buf.getvalue()
+    else:
+        for batch in iter_audit_export_batches(query, batch_size):
+            yield "".join(_json.dumps(record, default=str) + "\n" for record in batch)
@@ -0,0 +1,243 @@
+"""Metric-driven scaling of application processes.
+
+A policy in ``ApplicationEnvironment.autoscale_policies`` keeps a process
+between ``min`` and ``max`` pods and sets a per-pod ``target`` for one
+metric:
+
+- ``cpu``: average CPU use, as a percentage of the pod class's CPU request
+- ``rps``: requests per second per pod, as seen by the ingress
+
+:func:`evaluate_process` turns one observation into a decision, and is
+deliberately reluctant to act:
+
+- A reading within ``tolerance`` of the target changes nothing.
+- Scale-downs wait until recommendations have stayed below the current
+  count for ``scale_down_window`` seconds. They then go only as low as the
+  highest recommendation in that window.
+- A process that was just scaled is left alone for ``cooldown`` seconds.
+
+Policies with ``dry_run`` set only record what they would have done.
+"""
+
+import math
+import time
+
+from cabotage.server.models.projects import DEFAULT_POD_CLASS, pod_classes
+from cabotage.server.observe import (
+    REGEX_META,
+    build_observe_queries,
+    collect_traefik_svc_names,
+    compute_observe_namespace,
+    compute_observe_prefix,
+    traefik_svc_label,
+)
+
+METRICS = ("cpu", "rps")
+
+# Stay well clear of anything that could exhaust a namespace's quota.
+MAX_PROCESS_COUNT = 100
+
+
+class AutoscalePolicyError(ValueError):
+    pass
+
+
+def validate_policy(policy):
+    """Return a normalized copy of ``policy``, or raise AutoscalePolicyError."""
+    if not isinstance(policy, dict):
+        raise AutoscalePolicyError("policy must be an object")
+    metric = policy.get("metric")
+    if metric not in METRICS:
+        raise AutoscalePolicyError(f"metric must be one of: {', '.join(METRICS)}")
+    try:
+        minimum = int(policy.get("min", 1))
+        maximum = int(policy["max"])
+        target = float(policy["target"])
+    except KeyError as exc:
+        raise AutoscalePolicyError(f"{exc.args[0]} is required")
+    except (TypeError, ValueError):
+        raise AutoscalePolicyError("min, max and target must be numbers")
+    if minimum < 1:
+        raise AutoscalePolicyError("min must be at least 1")
+    if not minimum <= maximum <= MAX_PROCESS_COUNT:
+        raise AutoscalePolicyError(f"max must be between min and {MAX_PROCESS_COUNT}")
+    if not target > 0:
+        raise AutoscalePolicyError("target must be greater than 0")
+    return {
+        "metric": metric,
+        "target": target,
+        "min": minimum,
+        "max": maximum,
+        "dry_run": bool(policy.get("dry_run", False)),
+    }
+
+
+def cpu_request_cores(pod_class):
+    request = pod_classes.get(pod_class, pod_classes[DEFAULT_POD_CLASS])["cpu"][
+        "requests"
+    ]
+    if request.endswith("m"):
+        return int(request[:-1]) / 1000
+    return float(request)
+
+
+def per_pod_value(policy, usage, current, pod_class=DEFAULT_POD_CLASS):
+    """Scale a process-wide ``usage`` to the per-pod unit of the policy."""
+    if policy["metric"] == "cpu":
+        return 100 * usage / (current * cpu_request_cores(pod_class))
+    return usage / current
+
+
+def recommend(policy, current, observed, tolerance):
+    """The count that would bring ``observed`` back to the policy's target."""
+    ratio = observed / policy["target"]
+    if abs(ratio - 1) <= tolerance:
+        desired = current
+    else:
+        desired = math.ceil(current * ratio)
+    return max(policy["min"], min(policy["max"], desired))
+
+
+def evaluate_process(
+    policy,
+    current,
+    usage,
+    state,
+    *,
+    tolerance,
+    scale_down_window,
+    cooldown,
+    pod_class=DEFAULT_POD_CLASS,
+    now=None,
+):
+    """Decide whether one process should be scaled.
+
+    ``usage`` is the process total from the metrics source (CPU cores, or
+    requests per second), or None when there's no data. ``state`` is what
+    the previous evaluation returned, or ``{}``.
+
+    Returns ``(desired, state)``. ``desired`` is None when the process
+    should be left as it is.
+    """
+    now = time.time() if now is None else now
+    state = dict(state)
+    state["history"] = [
+        entry
+        for entry in state.get("history", [])
+        if entry[0] > now - scale_down_window
+    ]
+    state["evaluated_at"] = now
+    state["proposed"] = None
+    # A process someone scaled to zero is switched off, not idle.
+    if usage is None or current == 0:
+        state["observed"] = state["recommended"] = None
+        return None, state
+
+    observed = per_pod_value(policy, usage, current, pod_class)
+    recommended = recommend(policy, current, observed, tolerance)
+    state["observed"] = round(observed, 3)
+    state["recommended"] = recommended
+    state["history"].append([now, recommended])
+
+    if recommended < current:
+        below_since = state.get("below_since") or now
+        state["below_since"] = below_since
+        if now - below_since < scale_down_window:
+            return None, state
+        desired = max(n for ts, n in state["history"] if ts >= below_since)
+    else:
+        state["below_since"] = None
+        desired = recommended
+
+    if desired == current:
+        return None, state
+    last_scaled_at = state.get("last_scaled_at")
+    if last_scaled_at is not None and now - last_scaled_at < cooldown:
+        return None, state
+    state["proposed"] = desired
+    return desired, state
+
+
+_APP_CONTAINER_FILTER = (
+    'container!="", container!="POD"'
+    ', container!="cabotage-sidecar"'
+    ', container!="cabotage-sidecar-tls"'
+    ', container!="cabotage-enroller"'
+)
+
+
+class MimirMetricsSource:
+    """Process usage from Mimir, built with the same queries as Observe."""
+
+    def __init__(self, window=60):
+        self.window = window
+
+    def process_usage(self, app_env, metric, processes):
+        """Return ``{process_name: usage}`` for the given processes.
+
+        Processes without data are left out.
+        """
+        namespace = compute_observe_namespace(app_env.application, app_env)
+        prefix = compute_observe_prefix(app_env.application)
+        escaped_prefix = REGEX_META.sub(r"\\\g<0>", prefix)
+        step = self.window
+        end = int(time.time())
+        start = end - step
+
+        if metric == "cpu":
+            labels = (
+                f'namespace="{namespace}", pod=~"{escaped_prefix}-.*", '
+                f"{_APP_CONTAINER_FILTER}"
+            )
+            result, _ = build_observe_queries(
+                "cpu",
+                "process",
+                labels,
+                None,
+                step,
+                start,
+                end,
+                step,
+                f"{escaped_prefix}-(.*)-[a-z0-9]+-[a-z0-9]+",
+                "by (process)",
+                f"{step}s",
+            )
+            return {
+                series["metric"].get("process"): float(series["values"][-1][1])
+                for series in result or []
+                if series.get("values") and series["metric"].get("process") in processes
+            }
+
+        usage = {}
+        for process_name in processes:
+            traefik_svc = traefik_svc_label(
+                collect_traefik_svc_names(
+                    [app_env],
+                    lambda ae: namespace,
+                    lambda ae: prefix,
+                    process_filter=process_name,
+                )
+            )
+            if traefik_svc is None:
+                continue
+            result, _ = build_observe_queries(
+                "requests",
+                "total",
+                "",
+                traefik_svc,
+                step,
+                start,
+                end,
+                step,
+                "",
+                "",
+                f"{step}s",
+            )
+            if result:
+                # One series per status class, each an increase over the step.
+                usage[process_name] = sum(
+                    float(series["values"][-1][1])
+                    for series in result
+                    if series.get("values")
+                ) / max(step, 60)
+        return usage
@@ -109,6 +109,8 @@ class Config(metaclass=MetaFlaskEnv):
     CONSUL_VERIFY = False
     CONSUL_CERT = None
     CONSUL_PREFIX = "cabotage"
+    # Consul rejects transactions with more than 64 operations.
+    CONSUL_TXN_MAX_OPS = 64
     VAULT_TOKEN = None
     VAULT_TOKEN_UNWRAP = False
     VAULT_URL = "http://vault:8200"
@@ -117,16 +119,38 @@ class Config(metaclass=MetaFlaskEnv):
     VAULT_PREFIX = "cabotage-secrets"
     VAULT_SIGNING_MOUNT = "transit"
     VAULT_SIGNING_KEY = "cabotage-app"
+    # Parallel Vault writes when importing many secrets at once.
+    VAULT_WRITE_CONCURRENCY = 8
     REGISTRY_BUILD = "registry:5001"
     REGISTRY_PULL = "registry:5001"
     REGISTRY_SECURE = False
     REGISTRY_VERIFY = False
     REGISTRY_AUTH_SECRET = "v3rys3cur3"  # nosec
+    REGISTRY_PRUNE_RETAIN = 5
+    REGISTRY_PRUNE_CONCURRENCY = 4
+    REGISTRY_PRUNE_CHUNK_SIZE = 25
     DOCKERHUB_USERNAME = None
     DOCKERHUB_TOKEN = None
+    # Builds running at once, install wide and per organization. Builds over
+    # either limit wait in the build scheduler's queue.
+    BUILD_CONCURRENCY_LIMIT = 20
+    BUILD_ORGANIZATION_CONCURRENCY_LIMIT = 4
     BUILDKITD_URL = "tcp://cabotage-buildkitd:1234"
     BUILDKITD_VERIFY = None
+    # Long-lived buildkitd addresses (a list, or comma separated). When set,
+    # builds run on these daemons instead of one-shot Kubernetes Jobs, and
+    # BUILDKITD_VERIFY is the CA bundle for their TLS connections.
+    BUILDKITD_POOL = None
+    BUILDKITD_POOL_MAX_CONCURRENCY = 2
+    BUILDKITD_POOL_WAIT_TIMEOUT = 1800
+    # Builds that outlive this lose their slot.
+    BUILDKITD_POOL_LEASE_TIMEOUT = 3600
     BUILDKIT_IMAGE = "moby/buildkit:v0.28.0-rootless"
+    # Shared ReadWriteMany claim in the build namespace for content-addressed
+    # source snapshots; None has BuildKit clone the repository every build.
+    BUILD_SOURCE_CACHE_CLAIM = None
+    BUILD_SOURCE_CACHE_MAX_MEGABYTES = 20480
+    BUILD_SOURCE_CACHE_IMAGE = "alpine/git:2.47.2"
     CELERY_BROKER_URL = "redis://redis:6379"
     CELERY_RESULT_BACKEND = "redis://redis:6379"
     KUBERNETES_ENABLED = False
@@ -154,6 +178,9 @@ class Config(metaclass=MetaFlaskEnv):
     GITHUB_APP_ID = None
     GITHUB_APP_PRIVATE_KEY = None
     GITHUB_WEBHOOK_SECRET = None
+    # Webhook deliveries are queued and processed in batches; deliveries
+    # arriving within this many seconds share one batch.
+    GITHUB_HOOK_COALESCE_SECONDS = 2
     GITHUB_TOKEN = None
     GITHUB_APP_URL = None
     GITHUB_APP_INSTALL_URL = None
@@ -172,6 +199,16 @@ class Config(metaclass=MetaFlaskEnv):
     MIMIR_TIMEOUT = 5
     MIMIR_URL = None
     MIMIR_VERIFY = None
+    # Processes with an autoscale policy are evaluated against Mimir every
+    # AUTOSCALE_INTERVAL seconds, using usage averaged over
+    # AUTOSCALE_METRIC_WINDOW seconds. Readings within AUTOSCALE_TOLERANCE
+    # of the target are ignored, scale-downs wait AUTOSCALE_SCALE_DOWN_WINDOW
+    # seconds, and a scaled process is left alone for AUTOSCALE_COOLDOWN.
+    AUTOSCALE_INTERVAL = 30
+    AUTOSCALE_METRIC_WINDOW = 60
+    AUTOSCALE_TOLERANCE = 0.1
+    AUTOSCALE_SCALE_DOWN_WINDOW = 300
+    AUTOSCALE_COOLDOWN = 60
     LOKI_LEGACY_TENANT_ID = "fake"
     LOKI_URL = None
     LOKI_VERIFY = None
@@ -183,4 +220,27 @@ class Config(metaclass=MetaFlaskEnv):
     ALERTMANAGER_WEBHOOK_SECRET = None
     ALERTMANAGER_URL = None
     ALERTMANAGER_VERIFY = None
+    # Scope reconciliation polls, e.g. 'cabotage="true"'; separate multiple
+    # matchers with ";". Must cover every alert routed to the webhook, or
+    # those alerts will be resolved by reconciliation.
+    ALERTMANAGER_FILTER = None
+    ALERTMANAGER_RECEIVER = None
+    ALERTMANAGER_POLL_MIN_INTERVAL = 5
+    ALERTMANAGER_POLL_MAX_INTERVAL = 60
+    ALERTMANAGER_FULL_RECONCILE_INTERVAL = 300
     PROXY_FIX_NUM_PROXIES = 1
+    # Serve Prometheus metrics on /metrics, optionally behind a bearer token.
+    METRICS_ENABLED = False
+    METRICS_TOKEN = None
+    # Port for the Celery worker's own metrics exporter; unset disables it.
+    # Set PROMETHEUS_MULTIPROC_DIR too so prefork children are aggregated.
+    METRICS_WORKER_PORT = None
+    # Label pipeline stage metrics by organization slug.
+    METRICS_ORGANIZATION_LABELS = True
+    QUERY_STATS_ENABLED = True
+    # Return X-DB-Query-Count / X-DB-Time-Ms / X-DB-Repeated-Queries headers.
+    QUERY_STATS_HEADERS = False
+    # Log a warning for requests over this many queries, or that run any one
+    # statement this many times.
+    QUERY_STATS_LOG_THRESHOLD = 50
+    QUERY_STATS_REPEAT_THRESHOLD = 10
@@ -1,3 +1,18 @@
+import contextlib
+import contextvars
+import logging
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+
+from cabotage.server.metrics import CONFIG_READS
+
+log = logging.getLogger(__name__)
+
+_read_cache: contextvars.ContextVar["ConfigReadCache | None"] = contextvars.ContextVar(
+    "config_read_cache", default=None
+)
+
+
 class ConfigWriter(object):
     def __init__(self, app=None, consul=None, vault=None):
         self.app = app
@@ -11,6 +26,8 @@ class ConfigWriter(object):
         self.vault = vault
         self.consul_prefix = app.config.get("CONSUL_PREFIX", "cabotage")
         self.vault_prefix = app.config.get("VAULT_PREFIX", "secret/cabotage")
+        self.txn_max_ops = app.config.get("CONSUL_TXN_MAX_OPS", 64)
+        self.vault_write_concurrency = app.config.get("VAULT_WRITE_CONCURRENCY", 8)
 
         app.teardown_appcontext(self.teardown)
 
@@ -20,12 +37,10 @@ class ConfigWriter(object):
     def _config_path_segment(self, k8s_namespace, k8s_resource_prefix):
         return f"/{k8s_namespace}/{k8s_resource_prefix}"
 
-    def write_configuration(self, k8s_namespace, k8s_resource_prefix, configuration):
+    def _key_names(self, k8s_namespace, k8s_resource_prefix, configuration):
         version = configuration.version_id + 1 if configuration.version_id else 1
         path_segment = self._config_path_segment(k8s_namespace, k8s_resource_prefix)
         if configuration.secret:
-            if self.vault is None:
-                raise RuntimeError("No Vault extension configured!")
             config_key_name = (
                 f"{self.vault_prefix}/automation"
                 f"{path_segment}/configuration/"
@@ -36,7 +51,32 @@ class ConfigWriter(object):
                 f"{path_segment}/configuration/"
                 f"{configuration.name}/{version}"
             )
+            return config_key_name, build_key_name
+        config_key_name = (
+            f"{self.consul_prefix}"
+            f"{path_segment}/configuration/"
+            f"{configuration.name}/{version}/{configuration.name}"
+        )
+        return config_key_name, config_key_name
+
+    def _key_slugs(self, configuration, config_key_name, build_key_name):
+        if configuration.secret:
             storage = "vault"
+        else:
+            storage = "consul"
+            config_key_name = "/".join(config_key_name.split("/")[:-1])
+        return {
+            "config_key_slug": f"{storage}:{config_key_name}",
+            "build_key_slug": f"{storage}:{build_key_name}",
+        }
+
+    def write_configuration(self, k8s_namespace, k8s_resource_prefix, configuration):
+        config_key_name, build_key_name = self._key_names(
+            k8s_namespace, k8s_resource_prefix, configuration
+        )
+        if configuration.secret:
+            if self.vault is None:
+                raise RuntimeError("No Vault extension configured!")
             self.vault.vault_connection.write(
                 config_key_name,
                 **{configuration.name: configuration.value},
@@ -49,19 +89,75 @@ class ConfigWriter(object):
         else:
             if self.consul is None:
                 raise RuntimeError("No Consul extension configured!")
-            config_key_name = (
-                f"{self.consul_prefix}"
-                f"{path_segment}/configuration/"
-                f"{configuration.name}/{version}/{configuration.name}"
-            )
-            build_key_name = config_key_name
-            storage = "consul"
             self.consul.consul_connection.kv.put(config_key_name, configuration.value)
-            config_key_name = "/".join(config_key_name.split("/")[:-1])
-        return {
-            "config_key_slug": f"{storage}:{config_key_name}",
-            "build_key_slug": f"{storage}:{build_key_name}",
-        }
+        return self._key_slugs(configuration, config_key_name, build_key_name)
+
+    def write_configurations(self, k8s_namespace, k8s_resource_prefix, configurations):
+        """Write many configurations, returning their key slugs in order.
+
+        Plain values go to Consul in transactions of at most
+        ``txn_max_ops`` keys, secrets are written to Vault concurrently.
+        Every write lands on a new versioned path, so a failure part way
+        through leaves nothing referenced and the whole call can be retried.
+        """
+        key_names = [
+            self._key_names(k8s_namespace, k8s_resource_prefix, configuration)
+            for configuration in configurations
+        ]
+        secret_writes = []
+        consul_ops = []
+        for configuration, (config_key_name, build_key_name) in zip(
+            configurations, key_names, strict=True
+        ):
+            if configuration.secret:
+                secret_writes.append((config_key_name, configuration))
+                if configuration.buildtime:
+                    secret_writes.append((build_key_name, configuration))
+            else:
+                consul_ops.append(
+                    {
+                        "KV": {
+                            "Verb": "set",
+                            "Key": config_key_name,
+                            "Value": b64encode(
+                                configuration.value.encode("utf-8")
+                            ).decode("ascii"),
+                        }
+                    }
+                )
+
+        if consul_ops:
+            if self.consul is None:
+                raise RuntimeError("No Consul extension configured!")
+            consul_client = self.consul.consul_connection
+            for start in range(0, len(consul_ops), self.txn_max_ops):
+                consul_client.txn.put(consul_ops[start : start + self.txn_max_ops])
+
+        if secret_writes:
+            if self.vault is None:
+                raise RuntimeError("No Vault extension configured!")
+            # Fetch the client here, it lives on the request's flask.g.
+            vault_client = self.vault.vault_connection
+            with ThreadPoolExecutor(
+                max_workers=min(self.vault_write_concurrency, len(secret_writes))
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        vault_client.write,
+                        key_name,
+                        **{configuration.name: configuration.value},
+                    )
+                    for key_name, configuration in secret_writes
+                ]
+                for future in futures:
+                    future.result()
+
+        return [
+            self._key_slugs(configuration, config_key_name, build_key_name)
+            for configuration, (config_key_name, build_key_name) in zip(
+                configurations, key_names, strict=True
+            )
+        ]
 
     def read(self, key_slug, build=False, secret=False):
         if secret:
@@ -71,3 +167,88 @@ class ConfigWriter(object):
         if self.consul is None:
             raise RuntimeError("No Consul extension configured!")
         return self.consul.consul_connection.read(key_slug)
+
+
+class ConfigReadCache:
+    """Read-through cache in front of a ConfigWriter's ``read``.
+
+    Lives for one build or deploy (see ``config_read_cache``), so every
+    process and build arg that needs the same key costs one Vault/Consul
+    round trip, and ``prefetch`` can fetch the rest concurrently up front.
+    """
+
+    def __init__(self, reader, max_workers=8):
+        self.reader = reader
+        self.max_workers = max_workers
+        self._values = {}
+
+    @staticmethod
+    def _storage(secret):
+        return "vault" if secret else "consul"
+
+    def read(self, key_slug, build=False, secret=False):
+        key = (key_slug, build, secret)
+        if key in self._values:
+            CONFIG_READS.labels(self._storage(secret), "hit").inc()
+            return self._values[key]
+        CONFIG_READS.labels(self._storage(secret), "miss").inc()
+        value = self.reader.read(key_slug, build=build, secret=secret)
+        self._values[key] = value
+        return value
+
+    def prefetch(self, configurations):
+        """Concurrently read the build-time secrets of ``configurations``.
+
+        Failures are only logged; the key is read again, and the error
+        raised, where the value is actually used.
+        """
+        keys = [
+            (c.build_key_slug.split(":", 1)[1], True, True)
+            for c in configurations
+            if c is not None and c.secret and c.buildtime and c.build_key_slug
+        ]
+        keys = [key for key in dict.fromkeys(keys) if key not in self._values]
+        if not keys:
+            return
+
+        def fetch(key):
+            key_slug, build, secret = key
+            return self.reader.read(key_slug, build=build, secret=secret)
+
+        # Each worker runs in a copy of this context so the app context,
+        # and with it the Vault client on flask.g, is available.
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(keys))
+        ) as executor:
+            futures = {
+                key: executor.submit(contextvars.copy_context().run, fetch, key)
+                for key in keys
+            }
+        for key, future in futures.items():
+            try:
+                self._values[key] = future.result()
+            except Exception:
+                log.warning("Prefetching %s failed", key[0], exc_info=True)
+                continue
+            CONFIG_READS.labels(self._storage(key[2]), "miss").inc()
+
+
+@contextlib.contextmanager
+def config_read_cache(reader):
+    """Cache configuration reads made through ``cached_reader`` in the block."""
+    cache = _read_cache.get()
+    if cache is not None:
+        yield cache
+        return
+    cache = ConfigReadCache(reader)
+    token = _read_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _read_cache.reset(token)
+
+
+def cached_reader(reader):
+    """The active ConfigReadCache, or ``reader`` itself outside of one."""
+    cache = _read_cache.get()
+    return cache if cache is not None else reader
@@ -2,6 +2,7 @@ import os
 
 import consul
 
+from cabotage.server.metrics import instrument_session
 from cabotage.utils.context import modified_environ
 from flask import g
 
@@ -44,6 +45,7 @@ class Consul(object):
                 cert=self.consul_cert,
                 token=self.consul_token,
             )
+        instrument_session(consul_client.http.session, "consul")
         return consul_client
 
     def teardown(self, exception):
@@ -1,7 +1,26 @@
+import time
+
 from flask import g
 
 import kubernetes
 
+from cabotage.server.metrics import kubernetes_resource, observe_external_call
+
+
+class InstrumentedApiClient(kubernetes.client.ApiClient):
+    """ApiClient recording the latency of each API request."""
+
+    def request(self, method, url, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().request(method, url, *args, **kwargs)
+        finally:
+            observe_external_call(
+                "kubernetes",
+                f"{method} {kubernetes_resource(url)}",
+                time.perf_counter() - start,
+            )
+
 
 class Kubernetes(object):
     def __init__(self, app=None):
@@ -24,7 +43,7 @@ class Kubernetes(object):
         app.teardown_appcontext(self.teardown)
 
     def connect_kubernetes(self):
-        kubernetes_client = kubernetes.client.ApiClient()
+        kubernetes_client = InstrumentedApiClient()
         return kubernetes_client
 
     def teardown(self, exception):
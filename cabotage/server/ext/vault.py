@@ -6,9 +6,12 @@ from base64 import (
 )
 
 import hvac
+import requests
 
 from flask import g
 
+from cabotage.server.metrics import instrument_session
+
 from cabotage.utils.cert_hacks import construct_cert_from_public_key
 
 
@@ -48,6 +51,7 @@ class Vault(object):
             token=self.vault_token,
             verify=self.vault_verify,
             cert=self.vault_cert,
+            session=instrument_session(requests.Session(), "vault"),
         )
         return vault_client
 
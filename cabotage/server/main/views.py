@@ -1,8 +1,11 @@
-from flask import current_app, render_template, Blueprint
+import hmac
+
+from flask import Blueprint, Response, abort, current_app, render_template, request
 from flask_login import current_user
 from sqlalchemy import func
 
 from cabotage.server import db
+from cabotage.server import metrics
 from cabotage.server.models.auth import Organization
 from cabotage.server.models.auth_associations import OrganizationMember
 from cabotage.server.models.projects import Application, Deployment, Project
@@ -70,3 +73,16 @@ def home():
 @main_blueprint.route("/about/")
 def about():
     return render_template("main/about.html")
+
+
+@main_blueprint.route("/metrics")
+def prometheus_metrics():
+    if not current_app.config.get("METRICS_ENABLED"):
+        abort(404)
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        auth_header = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(auth_header, f"Bearer {token}"):
+            abort(401)
+    body, content_type = metrics.generate_metrics()
+    return Response(body, content_type=content_type)
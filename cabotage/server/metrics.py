@@ -0,0 +1,206 @@
+"""Prometheus metrics for the web app and Celery workers.
+
+Under gunicorn (and prefork Celery) each process keeps its own values; set
+``PROMETHEUS_MULTIPROC_DIR`` so that scrapes aggregate across processes.
+"""
+
+import contextlib
+import functools
+import os
+import time
+from urllib.parse import urlsplit
+
+import prometheus_client
+from flask import current_app
+from prometheus_client import multiprocess
+
+
+def histogram(name, documentation, labelnames=(), buckets=None):
+    kwargs = {"buckets": buckets} if buckets else {}
+    return prometheus_client.Histogram(name, documentation, labelnames, **kwargs)
+
+
+def counter(name, documentation, labelnames=()):
+    return prometheus_client.Counter(name, documentation, labelnames)
+
+
+def gauge(name, documentation, labelnames=()):
+    # Every process sets the same value, so the latest write is the answer.
+    return prometheus_client.Gauge(
+        name, documentation, labelnames, multiprocess_mode="mostrecent"
+    )
+
+
+def _registry():
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prometheus_client.REGISTRY
+
+
+def generate_metrics():
+    """Return ``(body, content_type)`` for a scrape of this process."""
+    body = prometheus_client.generate_latest(_registry())
+    return body, prometheus_client.CONTENT_TYPE_LATEST
+
+
+def start_exporter(port, addr="0.0.0.0"):  # nosec B104
+    """Serve ``/metrics`` over HTTP from a background thread.
+
+    Used by Celery workers, which have no web server of their own.
+    """
+    prometheus_client.start_http_server(port, addr=addr, registry=_registry())
+
+
+def mark_process_dead(pid):
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
+
+
+REQUEST_DB_QUERIES = histogram(
+    "cabotage_request_db_queries",
+    "SQL statements executed per request.",
+    ["endpoint"],
+    buckets=(1, 2, 5, 10, 20, 35, 50, 75, 100, 200, 500),
+)
+REQUEST_DB_SECONDS = histogram(
+    "cabotage_request_db_seconds",
+    "Time spent executing SQL per request.",
+    ["endpoint"],
+)
+REQUEST_DB_REPEATED_QUERIES = counter(
+    "cabotage_request_db_repeated_queries_total",
+    "Executions of a statement already run earlier in the same request.",
+    ["endpoint"],
+)
+
+TASK_QUEUE_WAIT_SECONDS = histogram(
+    "cabotage_task_queue_wait_seconds",
+    "Time between a Celery task being published and a worker starting it.",
+    ["task"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+TASK_DURATION_SECONDS = histogram(
+    "cabotage_task_duration_seconds",
+    "Celery task run time.",
+    ["task", "state"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+PIPELINE_STAGE_SECONDS = histogram(
+    "cabotage_pipeline_stage_seconds",
+    "Duration of image build, release build and deploy stages.",
+    ["stage", "organization", "outcome"],
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 900, 1200, 1800, 3600),
+)
+EXTERNAL_CALL_SECONDS = histogram(
+    "cabotage_external_call_seconds",
+    "Latency of calls to Kubernetes, GitHub, Vault and Consul.",
+    ["service", "operation"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+CONFIG_READS = counter(
+    "cabotage_config_reads_total",
+    "Configuration reads during builds and deploys, by cache result.",
+    ["storage", "result"],
+)
+RECONCILE_SECONDS = histogram(
+    "cabotage_reconcile_seconds",
+    "Duration of one pass of a periodic reconcile loop.",
+    ["loop"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+BUILD_QUEUE_WAIT_SECONDS = histogram(
+    "cabotage_build_queue_wait_seconds",
+    "Time builds spent in the build scheduler's queue before starting.",
+    ["kind", "priority"],
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 900, 1800, 3600),
+)
+BUILD_QUEUE_DEPTH = gauge(
+    "cabotage_build_queue_depth",
+    "Builds waiting in the build scheduler's queue.",
+    ["priority"],
+)
+BUILDS_RUNNING = gauge(
+    "cabotage_builds_running",
+    "Builds the build scheduler has admitted and not yet seen finish.",
+)
+RECONCILE_ROWS = histogram(
+    "cabotage_reconcile_rows",
+    "Rows or objects examined by one pass of a periodic reconcile loop.",
+    ["loop"],
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+
+
+@contextlib.contextmanager
+def time_stage(stage, organization=None):
+    """Time a pipeline stage, labelled by organization slug and outcome.
+
+    Organization is the only tenant label: projects and applications are too
+    numerous to give every one its own series.
+    """
+    if not current_app.config.get("METRICS_ORGANIZATION_LABELS", True):
+        organization = None
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    finally:
+        PIPELINE_STAGE_SECONDS.labels(stage, organization or "", outcome).observe(
+            time.perf_counter() - start
+        )
+
+
+def timed_reconcile(loop):
+    """Decorate a periodic task to record how long each pass takes."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                RECONCILE_SECONDS.labels(loop).observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def reconcile_rows(loop, rows):
+    RECONCILE_ROWS.labels(loop).observe(rows)
+
+
+def observe_external_call(service, operation, seconds):
+    EXTERNAL_CALL_SECONDS.labels(service, operation).observe(seconds)
+
+
+def instrument_session(session, service):
+    """Record the latency of every response received by a requests session."""
+
+    def record_latency(response, *args, **kwargs):
+        observe_external_call(
+            service, response.request.method, response.elapsed.total_seconds()
+        )
+
+    session.hooks["response"].append(record_latency)
+    return session
+
+
+def kubernetes_resource(url):
+    """Reduce a Kubernetes API URL to its resource type, e.g. ``pods/log``."""
+    parts = [part for part in urlsplit(url).path.split("/") if part]
+    if parts[:1] == ["api"]:
+        parts = parts[2:]
+    elif parts[:1] == ["apis"]:
+        parts = parts[3:]
+    if len(parts) > 2 and parts[0] == "namespaces":
+        parts = parts[2:]
+    if not parts:
+        return "discovery"
+    if len(parts) >= 3:
+        return f"{parts[0]}/{parts[2]}"
+    return parts[0]
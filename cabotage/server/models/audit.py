@@ -1,17 +1,36 @@
-from sqlalchemy import BigInteger, Column, String, Boolean, Integer, DateTime
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.dialects import postgresql
 
 from cabotage.server import Model
 
 
 class AuditLog(Model):
-    """Read-only model backed by the audit_log SQL view."""
+    """Read-only model over the denormalized audit_log_entries table.
 
-    __tablename__ = "audit_log"
-    __table_args__ = {"info": {"is_view": True}}
+    Rows are copied out of the audit_log view by a deferred trigger on
+    activity when the inserting transaction commits, so reads never pay for
+    the view's joins. The ``audit_log_entries_sync`` trigger is defined in
+    migration d7a3f9e1c5b2_materialize_audit_log_entries.
+    """
+
+    __tablename__ = "audit_log_entries"
+    __table_args__ = (
+        Index("ix_audit_log_entries_organization_id_id", "organization_id", "id"),
+        Index("ix_audit_log_entries_project_id_id", "project_id", "id"),
+        Index("ix_audit_log_entries_application_id_id", "application_id", "id"),
+        Index("ix_audit_log_entries_object_type_object_id", "object_type", "object_id"),
+    )
 
     # Identity
-    id = Column(Integer, primary_key=True)
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
     timestamp = Column(DateTime)
 
     # Version lookup (for computing diffs from version tables)
@@ -56,6 +75,18 @@ class AuditLog(Model):
     raw_data = Column(postgresql.JSONB)
 
 
+class AuditLogFacet(Model):
+    """Distinct (verb, object_type) pairs seen per organization, project and
+    application, backing the audit log filter menus."""
+
+    __tablename__ = "audit_log_facets"
+
+    scope_type = Column(String(16), primary_key=True)
+    scope_id = Column(postgresql.UUID(as_uuid=True), primary_key=True)
+    verb = Column(String(255), primary_key=True)
+    object_type = Column(String(255), primary_key=True)
+
+
 # fmt: off
 AUDIT_LOG_VIEW_SQL = """\
 CREATE OR REPLACE VIEW audit_log AS
@@ -1,3 +1,4 @@
+from collections import defaultdict
 from typing import Any
 
 import sqlalchemy as sa
@@ -55,7 +56,7 @@ class ActivityFactory(ModelFactory):
 
             target_tx_id = sa.Column(sa.BigInteger)
 
-            def _calculate_tx_id(self, obj):
+            def _calculate_tx_id(self, obj, latest=None):
                 session = sa.orm.object_session(self)
                 if obj and session is not None:
                     object_version = version_obj(session, obj)
@@ -63,17 +64,19 @@ class ActivityFactory(ModelFactory):
                         return object_version.transaction_id
 
                     version_cls = version_class(obj.__class__)
+                    if latest is not None:
+                        return latest.get((version_cls, obj.id))
                     return (
                         session.query(sa.func.max(version_cls.transaction_id))
                         .filter(version_cls.id == obj.id)
                         .scalar()
                     )
 
-            def calculate_object_tx_id(self):
-                self.object_tx_id = self._calculate_tx_id(self.object)
+            def calculate_object_tx_id(self, latest=None):
+                self.object_tx_id = self._calculate_tx_id(self.object, latest)
 
-            def calculate_target_tx_id(self):
-                self.target_tx_id = self._calculate_tx_id(self.target)
+            def calculate_target_tx_id(self, latest=None):
+                self.target_tx_id = self._calculate_tx_id(self.target, latest)
 
             object = generic_relationship(object_type, object_id)
 
@@ -116,6 +119,26 @@ class ActivityFactory(ModelFactory):
         return Activity
 
 
+def _latest_version_tx_ids(session, objs):
+    """Map (version class, id) to the newest version transaction id.
+
+    Issues one grouped query per version class rather than one per object.
+    """
+    ids_by_class = defaultdict(set)
+    for obj in objs:
+        ids_by_class[version_class(obj.__class__)].add(obj.id)
+    latest = {}
+    for version_cls, ids in ids_by_class.items():
+        rows = (
+            session.query(version_cls.id, sa.func.max(version_cls.transaction_id))
+            .filter(version_cls.id.in_(ids))
+            .group_by(version_cls.id)
+        )
+        for object_id, tx_id in rows:
+            latest[(version_cls, object_id)] = tx_id
+    return latest
+
+
 class ActivityPlugin(Plugin):
     def after_build_models(self, manager):
         self.activity_cls = ActivityFactory()(manager)
@@ -131,11 +154,22 @@ class ActivityPlugin(Plugin):
         return any(isinstance(obj, self.activity_cls) for obj in session)
 
     def before_flush(self, uow, session):
-        for obj in session:
-            if isinstance(obj, self.activity_cls):
-                obj.transaction = uow.current_transaction
-                obj.calculate_target_tx_id()
-                obj.calculate_object_tx_id()
+        activities = [obj for obj in session if isinstance(obj, self.activity_cls)]
+        if not activities:
+            return
+        latest = _latest_version_tx_ids(
+            session,
+            [
+                obj
+                for activity in activities
+                for obj in (activity.object, activity.target)
+                if obj is not None and version_obj(session, obj) is None
+            ],
+        )
+        for obj in activities:
+            obj.transaction = uow.current_transaction
+            obj.calculate_target_tx_id(latest)
+            obj.calculate_object_tx_id(latest)
 
     def after_version_class_built(self, parent_cls, version_cls):
         pass
@@ -21,11 +21,22 @@ from sqlalchemy import (
     String,
     Text,
     UniqueConstraint,
+    select,
     text,
+    update,
 )
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.event import listens_for
-from sqlalchemy.orm import DynamicMapped, Mapped, mapped_column, relationship, backref
+from sqlalchemy.orm import (
+    DynamicMapped,
+    Mapped,
+    Session,
+    backref,
+    mapped_column,
+    object_session,
+    relationship,
+)
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy_continuum import make_versioned
 from sqlalchemy_continuum.plugins import FlaskPlugin
 from sqlalchemy_utils.models import Timestamp
@@ -39,6 +50,8 @@ from cabotage.server.models.utils import (
     safe_k8s_name,
     slugify,
     DictDiffer,
+    RELEASE_DIFF_IGNORED_KEYS,
+    release_state_fingerprint,
 )
 from cabotage.utils.docker_auth import (
     generate_docker_credentials,
@@ -288,7 +301,7 @@ class Environment(Model, Timestamp):
 
 
 class ApplicationEnvironment(Model, Timestamp):
-    __versioned__: dict = {}
+    __versioned__: dict = {"exclude": ["candidate_fingerprint"]}
     __tablename__ = "application_environments"
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -312,6 +325,10 @@ class ApplicationEnvironment(Model, Timestamp):
     process_pod_classes: Mapped[Any | None] = mapped_column(
         postgresql.JSONB(), server_default=text("json_object('{}')")
     )
+    # {process_name: policy}, see cabotage.server.autoscaling.
+    autoscale_policies: Mapped[Any | None] = mapped_column(
+        postgresql.JSONB(), server_default=text("json_object('{}')")
+    )
     deployment_timeout: Mapped[int | None] = mapped_column(Integer)
     health_check_path: Mapped[str | None] = mapped_column(String(64))
     health_check_host: Mapped[str | None] = mapped_column(String(256))
@@ -325,6 +342,9 @@ class ApplicationEnvironment(Model, Timestamp):
     k8s_identifier: Mapped[str | None] = mapped_column(String(64))
     deleted_at: Mapped[datetime.datetime | None] = mapped_column(DateTime, index=True)
     version_id: Mapped[int] = mapped_column(Integer)
+    # release_state_fingerprint() of the current release candidate, refreshed
+    # at commit whenever its images, configuration or ingresses change.
+    candidate_fingerprint: Mapped[str | None] = mapped_column(String(64))
 
     application: Mapped[Application] = relationship(
         back_populates="application_environments"
@@ -453,6 +473,24 @@ class ApplicationEnvironment(Model, Timestamp):
     def ready_for_deployment(self):
         return self.application.ready_for_deployment_in_env(self)
 
+    def has_undeployed_changes(self, latest_deployment_completed=None):
+        """Whether the release candidate differs from the deployed release.
+
+        Compares fingerprints rather than building the candidate, unless the
+        stored candidate fingerprint is missing. It is missing for
+        environments that haven't changed since the fingerprint columns were
+        added, until their next configuration, ingress or image change.
+        """
+        if latest_deployment_completed is None:
+            latest_deployment_completed = self.latest_deployment_completed
+        candidate = (
+            self.candidate_fingerprint
+            or self.application.release_candidate_fingerprint(self)
+        )
+        if latest_deployment_completed is None:
+            return candidate != release_state_fingerprint({})
+        return candidate != latest_deployment_completed.deployed_fingerprint
+
     @property
     def effective_auto_deploy_branch(self):
         return self.auto_deploy_branch or self.application.auto_deploy_branch
@@ -502,6 +540,9 @@ class Application(Model, Timestamp):
     name: Mapped[str] = mapped_column(Text())
     slug: Mapped[str] = mapped_column(postgresql.CITEXT())
     k8s_identifier: Mapped[str] = mapped_column(String(64))
+    # safe_k8s_name(project.k8s_identifier, k8s_identifier), the prefix of
+    # every Kubernetes resource name for this app; indexed for alert lookups.
+    resource_prefix: Mapped[str | None] = mapped_column(String(64), index=True)
     platform: Mapped[str] = mapped_column(platform_version, default="wind")
     process_counts: Mapped[Any | None] = mapped_column(
         postgresql.JSONB(), server_default=text("json_object('{}')")
@@ -631,20 +672,23 @@ class Application(Model, Timestamp):
         configuration_diff = DictDiffer(
             candidate.get("configuration") or {},
             current.get("configuration") or {},
-            ignored_keys=["id"],
+            ignored_keys=RELEASE_DIFF_IGNORED_KEYS["configuration"],
         )
         image_diff = DictDiffer(
             candidate.get("image") or {},
             current.get("image") or {},
-            ignored_keys=["id", "commit_sha"],
+            ignored_keys=RELEASE_DIFF_IGNORED_KEYS["image"],
         )
         ingress_diff = DictDiffer(
             candidate.get("ingresses") or {},
             current.get("ingresses") or {},
-            ignored_keys=["id"],
+            ignored_keys=RELEASE_DIFF_IGNORED_KEYS["ingresses"],
         )
         return image_diff, configuration_diff, ingress_diff
 
+    def release_candidate_fingerprint(self, app_env):
+        return release_state_fingerprint(self.release_candidate_for_env(app_env))
+
     @staticmethod
     def _resolved_configuration(app_env):
         """Merge environment-level configs (base) with app-level configs (override)."""
@@ -725,6 +769,21 @@ class Application(Model, Timestamp):
     __mapper_args__ = {"version_id_col": version_id}
 
 
+@listens_for(Application, "before_insert")
+@listens_for(Application, "before_update")
+def application_resource_prefix_listener(mapper, connection, target):
+    if (
+        target.resource_prefix is not None
+        and not db.inspect(target).attrs.k8s_identifier.history.has_changes()
+    ):
+        return
+    project_k8s = connection.execute(
+        select(Project.k8s_identifier).where(Project.id == target.project_id)
+    ).scalar()
+    if project_k8s and target.k8s_identifier:
+        target.resource_prefix = safe_k8s_name(project_k8s, target.k8s_identifier)
+
+
 class Deployment(Model, Timestamp):
     __versioned__: dict = {}
     __tablename__ = "deployments"
@@ -752,6 +811,7 @@ class Deployment(Model, Timestamp):
     deploy_metadata: Mapped[Any | None] = mapped_column(postgresql.JSONB())
     deploy_log: Mapped[str | None] = mapped_column(Text())
     job_id: Mapped[str | None] = mapped_column(String(64))
+    release_fingerprint: Mapped[str | None] = mapped_column(String(64))
 
     application: Mapped[Application] = relationship(back_populates="deployments")
     application_environment: Mapped[ApplicationEnvironment] = relationship(
@@ -764,6 +824,10 @@ class Deployment(Model, Timestamp):
     def release_object(self):
         return Release.query.filter_by(id=self.release.get("id", None)).first()
 
+    @property
+    def deployed_fingerprint(self):
+        return self.release_fingerprint or release_state_fingerprint(self.release)
+
     @property
     def release_snapshot(self):
         if self.release:
@@ -771,6 +835,11 @@ class Deployment(Model, Timestamp):
         return None
 
 
+@listens_for(Deployment, "before_insert")
+def deployment_release_fingerprint_listener(mapper, connection, target):
+    target.release_fingerprint = release_state_fingerprint(target.release)
+
+
 class JobLog(Model, Timestamp):
     __tablename__ = "job_logs"
 
@@ -1472,17 +1541,20 @@ class Image(Model, Timestamp):
             return f"cabotage/{org_k8s}/{env_k8s}/{project_k8s}/{app_k8s}"
         return f"cabotage/{org_k8s}/{project_k8s}/{app_k8s}"
 
-    def buildargs(self, reader):
-        args = {}
+    def buildarg_configurations(self):
         # Subscribed env configs first (base), then app configs (override)
+        configurations = []
         for sub in self.application_environment.environment_config_subscriptions:
             ec = sub.environment_configuration
             if ec.buildtime and not ec.deleted:
-                args[ec.name] = ec.read_value(reader)
+                configurations.append(ec)
         for c in self.application_environment.configurations:
             if c.buildtime:
-                args[c.name] = c.read_value(reader)
-        return args
+                configurations.append(c)
+        return configurations
+
+    def buildargs(self, reader):
+        return {c.name: c.read_value(reader) for c in self.buildarg_configurations()}
 
     @property
     def commit_sha(self):
@@ -1925,6 +1997,8 @@ class Alert(Model, Timestamp):
         index=True,
     )
     last_notified_at: Mapped[datetime.datetime | None] = mapped_column(DateTime)
+    # Hash of the Alertmanager-owned fields, see alert_content_hash()
+    content_hash: Mapped[str | None] = mapped_column(String(64))
     version_id: Mapped[int] = mapped_column(Integer)
 
     application: Mapped[Application | None] = relationship(
@@ -1949,3 +2023,107 @@ class Alert(Model, Timestamp):
     )
 
     __mapper_args__ = {"version_id_col": version_id}
+
+
+# ---------------------------------------------------------------------------
+# Release candidate fingerprints
+#
+# Writes to anything a release candidate is built from mark the affected
+# ApplicationEnvironments stale on the session; the fingerprints are rebuilt
+# once, just before commit.
+# ---------------------------------------------------------------------------
+
+_STALE_CANDIDATES = "stale_candidate_fingerprints"
+
+
+def _mark_candidates_stale(target, app_env_ids):
+    session = object_session(target)
+    if session is None:
+        return
+    session.info.setdefault(_STALE_CANDIDATES, set()).update(
+        app_env_id for app_env_id in app_env_ids if app_env_id is not None
+    )
+
+
+@listens_for(Configuration, "after_insert")
+@listens_for(Configuration, "after_update")
+@listens_for(Configuration, "after_delete")
+@listens_for(Ingress, "after_insert")
+@listens_for(Ingress, "after_update")
+@listens_for(Ingress, "after_delete")
+@listens_for(EnvironmentConfigSubscription, "after_insert")
+@listens_for(EnvironmentConfigSubscription, "after_delete")
+def _candidate_source_changed(mapper, connection, target):
+    _mark_candidates_stale(target, [target.application_environment_id])
+
+
+@listens_for(Image, "after_insert")
+@listens_for(Image, "after_update")
+def _candidate_image_changed(mapper, connection, target):
+    if target.built and db.inspect(target).attrs.built.history.has_changes():
+        _mark_candidates_stale(target, [target.application_environment_id])
+
+
+@listens_for(IngressHost, "after_insert")
+@listens_for(IngressHost, "after_update")
+@listens_for(IngressHost, "after_delete")
+@listens_for(IngressPath, "after_insert")
+@listens_for(IngressPath, "after_update")
+@listens_for(IngressPath, "after_delete")
+def _candidate_ingress_child_changed(mapper, connection, target):
+    _mark_candidates_stale(
+        target,
+        connection.execute(
+            select(Ingress.application_environment_id).where(
+                Ingress.id == target.ingress_id
+            )
+        ).scalars(),
+    )
+
+
+@listens_for(EnvironmentConfiguration, "after_insert")
+@listens_for(EnvironmentConfiguration, "after_update")
+@listens_for(EnvironmentConfiguration, "after_delete")
+def _candidate_environment_config_changed(mapper, connection, target):
+    _mark_candidates_stale(
+        target,
+        connection.execute(
+            select(EnvironmentConfigSubscription.application_environment_id).where(
+                EnvironmentConfigSubscription.environment_configuration_id == target.id
+            )
+        ).scalars(),
+    )
+
+
+@listens_for(Session, "before_commit")
+def _refresh_candidate_fingerprints(session):
+    if not session.info.get(_STALE_CANDIDATES):
+        return
+    session.flush()
+    stale = session.info.pop(_STALE_CANDIDATES, set())
+    for app_env in (
+        session.query(ApplicationEnvironment)
+        .filter(ApplicationEnvironment.id.in_(stale))
+        .all()
+    ):
+        # Collections loaded before the flush may not include rows that
+        # were added by foreign key alone.
+        session.expire(
+            app_env, ["configurations", "environment_config_subscriptions", "ingresses"]
+        )
+        for ingress in app_env.ingresses:
+            session.expire(ingress, ["hosts", "paths"])
+        fingerprint = app_env.application.release_candidate_fingerprint(app_env)
+        # Core update: the fingerprint is derived state, not a new version.
+        session.execute(
+            update(ApplicationEnvironment)
+            .where(ApplicationEnvironment.id == app_env.id)
+            .values(candidate_fingerprint=fingerprint)
+            .execution_options(synchronize_session=False)
+        )
+        set_committed_value(app_env, "candidate_fingerprint", fingerprint)
+
+
+@listens_for(Session, "after_soft_rollback")
+def _discard_stale_candidates(session, previous_transaction):
+    session.info.pop(_STALE_CANDIDATES, None)
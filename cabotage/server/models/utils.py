@@ -1,4 +1,5 @@
 import hashlib
+import json
 import re
 import secrets
 
@@ -114,6 +115,35 @@ def readable_k8s_hostname(*pairs):
     return truncated + "-" + digest
 
 
+# Per-item keys DictDiffer ignores when comparing a release candidate with the
+# deployed release, by release section.
+RELEASE_DIFF_IGNORED_KEYS = {
+    "image": ("id", "commit_sha"),
+    "configuration": ("id",),
+    "ingresses": ("id",),
+}
+
+
+def release_state_fingerprint(release):
+    """Hash of the image/configuration/ingress state of a release dict.
+
+    Two releases have equal fingerprints exactly when DictDiffer, with
+    RELEASE_DIFF_IGNORED_KEYS, would report no changes between them.
+    """
+    state = {}
+    for section, ignored_keys in RELEASE_DIFF_IGNORED_KEYS.items():
+        state[section] = {
+            key: (
+                {k: v for k, v in value.items() if k not in ignored_keys}
+                if isinstance(value, dict)
+                else value
+            )
+            for key, value in ((release or {}).get(section) or {}).items()
+        }
+    payload = json.dumps(state, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
 class DictDiffer(object):
     """
     Calculate the difference between two dictionaries as:
@@ -0,0 +1,368 @@
+"""Mimir queries and PromQL builders behind the Observe pages.
+
+Shared by the Observe views and by process autoscaling, which reads the same
+series the charts show.
+"""
+
+import re
+
+import requests as requests_lib
+from flask import current_app
+
+from cabotage.server.models.utils import safe_k8s_name
+
+REGEX_META = re.compile(r"[.*+?{}()|\\^$\[\]]")
+
+
+def mimir_connection(tenant_id=None):
+    """Return (mimir_url, verify, headers) tuple, or (None, None, {}) if not configured.
+
+    If *tenant_id* is given it overrides the default tenant header.
+    """
+    mimir_url = current_app.config.get("MIMIR_URL")
+    if not mimir_url:
+        return None, None, {}
+    verify = current_app.config.get("MIMIR_VERIFY")
+    if verify is not None:
+        if isinstance(verify, str) and verify.lower() == "false":
+            verify = False
+    else:
+        verify = True
+    headers = {}
+    # TODO: Include anonymous until migration to multi-tenant is completed
+    effective_tenant = (
+        tenant_id
+        if tenant_id is not None
+        else str(current_app.config.get("MIMIR_TENANT_ID")) + "|anonymous"
+    )
+    if effective_tenant:
+        headers["X-Scope-OrgID"] = effective_tenant
+    return mimir_url, verify, headers
+
+
+def query_mimir_range(query, start, end, step, tenant_id=None):
+    """Query Mimir's Prometheus-compatible query_range endpoint.
+
+    Returns the parsed ``data.result`` list, or None on any error.
+    """
+    mimir_url, verify, headers = mimir_connection(tenant_id=tenant_id)
+    if not mimir_url:
+        return None
+    try:
+        resp = requests_lib.get(
+            f"{mimir_url}/prometheus/api/v1/query_range",
+            params={
+                "query": query,
+                "start": start,
+                "end": end,
+                "step": step,
+            },
+            headers=headers,
+            verify=verify,
+            timeout=10,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        if data.get("status") == "success":
+            return data.get("data", {}).get("result", [])
+        return None
+    except Exception:
+        return None
+
+
+def query_mimir_instant(query, tenant_id=None):
+    """Query Mimir's Prometheus-compatible instant query endpoint.
+
+    Returns the parsed ``data.result`` list, or None on any error.
+    """
+    mimir_url, verify, headers = mimir_connection(tenant_id=tenant_id)
+    if not mimir_url:
+        return None
+    try:
+        resp = requests_lib.get(  # nosec B113 - timeout has default
+            f"{mimir_url}/prometheus/api/v1/query",
+            params={"query": query},
+            headers=headers,
+            verify=verify,
+            timeout=current_app.config.get("MIMIR_TIMEOUT", 5),
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        if data.get("status") == "success":
+            return data.get("data", {}).get("result", [])
+        return None
+    except Exception:
+        return None
+
+
+def compute_observe_namespace(application, app_env):
+    """Compute the k8s namespace for an application's environment."""
+    org_k8s = application.project.organization.k8s_identifier
+    if app_env and app_env.environment.uses_environment_namespace:
+        return app_env.environment.k8s_namespace
+    return org_k8s
+
+
+def compute_observe_prefix(application):
+    """Compute the k8s resource prefix (project-app) for pod matching."""
+    return safe_k8s_name(
+        application.project.k8s_identifier,
+        application.k8s_identifier,
+    )
+
+
+def collect_traefik_svc_names(app_envs, namespace_fn, prefix_fn, process_filter=""):
+    """Enumerate traefik service names from ingress configs across app_envs."""
+    names = set()
+    for ae in app_envs:
+        ns = namespace_fn(ae)
+        pfx = prefix_fn(ae)
+        for ingress in ae.ingresses:
+            if not ingress.enabled:
+                continue
+            for path in ingress.paths:
+                if process_filter and path.target_process_name != process_filter:
+                    continue
+                names.add(
+                    f"{ns}-{pfx}-{ingress.name}-{pfx}-{path.target_process_name}-https@kubernetesingressnginx"
+                )
+                names.add(
+                    f"{ns}-{pfx}-{ingress.name}-{pfx}-{path.target_process_name}-8000@kubernetesingressnginx"
+                )
+            if not ingress.paths:
+                if not process_filter or process_filter == "web":
+                    names.add(
+                        f"{ns}-{pfx}-{ingress.name}-{pfx}-web-https@kubernetesingressnginx"
+                    )
+                    names.add(
+                        f"{ns}-{pfx}-{ingress.name}-{pfx}-web-8000@kubernetesingressnginx"
+                    )
+    return names
+
+
+def traefik_svc_label(names):
+    """Build a service=... label selector from a set of traefik service names."""
+    if len(names) == 1:
+        return f'service="{next(iter(names))}"'
+    elif names:
+        joined = "|".join(REGEX_META.sub(r"\\\g<0>", s) for s in sorted(names))
+        return f'service=~"{joined}"'
+    return None
+
+
+def build_observe_queries(
+    metric,
+    group,
+    labels,
+    traefik_svc,
+    step,
+    start,
+    end,
+    duration,
+    process_re,
+    by_clause,
+    rate_window,
+    app_re=None,
+    env_re=None,
+    proj_re=None,
+    network_labels=None,
+    pod_join=None,
+    group_label_map=None,
+):
+    """Build PromQL queries and execute them. Returns (result, queries)."""
+
+    result = None
+    queries = []
+    pod_join = pod_join or ""
+    group_label_map = group_label_map or {}
+
+    if metric == "cpu":
+        cpu_source = (
+            f"(rate(container_cpu_usage_seconds_total{{{labels}}}[{rate_window}]))"
+            f"{pod_join}"
+        )
+        if group in group_label_map:
+            q = f"sum by ({group_label_map[group]}) ({cpu_source})"
+        elif group == "process":
+            q = (
+                f"sum by (process) (label_replace("
+                f"sum by (pod) ({cpu_source})"
+                f', "process", "$1", "pod", "{process_re}"))'
+            )
+        elif group == "application" and app_re:
+            q = (
+                f"sum by (application) (label_replace("
+                f"sum by (pod) ({cpu_source})"
+                f', "application", "$1", "pod", "{app_re}"))'
+            )
+        elif group == "environment" and env_re:
+            q = (
+                f"sum by (environment) (label_replace("
+                f"sum by (namespace) ({cpu_source})"
+                f', "environment", "$1", "namespace", "{env_re}"))'
+            )
+        elif group == "project" and proj_re:
+            q = (
+                f"sum by (project) (label_replace("
+                f"sum by (pod) ({cpu_source})"
+                f', "project", "$1", "pod", "{proj_re}"))'
+            )
+        else:
+            q = f"sum({cpu_source}) {by_clause}"
+        queries.append(q)
+        result = query_mimir_range(q, start, end, step)
+
+    elif metric == "memory":
+        mem_source = f"(container_memory_working_set_bytes{{{labels}}}){pod_join}"
+        if group in group_label_map:
+            q = f"sum by ({group_label_map[group]}) ({mem_source})"
+        elif group == "process":
+            q = (
+                f"sum by (process) (label_replace("
+                f"sum by (pod) ({mem_source})"
+                f', "process", "$1", "pod", "{process_re}"))'
+            )
+        elif group == "application" and app_re:
+            q = (
+                f"sum by (application) (label_replace("
+                f"sum by (pod) ({mem_source})"
+                f', "application", "$1", "pod", "{app_re}"))'
+            )
+        elif group == "environment" and env_re:
+            q = (
+                f"sum by (environment) (label_replace("
+                f"sum by (namespace) ({mem_source})"
+                f', "environment", "$1", "namespace", "{env_re}"))'
+            )
+        elif group == "project" and proj_re:
+            q = (
+                f"sum by (project) (label_replace("
+                f"sum by (pod) ({mem_source})"
+                f', "project", "$1", "pod", "{proj_re}"))'
+            )
+        else:
+            q = f"sum({mem_source}) {by_clause}"
+        queries.append(q)
+        result = query_mimir_range(q, start, end, step)
+
+    elif metric in ("requests", "errors", "latency") and traefik_svc is None:
+        result = None
+
+    elif metric == "requests":
+        req_step = max(step, 60)
+        req_start = end - duration
+        result = []
+        for code_class in ["2", "3", "4", "5"]:
+            q = (
+                f"sum(increase(traefik_service_requests_total"
+                f'{{{traefik_svc}, code=~"{code_class}.."}}[{req_step}s]))'
+            )
+            queries.append(q)
+            qr = query_mimir_range(q, req_start, end, req_step)
+            if qr:
+                for series in qr:
+                    series["metric"]["code"] = f"{code_class}xx"
+                result.extend(qr)
+        result = result if result else None
+
+    elif metric == "errors":
+        err_step = max(step, 60)
+        err_start = end - duration
+        if group == "status":
+            result = []
+            for code_class, label in [("4", "4xx"), ("5", "5xx")]:
+                q = (
+                    f"sum(increase(traefik_service_requests_total"
+                    f'{{{traefik_svc}, code=~"{code_class}.."}}[{err_step}s]))'
+                    f" / sum(increase(traefik_service_requests_total"
+                    f"{{{traefik_svc}}}[{err_step}s]))"
+                )
+                queries.append(q)
+                qr = query_mimir_range(q, err_start, end, err_step)
+                if qr:
+                    for series in qr:
+                        series["metric"]["label"] = label
+                    result.extend(qr)
+            result = result if result else None
+        else:
+            q = (
+                f"sum(increase(traefik_service_requests_total"
+                f'{{{traefik_svc}, code=~"5.."}}[{err_step}s]))'
+                f" / sum(increase(traefik_service_requests_total"
+                f"{{{traefik_svc}}}[{err_step}s]))"
+            )
+            queries.append(q)
+            result = query_mimir_range(q, err_start, end, err_step)
+            if result:
+                for series in result:
+                    series["metric"]["label"] = "error rate"
+
+    elif metric == "latency":
+        rate_seconds = max(step, 30)
+        rate_rule_suffix = {30: "rate30s", 60: "rate1m", 300: "rate5m"}.get(
+            rate_seconds, "rate5m"
+        )
+        result = []
+        for quantile in [0.5, 0.9, 0.95, 0.99]:
+            q = (
+                f"histogram_quantile({quantile}, sum by (le)("
+                f"traefik:router_request_duration_seconds_bucket:{rate_rule_suffix}"
+                f"{{{traefik_svc}}}))"
+            )
+            queries.append(q)
+            qr = query_mimir_range(q, start, end, step)
+            if qr:
+                for series in qr:
+                    series["metric"]["quantile"] = f"p{int(quantile * 100)}"
+                result.extend(qr)
+        result = result if result else None
+
+    elif metric == "network":
+        # Network metrics are per-pod and have no container label,
+        # so use network_labels (without container filter) if provided.
+        net_labels = network_labels if network_labels is not None else labels
+        result = []
+        for direction, counter in [
+            ("tx", "container_network_transmit_bytes_total"),
+            ("rx", "container_network_receive_bytes_total"),
+        ]:
+            network_source = (
+                f"(rate({counter}{{{net_labels}}}[{rate_window}])){pod_join}"
+            )
+            if group in group_label_map:
+                q = f"sum by ({group_label_map[group]}) ({network_source})"
+            elif group == "process":
+                q = (
+                    f"sum by (process) (label_replace("
+                    f"sum by (pod) ({network_source})"
+                    f', "process", "$1", "pod", "{process_re}"))'
+                )
+            elif group == "application" and app_re:
+                q = (
+                    f"sum by (application) (label_replace("
+                    f"sum by (pod) ({network_source})"
+                    f', "application", "$1", "pod", "{app_re}"))'
+                )
+            elif group == "environment" and env_re:
+                q = (
+                    f"sum by (environment) (label_replace("
+                    f"sum by (namespace) ({network_source})"
+                    f', "environment", "$1", "namespace", "{env_re}"))'
+                )
+            elif group == "project" and proj_re:
+                q = (
+                    f"sum by (project) (label_replace("
+                    f"sum by (pod) ({network_source})"
+                    f', "project", "$1", "pod", "{proj_re}"))'
+                )
+            else:
+                q = f"sum({network_source}) {by_clause}"
+            queries.append(q)
+            qr = query_mimir_range(q, start, end, step)
+            if qr:
+                for series in qr:
+                    series["metric"]["direction"] = direction
+                result.extend(qr)
+        result = result if result else None
+
+    return result, queries
@@ -5,14 +5,24 @@ into reusable functions.
 """
 
 import uuid as _uuid
+from dataclasses import dataclass, field, fields
+from typing import Any
 
-from sqlalchemy import and_, case, func, or_
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.orm import joinedload, selectinload
 
 from cabotage.server import db
+from cabotage.server.models.auth import Organization
 from cabotage.server.models.projects import (
+    Application,
     ApplicationEnvironment,
     Deployment,
+    Environment,
+    EnvironmentConfigSubscription,
     Image,
+    Ingress,
+    JobLog,
+    Project,
     Release,
 )
 
@@ -232,6 +242,18 @@ def compute_ae_status_sets(ae_ids):
     }
 
 
+def _referenced_ids(objects, attr, known):
+    ids = set()
+    for obj in objects:
+        ref = getattr(obj, attr) or {}
+        ref_id = ref.get("id")
+        if ref_id:
+            ref_id = _uuid.UUID(ref_id) if isinstance(ref_id, str) else ref_id
+            if ref_id not in known:
+                ids.add(ref_id)
+    return ids
+
+
 class RelatedObjectResolver:
     """Caches Release/Image lookups from JSONB foreign keys.
 
@@ -244,7 +266,23 @@ class RelatedObjectResolver:
         self._all_releases = releases or []
 
     def warm_caches(self, deployments, releases):
-        """Pre-resolve all Release/Image references from deployments and releases."""
+        """Pre-resolve all Release/Image references from deployments and releases.
+
+        References not already cached are fetched with one query per type.
+        """
+        release_ids = _referenced_ids(
+            deployments,
+            "release",
+            set(self._release_cache) | {r.id for r in self._all_releases},
+        )
+        if release_ids:
+            fetched = Release.query.filter(Release.id.in_(release_ids)).all()
+            self._all_releases = list(self._all_releases) + fetched
+            releases = list(releases) + fetched
+        image_ids = _referenced_ids(releases, "image", set(self._image_cache))
+        if image_ids:
+            for image in Image.query.filter(Image.id.in_(image_ids)).all():
+                self._image_cache[image.id] = image
         for d in deployments:
             self._get_release(d)
         for r in releases:
@@ -317,6 +355,249 @@ def extract_latest_variants(images, releases, deployments):
     }
 
 
+RECENT_HISTORY_LIMIT = 10
+
+
+@dataclass
+class ApplicationPath:
+    """Objects named by an application page URL."""
+
+    organization: Organization
+    project: Project
+    application: Application
+    app_env: ApplicationEnvironment | None
+    environment: Environment | None
+    environments: list[Environment]
+
+
+def resolve_application_path(org_slug, project_slug, app_slug, env_slug=None):
+    """Resolve org/project/application (and environment) slugs in one query.
+
+    Returns None when any slug does not resolve, including an ``env_slug``
+    the application is not enrolled in.  Without an ``env_slug`` the
+    application's default ApplicationEnvironment is used.
+    """
+    rows = db.session.execute(
+        select(Organization, Project, Application, ApplicationEnvironment, Environment)
+        .join(Project, Project.organization_id == Organization.id)
+        .join(Application, Application.project_id == Project.id)
+        .outerjoin(
+            ApplicationEnvironment,
+            and_(
+                ApplicationEnvironment.application_id == Application.id,
+                ApplicationEnvironment.deleted_at.is_(None),
+            ),
+        )
+        .outerjoin(Environment, Environment.id == ApplicationEnvironment.environment_id)
+        .where(
+            Organization.slug == org_slug,
+            Project.slug == project_slug,
+            Application.slug == app_slug,
+        )
+        .options(joinedload(Organization.tailscale_integration))
+    ).all()
+    if not rows:
+        return None
+    organization, project, application = rows[0][:3]
+    enrolled = [(ae, env) for _, _, _, ae, env in rows if ae is not None]
+
+    environments = []
+    if project.environments_enabled:
+        environments = sorted(
+            (env for _, env in enrolled if env.deleted_at is None),
+            key=lambda e: e.sort_order,
+        )
+
+    if env_slug:
+        app_env, environment = next(
+            (
+                (ae, env)
+                for ae, env in enrolled
+                if env.slug == env_slug and env.deleted_at is None
+            ),
+            (None, None),
+        )
+        if app_env is None:
+            return None
+    else:
+        # Mirrors Application.default_app_env; env-enabled pages redirect to
+        # the default environment's URL instead of rendering this.
+        app_env = next(
+            (ae for ae, _ in enrolled if ae.k8s_identifier is None),
+            enrolled[0][0] if enrolled else None,
+        )
+        environment = next(
+            (e for e in environments if e.is_default),
+            environments[0] if environments else None,
+        )
+    if not project.environments_enabled:
+        environment = None
+
+    return ApplicationPath(
+        organization=organization,
+        project=project,
+        application=application,
+        app_env=app_env,
+        environment=environment,
+        environments=environments,
+    )
+
+
+def _fetch_recent_with_latest(model, app_env_id, order_by, state_columns):
+    """Recent rows plus the newest row in each state, newest first.
+
+    Returns ``(recent, candidates)``: the first RECENT_HISTORY_LIMIT rows,
+    and those plus the top row of every ``state_columns`` partition, which
+    is everything extract_latest_variants needs.
+    """
+    ranked = (
+        select(
+            model.id,
+            func.row_number().over(order_by=order_by.desc()).label("rn"),
+            func.row_number()
+            .over(partition_by=state_columns, order_by=order_by.desc())
+            .label("state_rn"),
+        )
+        .where(model.application_environment_id == app_env_id)
+        .subquery()
+    )
+    rows = (
+        db.session.query(model, ranked.c.rn)
+        .join(ranked, ranked.c.id == model.id)
+        .filter(or_(ranked.c.rn <= RECENT_HISTORY_LIMIT, ranked.c.state_rn == 1))
+        .order_by(ranked.c.rn)
+        .all()
+    )
+    recent = [obj for obj, rn in rows if rn <= RECENT_HISTORY_LIMIT]
+    return recent, [obj for obj, _ in rows]
+
+
+def _latest_job_logs(app_env, process_names):
+    """Most recent JobLog per job process, in one DISTINCT ON query."""
+    if not process_names:
+        return {}
+    logs = (
+        JobLog.query.filter(
+            JobLog.application_id == app_env.application_id,
+            JobLog.application_environment_id == app_env.id,
+            JobLog.process_name.in_(process_names),
+        )
+        .distinct(JobLog.process_name)
+        .order_by(
+            JobLog.process_name,
+            func.coalesce(JobLog.completion_time, JobLog.start_time).desc(),
+        )
+        .all()
+    )
+    return {log.process_name: log for log in logs}
+
+
+@dataclass
+class ApplicationPage:
+    """Everything the application detail page renders, loaded up front.
+
+    Lists hold the RECENT_HISTORY_LIMIT newest rows; the ``latest_*``
+    variants are exact regardless of how far back they are.
+    """
+
+    organization: Organization
+    project: Project
+    application: Application
+    app_env: ApplicationEnvironment | None
+    environment: Environment | None
+    environments: list[Environment]
+    images: list[Image] = field(default_factory=list)
+    releases: list[Release] = field(default_factory=list)
+    deployments: list[Deployment] = field(default_factory=list)
+    latest_image: Image | None = None
+    latest_image_built: Image | None = None
+    latest_image_error: Image | None = None
+    latest_image_building: Image | None = None
+    latest_release: Release | None = None
+    latest_release_built: Release | None = None
+    latest_release_building: Release | None = None
+    latest_deployment: Deployment | None = None
+    latest_deployment_completed: Deployment | None = None
+    has_releases: bool = False
+    deployed_release: Release | None = None
+    deployed_image: Image | None = None
+    latest_deploy_release: Release | None = None
+    latest_release_image: Image | None = None
+    latest_release_processes: dict[str, Any] = field(default_factory=dict)
+    latest_release_release_commands: dict[str, Any] = field(default_factory=dict)
+    latest_release_job_processes: dict[str, Any] = field(default_factory=dict)
+    last_job_logs: dict[str, JobLog] = field(default_factory=dict)
+    release_by_id: dict[str, Release] = field(default_factory=dict)
+    image_by_id: dict[str, Image] = field(default_factory=dict)
+
+    def template_context(self):
+        """Fields as template variables (shallow, unlike dataclasses.asdict)."""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+def load_application_page(path):
+    """Load an ApplicationPage for a resolved ApplicationPath.
+
+    Issues a fixed number of queries however long the application's
+    history is, and warms every relationship the template walks.
+    """
+    page = ApplicationPage(
+        organization=path.organization,
+        project=path.project,
+        application=path.application,
+        app_env=path.app_env,
+        environment=path.environment,
+        environments=path.environments,
+    )
+    app_env = path.app_env
+    if app_env is None:
+        return page
+
+    # Collections used by the release candidate and the template.
+    db.session.query(ApplicationEnvironment).filter_by(id=app_env.id).options(
+        selectinload(ApplicationEnvironment.configurations),
+        selectinload(
+            ApplicationEnvironment.environment_config_subscriptions
+        ).joinedload(EnvironmentConfigSubscription.environment_configuration),
+        selectinload(ApplicationEnvironment.ingresses).selectinload(Ingress.hosts),
+        selectinload(ApplicationEnvironment.ingresses).selectinload(Ingress.paths),
+    ).first()
+
+    page.images, all_images = _fetch_recent_with_latest(
+        Image, app_env.id, Image.version, (Image.built, Image.error)
+    )
+    page.releases, all_releases = _fetch_recent_with_latest(
+        Release, app_env.id, Release.version, (Release.built, Release.error)
+    )
+    page.deployments, all_deployments = _fetch_recent_with_latest(
+        Deployment, app_env.id, Deployment.created, (Deployment.complete,)
+    )
+
+    variants = extract_latest_variants(all_images, all_releases, all_deployments)
+    for name, value in variants.items():
+        setattr(page, name, value)
+
+    resolver = RelatedObjectResolver(images=all_images, releases=all_releases)
+    resolver.warm_caches(all_deployments, all_releases)
+    page.deployed_release = resolver.get_release(page.latest_deployment_completed)
+    page.deployed_image = resolver.get_image_for_release(page.deployed_release)
+    page.latest_deploy_release = resolver.get_release(page.latest_deployment)
+    page.latest_release_image = resolver.get_image_for_release(page.latest_release)
+
+    (
+        page.latest_release_processes,
+        page.latest_release_release_commands,
+        _,
+        page.latest_release_job_processes,
+    ) = split_image_processes(page.latest_release_image)
+    page.last_job_logs = _latest_job_logs(
+        app_env, list(page.latest_release_job_processes)
+    )
+
+    page.release_by_id, page.image_by_id = resolver.build_lookup_dicts()
+    return page
+
+
 def compute_process_counts(releases, resolver):
     """Compute service process count per release (excludes release/postdeploy commands).
 
@@ -0,0 +1,200 @@
+"""Per-request SQL instrumentation.
+
+Every statement executed while a request is being handled is counted and
+timed, and grouped by a fingerprint of its SQL so that the same query run
+over and over (the usual shape of an N+1) stands out. Totals are exported
+as Prometheus metrics per endpoint, logged, and optionally returned in
+``X-DB-*`` response headers.
+
+``capture_queries`` and ``query_budget`` give tests the same numbers.
+"""
+
+import collections
+import contextlib
+import contextvars
+import logging
+import re
+import time
+
+from flask import g, request, request_started
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from cabotage.server.metrics import (
+    REQUEST_DB_QUERIES,
+    REQUEST_DB_REPEATED_QUERIES,
+    REQUEST_DB_SECONDS,
+)
+
+log = logging.getLogger(__name__)
+
+_current: contextvars.ContextVar["QueryStats | None"] = contextvars.ContextVar(
+    "query_stats", default=None
+)
+
+_WHITESPACE = re.compile(r"\s+")
+# Expanded IN lists ("IN (%(id_1_1)s, %(id_1_2)s)") and inline literals vary
+# with the data, not the query.
+_PARAM_LIST = re.compile(
+    r"\(\s*(?:%\(\w+\)s|\?|\$\d+)(?:\s*,\s*(?:%\(\w+\)s|\?|\$\d+))*\s*\)"
+)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def fingerprint(statement):
+    """Normalize a SQL statement so repeats with different values match."""
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _PARAM_LIST.sub("(?)", statement)
+    return _LITERAL.sub("?", statement)
+
+
+class QueryStats:
+    """Statements executed within one request or capture block."""
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = collections.Counter()
+
+    def record(self, statement, duration):
+        stats = self
+        key = fingerprint(statement)
+        while stats is not None:
+            stats.count += 1
+            stats.duration += duration
+            stats.fingerprints[key] += 1
+            stats = stats.parent
+
+    @property
+    def repeated_count(self):
+        """Executions beyond the first of each distinct statement."""
+        return sum(n - 1 for n in self.fingerprints.values() if n > 1)
+
+    def repeated(self, min_count=2):
+        """``[(fingerprint, count)]`` run at least ``min_count`` times."""
+        return [
+            (key, n) for key, n in self.fingerprints.most_common() if n >= min_count
+        ]
+
+    def summary(self, limit=5):
+        lines = [f"{self.count} queries in {self.duration * 1000:.1f}ms"]
+        for key, n in self.repeated()[:limit]:
+            lines.append(f"  {n}x {key[:200]}")
+        return "\n".join(lines)
+
+
+def current_stats():
+    return _current.get()
+
+
+@contextlib.contextmanager
+def capture_queries():
+    """Record statements executed inside the block, including any requests."""
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextlib.contextmanager
+def query_budget(max_queries, max_repeats=None):
+    """Fail if the block executes more than ``max_queries`` statements.
+
+    ``max_repeats`` additionally bounds how many times any one statement may
+    run, which catches N+1 loops that still fit inside the total.
+    """
+    with capture_queries() as stats:
+        yield stats
+    assert stats.count <= max_queries, (
+        f"Query budget of {max_queries} exceeded: {stats.summary()}"
+    )
+    if max_repeats is not None:
+        worst = stats.repeated(min_count=max_repeats + 1)
+        assert not worst, (
+            f"Statement repeated more than {max_repeats} times: {stats.summary()}"
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None and context is not None:
+        context._query_stats_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    start = getattr(context, "_query_stats_start", None)
+    if stats is not None and start is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+def init_query_stats(app):
+    if not app.config.get("QUERY_STATS_ENABLED", True):
+        return
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    # request_started fires ahead of every before_request hook, so queries
+    # made while loading the user and identity are counted too.
+    def start_query_stats(sender, **extra):
+        stats = QueryStats(parent=_current.get())
+        g._query_stats_token = _current.set(stats)
+
+    request_started.connect(start_query_stats, app, weak=False)
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = _current.get()
+        if "_query_stats_token" not in g or stats is None:
+            return response
+        endpoint = request.endpoint or "unknown"
+        REQUEST_DB_QUERIES.labels(endpoint).observe(stats.count)
+        REQUEST_DB_SECONDS.labels(endpoint).observe(stats.duration)
+        if stats.repeated_count:
+            REQUEST_DB_REPEATED_QUERIES.labels(endpoint).inc(stats.repeated_count)
+
+        if app.config.get("QUERY_STATS_HEADERS"):
+            response.headers["X-DB-Query-Count"] = str(stats.count)
+            response.headers["X-DB-Time-Ms"] = f"{stats.duration * 1000:.1f}"
+            response.headers["X-DB-Repeated-Queries"] = str(stats.repeated_count)
+
+        fields = {
+            "endpoint": endpoint,
+            "db_query_count": stats.count,
+            "db_time_ms": round(stats.duration * 1000, 1),
+            "db_repeated_queries": stats.repeated_count,
+        }
+        worst = stats.repeated(
+            min_count=app.config.get("QUERY_STATS_REPEAT_THRESHOLD", 10)
+        )
+        if worst or stats.count > app.config.get("QUERY_STATS_LOG_THRESHOLD", 50):
+            fields["db_repeated_statements"] = [
+                {"statement": key[:500], "count": n} for key, n in worst[:5]
+            ]
+            log.warning(
+                "%s ran %d queries (%d repeated) in %.1fms",
+                endpoint,
+                stats.count,
+                stats.repeated_count,
+                stats.duration * 1000,
+                extra=fields,
+            )
+        else:
+            log.debug(
+                "%s ran %d queries in %.1fms",
+                endpoint,
+                stats.count,
+                stats.duration * 1000,
+                extra=fields,
+            )
+        return response
+
+    @app.teardown_request
+    def stop_query_stats(exc):
+        token = g.pop("_query_stats_token", None)
+        if token is not None:
+            _current.reset(token)
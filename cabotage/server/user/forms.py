@@ -3,6 +3,7 @@ import uuid
 from flask_security.forms import LoginForm, RegisterFormV2
 
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField
 
 from wtforms import (
     BooleanField,
@@ -370,6 +371,48 @@ class CreateConfigurationForm(FlaskForm):
         return True
 
 
+class BulkConfigurationForm(FlaskForm):
+    environment_id = HiddenField(
+        "Environment",
+        description="Environment these Configurations belong to (optional).",
+    )
+    format = SelectField(
+        "Format",
+        choices=[("env", "ENV"), ("json", "JSON")],
+        default="env",
+    )
+    raw_text = TextAreaField(
+        "Variables",
+        [Optional()],
+        description="One KEY=VALUE per line, or a JSON object.",
+    )
+    upload = FileField(
+        "Upload",
+        description="A .env or .json file, used instead of the text above.",
+    )
+    secure = BooleanField(
+        "Secure",
+        [],
+        description=(
+            "Store new Environment Variables Securely. "
+            "Existing variables keep their current setting."
+        ),
+    )
+    buildtime = BooleanField(
+        "Expose during Build",
+        [],
+        description="Set new Environment Variables during Image builds.",
+    )
+
+    def import_text(self):
+        """Return ``(text, format)`` from the upload if given, else the textarea."""
+        upload = self.upload.data
+        if upload and getattr(upload, "filename", None):
+            fmt = "json" if upload.filename.lower().endswith(".json") else "env"
+            return upload.read().decode("utf-8", errors="replace"), fmt
+        return self.raw_text.data or "", self.format.data
+
+
 class EditApplicationSettingsForm(FlaskForm):
     application_id = SelectField(
         "Application",
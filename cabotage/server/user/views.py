@@ -7,6 +7,7 @@ import uuid
 
 from flask import (
     Blueprint,
+    Response,
     abort,
     current_app,
     jsonify,
@@ -15,6 +16,7 @@ from flask import (
     render_template,
     request,
     session,
+    stream_with_context,
     url_for,
     flash,
 )
@@ -27,15 +29,15 @@ from itsdangerous import BadData
 
 import kubernetes
 import kubernetes.stream.ws_client
+import redis
 
 from dxf import DXF
 import requests as requests_lib
 from requests.exceptions import HTTPError
-from sqlalchemy import and_, case, desc, func, or_
+from sqlalchemy import and_, case, func, or_
 from sqlalchemy.exc import DataError, IntegrityError
-from sqlalchemy.orm import joinedload, subqueryload
+from sqlalchemy.orm import joinedload
 from sqlalchemy.orm.attributes import flag_modified
-from sqlalchemy_continuum import version_class
 
 from cabotage.server import (
     config_writer,
@@ -84,6 +86,7 @@ from cabotage.server.models.projects import (
     pod_classes,
 )
 from cabotage.server.models.projects import activity_plugin
+from cabotage.server.autoscaling import AutoscalePolicyError, validate_policy
 from cabotage.server.models.resources import (
     PostgresResource,
     RedisResource,
@@ -97,15 +100,30 @@ from cabotage.server.query_helpers import (
     compute_ae_status_sets,
     compute_process_counts,
     compute_release_change_details,
-    extract_latest_variants,
+    load_application_page,
     RelatedObjectResolver,
-    split_image_processes,
+    resolve_application_path,
+)
+from cabotage.server.observe import (
+    REGEX_META,
+    build_observe_queries,
+    collect_traefik_svc_names,
+    compute_observe_namespace,
+    compute_observe_prefix,
+    query_mimir_instant,
+    query_mimir_range,
+    traefik_svc_label,
+)
+from cabotage.server.models.utils import (
+    readable_k8s_hostname,
+    safe_k8s_name,
+    slugify,
 )
-from cabotage.server.models.utils import safe_k8s_name, readable_k8s_hostname, slugify
 
 from cabotage.server.user.forms import (
     AddApplicationToEnvironmentForm,
     ApplicationScaleForm,
+    BulkConfigurationForm,
     CreateApplicationForm,
     CreateConfigurationForm,
     CreateEnvironmentConfigurationForm,
@@ -153,13 +171,18 @@ from cabotage.celery.tasks import (
     dispatch_pipeline_notification,
     process_github_hook,
     run_deploy,
-    run_image_build,
-    run_release_build,
     teardown_tailscale_operator,
 )
+from cabotage.celery.routing import PRIORITY_INTERACTIVE
+from cabotage.celery.tasks.build_scheduler import schedule_build
+from cabotage.celery.tasks.github import enqueue_github_hook
 from cabotage.celery.tasks.notify import dispatch_autodeploy_notification
 
-from cabotage.celery.tasks.deploy import resize_deployment, scale_deployment
+from cabotage.celery.tasks.autoscale import load_autoscale_state
+from cabotage.celery.tasks.deploy import (
+    queue_scale,
+    scale_status_key,
+)
 from cabotage.utils.build_log_stream import (
     get_redis_client,
     read_log_stream,
@@ -167,8 +190,7 @@ from cabotage.utils.build_log_stream import (
 )
 
 from cabotage.utils import oidc
-
-_REGEX_META = re.compile(r"[.*+?{}()|\\^$\[\]]")
+from cabotage.utils.config_import import ConfigImportError, parse_configuration
 
 
 def _safe_get(model, pk):
@@ -212,6 +234,86 @@ def _env_config_k8s_resource_prefix(project):
     return project.k8s_identifier
 
 
+def _import_configurations(form, existing, build_configuration, ns, prefix):
+    """Apply a BulkConfigurationForm on top of ``existing`` configurations.
+
+    Everything is validated before anything is written, then all values go
+    out through one ``write_configurations`` call. Unchanged variables are
+    skipped so they don't get a new version. Returns ``(created, updated)``
+    with the new configurations added to the session.
+    """
+    from cabotage.utils.config_templates import has_template_variables
+
+    text, fmt = form.import_text()
+    values = parse_configuration(text, fmt)
+    existing = {configuration.name.lower(): configuration for configuration in existing}
+
+    errors = []
+    created = []
+    updated = []
+    for name, value in values.items():
+        configuration = existing.get(name.lower())
+        if configuration is None:
+            if value == "**secure**":
+                errors.append(f"'{name}' is a masked secret, supply its value")
+                continue
+            configuration = build_configuration(name, value)
+            created.append(configuration)
+        elif getattr(configuration, "resource_id", None) is not None:
+            errors.append(f"'{name}' is managed by a backing service")
+            continue
+        elif value == ("**secure**" if configuration.secret else configuration.value):
+            continue
+        else:
+            updated.append((configuration, value))
+        if configuration.secret and has_template_variables(value):
+            errors.append(f"'{name}': template configs cannot be secrets")
+    if errors:
+        raise ConfigImportError(errors)
+
+    for configuration, value in updated:
+        configuration.value = value
+    updated = [configuration for configuration, _ in updated]
+    changed = created + updated
+    to_write = [c for c in changed if not has_template_variables(c.value)]
+    key_slugs = config_writer.write_configurations(ns, prefix, to_write)
+    for configuration, slugs in zip(to_write, key_slugs, strict=True):
+        configuration.key_slug = slugs["config_key_slug"]
+        configuration.build_key_slug = slugs["build_key_slug"]
+        if configuration.secret:
+            configuration.value = "**secure**"
+    for configuration in changed:
+        if configuration not in to_write:
+            configuration.key_slug = None
+            configuration.build_key_slug = None
+    db.session.add_all(created)
+    return created, updated
+
+
+def _record_configuration_import(obj, created, updated):
+    if not created and not updated:
+        flash("No changes to import.", "info")
+        return
+    db.session.flush()
+    activity = Activity(
+        verb="import",
+        object=obj,
+        data={
+            "user_id": str(current_user.id),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "created": sorted(c.name for c in created),
+            "updated": sorted(c.name for c in updated),
+        },
+    )
+    db.session.add(activity)
+    db.session.commit()
+    flash(
+        f"Imported {len(created) + len(updated)} variables "
+        f"({len(created)} new, {len(updated)} updated).",
+        "success",
+    )
+
+
 def _environment_app_references(environment):
     """Build template variable references for all apps in an environment."""
     references = []
@@ -1452,6 +1554,14 @@ def project(org_slug, project_slug):
             selectinload(Project.project_applications)
             .selectinload(Application.application_environments)
             .selectinload(ApplicationEnvironment.configurations),
+            selectinload(Project.project_applications)
+            .selectinload(Application.application_environments)
+            .selectinload(ApplicationEnvironment.environment_config_subscriptions)
+            .joinedload(EnvironmentConfigSubscription.environment_configuration),
+            selectinload(Project.project_applications)
+            .selectinload(Application.application_environments)
+            .selectinload(ApplicationEnvironment.ingresses)
+            .selectinload(Ingress.hosts),
             selectinload(Project.project_environments).selectinload(
                 Environment.resources
             ),
@@ -2240,6 +2350,75 @@ def project_environment_configuration_create(org_slug, project_slug, env_slug):
     )
 
 
+@user_blueprint.route(
+    "/projects/<org_slug>/<project_slug>/environments/<env_slug>/config/bulk",
+    methods=["POST"],
+)
+@login_required
+def project_environment_configuration_bulk(org_slug, project_slug, env_slug):
+    organization = Organization.query.filter_by(slug=org_slug).first_or_404()
+    project = Project.query.filter_by(
+        organization_id=organization.id, slug=project_slug
+    ).first_or_404()
+    if not AdministerProjectPermission(project.id).can():
+        abort(403)
+    environment = Environment.query.filter_by(
+        project_id=project.id, slug=env_slug
+    ).first_or_404()
+
+    form = BulkConfigurationForm()
+    redirect_url = url_for(
+        "user.project_environment",
+        org_slug=organization.slug,
+        project_slug=project.slug,
+        env_slug=environment.slug,
+        _anchor="config",
+    )
+    if not form.validate_on_submit():
+        for field, errors in form.errors.items():
+            for error in errors:
+                flash(f"{field}: {error}", "error")
+        return redirect(redirect_url)
+
+    def build_configuration(name, value):
+        return EnvironmentConfiguration(
+            project_id=project.id,
+            environment_id=environment.id,
+            name=name,
+            value=value,
+            secret=form.secure.data,
+            buildtime=form.buildtime.data,
+        )
+
+    # Use any active app_env to derive the k8s namespace
+    app_env = (
+        environment.active_application_environments[0]
+        if environment.active_application_environments
+        else None
+    )
+    if app_env:
+        ns = _config_k8s_namespace(organization, app_env)
+    else:
+        ns = environment.k8s_namespace
+    existing = EnvironmentConfiguration.query.filter_by(
+        project_id=project.id, environment_id=environment.id
+    ).all()
+    try:
+        created, updated = _import_configurations(
+            form,
+            existing,
+            build_configuration,
+            ns,
+            _env_config_k8s_resource_prefix(project),
+        )
+    except ConfigImportError as exc:
+        for error in exc.errors:
+            flash(error, "error")
+        return redirect(redirect_url)
+    _record_configuration_import(environment, created, updated)
+    return redirect(redirect_url)
+
+
 @user_blueprint.route(
     "/projects/<org_slug>/<project_slug>/environments/<env_slug>/config/<config_id>/edit",
     methods=["GET", "POST"],
@@ -3133,68 +3312,27 @@ def organization_delete(org_slug):
 )
 @login_required
 def project_application(org_slug, project_slug, app_slug, env_slug=None):
-    organization = Organization.query.filter_by(slug=org_slug).first_or_404()
-    project = Project.query.filter_by(
-        organization_id=organization.id, slug=project_slug
-    ).first_or_404()
-    application = Application.query.filter_by(
-        project_id=project.id, slug=app_slug
-    ).first_or_404()
-    if not ViewApplicationPermission(application.id).can():
+    path = resolve_application_path(org_slug, project_slug, app_slug, env_slug)
+    if path is None:
+        abort(404)
+    if not ViewApplicationPermission(path.application.id).can():
         abort(403)
 
-    environment = None
-    environments = []
-    if project.environments_enabled:
-        # Only show environments this application is enrolled in
-        all_app_envs = (
-            ApplicationEnvironment.query.filter_by(
-                application_id=application.id,
+    if path.project.environments_enabled and not env_slug and path.environment:
+        return redirect(
+            url_for(
+                "user.project_application",
+                org_slug=org_slug,
+                project_slug=project_slug,
+                app_slug=app_slug,
+                env_slug=path.environment.slug,
             )
-            .filter(ApplicationEnvironment.deleted_at.is_(None))
-            .all()
-        )
-        enrolled_env_ids = {ae.environment_id for ae in all_app_envs}
-        environments = sorted(
-            [e for e in project.active_environments if e.id in enrolled_env_ids],
-            key=lambda e: e.sort_order,
         )
-        if env_slug:
-            environment = Environment.query.filter_by(
-                project_id=project.id, slug=env_slug
-            ).first_or_404()
-        else:
-            environment = next(
-                (e for e in environments if e.is_default),
-                environments[0] if environments else None,
-            )
-            if environment:
-                return redirect(
-                    url_for(
-                        "user.project_application",
-                        org_slug=org_slug,
-                        project_slug=project_slug,
-                        app_slug=app_slug,
-                        env_slug=environment.slug,
-                    )
-                )
-
-    # Resolve app_env (may be None for unenrolled apps in env-enabled projects)
-    app_env = _resolve_app_env(
-        application,
-        env_slug=env_slug if env_slug else None,
-        project=project,
-        required=False,
-    )
 
-    # Eagerly load subscriptions + env configs to avoid N+1 in
-    # _resolved_configuration and template rendering
-    if app_env:
-        db.session.query(ApplicationEnvironment).filter_by(id=app_env.id).options(
-            subqueryload(
-                ApplicationEnvironment.environment_config_subscriptions
-            ).joinedload(EnvironmentConfigSubscription.environment_configuration)
-        ).first()
+    page = load_application_page(path)
+    application = page.application
+    app_env = page.app_env
+    latest_deployment_completed = page.latest_deployment_completed
 
     pod_class_info = (
         '<table class="table"><tr><th>Class</th><th>CPU</th><th>Mem</th></tr>'
@@ -3209,227 +3347,116 @@ def project_application(org_slug, project_slug, app_slug, env_slug=None):
     scale_form = ApplicationScaleForm()
     scale_form.application_id.data = str(application.id)
 
-    # Pre-fetch all data from dynamic relationships once to avoid
-    # repeated per-access queries in the template (~50+ calls to
-    # src.latest_* each triggering a fresh DB query).
-    latest_image = None
-    latest_image_built = None
-    latest_image_error = None
-    latest_image_building = None
-    latest_release = None
-    latest_release_built = None
-    latest_release_building = None
-    latest_deployment = None
-    latest_deployment_completed = None
-    has_releases = False
     image_diff = None
     config_diff = None
     ingress_diff = None
     ingress_change_details = {}
-    releases = []
-    images = []
-    deployments = []
-
-    # Pre-resolved related objects (avoid cascading queries for
-    # deployment.release_object → release.image_object → image.processes)
-    deployed_release = None
-    deployed_image = None
-    latest_deploy_release = None
-    latest_release_image = None
-    latest_release_processes = {}
-    latest_release_release_commands = {}
-    latest_release_job_processes = {}
-    last_job_logs = {}
-    release_by_id = {}
-    image_by_id = {}
 
     if app_env is not None:
-        # 3 queries: fetch recent items, extract latest_* variants in Python
-        all_images = app_env.images.order_by(Image.version.desc()).limit(50).all()
-        all_releases = app_env.releases.order_by(Release.version.desc()).limit(50).all()
-        all_deployments = (
-            app_env.deployments.order_by(Deployment.created.desc()).limit(50).all()
-        )
-
-        images = all_images[:10]
-        releases = all_releases[:10]
-        deployments = all_deployments[:10]
-
-        # Extract latest_* variants from pre-fetched lists
-        variants = extract_latest_variants(all_images, all_releases, all_deployments)
-        latest_image = variants["latest_image"]
-        latest_image_built = variants["latest_image_built"]
-        latest_image_error = variants["latest_image_error"]
-        latest_image_building = variants["latest_image_building"]
-        latest_release = variants["latest_release"]
-        latest_release_built = variants["latest_release_built"]
-        latest_release_building = variants["latest_release_building"]
-        latest_deployment = variants["latest_deployment"]
-        latest_deployment_completed = variants["latest_deployment_completed"]
-        has_releases = variants["has_releases"]
-
-        # Pre-resolve Release/Image objects referenced by JSONB foreign keys
-        resolver = RelatedObjectResolver(images=all_images, releases=all_releases)
-        deployed_release = resolver.get_release(latest_deployment_completed)
-        deployed_image = resolver.get_image_for_release(deployed_release)
-        latest_deploy_release = resolver.get_release(latest_deployment)
-        latest_release_image = resolver.get_image_for_release(latest_release)
-
-        (
-            latest_release_processes,
-            latest_release_release_commands,
-            _,
-            latest_release_job_processes,
-        ) = split_image_processes(latest_release_image)
-
-        # Fetch most recent job log per job process for the "last ran" display
-        for proc_name in latest_release_job_processes:
-            last_log = (
-                JobLog.query.filter_by(
-                    application_id=application.id,
-                    application_environment_id=app_env.id,
-                    process_name=proc_name,
-                )
-                .order_by(
-                    func.coalesce(JobLog.completion_time, JobLog.start_time).desc()
-                )
-                .first()
+        # Only build the candidate release and diff it when its fingerprint
+        # says something changed since the last completed deployment.
+        if app_env.has_undeployed_changes(latest_deployment_completed):
+            # Compute ready_for_deployment diffs inline (avoids re-querying
+            # latest_release and latest_image_built inside the model method)
+            from cabotage.server.models.projects import DictDiffer
+
+            current = (
+                latest_deployment_completed.release
+                if latest_deployment_completed
+                else {}
+            )
+            candidate = Release(
+                application_id=application.id,
+                application_environment_id=app_env.id,
+                image=(
+                    page.latest_image_built.asdict if page.latest_image_built else {}
+                ),
+                configuration=Application._resolved_configuration(app_env),
+                ingresses={ing.name: ing.asdict for ing in app_env.ingresses},
+                platform=application.platform,
+            ).asdict
+            image_diff = DictDiffer(
+                candidate.get("image") or {},
+                current.get("image") or {},
+                ignored_keys=["id", "version_id", "commit_sha"],
+            )
+            config_diff = DictDiffer(
+                candidate.get("configuration") or {},
+                current.get("configuration") or {},
+                ignored_keys=["id"],
+            )
+            ingress_diff = DictDiffer(
+                candidate.get("ingresses") or {},
+                current.get("ingresses") or {},
+                ignored_keys=["id"],
             )
-            if last_log is not None:
-                last_job_logs[proc_name] = last_log
-
-        # Batch-warm caches for template loops
-        resolver.warm_caches(all_deployments, all_releases)
-        release_by_id, image_by_id = resolver.build_lookup_dicts()
-
-        # Compute ready_for_deployment diffs inline (avoids re-querying
-        # latest_release and latest_image_built inside the model method)
-        from cabotage.server.models.projects import DictDiffer
 
-        current = (
-            latest_deployment_completed.release if latest_deployment_completed else {}
-        )
-        candidate = Release(
-            application_id=application.id,
-            application_environment_id=app_env.id,
-            image=(latest_image_built.asdict if latest_image_built else {}),
-            configuration=Application._resolved_configuration(app_env),
-            ingresses={ing.name: ing.asdict for ing in app_env.ingresses},
-            platform=application.platform,
-        ).asdict
-        image_diff = DictDiffer(
-            candidate.get("image") or {},
-            current.get("image") or {},
-            ignored_keys=["id", "version_id", "commit_sha"],
-        )
-        config_diff = DictDiffer(
-            candidate.get("configuration") or {},
-            current.get("configuration") or {},
-            ignored_keys=["id"],
-        )
-        ingress_diff = DictDiffer(
-            candidate.get("ingresses") or {},
-            current.get("ingresses") or {},
-            ignored_keys=["id"],
-        )
-
-        # Build per-ingress change summaries for the template
-        ingress_change_details = {}
-        for name in ingress_diff.changed():
-            old_ing = ingress_diff.past_dict[name]
-            new_ing = ingress_diff.current_dict[name]
-            details = []
-            old_hosts = {h["hostname"] for h in old_ing.get("hosts", [])}
-            new_hosts = {h["hostname"] for h in new_ing.get("hosts", [])}
-            h_added = len(new_hosts - old_hosts)
-            h_removed = len(old_hosts - new_hosts)
-            if h_added or h_removed:
-                parts = []
-                if h_added:
-                    parts.append(f"{h_added} added")
-                if h_removed:
-                    parts.append(f"{h_removed} removed")
-                details.append(f"hosts: {', '.join(parts)}")
-            old_paths = {p["path"] for p in old_ing.get("paths", [])}
-            new_paths = {p["path"] for p in new_ing.get("paths", [])}
-            p_added = len(new_paths - old_paths)
-            p_removed = len(old_paths - new_paths)
-            if p_added or p_removed:
-                parts = []
-                if p_added:
-                    parts.append(f"{p_added} added")
-                if p_removed:
-                    parts.append(f"{p_removed} removed")
-                details.append(f"paths: {', '.join(parts)}")
-            setting_keys = {
-                "enabled",
-                "ingress_class_name",
-                "backend_protocol",
-                "proxy_connect_timeout",
-                "proxy_read_timeout",
-                "proxy_send_timeout",
-                "proxy_body_size",
-                "client_body_buffer_size",
-                "proxy_request_buffering",
-                "session_affinity",
-                "use_regex",
-                "allow_annotations",
-                "extra_annotations",
-                "cluster_issuer",
-                "force_ssl_redirect",
-                "service_upstream",
-            }
-            changed_settings = [
-                k for k in setting_keys if old_ing.get(k) != new_ing.get(k)
-            ]
-            if changed_settings:
-                details.append(f"settings: {', '.join(sorted(changed_settings))}")
-            ingress_change_details[name] = details
+            # Build per-ingress change summaries for the template
+            ingress_change_details = {}
+            for name in ingress_diff.changed():
+                old_ing = ingress_diff.past_dict[name]
+                new_ing = ingress_diff.current_dict[name]
+                details = []
+                old_hosts = {h["hostname"] for h in old_ing.get("hosts", [])}
+                new_hosts = {h["hostname"] for h in new_ing.get("hosts", [])}
+                h_added = len(new_hosts - old_hosts)
+                h_removed = len(old_hosts - new_hosts)
+                if h_added or h_removed:
+                    parts = []
+                    if h_added:
+                        parts.append(f"{h_added} added")
+                    if h_removed:
+                        parts.append(f"{h_removed} removed")
+                    details.append(f"hosts: {', '.join(parts)}")
+                old_paths = {p["path"] for p in old_ing.get("paths", [])}
+                new_paths = {p["path"] for p in new_ing.get("paths", [])}
+                p_added = len(new_paths - old_paths)
+                p_removed = len(old_paths - new_paths)
+                if p_added or p_removed:
+                    parts = []
+                    if p_added:
+                        parts.append(f"{p_added} added")
+                    if p_removed:
+                        parts.append(f"{p_removed} removed")
+                    details.append(f"paths: {', '.join(parts)}")
+                setting_keys = {
+                    "enabled",
+                    "ingress_class_name",
+                    "backend_protocol",
+                    "proxy_connect_timeout",
+                    "proxy_read_timeout",
+                    "proxy_send_timeout",
+                    "proxy_body_size",
+                    "client_body_buffer_size",
+                    "proxy_request_buffering",
+                    "session_affinity",
+                    "use_regex",
+                    "allow_annotations",
+                    "extra_annotations",
+                    "cluster_issuer",
+                    "force_ssl_redirect",
+                    "service_upstream",
+                }
+                changed_settings = [
+                    k for k in setting_keys if old_ing.get(k) != new_ing.get(k)
+                ]
+                if changed_settings:
+                    details.append(f"settings: {', '.join(sorted(changed_settings))}")
+                ingress_change_details[name] = details
 
     return render_template(
         "user/project_application.html",
-        application=application,
-        app_env=app_env,
-        environment=environment,
-        environments=environments,
+        **page.template_context(),
         deploy_form=ReleaseDeployForm(),
         scale_form=scale_form,
-        view_releases=version_class(Release)
-        .query.filter_by(application_id=application.id)
-        .order_by(desc(version_class(Release).version_id))
-        .limit(5),
-        releases=releases,
-        images=images,
-        deployments=deployments,
         DEFAULT_POD_CLASS=DEFAULT_POD_CLASS,
         pod_classes=pod_classes,
         pod_class_info=pod_class_info,
-        # Pre-fetched latest_* values (avoid per-access queries)
-        latest_image=latest_image,
-        latest_image_built=latest_image_built,
-        latest_image_error=latest_image_error,
-        latest_image_building=latest_image_building,
-        latest_release=latest_release,
-        latest_release_built=latest_release_built,
-        latest_release_building=latest_release_building,
-        latest_deployment=latest_deployment,
-        latest_deployment_completed=latest_deployment_completed,
-        has_releases=has_releases,
         image_diff=image_diff,
         config_diff=config_diff,
         ingress_diff=ingress_diff,
         ingress_change_details=ingress_change_details,
-        deployed_release=deployed_release,
-        deployed_image=deployed_image,
-        latest_deploy_release=latest_deploy_release,
-        latest_release_image=latest_release_image,
-        latest_release_processes=latest_release_processes,
-        latest_release_release_commands=latest_release_release_commands,
-        latest_release_job_processes=latest_release_job_processes,
-        last_job_logs=last_job_logs,
-        release_by_id=release_by_id,
-        image_by_id=image_by_id,
-        env_configs=_eager_env_configs(project, environment),
+        env_configs=_eager_env_configs(page.project, page.environment),
         subscribed_env_config_ids=(
             {
                 sub.environment_configuration_id
@@ -4049,6 +4076,66 @@ def project_application_configuration_edit(org_slug, project_slug, app_slug, con
     )
 
 
+@user_blueprint.route(
+    "/projects/<org_slug>/<project_slug>/applications/<app_slug>/config/bulk",
+    methods=["POST"],
+)
+@login_required
+def project_application_configuration_bulk(org_slug, project_slug, app_slug):
+    organization = Organization.query.filter_by(slug=org_slug).first_or_404()
+    project = Project.query.filter_by(
+        organization_id=organization.id, slug=project_slug
+    ).first_or_404()
+    application = Application.query.filter_by(
+        project_id=project.id, slug=app_slug
+    ).first_or_404()
+    if not AdministerApplicationPermission(application.id).can():
+        abort(403)
+
+    form = BulkConfigurationForm()
+    app_env = _resolve_app_env(application, environment_id=form.environment_id.data)
+    redirect_url = url_for(
+        "user.application_config",
+        org_slug=organization.slug,
+        project_slug=project.slug,
+        app_slug=application.slug,
+        env_slug=app_env.environment.slug if project.environments_enabled else None,
+    )
+    if not form.validate_on_submit():
+        for field, errors in form.errors.items():
+            for error in errors:
+                flash(f"{field}: {error}", "error")
+        return redirect(redirect_url)
+
+    def build_configuration(name, value):
+        return Configuration(
+            application_id=application.id,
+            application_environment_id=app_env.id,
+            name=name,
+            value=value,
+            secret=form.secure.data,
+            buildtime=form.buildtime.data,
+        )
+
+    existing = Configuration.query.filter_by(
+        application_id=application.id, application_environment_id=app_env.id
+    ).all()
+    try:
+        created, updated = _import_configurations(
+            form,
+            existing,
+            build_configuration,
+            _config_k8s_namespace(organization, app_env),
+            _config_k8s_resource_prefix(project, application),
+        )
+    except ConfigImportError as exc:
+        for error in exc.errors:
+            flash(error, "error")
+        return redirect(redirect_url)
+    _record_configuration_import(application, created, updated)
+    return redirect(redirect_url)
+
+
 @user_blueprint.route(
     "/projects/<org_slug>/<project_slug>/applications/<app_slug>/settings",
     methods=["GET", "POST"],
@@ -4509,7 +4596,7 @@ def project_application_ingress(org_slug, project_slug, app_slug, env_slug=None)
                         )
             elif not new_use_regex and ingress.use_regex:
                 for p in kept_paths:
-                    if _REGEX_META.search(p.path):
+                    if REGEX_META.search(p.path):
                         ingress_errors.setdefault("paths", []).append(
                             f"Cannot disable regex: path '{p.path}' contains regex characters."
                         )
@@ -4541,7 +4628,7 @@ def project_application_ingress(org_slug, project_slug, app_slug, env_slug=None)
                         ingress_errors.setdefault("paths", []).append(
                             f"Invalid regex path '{path_value}': {e}"
                         )
-                elif _REGEX_META.search(path_value):
+                elif REGEX_META.search(path_value):
                     ingress_errors.setdefault("paths", []).append(
                         f"Path '{path_value}' contains regex characters but regex is disabled."
                     )
@@ -4887,13 +4974,16 @@ def project_application_configuration_delete(
     )
 
 
-def _render_audit_log(scope_filter, template_context):
+def _render_audit_log(scope_filter, template_context, facet_scope):
     """Core audit log rendering shared across org/project/app scopes.
 
     scope_filter: a SQLAlchemy filter expression for scoping (e.g. by org, project, app)
     template_context: dict of extra template variables (application, org, etc.)
+    facet_scope: (scope_type, scope_id) of the audit_log_facets rows that
+        populate the verb/type filter menus, or None to compute them from
+        scope_filter for scopes that have no facet rows of their own
     """
-    from cabotage.server.models.audit import AuditLog
+    from cabotage.server.models.audit import AuditLog, AuditLogFacet
 
     before = request.args.get("before", type=int)
     after = request.args.get("after", type=int)
@@ -4927,24 +5017,42 @@ def _render_audit_log(scope_filter, template_context):
         has_newer = before is not None
 
     # Available filter values — scoped by the OTHER active filter
-    verb_q = AuditLog.query.filter(scope_filter)
-    type_q = AuditLog.query.filter(scope_filter)
-    if type_filter:
-        verb_q = verb_q.filter(AuditLog.object_type.in_(type_filter))
-    if verb_filter:
-        type_q = type_q.filter(AuditLog.verb.in_(verb_filter))
-
+    if facet_scope is None:
+        facets = (
+            AuditLog.query.filter(scope_filter)
+            .with_entities(AuditLog.verb, AuditLog.object_type)
+            .distinct()
+            .all()
+        )
+    else:
+        scope_type, scope_id = facet_scope
+        facets = AuditLogFacet.query.filter_by(
+            scope_type=scope_type, scope_id=scope_id
+        ).all()
     all_verbs = sorted(
-        r[0] for r in verb_q.with_entities(AuditLog.verb).distinct() if r[0]
+        {
+            f.verb
+            for f in facets
+            if f.verb and (not type_filter or f.object_type in type_filter)
+        }
     )
     all_types = sorted(
-        r[0] for r in type_q.with_entities(AuditLog.object_type).distinct() if r[0]
+        {
+            f.object_type
+            for f in facets
+            if f.object_type and (not verb_filter or f.verb in verb_filter)
+        }
     )
 
     from cabotage.server.audit_helpers import compute_audit_changes
 
     entry_changes = compute_audit_changes(entries)
 
+    export_args = dict(request.view_args or {})
+    export_args.update(
+        (k, v) for k, v in request.args.items() if k in ("env_slug", "verb", "type")
+    )
+
     return render_template(
         "user/audit_log.html",
         entries=entries,
@@ -4957,15 +5065,63 @@ def _render_audit_log(scope_filter, template_context):
         type_filter=type_filter,
         all_verbs=all_verbs,
         all_types=all_types,
+        export_endpoint=f"{request.endpoint}_export",
+        export_args=export_args,
         **template_context,
     )
 
 
-@user_blueprint.route(
-    "/projects/<org_slug>/<project_slug>/applications/<app_slug>/audit"
-)
-@login_required
-def application_audit_log(org_slug, project_slug, app_slug):
+def _parse_audit_time(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        abort(400, description=f"Invalid {name} timestamp")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _export_audit_log(scope_filter, filename):
+    """Stream every audit entry in scope as NDJSON (default) or CSV.
+
+    Honors the same verb/type filters as the HTML view, plus optional ISO
+    8601 ``since``/``until`` bounds on the entry timestamp.
+    """
+    from cabotage.server.audit_helpers import stream_audit_export
+    from cabotage.server.models.audit import AuditLog
+
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in ("ndjson", "csv"):
+        abort(400, description="format must be ndjson or csv")
+    verb_filter = [v for v in request.args.get("verb", "").split(",") if v]
+    type_filter = [t for t in request.args.get("type", "").split(",") if t]
+    since = _parse_audit_time("since")
+    until = _parse_audit_time("until")
+
+    q = AuditLog.query.filter(scope_filter)
+    if verb_filter:
+        q = q.filter(AuditLog.verb.in_(verb_filter))
+    if type_filter:
+        q = q.filter(AuditLog.object_type.in_(type_filter))
+    if since:
+        q = q.filter(AuditLog.timestamp >= since)
+    if until:
+        q = q.filter(AuditLog.timestamp < until)
+
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(
+        stream_with_context(stream_audit_export(q, fmt)),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{fmt}"',
+        },
+    )
+
+
+def _application_audit_scope(org_slug, project_slug, app_slug):
     from cabotage.server.models.audit import AuditLog
 
     org, project, application = _lookup_app_context(org_slug, project_slug, app_slug)
@@ -4981,6 +5137,17 @@ def application_audit_log(org_slug, project_slug, app_slug):
                 AuditLog.application_environment_id.is_(None),
             ),
         )
+    return project, application, app_env, scope
+
+
+@user_blueprint.route(
+    "/projects/<org_slug>/<project_slug>/applications/<app_slug>/audit"
+)
+@login_required
+def application_audit_log(org_slug, project_slug, app_slug):
+    project, application, app_env, scope = _application_audit_scope(
+        org_slug, project_slug, app_slug
+    )
 
     environment = (
         app_env.environment if app_env and project.environments_enabled else None
@@ -4999,12 +5166,24 @@ def application_audit_log(org_slug, project_slug, app_slug):
                 app_slug=app_slug,
             ),
         },
+        None if app_env else ("application", application.id),
     )
 
 
-@user_blueprint.route("/projects/<org_slug>/<project_slug>/audit")
+@user_blueprint.route(
+    "/projects/<org_slug>/<project_slug>/applications/<app_slug>/audit/export"
+)
 @login_required
-def project_audit_log(org_slug, project_slug):
+def application_audit_log_export(org_slug, project_slug, app_slug):
+    project, application, app_env, scope = _application_audit_scope(
+        org_slug, project_slug, app_slug
+    )
+    return _export_audit_log(
+        scope, f"audit-{org_slug}-{project_slug}-{application.slug}"
+    )
+
+
+def _project_audit_scope(org_slug, project_slug):
     from cabotage.server.models.audit import AuditLog
 
     organization = Organization.query.filter_by(slug=org_slug).first_or_404()
@@ -5013,9 +5192,16 @@ def project_audit_log(org_slug, project_slug):
     ).first_or_404()
     if not ViewProjectPermission(project.id).can():
         abort(403)
+    return organization, project, AuditLog.project_id == project.id
+
+
+@user_blueprint.route("/projects/<org_slug>/<project_slug>/audit")
+@login_required
+def project_audit_log(org_slug, project_slug):
+    organization, project, scope = _project_audit_scope(org_slug, project_slug)
 
     return _render_audit_log(
-        AuditLog.project_id == project.id,
+        scope,
         {
             "organization": organization,
             "project": project,
@@ -5024,12 +5210,18 @@ def project_audit_log(org_slug, project_slug):
                 "user.project_audit_log", org_slug=org_slug, project_slug=project_slug
             ),
         },
+        ("project", project.id),
     )
 
 
-@user_blueprint.route("/projects/<org_slug>/<project_slug>/env/<env_slug>/audit")
+@user_blueprint.route("/projects/<org_slug>/<project_slug>/audit/export")
 @login_required
-def environment_audit_log(org_slug, project_slug, env_slug):
+def project_audit_log_export(org_slug, project_slug):
+    organization, project, scope = _project_audit_scope(org_slug, project_slug)
+    return _export_audit_log(scope, f"audit-{org_slug}-{project_slug}")
+
+
+def _environment_audit_scope(org_slug, project_slug, env_slug):
     from cabotage.server.models.audit import AuditLog
 
     organization = Organization.query.filter_by(slug=org_slug).first_or_404()
@@ -5056,6 +5248,15 @@ def environment_audit_log(org_slug, project_slug, env_slug):
             AuditLog.application_environment_id.is_(None),
         ),
     )
+    return organization, project, environment, scope
+
+
+@user_blueprint.route("/projects/<org_slug>/<project_slug>/env/<env_slug>/audit")
+@login_required
+def environment_audit_log(org_slug, project_slug, env_slug):
+    organization, project, environment, scope = _environment_audit_scope(
+        org_slug, project_slug, env_slug
+    )
 
     return _render_audit_log(
         scope,
@@ -5071,34 +5272,58 @@ def environment_audit_log(org_slug, project_slug, env_slug):
                 env_slug=env_slug,
             ),
         },
+        None,
     )
 
 
-@user_blueprint.route("/organizations/<org_slug>/audit")
+@user_blueprint.route("/projects/<org_slug>/<project_slug>/env/<env_slug>/audit/export")
 @login_required
-def organization_audit_log(org_slug):
+def environment_audit_log_export(org_slug, project_slug, env_slug):
+    organization, project, environment, scope = _environment_audit_scope(
+        org_slug, project_slug, env_slug
+    )
+    return _export_audit_log(scope, f"audit-{org_slug}-{project_slug}-{env_slug}")
+
+
+def _organization_audit_scope(org_slug):
     from cabotage.server.models.audit import AuditLog
 
     organization = Organization.query.filter_by(slug=org_slug).first_or_404()
     if not ViewOrganizationPermission(organization.id).can():
         abort(403)
+    scope = or_(
+        AuditLog.organization_id == organization.id,
+        and_(
+            AuditLog.object_type == "Organization",
+            AuditLog.object_id == organization.id,
+        ),
+    )
+    return organization, scope
+
+
+@user_blueprint.route("/organizations/<org_slug>/audit")
+@login_required
+def organization_audit_log(org_slug):
+    organization, scope = _organization_audit_scope(org_slug)
 
     return _render_audit_log(
-        or_(
-            AuditLog.organization_id == organization.id,
-            and_(
-                AuditLog.object_type == "Organization",
-                AuditLog.object_id == organization.id,
-            ),
-        ),
+        scope,
         {
             "organization": organization,
             "scope_type": "organization",
             "audit_url": url_for("user.organization_audit_log", org_slug=org_slug),
         },
+        ("organization", organization.id),
     )
 
 
+@user_blueprint.route("/organizations/<org_slug>/audit/export")
+@login_required
+def organization_audit_log_export(org_slug):
+    organization, scope = _organization_audit_scope(org_slug)
+    return _export_audit_log(scope, f"audit-{org_slug}")
+
+
 @user_blueprint.route(
     "/projects/<org_slug>/<project_slug>/applications/<app_slug>/images"
 )
@@ -5603,7 +5828,7 @@ def deployment_logs_query(org_slug, project_slug, app_slug, deployment_id):
     if not app_env:
         return jsonify({"error": "not configured"}), 404
 
-    namespace = _compute_observe_namespace(application, app_env)
+    namespace = compute_observe_namespace(application, app_env)
     org = application.project.organization
     process_names = sorted(app_env.process_counts or {})
     selectors = [
@@ -5661,7 +5886,7 @@ def application_release_create(org_slug, project_slug, app_slug):
     )
     db.session.add(activity)
     db.session.commit()
-    run_release_build.delay(release_id=release.id)
+    schedule_build("release", release, priority=PRIORITY_INTERACTIVE)
     dispatch_pipeline_notification.delay(
         "pipeline.release",
         "Release",
@@ -5868,7 +6093,7 @@ def application_images_build_fromsource(org_slug, project_slug, app_slug):
     )
     db.session.add(activity)
     db.session.commit()
-    run_image_build.delay(image_id=image.id, buildkit=True)
+    schedule_build("image", image, priority=PRIORITY_INTERACTIVE, buildkit=True)
     if auto_deploy:
         dispatch_autodeploy_notification(
             "image_building",
@@ -6153,6 +6378,7 @@ def application_scale(org_slug, project_slug, app_slug):
 
     form = ApplicationScaleForm()
     form.application_id.data = str(application.id)
+    operation_id = None
     if form.validate_on_submit():
         scaled = collections.defaultdict(dict)
         for key, value in request.form.items():
@@ -6177,62 +6403,31 @@ def application_scale(org_slug, project_slug, app_slug):
                     app_env.process_pod_classes[process_name] = value
                     flag_modified(app_env, "process_pod_classes")
         if scaled:
-            activity = Activity(
-                verb="scale",
-                object=application,
-                data={
-                    "user_id": str(current_user.id),
-                    "timestamp": datetime.datetime.now(
-                        datetime.timezone.utc
-                    ).isoformat(),
-                    "changes": scaled,
-                },
+            operation_id = queue_scale(
+                app_env,
+                scaled,
+                {"user_id": str(current_user.id)},
+                priority=PRIORITY_INTERACTIVE,
             )
-            db.session.add(app_env)
-            db.session.add(activity)
-            db.session.commit()
-
-            if current_app.config["KUBERNETES_ENABLED"]:
-                from cabotage.celery.tasks.deploy import k8s_namespace as _k8s_ns
-                from cabotage.celery.tasks.deploy import resize_cronjob
-                from cabotage.celery.tasks.deploy import suspend_cronjob
-
-                latest = app_env.latest_release_built
-                if latest:
-                    namespace = _k8s_ns(latest)
-                    for process_name, change in scaled.items():
-                        if process_name.startswith("job"):
-                            if "process_count" in change:
-                                suspend_cronjob(
-                                    namespace,
-                                    latest,
-                                    process_name,
-                                    suspend=change["process_count"]["new_value"] == 0,
-                                )
-                            if "pod_class" in change:
-                                resize_cronjob(
-                                    namespace,
-                                    latest,
-                                    process_name,
-                                    change["pod_class"]["new_value"],
-                                )
-                        else:
-                            if "process_count" in change:
-                                scale_deployment(
-                                    namespace,
-                                    latest,
-                                    process_name,
-                                    change["process_count"]["new_value"],
-                                )
-                            if "pod_class" in change:
-                                resize_deployment(
-                                    namespace,
-                                    latest,
-                                    process_name,
-                                    change["pod_class"]["new_value"],
-                                )
     else:
         return jsonify(form.errors), 400
+
+    if request.accept_mimetypes.best == "application/json":
+        if operation_id is None:
+            return jsonify({"operation_id": None, "state": "done"})
+        return jsonify(
+            {
+                "operation_id": operation_id,
+                "state": "queued",
+                "status_url": url_for(
+                    "user.application_scale_status",
+                    org_slug=org.slug,
+                    project_slug=project.slug,
+                    app_slug=application.slug,
+                    operation_id=operation_id,
+                ),
+            }
+        ), 202
     return redirect(
         url_for(
             "user.project_application",
@@ -6240,10 +6435,122 @@ def application_scale(org_slug, project_slug, app_slug):
             project_slug=application.project.slug,
             app_slug=application.slug,
             env_slug=app_env.environment.slug if project.environments_enabled else None,
+            scale_operation=operation_id,
         )
     )
 
 
+@user_blueprint.route(
+    "/projects/<org_slug>/<project_slug>/applications/<app_slug>/scale/<operation_id>",
+)
+@login_required
+def application_scale_status(org_slug, project_slug, app_slug, operation_id):
+    _, _, application = _lookup_app_context(org_slug, project_slug, app_slug)
+    redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
+    status = {
+        k.decode(): v.decode()
+        for k, v in redis_client.hgetall(scale_status_key(operation_id)).items()
+    }
+    if status.pop("application_id", None) != str(application.id):
+        abort(404)
+    return jsonify(
+        {
+            "operation_id": operation_id,
+            "state": status.pop("state", "queued"),
+            "processes": {
+                name[len("process:") :]: value
+                for name, value in sorted(status.items())
+                if name.startswith("process:")
+            },
+        }
+    )
+
+
+@user_blueprint.route(
+    "/projects/<org_slug>/<project_slug>/applications/<app_slug>/autoscale",
+    methods=["GET", "POST"],
+)
+@login_required
+def application_autoscale(org_slug, project_slug, app_slug):
+    """Autoscale policies and the autoscaler's latest signal, per process.
+
+    POST a JSON ``{"environment_id", "process", "policy"}`` to set a
+    process's policy, or a null ``policy`` to remove it.
+    """
+    _, _, application = _lookup_app_context(
+        org_slug,
+        project_slug,
+        app_slug,
+        require_admin=request.method == "POST",
+    )
+    body = request.get_json(silent=True) or {}
+    environment_id = (
+        body.get("environment_id")
+        if request.method == "POST"
+        else request.args.get("environment_id")
+    )
+    app_env = _resolve_app_env(application, environment_id=environment_id)
+    policies = dict(app_env.autoscale_policies or {})
+
+    if request.method == "POST":
+        process_name = body.get("process")
+        if process_name not in (app_env.process_counts or {}):
+            return jsonify({"error": f"unknown process {process_name!r}"}), 400
+        if process_name.startswith("job"):
+            return jsonify({"error": "jobs cannot be autoscaled"}), 400
+        old_value = policies.get(process_name)
+        if body.get("policy") is None:
+            policies.pop(process_name, None)
+        else:
+            try:
+                policies[process_name] = validate_policy(body["policy"])
+            except AutoscalePolicyError as exc:
+                return jsonify({"error": str(exc)}), 400
+        if policies.get(process_name) != old_value:
+            app_env.autoscale_policies = policies
+            activity = Activity(
+                verb="edit",
+                object=application,
+                data={
+                    "user_id": str(current_user.id),
+                    "timestamp": datetime.datetime.now(
+                        datetime.timezone.utc
+                    ).isoformat(),
+                    "autoscale_policy": {
+                        "process": process_name,
+                        "old_value": old_value,
+                        "new_value": policies.get(process_name),
+                    },
+                },
+            )
+            db.session.add(app_env)
+            db.session.add(activity)
+            db.session.commit()
+
+    states = load_autoscale_state(
+        get_redis_client(current_app.config["CELERY_BROKER_URL"]), app_env.id
+    )
+    processes = {}
+    for process_name, policy in sorted(policies.items()):
+        state = states.get(process_name, {})
+        processes[process_name] = {
+            "policy": policy,
+            "current": (app_env.process_counts or {}).get(process_name, 0),
+            "observed": state.get("observed"),
+            "recommended": state.get("recommended"),
+            "proposed": state.get("proposed"),
+            "evaluated_at": state.get("evaluated_at"),
+            "last_scaled_at": state.get("last_scaled_at"),
+        }
+    return jsonify(
+        {
+            "enabled": bool(current_app.config.get("MIMIR_URL")),
+            "environment_id": str(app_env.environment_id),
+            "processes": processes,
+        }
+    )
+
+
 @user_blueprint.route("/application/<application_id>/scale", methods=["POST"])
 @login_required
 def application_scale_legacy(application_id):
@@ -6307,7 +6614,9 @@ def release_deploy(org_slug, project_slug, app_slug, release_id):
             detail=f"Triggered by: {current_user.username}",
         )
         deployment_id = deployment.id
-        run_deploy.delay(deployment_id=deployment.id)
+        run_deploy.apply_async(
+            kwargs={"deployment_id": deployment.id}, priority=PRIORITY_INTERACTIVE
+        )
         deployment = Deployment.query.filter_by(id=deployment_id).first_or_404()
     else:
         from cabotage.celery.tasks.deploy import fake_deploy_release
@@ -6358,13 +6667,22 @@ def release_deploy_legacy(release_id):
 
 @user_blueprint.route("/github/hooks", methods=["POST"])
 def github_hooks():
-    if github_app.validate_webhook():
-        hook = Hook(headers=dict(request.headers), payload=request.json)
-        db.session.add(hook)
-        db.session.commit()
-        process_github_hook.delay(hook_id=hook.id)
-        return jsonify({"hook_id": hook.id})
-    abort(403)
+    if not github_app.validate_webhook():
+        abort(403)
+    headers = dict(request.headers)
+    try:
+        redis_client = get_redis_client(current_app.config["CELERY_BROKER_URL"])
+        enqueue_github_hook(redis_client, headers, request.get_data())
+        return jsonify({"delivery_id": headers.get("X-Github-Delivery")}), 202
+    except redis.RedisError:
+        current_app.logger.warning(
+            "Webhook inbox unavailable, processing delivery directly", exc_info=True
+        )
+    hook = Hook(headers=headers, payload=request.json)
+    db.session.add(hook)
+    db.session.commit()
+    process_github_hook.delay(hook_id=hook.id)
+    return jsonify({"hook_id": hook.id})
 
 
 @user_blueprint.route("/organizations/<org_slug>/users/add", methods=["GET", "POST"])
@@ -6577,78 +6895,6 @@ def _project_tenant_ids(organization, project):
     return "|".join(sorted(tenant_ids))
 
 
-def _mimir_connection(tenant_id=None):
-    """Return (mimir_url, verify, headers) tuple, or (None, None, {}) if not configured.
-
-    If *tenant_id* is given it overrides the default tenant header.
-    """
-    mimir_url = current_app.config.get("MIMIR_URL")
-    if not mimir_url:
-        return None, None, {}
-    verify = current_app.config.get("MIMIR_VERIFY")
-    if verify is not None:
-        if isinstance(verify, str) and verify.lower() == "false":
-            verify = False
-    else:
-        verify = True
-    headers = {}
-    # TODO: Include anonymous until migration to multi-tenant is completed
-    effective_tenant = (
-        tenant_id
-        if tenant_id is not None
-        else str(current_app.config.get("MIMIR_TENANT_ID")) + "|anonymous"
-    )
-    if effective_tenant:
-        headers["X-Scope-OrgID"] = effective_tenant
-    return mimir_url, verify, headers
-
-
-def _query_mimir_range(query, start, end, step, tenant_id=None):
-    """Query Mimir's Prometheus-compatible query_range endpoint.
-
-    Returns the parsed ``data.result`` list, or None on any error.
-    """
-    mimir_url, verify, headers = _mimir_connection(tenant_id=tenant_id)
-    if not mimir_url:
-        return None
-    try:
-        resp = requests_lib.get(
-            f"{mimir_url}/prometheus/api/v1/query_range",
-            params={
-                "query": query,
-                "start": start,
-                "end": end,
-                "step": step,
-            },
-            headers=headers,
-            verify=verify,
-            timeout=10,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        if data.get("status") == "success":
-            return data.get("data", {}).get("result", [])
-        return None
-    except Exception:
-        return None
-
-
-def _compute_observe_namespace(application, app_env):
-    """Compute the k8s namespace for an application's environment."""
-    org_k8s = application.project.organization.k8s_identifier
-    if app_env and app_env.environment.uses_environment_namespace:
-        return app_env.environment.k8s_namespace
-    return org_k8s
-
-
-def _compute_observe_prefix(application):
-    """Compute the k8s resource prefix (project-app) for pod matching."""
-    return safe_k8s_name(
-        application.project.k8s_identifier,
-        application.k8s_identifier,
-    )
-
-
 def _observe_common_groups(allowed):
     """Parse group query params, clamping to allowed set."""
     current_groups = {
@@ -7090,9 +7336,9 @@ def project_application_observe_metric(org_slug, project_slug, app_slug, env_slu
     if not mimir_url or not app_env:
         return jsonify({"error": "not configured"}), 404
 
-    namespace = _compute_observe_namespace(application, app_env)
-    prefix = _compute_observe_prefix(application)
-    escaped_prefix = _REGEX_META.sub(r"\\\g<0>", prefix)
+    namespace = compute_observe_namespace(application, app_env)
+    prefix = compute_observe_prefix(application)
+    escaped_prefix = REGEX_META.sub(r"\\\g<0>", prefix)
 
     # Optional process filter
     process_filter = request.args.get("process", "")
@@ -7107,7 +7353,7 @@ def project_application_observe_metric(org_slug, project_slug, app_slug, env_slu
             ', container!="cabotage-enroller"'
         )
     if process_filter:
-        escaped_process = _REGEX_META.sub(r"\\\g<0>", process_filter)
+        escaped_process = REGEX_META.sub(r"\\\g<0>", process_filter)
         base_selector = f'namespace="{namespace}", pod=~"{escaped_prefix}-{escaped_process}-[a-z0-9]+-[a-z0-9]+"'
     else:
         base_selector = f'namespace="{namespace}", pod=~"{escaped_prefix}-.*"'
@@ -7142,7 +7388,7 @@ def project_application_observe_metric(org_slug, project_slug, app_slug, env_slu
         traefik_svc = f'service="{next(iter(traefik_svc_names))}"'
     elif traefik_svc_names:
         joined = "|".join(
-            _REGEX_META.sub(r"\\\g<0>", s) for s in sorted(traefik_svc_names)
+            REGEX_META.sub(r"\\\g<0>", s) for s in sorted(traefik_svc_names)
         )
         traefik_svc = f'service=~"{joined}"'
     elif process_filter:
@@ -7204,7 +7450,7 @@ def project_application_observe_metric(org_slug, project_slug, app_slug, env_slu
         else:
             q = f"sum(rate(container_cpu_usage_seconds_total{{{labels}}}[{rate_window}])) {by_clause}"
         queries.append(q)
-        result = _query_mimir_range(q, start, end, step)
+        result = query_mimir_range(q, start, end, step)
     elif metric == "memory":
         if group == "process":
             q = (
@@ -7215,7 +7461,7 @@ def project_application_observe_metric(org_slug, project_slug, app_slug, env_slu
         else:
             q = f"sum(container_memory_working_set_bytes{{{labels}}}) {by_clause}"
         queries.append(q)
-        result = _query_mimir_range(q, start, end, step)
+        result = query_mimir_range(q, start, end, step)
     elif metric in ("requests", "errors", "latency") and traefik_svc is None:
         # Process has no ingresses — no HTTP metrics
         result = None
@@ -7230,7 +7476,7 @@ def project_application_observe_metric(org_slug, project_slug, app_slug, env_slu
                 f'{{{traefik_svc}, code=~"{code_class}.."}}[{req_step}s]))'
             )
             queries.append(q)
-            qr = _query_mimir_range(q, req_start, end, req_step)
+            qr = query_mimir_range(q, req_start, end, req_step)
             if qr:
                 for series in qr:
                     series["metric"]["code"] = f"{code_class}xx"
@@ -7251,7 +7497,7 @@ def project_application_observe_metric(org_slug, project_slug, app_slug, env_slu
                     f"{{{traefik_svc}}}[{err_step}s]))"
                 )
                 queries.append(q)
-                qr = _query_mimir_range(q, err_start, end, err_step)
+                qr = query_mimir_range(q, err_start, end, err_step)
                 if qr:
                     for series in qr:
                         series["metric"]["label"] = label
@@ -7266,7 +7512,7 @@ def project_application_observe_metric(org_slug, project_slug, app_slug, env_slu
                 f"{{{traefik_svc}}}[{err_step}s]))"
             )
             queries.append(q)
-            result = _query_mimir_range(q, err_start, end, err_step)
+            result = query_mimir_range(q, err_start, end, err_step)
             if result:
                 for series in result:
                     series["metric"]["label"] = "error rate"
@@ -7284,7 +7530,7 @@ def project_application_observe_metric(org_slug, project_slug, app_slug, env_slu
                 f"{{{traefik_svc}}}))"
             )
             queries.append(q)
-            qr = _query_mimir_range(q, start, end, step)
+            qr = query_mimir_range(q, start, end, step)
             if qr:
                 for series in qr:
                     series["metric"]["quantile"] = f"p{int(quantile * 100)}"
@@ -7307,7 +7553,7 @@ def project_application_observe_metric(org_slug, project_slug, app_slug, env_slu
             else:
                 q = f"sum(rate({counter}{{{network_labels}}}[{rate_window}])) {by_clause}"
             queries.append(q)
-            qr = _query_mimir_range(q, start, end, step)
+            qr = query_mimir_range(q, start, end, step)
             if qr:
                 for series in qr:
                     series["metric"]["direction"] = direction
@@ -7372,263 +7618,6 @@ def _observe_application_pod_join(selector):
     )
 
 
-def _collect_traefik_svc_names(app_envs, namespace_fn, prefix_fn, process_filter=""):
-    """Enumerate traefik service names from ingress configs across app_envs."""
-    names = set()
-    for ae in app_envs:
-        ns = namespace_fn(ae)
-        pfx = prefix_fn(ae)
-        for ingress in ae.ingresses:
-            if not ingress.enabled:
-                continue
-            for path in ingress.paths:
-                if process_filter and path.target_process_name != process_filter:
-                    continue
-                names.add(
-                    f"{ns}-{pfx}-{ingress.name}-{pfx}-{path.target_process_name}-https@kubernetesingressnginx"
-                )
-                names.add(
-                    f"{ns}-{pfx}-{ingress.name}-{pfx}-{path.target_process_name}-8000@kubernetesingressnginx"
-                )
-            if not ingress.paths:
-                if not process_filter or process_filter == "web":
-                    names.add(
-                        f"{ns}-{pfx}-{ingress.name}-{pfx}-web-https@kubernetesingressnginx"
-                    )
-                    names.add(
-                        f"{ns}-{pfx}-{ingress.name}-{pfx}-web-8000@kubernetesingressnginx"
-                    )
-    return names
-
-
-def _traefik_svc_label(names):
-    """Build a service=... label selector from a set of traefik service names."""
-    if len(names) == 1:
-        return f'service="{next(iter(names))}"'
-    elif names:
-        joined = "|".join(_REGEX_META.sub(r"\\\g<0>", s) for s in sorted(names))
-        return f'service=~"{joined}"'
-    return None
-
-
-def _build_observe_queries(
-    metric,
-    group,
-    labels,
-    traefik_svc,
-    step,
-    start,
-    end,
-    duration,
-    process_re,
-    by_clause,
-    rate_window,
-    app_re=None,
-    env_re=None,
-    proj_re=None,
-    network_labels=None,
-    pod_join=None,
-    group_label_map=None,
-):
-    """Build PromQL queries and execute them. Returns (result, queries)."""
-
-    result = None
-    queries = []
-    pod_join = pod_join or ""
-    group_label_map = group_label_map or {}
-
-    if metric == "cpu":
-        cpu_source = (
-            f"(rate(container_cpu_usage_seconds_total{{{labels}}}[{rate_window}]))"
-            f"{pod_join}"
-        )
-        if group in group_label_map:
-            q = f"sum by ({group_label_map[group]}) ({cpu_source})"
-        elif group == "process":
-            q = (
-                f"sum by (process) (label_replace("
-                f"sum by (pod) ({cpu_source})"
-                f', "process", "$1", "pod", "{process_re}"))'
-            )
-        elif group == "application" and app_re:
-            q = (
-                f"sum by (application) (label_replace("
-                f"sum by (pod) ({cpu_source})"
-                f', "application", "$1", "pod", "{app_re}"))'
-            )
-        elif group == "environment" and env_re:
-            q = (
-                f"sum by (environment) (label_replace("
-                f"sum by (namespace) ({cpu_source})"
-                f', "environment", "$1", "namespace", "{env_re}"))'
-            )
-        elif group == "project" and proj_re:
-            q = (
-                f"sum by (project) (label_replace("
-                f"sum by (pod) ({cpu_source})"
-                f', "project", "$1", "pod", "{proj_re}"))'
-            )
-        else:
-            q = f"sum({cpu_source}) {by_clause}"
-        queries.append(q)
-        result = _query_mimir_range(q, start, end, step)
-
-    elif metric == "memory":
-        mem_source = f"(container_memory_working_set_bytes{{{labels}}}){pod_join}"
-        if group in group_label_map:
-            q = f"sum by ({group_label_map[group]}) ({mem_source})"
-        elif group == "process":
-            q = (
-                f"sum by (process) (label_replace("
-                f"sum by (pod) ({mem_source})"
-                f', "process", "$1", "pod", "{process_re}"))'
-            )
-        elif group == "application" and app_re:
-            q = (
-                f"sum by (application) (label_replace("
-                f"sum by (pod) ({mem_source})"
-                f', "application", "$1", "pod", "{app_re}"))'
-            )
-        elif group == "environment" and env_re:
-            q = (
-                f"sum by (environment) (label_replace("
-                f"sum by (namespace) ({mem_source})"
-                f', "environment", "$1", "namespace", "{env_re}"))'
-            )
-        elif group == "project" and proj_re:
-            q = (
-                f"sum by (project) (label_replace("
-                f"sum by (pod) ({mem_source})"
-                f', "project", "$1", "pod", "{proj_re}"))'
-            )
-        else:
-            q = f"sum({mem_source}) {by_clause}"
-        queries.append(q)
-        result = _query_mimir_range(q, start, end, step)
-
-    elif metric in ("requests", "errors", "latency") and traefik_svc is None:
-        result = None
-
-    elif metric == "requests":
-        req_step = max(step, 60)
-        req_start = end - duration
-        result = []
-        for code_class in ["2", "3", "4", "5"]:
-            q = (
-                f"sum(increase(traefik_service_requests_total"
-                f'{{{traefik_svc}, code=~"{code_class}.."}}[{req_step}s]))'
-            )
-            queries.append(q)
-            qr = _query_mimir_range(q, req_start, end, req_step)
-            if qr:
-                for series in qr:
-                    series["metric"]["code"] = f"{code_class}xx"
-                result.extend(qr)
-        result = result if result else None
-
-    elif metric == "errors":
-        err_step = max(step, 60)
-        err_start = end - duration
-        if group == "status":
-            result = []
-            for code_class, label in [("4", "4xx"), ("5", "5xx")]:
-                q = (
-                    f"sum(increase(traefik_service_requests_total"
-                    f'{{{traefik_svc}, code=~"{code_class}.."}}[{err_step}s]))'
-                    f" / sum(increase(traefik_service_requests_total"
-                    f"{{{traefik_svc}}}[{err_step}s]))"
-                )
-                queries.append(q)
-                qr = _query_mimir_range(q, err_start, end, err_step)
-                if qr:
-                    for series in qr:
-                        series["metric"]["label"] = label
-                    result.extend(qr)
-            result = result if result else None
-        else:
-            q = (
-                f"sum(increase(traefik_service_requests_total"
-                f'{{{traefik_svc}, code=~"5.."}}[{err_step}s]))'
-                f" / sum(increase(traefik_service_requests_total"
-                f"{{{traefik_svc}}}[{err_step}s]))"
-            )
-            queries.append(q)
-            result = _query_mimir_range(q, err_start, end, err_step)
-            if result:
-                for series in result:
-                    series["metric"]["label"] = "error rate"
-
-    elif metric == "latency":
-        rate_seconds = max(step, 30)
-        rate_rule_suffix = {30: "rate30s", 60: "rate1m", 300: "rate5m"}.get(
-            rate_seconds, "rate5m"
-        )
-        result = []
-        for quantile in [0.5, 0.9, 0.95, 0.99]:
-            q = (
-                f"histogram_quantile({quantile}, sum by (le)("
-                f"traefik:router_request_duration_seconds_bucket:{rate_rule_suffix}"
-                f"{{{traefik_svc}}}))"
-            )
-            queries.append(q)
-            qr = _query_mimir_range(q, start, end, step)
-            if qr:
-                for series in qr:
-                    series["metric"]["quantile"] = f"p{int(quantile * 100)}"
-                result.extend(qr)
-        result = result if result else None
-
-    elif metric == "network":
-        # Network metrics are per-pod and have no container label,
-        # so use network_labels (without container filter) if provided.
-        net_labels = network_labels if network_labels is not None else labels
-        result = []
-        for direction, counter in [
-            ("tx", "container_network_transmit_bytes_total"),
-            ("rx", "container_network_receive_bytes_total"),
-        ]:
-            network_source = (
-                f"(rate({counter}{{{net_labels}}}[{rate_window}])){pod_join}"
-            )
-            if group in group_label_map:
-                q = f"sum by ({group_label_map[group]}) ({network_source})"
-            elif group == "process":
-                q = (
-                    f"sum by (process) (label_replace("
-                    f"sum by (pod) ({network_source})"
-                    f', "process", "$1", "pod", "{process_re}"))'
-                )
-            elif group == "application" and app_re:
-                q = (
-                    f"sum by (application) (label_replace("
-                    f"sum by (pod) ({network_source})"
-                    f', "application", "$1", "pod", "{app_re}"))'
-                )
-            elif group == "environment" and env_re:
-                q = (
-                    f"sum by (environment) (label_replace("
-                    f"sum by (namespace) ({network_source})"
-                    f', "environment", "$1", "namespace", "{env_re}"))'
-                )
-            elif group == "project" and proj_re:
-                q = (
-                    f"sum by (project) (label_replace("
-                    f"sum by (pod) ({network_source})"
-                    f', "project", "$1", "pod", "{proj_re}"))'
-                )
-            else:
-                q = f"sum({network_source}) {by_clause}"
-            queries.append(q)
-            qr = _query_mimir_range(q, start, end, step)
-            if qr:
-                for series in qr:
-                    series["metric"]["direction"] = direction
-                result.extend(qr)
-        result = result if result else None
-
-    return result, queries
-
-
 # ── Environment-level metric endpoint ──
 
 
@@ -7711,8 +7700,8 @@ def environment_observe_metric(org_slug, project_slug, env_slug):
     else:
         if app_filter and active_aes:
             ae = active_aes[0]
-            prefix = _compute_observe_prefix(ae.application)
-            escaped_prefix = _REGEX_META.sub(r"\\\g<0>", prefix)
+            prefix = compute_observe_prefix(ae.application)
+            escaped_prefix = REGEX_META.sub(r"\\\g<0>", prefix)
             base_selector = f'{ns_selector}, pod=~"{escaped_prefix}-.*"'
             labels = f"{base_selector}, {container_filter}"
             network_labels = base_selector
@@ -7745,12 +7734,12 @@ def environment_observe_metric(org_slug, project_slug, env_slug):
     group_label_map = None
     traefik_svc = None
     if not is_backing_services:
-        traefik_names = _collect_traefik_svc_names(
+        traefik_names = collect_traefik_svc_names(
             active_aes,
-            lambda ae: _compute_observe_namespace(ae.application, ae),
-            lambda ae: _compute_observe_prefix(ae.application),
+            lambda ae: compute_observe_namespace(ae.application, ae),
+            lambda ae: compute_observe_prefix(ae.application),
         )
-        traefik_svc = _traefik_svc_label(traefik_names)
+        traefik_svc = traefik_svc_label(traefik_names)
     else:
         group_label_map = {
             "service": "label_cabotage_io_resource_id",
@@ -7758,7 +7747,7 @@ def environment_observe_metric(org_slug, project_slug, env_slug):
             "role": "label_role",
         }
 
-    result, queries = _build_observe_queries(
+    result, queries = build_observe_queries(
         metric,
         group,
         labels,
@@ -7818,9 +7807,9 @@ def project_observe_metric(org_slug, project_slug):
         return jsonify({"error": "not configured"}), 404
 
     org_k8s = organization.k8s_identifier
-    escaped_org_k8s = _REGEX_META.sub(r"\\\g<0>", org_k8s)
+    escaped_org_k8s = REGEX_META.sub(r"\\\g<0>", org_k8s)
     proj_k8s = project.k8s_identifier
-    escaped_proj_k8s = _REGEX_META.sub(r"\\\g<0>", proj_k8s)
+    escaped_proj_k8s = REGEX_META.sub(r"\\\g<0>", proj_k8s)
     container_filter = _observe_container_filter()
     is_backing_services = workload == "backing_services"
 
@@ -7852,7 +7841,7 @@ def project_observe_metric(org_slug, project_slug):
         )
         if app:
             app_prefix = safe_k8s_name(proj_k8s, app.k8s_identifier)
-            escaped_app_prefix = _REGEX_META.sub(r"\\\g<0>", app_prefix)
+            escaped_app_prefix = REGEX_META.sub(r"\\\g<0>", app_prefix)
             pod_label = f'pod=~"{escaped_app_prefix}-.*"'
         else:
             pod_label = f'pod=~"{escaped_proj_k8s}-.*"'
@@ -7900,12 +7889,12 @@ def project_observe_metric(org_slug, project_slug):
                     continue
                 all_aes.append(ae)
 
-        traefik_names = _collect_traefik_svc_names(
+        traefik_names = collect_traefik_svc_names(
             all_aes,
             lambda ae: ae.environment.k8s_namespace,
-            lambda ae: _compute_observe_prefix(ae.application),
+            lambda ae: compute_observe_prefix(ae.application),
         )
-        traefik_svc = _traefik_svc_label(traefik_names)
+        traefik_svc = traefik_svc_label(traefik_names)
     else:
         group_label_map = {
             "service": "label_cabotage_io_resource_id",
@@ -7913,7 +7902,7 @@ def project_observe_metric(org_slug, project_slug):
             "role": "label_role",
         }
 
-    result, queries = _build_observe_queries(
+    result, queries = build_observe_queries(
         metric,
         group,
         labels,
@@ -7967,7 +7956,7 @@ def organization_observe_metric(org_slug):
         return jsonify({"error": "not configured"}), 404
 
     org_k8s = organization.k8s_identifier
-    escaped_org_k8s = _REGEX_META.sub(r"\\\g<0>", org_k8s)
+    escaped_org_k8s = REGEX_META.sub(r"\\\g<0>", org_k8s)
     container_filter = _observe_container_filter()
     is_backing_services = workload == "backing_services"
 
@@ -8007,10 +7996,10 @@ def organization_observe_metric(org_slug):
         )
         if app:
             app_prefix = safe_k8s_name(filtered_proj.k8s_identifier, app.k8s_identifier)
-            escaped_app_prefix = _REGEX_META.sub(r"\\\g<0>", app_prefix)
+            escaped_app_prefix = REGEX_META.sub(r"\\\g<0>", app_prefix)
             pod_label = f'pod=~"{escaped_app_prefix}-.*"'
     elif filtered_proj:
-        escaped_proj_k8s = _REGEX_META.sub(r"\\\g<0>", filtered_proj.k8s_identifier)
+        escaped_proj_k8s = REGEX_META.sub(r"\\\g<0>", filtered_proj.k8s_identifier)
         pod_label = f'pod=~"{escaped_proj_k8s}-.*"'
 
     base_selector = f"{ns_label}, {pod_label}"
@@ -8029,7 +8018,7 @@ def organization_observe_metric(org_slug):
     env_re = f"{escaped_org_k8s}-(.+)"
     # Enumerate known project k8s identifiers for clean extraction
     proj_k8s_alts = "|".join(
-        _REGEX_META.sub(r"\\\g<0>", proj.k8s_identifier)
+        REGEX_META.sub(r"\\\g<0>", proj.k8s_identifier)
         for proj in organization.active_projects
         if proj.deleted_at is None
     )
@@ -8067,12 +8056,12 @@ def organization_observe_metric(org_slug):
                         continue
                     all_aes.append(ae)
 
-        traefik_names = _collect_traefik_svc_names(
+        traefik_names = collect_traefik_svc_names(
             all_aes,
             lambda ae: ae.environment.k8s_namespace,
-            lambda ae: _compute_observe_prefix(ae.application),
+            lambda ae: compute_observe_prefix(ae.application),
         )
-        traefik_svc = _traefik_svc_label(traefik_names)
+        traefik_svc = traefik_svc_label(traefik_names)
     else:
         group_label_map = {
             "service": "label_cabotage_io_resource_id",
@@ -8080,7 +8069,7 @@ def organization_observe_metric(org_slug):
             "role": "label_role",
         }
 
-    result, queries = _build_observe_queries(
+    result, queries = build_observe_queries(
         metric,
         group,
         labels,
@@ -8102,31 +8091,6 @@ def organization_observe_metric(org_slug):
     return jsonify({"result": result, "queries": queries})
 
 
-def _query_mimir_instant(query, tenant_id=None):
-    """Query Mimir's Prometheus-compatible instant query endpoint.
-
-    Returns the parsed ``data.result`` list, or None on any error.
-    """
-    mimir_url, verify, headers = _mimir_connection(tenant_id=tenant_id)
-    if not mimir_url:
-        return None
-    try:
-        resp = requests_lib.get(  # nosec B113 - timeout has default
-            f"{mimir_url}/prometheus/api/v1/query",
-            params={"query": query},
-            headers=headers,
-            verify=verify,
-            timeout=current_app.config.get("MIMIR_TIMEOUT", 5),
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        if data.get("status") == "success":
-            return data.get("data", {}).get("result", [])
-        return None
-    except Exception:
-        return None
-
-
 @user_blueprint.route(
     "/projects/<org_slug>/<project_slug>/env/<env_slug>/applications/<app_slug>/live-stats",
 )
@@ -8145,9 +8109,9 @@ def project_application_live_stats(org_slug, project_slug, app_slug, env_slug=No
     if not mimir_url or not app_env:
         return jsonify({"error": "not configured"}), 404
 
-    namespace = _compute_observe_namespace(application, app_env)
-    prefix = _compute_observe_prefix(application)
-    escaped_prefix = _REGEX_META.sub(r"\\\g<0>", prefix)
+    namespace = compute_observe_namespace(application, app_env)
+    prefix = compute_observe_prefix(application)
+    escaped_prefix = REGEX_META.sub(r"\\\g<0>", prefix)
 
     # Pod status from Kubernetes API (source of truth)
     pods_total = 0
@@ -8226,7 +8190,7 @@ def project_application_live_stats(org_slug, project_slug, app_slug, env_slug=No
         ', container!="cabotage-sidecar-tls"'
         ', container!="cabotage-enroller"'
     )
-    cpu_series = _query_mimir_range(
+    cpu_series = query_mimir_range(
         f"sum(rate(container_cpu_usage_seconds_total{{{app_labels}}}[{step}s]))",
         start,
         end,
@@ -8236,7 +8200,7 @@ def project_application_live_stats(org_slug, project_slug, app_slug, env_slug=No
         for ts, val in cpu_series[0].get("values", []):
             cpu_history.append([ts, round(float(val) * 1000, 1)])
 
-    mem_series = _query_mimir_range(
+    mem_series = query_mimir_range(
         f"sum(container_memory_working_set_bytes{{{app_labels}}})",
         start,
         end,
@@ -8252,7 +8216,7 @@ def project_application_live_stats(org_slug, project_slug, app_slug, env_slug=No
 
     if running_pod_names:
         pod_regex = "|".join(
-            _REGEX_META.sub(r"\\\g<0>", name) for name in running_pod_names
+            REGEX_META.sub(r"\\\g<0>", name) for name in running_pod_names
         )
         app_container_filter = (
             ', container!="", container!="POD"'
@@ -8260,14 +8224,14 @@ def project_application_live_stats(org_slug, project_slug, app_slug, env_slug=No
             ', container!="cabotage-sidecar-tls"'
             ', container!="cabotage-enroller"'
         )
-        cpu_result = _query_mimir_instant(
+        cpu_result = query_mimir_instant(
             f"sum(rate(container_cpu_usage_seconds_total"
             f'{{namespace="{namespace}", pod=~"{pod_regex}"{app_container_filter}}}[5m]))'
         )
         if cpu_result and len(cpu_result) > 0 and cpu_result[0].get("value"):
             cpu_val = round(float(cpu_result[0]["value"][1]) * 1000, 1)
 
-        mem_result = _query_mimir_instant(
+        mem_result = query_mimir_instant(
             f"sum(container_memory_working_set_bytes"
             f'{{namespace="{namespace}", pod=~"{pod_regex}"{app_container_filter}}})'
         )
@@ -8572,7 +8536,7 @@ def project_application_logs_query(org_slug, project_slug, app_slug, env_slug=No
     if not app_env:
         return jsonify({"error": "not configured"}), 404
 
-    namespace = _compute_observe_namespace(application, app_env)
+    namespace = compute_observe_namespace(application, app_env)
     process_names = sorted(app_env.process_counts or {})
     env_slug_val = app_env.environment.slug if app_env.environment else ""
     selectors = _build_log_selectors(
@@ -8633,7 +8597,7 @@ def project_logs_query(org_slug, project_slug):
     # Project logs may span multiple namespaces (org-level + env-specific),
     # so use a regex on the org k8s identifier prefix.
     selectors = [
-        f'namespace=~"{_REGEX_META.sub(lambda m: chr(92) + m.group(), organization.k8s_identifier)}.*"',
+        f'namespace=~"{REGEX_META.sub(lambda m: chr(92) + m.group(), organization.k8s_identifier)}.*"',
         f'project="{project.slug}"',
     ]
 
@@ -8674,7 +8638,7 @@ def _discover_infra_workloads():
         [{"kind": ..., "name": ..., "namespace": ..., "pods": [...]}, ...]
     """
     # 1. All pods labelled cabotage.io/infra=true
-    infra_pods = _query_mimir_instant(
+    infra_pods = query_mimir_instant(
         'kube_pod_labels{label_cabotage_io_infra="true"}',
         tenant_id=_INFRA_TENANT,
     )
@@ -8684,7 +8648,7 @@ def _discover_infra_workloads():
     infra_pod_set = {(r["metric"]["namespace"], r["metric"]["pod"]) for r in infra_pods}
 
     # 2. Pod ownership
-    pod_owners = _query_mimir_instant("kube_pod_owner", tenant_id=_INFRA_TENANT)
+    pod_owners = query_mimir_instant("kube_pod_owner", tenant_id=_INFRA_TENANT)
     owner_map = {}  # (ns, pod) -> (owner_kind, owner_name)
     if pod_owners:
         for r in pod_owners:
@@ -8694,7 +8658,7 @@ def _discover_infra_workloads():
                 owner_map[key] = (m.get("owner_kind", ""), m.get("owner_name", ""))
 
     # 3. ReplicaSet -> Deployment mapping
-    rs_owners = _query_mimir_instant(
+    rs_owners = query_mimir_instant(
         'kube_replicaset_owner{owner_kind="Deployment"}',
         tenant_id=_INFRA_TENANT,
     )
@@ -8823,7 +8787,7 @@ def infra_observe_metric():
         if workload_namespace:
             narrow = f'namespace="{workload_namespace}", {narrow}'
     elif workload_name and workload_namespace:
-        escaped_name = _REGEX_META.sub(r"\\\g<0>", workload_name)
+        escaped_name = REGEX_META.sub(r"\\\g<0>", workload_name)
         narrow = f'namespace="{workload_namespace}", pod=~"{escaped_name}-.*"'
 
     labels = f"{narrow}, {container_filter}" if narrow else container_filter
@@ -8883,7 +8847,7 @@ def infra_observe_metric():
             else:
                 rq = f"sum({ksm_metric}{{{ksm_narrow}}} {infra_join})"
             queries.append(rq)
-            rr = _query_mimir_range(rq, start, end, step, tenant_id=_INFRA_TENANT)
+            rr = query_mimir_range(rq, start, end, step, tenant_id=_INFRA_TENANT)
             if rr:
                 for series in rr:
                     series["metric"]["__ref__"] = ref_type
@@ -8897,7 +8861,7 @@ def infra_observe_metric():
             f"{infra_join}) {by_clause}"
         )
         queries.append(q)
-        result = _query_mimir_range(q, start, end, step, tenant_id=_INFRA_TENANT)
+        result = query_mimir_range(q, start, end, step, tenant_id=_INFRA_TENANT)
         _append_ref_lines("cpu")
     elif metric == "memory":
         q = (
@@ -8905,7 +8869,7 @@ def infra_observe_metric():
             f"{infra_join}) {by_clause}"
         )
         queries.append(q)
-        result = _query_mimir_range(q, start, end, step, tenant_id=_INFRA_TENANT)
+        result = query_mimir_range(q, start, end, step, tenant_id=_INFRA_TENANT)
         _append_ref_lines("memory")
     elif metric == "network":
         result = []
@@ -8918,7 +8882,7 @@ def infra_observe_metric():
             else:
                 q = f"sum(rate({counter}[{rate_window}]) {infra_join}) {by_clause}"
             queries.append(q)
-            qr = _query_mimir_range(q, start, end, step, tenant_id=_INFRA_TENANT)
+            qr = query_mimir_range(q, start, end, step, tenant_id=_INFRA_TENANT)
             if qr:
                 for series in qr:
                     series["metric"]["direction"] = direction
@@ -0,0 +1,107 @@
+"""Routing builds to a pool of long-lived buildkitd daemons.
+
+With ``BUILDKITD_POOL`` set, builds skip the one-shot Kubernetes Job. The
+worker runs ``buildctl`` against one of the pool's daemons instead, so
+there is no pod to schedule or image to pull, and the daemon's local cache
+is still warm from earlier builds.
+
+An application prefers the same daemon on every build. Daemons are ranked
+by rendezvous hashing, so adding or removing one only moves the
+applications that were on it. Each daemon runs at most
+``max_concurrency`` builds at a time. A build whose preferred daemon is
+full goes to the next one in its ranking, and waits only when every
+daemon is full.
+
+Slots are redis locks with a timeout, so a crashed worker's slot frees
+itself.
+"""
+
+import hashlib
+import logging
+import time
+from contextlib import contextmanager
+
+import redis
+
+log = logging.getLogger(__name__)
+
+
+class BuildkitdPoolBusy(Exception):
+    pass
+
+
+def parse_pool(value):
+    """Daemon addresses from a list, or a comma separated string."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [address.strip() for address in value if address.strip()]
+
+
+def daemon_order(addresses, key):
+    """``addresses`` ranked by preference for ``key``."""
+    return sorted(
+        addresses,
+        key=lambda address: hashlib.sha256(f"{address}|{key}".encode()).hexdigest(),
+        reverse=True,
+    )
+
+
+class BuildkitdPool:
+    def __init__(self, redis_client, addresses, max_concurrency=2, lease_timeout=3600):
+        self.redis_client = redis_client
+        self.addresses = list(addresses)
+        self.max_concurrency = max_concurrency
+        self.lease_timeout = lease_timeout
+
+    @classmethod
+    def from_config(cls, redis_client, config):
+        return cls(
+            redis_client,
+            parse_pool(config.get("BUILDKITD_POOL")),
+            max_concurrency=int(config.get("BUILDKITD_POOL_MAX_CONCURRENCY", 2)),
+            lease_timeout=int(config.get("BUILDKITD_POOL_LEASE_TIMEOUT", 3600)),
+        )
+
+    def try_acquire(self, key):
+        """Take a free slot, preferring ``key``'s daemons in order.
+
+        Returns ``(address, lock)``, or None when every daemon is full.
+        """
+        for address in daemon_order(self.addresses, key):
+            for slot in range(self.max_concurrency):
+                lock = self.redis_client.lock(
+                    f"buildkitd:{address}:{slot}", timeout=self.lease_timeout
+                )
+                if lock.acquire(blocking=False):
+                    return address, lock
+        return None
+
+    @contextmanager
+    def lease(self, key, wait_timeout, poll_interval=2.0, on_wait=None):
+        """Hold a build slot for ``key`` and yield the daemon's address.
+
+        ``on_wait`` is called on every poll while all slots are taken, e.g.
+        to keep the waiting build's heartbeat alive.
+        """
+        if not self.addresses:
+            raise BuildkitdPoolBusy("No buildkitd daemons are configured")
+        deadline = time.monotonic() + wait_timeout
+        while (acquired := self.try_acquire(key)) is None:
+            if time.monotonic() >= deadline:
+                raise BuildkitdPoolBusy(
+                    f"No buildkitd slot came free within {wait_timeout}s"
+                )
+            if on_wait is not None:
+                on_wait()
+            time.sleep(poll_interval)
+        address, lock = acquired
+        log.info("Leased buildkitd %s for %s", address, key)
+        try:
+            yield address
+        finally:
+            try:
+                lock.release()
+            except redis.RedisError:
+                log.warning("Failed to release buildkitd slot on %s", address)
@@ -0,0 +1,107 @@
+import json
+import re
+
+NAME_PATTERN = re.compile(r"^[a-zA-Z_]+[a-zA-Z0-9_]*$")
+
+RESERVED_NAMES = {"CABOTAGE_SENTINEL"}
+
+MAX_VALUE_LENGTH = 2048
+
+_DOUBLE_QUOTED_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", '"': '"', "\\": "\\"}
+
+
+class ConfigImportError(Exception):
+    """Raised when a bulk configuration import cannot be parsed."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == "'":
+        return value[1:-1]
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(
+            r"\\(.)",
+            lambda m: _DOUBLE_QUOTED_ESCAPES.get(m.group(1), m.group(0)),
+            value[1:-1],
+        )
+    # Unquoted values may carry a trailing " # comment".
+    return re.split(r"\s+#", value, maxsplit=1)[0].rstrip()
+
+
+def _parse_env(text):
+    entries = []
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("export "):
+            line = line[len("export ") :].lstrip()
+        name, sep, value = line.partition("=")
+        if not sep:
+            entries.append((lineno, line, None))
+            continue
+        entries.append((lineno, name.strip(), _unquote(value.strip())))
+    return entries
+
+
+def _parse_json(text):
+    try:
+        data = json.loads(text)
+    except ValueError as exc:
+        raise ConfigImportError([f"Invalid JSON: {exc}"])
+    if not isinstance(data, dict):
+        raise ConfigImportError(['JSON must be an object of {"NAME": "value"}'])
+    entries = []
+    for name, value in data.items():
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        elif isinstance(value, (int, float)):
+            value = str(value)
+        elif not isinstance(value, str):
+            value = None
+        entries.append((None, name, value))
+    return entries
+
+
+def parse_configuration(text, fmt="env"):
+    """Parse a dotenv blob or JSON object into ``{name: value}``.
+
+    Every problem is collected before raising ConfigImportError, so the
+    user can fix the whole paste in one go.
+    """
+    entries = _parse_json(text) if fmt == "json" else _parse_env(text)
+    errors = []
+    parsed = {}
+    seen = set()
+    for lineno, name, value in entries:
+        where = f"Line {lineno}: " if lineno is not None else ""
+        if value is None:
+            if lineno is not None:
+                errors.append(f"{where}expected NAME=value")
+            else:
+                errors.append(f"{name}: value must be a string, number or boolean")
+            continue
+        if not NAME_PATTERN.match(name):
+            errors.append(f"{where}invalid variable name '{name}'")
+        elif name.upper() in RESERVED_NAMES:
+            errors.append(f"{where}'{name}' is reserved")
+        elif name.lower() in seen:
+            # Names are case insensitive in the database.
+            errors.append(f"{where}'{name}' is defined more than once")
+        elif value == "":
+            errors.append(f"{where}'{name}' has an empty value")
+        elif len(value) > MAX_VALUE_LENGTH:
+            errors.append(
+                f"{where}'{name}' is longer than {MAX_VALUE_LENGTH} characters"
+            )
+        else:
+            parsed[name] = value
+            seen.add(name.lower())
+    if errors:
+        raise ConfigImportError(errors)
+    if not parsed:
+        raise ConfigImportError(["No variables found"])
+    return parsed
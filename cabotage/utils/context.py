@@ -1,5 +1,10 @@
 import contextlib
 import os
+import threading
+
+# os.environ is process-wide; serialize modifications made from threaded
+# web and Celery workers so one thread's restore can't clobber another's.
+_environ_lock = threading.RLock()
 
 
 @contextlib.contextmanager
@@ -17,17 +22,18 @@ def modified_environ(*remove, **update):
     update = update or {}
     remove = remove or []
 
-    # List of environment variables being updated or removed.
-    stomped = (set(update.keys()) | set(remove)) & set(env.keys())
-    # Environment variables and values to restore on exit.
-    update_after = {k: env[k] for k in stomped}
-    # Environment variables and values to remove on exit.
-    remove_after = frozenset(k for k in update if k not in env)
+    with _environ_lock:
+        # List of environment variables being updated or removed.
+        stomped = (set(update.keys()) | set(remove)) & set(env.keys())
+        # Environment variables and values to restore on exit.
+        update_after = {k: env[k] for k in stomped}
+        # Environment variables and values to remove on exit.
+        remove_after = frozenset(k for k in update if k not in env)
 
-    try:
-        env.update(update)
-        [env.pop(k, None) for k in remove]
-        yield
-    finally:
-        env.update(update_after)
-        [env.pop(k) for k in remove_after]
+        try:
+            env.update(update)
+            [env.pop(k, None) for k in remove]
+            yield
+        finally:
+            env.update(update_after)
+            [env.pop(k) for k in remove_after]
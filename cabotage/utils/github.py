@@ -7,6 +7,8 @@ from flask import current_app
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from cabotage.server.metrics import instrument_session
+
 logger = logging.getLogger(__name__)
 
 COMMENT_MARKER = "<!-- cabotage-branch-deploy -->"
@@ -26,6 +28,7 @@ _adapter = HTTPAdapter(max_retries=_retry_strategy)
 
 github_session = requests.Session()
 github_session.mount("https://", _adapter)
+instrument_session(github_session, "github")
 
 
 def _github_headers(access_token):
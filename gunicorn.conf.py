@@ -14,3 +14,9 @@ access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"
 
 def when_ready(server):
     open("/tmp/app-initialized", "w").close()  # nosec B108
+
+
+def child_exit(server, worker):
+    from cabotage.server.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
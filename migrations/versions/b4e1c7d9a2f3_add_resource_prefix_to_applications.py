@@ -0,0 +1,69 @@
+"""add resource_prefix to applications
+
+Revision ID: b4e1c7d9a2f3
+Revises: 6e1f85c42b83
+Create Date: 2026-10-19 09:12:41.502217
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b4e1c7d9a2f3"
+down_revision = "6e1f85c42b83"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("project_applications", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("resource_prefix", sa.String(length=64), nullable=True)
+        )
+        batch_op.create_index(
+            batch_op.f("ix_project_applications_resource_prefix"),
+            ["resource_prefix"],
+            unique=False,
+        )
+
+    with op.batch_alter_table("project_applications_version", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "resource_prefix",
+                sa.String(length=64),
+                autoincrement=False,
+                nullable=True,
+            )
+        )
+
+    # Backfill with the same truncate-and-hash rule as safe_k8s_name().
+    conn = op.get_bind()
+    conn.execute(
+        sa.text("""
+            UPDATE project_applications AS a
+            SET resource_prefix = CASE
+                WHEN length(p.k8s_identifier || '-' || a.k8s_identifier) <= 63
+                THEN p.k8s_identifier || '-' || a.k8s_identifier
+                ELSE rtrim(left(p.k8s_identifier || '-' || a.k8s_identifier, 54), '-')
+                    || '-'
+                    || left(encode(sha256(convert_to(
+                        p.k8s_identifier || '-' || a.k8s_identifier, 'UTF8'
+                    )), 'hex'), 8)
+            END
+            FROM projects AS p
+            WHERE a.project_id = p.id
+              AND p.k8s_identifier IS NOT NULL
+              AND a.k8s_identifier IS NOT NULL
+        """)
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("project_applications_version", schema=None) as batch_op:
+        batch_op.drop_column("resource_prefix")
+
+    with op.batch_alter_table("project_applications", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_project_applications_resource_prefix"))
+        batch_op.drop_column("resource_prefix")
@@ -0,0 +1,159 @@
+"""materialize audit_log into audit_log_entries
+
+Revision ID: d7a3f9e1c5b2
+Revises: c81d5f02e6a7
+Create Date: 2026-10-19 11:04:17.338120
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "d7a3f9e1c5b2"
+down_revision = "c81d5f02e6a7"
+branch_labels = None
+depends_on = None
+
+
+_COLUMNS = (
+    "id, timestamp, object_tx_id, transaction_id, verb, detail, object_type, "
+    "object_id, object_name, application_id, application_environment_id, "
+    "project_id, organization_id, app_name, project_name, actor_username, "
+    "actor_email, remote_addr, config_secret, config_buildtime, config_version, "
+    "image_ref, image_sha, deploy_release_version, raw_data"
+)
+
+_SYNC_SQL = f"""\
+CREATE OR REPLACE FUNCTION audit_log_entries_sync() RETURNS trigger AS $$
+BEGIN
+  INSERT INTO audit_log_entries ({_COLUMNS})
+  SELECT {_COLUMNS} FROM audit_log WHERE id = NEW.id
+  ON CONFLICT (id) DO NOTHING;
+
+  INSERT INTO audit_log_facets (scope_type, scope_id, verb, object_type)
+  SELECT s.scope_type, s.scope_id, e.verb, e.object_type
+  FROM audit_log_entries e
+  CROSS JOIN LATERAL (VALUES
+    ('organization', e.organization_id),
+    ('project', e.project_id),
+    ('application', e.application_id)
+  ) AS s(scope_type, scope_id)
+  WHERE e.id = NEW.id
+    AND s.scope_id IS NOT NULL
+    AND e.verb IS NOT NULL
+    AND e.object_type IS NOT NULL
+  ON CONFLICT DO NOTHING;
+
+  RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS audit_log_entries_sync ON activity;
+CREATE CONSTRAINT TRIGGER audit_log_entries_sync
+AFTER INSERT ON activity
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION audit_log_entries_sync();
+"""
+
+_BACKFILL_SQL = f"""\
+INSERT INTO audit_log_entries ({_COLUMNS})
+SELECT {_COLUMNS} FROM audit_log
+ON CONFLICT (id) DO NOTHING;
+
+INSERT INTO audit_log_facets (scope_type, scope_id, verb, object_type)
+SELECT DISTINCT s.scope_type, s.scope_id, e.verb, e.object_type
+FROM audit_log_entries e
+CROSS JOIN LATERAL (VALUES
+  ('organization', e.organization_id),
+  ('project', e.project_id),
+  ('application', e.application_id)
+) AS s(scope_type, scope_id)
+WHERE s.scope_id IS NOT NULL
+  AND e.verb IS NOT NULL
+  AND e.object_type IS NOT NULL
+ON CONFLICT DO NOTHING;
+"""
+
+
+def upgrade():
+    op.create_table(
+        "audit_log_entries",
+        sa.Column("id", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.Column("object_tx_id", sa.BigInteger(), nullable=True),
+        sa.Column("transaction_id", sa.BigInteger(), nullable=True),
+        sa.Column("verb", sa.String(), nullable=True),
+        sa.Column("detail", sa.String(), nullable=True),
+        sa.Column("object_type", sa.String(), nullable=True),
+        sa.Column("object_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("object_name", sa.String(), nullable=True),
+        sa.Column("application_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column(
+            "application_environment_id",
+            postgresql.UUID(as_uuid=True),
+            nullable=True,
+        ),
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("organization_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("app_name", sa.String(), nullable=True),
+        sa.Column("project_name", sa.String(), nullable=True),
+        sa.Column("actor_username", sa.String(), nullable=True),
+        sa.Column("actor_email", sa.String(), nullable=True),
+        sa.Column("remote_addr", sa.String(), nullable=True),
+        sa.Column("config_secret", sa.Boolean(), nullable=True),
+        sa.Column("config_buildtime", sa.Boolean(), nullable=True),
+        sa.Column("config_version", sa.Integer(), nullable=True),
+        sa.Column("image_ref", sa.String(), nullable=True),
+        sa.Column("image_sha", sa.String(), nullable=True),
+        sa.Column("deploy_release_version", sa.Integer(), nullable=True),
+        sa.Column("raw_data", postgresql.JSONB(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("audit_log_entries", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_audit_log_entries_organization_id_id",
+            ["organization_id", "id"],
+            unique=False,
+        )
+        batch_op.create_index(
+            "ix_audit_log_entries_project_id_id",
+            ["project_id", "id"],
+            unique=False,
+        )
+        batch_op.create_index(
+            "ix_audit_log_entries_application_id_id",
+            ["application_id", "id"],
+            unique=False,
+        )
+        batch_op.create_index(
+            "ix_audit_log_entries_object_type_object_id",
+            ["object_type", "object_id"],
+            unique=False,
+        )
+
+    op.create_table(
+        "audit_log_facets",
+        sa.Column("scope_type", sa.String(length=16), nullable=False),
+        sa.Column("scope_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("verb", sa.String(length=255), nullable=False),
+        sa.Column("object_type", sa.String(length=255), nullable=False),
+        sa.PrimaryKeyConstraint("scope_type", "scope_id", "verb", "object_type"),
+    )
+
+    op.execute(sa.text(_SYNC_SQL))
+    op.execute(sa.text(_BACKFILL_SQL))
+
+
+def downgrade():
+    op.execute(sa.text("DROP TRIGGER IF EXISTS audit_log_entries_sync ON activity"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS audit_log_entries_sync()"))
+    op.drop_table("audit_log_facets")
+    with op.batch_alter_table("audit_log_entries", schema=None) as batch_op:
+        batch_op.drop_index("ix_audit_log_entries_object_type_object_id")
+        batch_op.drop_index("ix_audit_log_entries_application_id_id")
+        batch_op.drop_index("ix_audit_log_entries_project_id_id")
+        batch_op.drop_index("ix_audit_log_entries_organization_id_id")
+    op.drop_table("audit_log_entries")
@@ -0,0 +1,56 @@
+"""add release state fingerprints
+
+Revision ID: e2b8c4a6f0d1
+Revises: d7a3f9e1c5b2
+Create Date: 2026-10-19 13:26:51.904417
+
+Existing rows are not backfilled, since the fingerprints are computed from
+resolved configuration in Python. A NULL candidate_fingerprint makes
+ApplicationEnvironment.has_undeployed_changes compute the candidate's
+fingerprint on the fly, and the column is filled in on the environment's
+next change. A NULL release_fingerprint is likewise computed from the
+deployment's stored release.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e2b8c4a6f0d1"
+down_revision = "d7a3f9e1c5b2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("application_environments", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("candidate_fingerprint", sa.String(length=64), nullable=True)
+        )
+
+    with op.batch_alter_table("deployments", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("release_fingerprint", sa.String(length=64), nullable=True)
+        )
+
+    with op.batch_alter_table("deployments_version", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "release_fingerprint",
+                sa.String(length=64),
+                autoincrement=False,
+                nullable=True,
+            )
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("deployments_version", schema=None) as batch_op:
+        batch_op.drop_column("release_fingerprint")
+
+    with op.batch_alter_table("deployments", schema=None) as batch_op:
+        batch_op.drop_column("release_fingerprint")
+
+    with op.batch_alter_table("application_environments", schema=None) as batch_op:
+        batch_op.drop_column("candidate_fingerprint")
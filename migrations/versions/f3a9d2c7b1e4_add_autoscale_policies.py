@@ -0,0 +1,53 @@
+"""add autoscale policies
+
+Revision ID: f3a9d2c7b1e4
+Revises: e2b8c4a6f0d1
+Create Date: 2026-10-19 15:02:13.418205
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "f3a9d2c7b1e4"
+down_revision = "e2b8c4a6f0d1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("application_environments", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "autoscale_policies",
+                postgresql.JSONB(astext_type=sa.Text()),
+                server_default=sa.text("json_object('{}')"),
+                nullable=True,
+            )
+        )
+
+    with op.batch_alter_table(
+        "application_environments_version", schema=None
+    ) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "autoscale_policies",
+                postgresql.JSONB(astext_type=sa.Text()),
+                server_default=sa.text("json_object('{}')"),
+                autoincrement=False,
+                nullable=True,
+            )
+        )
+
+
+def downgrade():
+    with op.batch_alter_table(
+        "application_environments_version", schema=None
+    ) as batch_op:
+        batch_op.drop_column("autoscale_policies")
+
+    with op.batch_alter_table("application_environments", schema=None) as batch_op:
+        batch_op.drop_column("autoscale_policies")
@@ -1,8 +1,11 @@
 """Tests for activity tracking on auth events and deletions."""
 
+import datetime
 import uuid
+from unittest.mock import patch
 
 import pytest
+import redis
 from flask_security import (
     hash_password,
     login_user,
@@ -13,7 +16,9 @@ from flask_security import (
     wan_deleted,
 )
 
+from cabotage.celery.tasks.audit import drain_audit_outbox
 from cabotage.server import db
+from cabotage.server.audit import write_audit_events
 from cabotage.server.models.auth import User
 from cabotage.server.models.projects import activity_plugin
 from cabotage.server.wsgi import app as _app
@@ -30,6 +35,58 @@ def app():
         yield _app
 
 
+class FakeStreamRedis:
+    """Just enough of a redis client for the audit outbox stream."""
+
+    def __init__(self):
+        self.entries = []
+        self.seq = 0
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        pass
+
+    def xadd(self, key, fields):
+        self.seq += 1
+        entry_id = f"{self.seq}-0".encode()
+        self.entries.append(
+            (entry_id, {k.encode(): v.encode() for k, v in fields.items()})
+        )
+        return entry_id
+
+    def xrange(self, key, count=None):
+        return self.entries[:count]
+
+    def xdel(self, key, *ids):
+        self.entries = [e for e in self.entries if e[0] not in ids]
+
+    def lock(self, name, timeout=None):
+        return _FakeLock()
+
+
+class _FakeLock:
+    def acquire(self, blocking=True):
+        return True
+
+    def reacquire(self):
+        pass
+
+    def release(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def outbox():
+    fake = FakeStreamRedis()
+    with (
+        patch("cabotage.server.audit.get_redis_client", return_value=fake),
+        patch("cabotage.celery.tasks.audit.get_redis_client", return_value=fake),
+    ):
+        yield fake
+
+
 @pytest.fixture
 def client(app):
     return app.test_client()
@@ -70,6 +127,7 @@ def _do_login(app, client, user):
 
 
 def _get_activities(user, verb=None):
+    drain_audit_outbox()
     q = db.session.query(Activity).filter(
         Activity.object_id == user.id,
     )
@@ -182,3 +240,105 @@ class TestWebAuthnActivity:
             a for a in activities if (a.data or {}).get("action") == "webauthn_deleted"
         ]
         assert len(del_activities) >= 1
+
+
+class TestAuditOutbox:
+    def test_events_are_queued_not_written_inline(self, app, client, test_user, outbox):
+        with client:
+            client.get("/")
+            login_user(test_user)
+            client.get("/")
+        assert len(outbox.entries) == 1
+        assert (
+            db.session.query(Activity)
+            .filter(Activity.object_id == test_user.id, Activity.verb == "login")
+            .count()
+            == 0
+        )
+
+    def test_drain_writes_and_acknowledges(self, app, client, test_user, outbox):
+        with client:
+            client.get("/")
+            login_user(test_user)
+            logout_user()
+            client.get("/")
+        assert drain_audit_outbox() == 2
+        assert outbox.entries == []
+        assert {a.verb for a in _get_activities(test_user)} >= {"login", "logout"}
+
+    def test_drain_drops_unwritable_entries(self, app, client, test_user, outbox):
+        outbox.xadd("audit:outbox", {"event": "not json"})
+        outbox.xadd("audit:outbox", {"event": '{"verb": "login"}'})
+        outbox.xadd(
+            "audit:outbox",
+            {
+                "event": (
+                    f'{{"user_id": "{test_user.id}", "verb": "login", '
+                    '"timestamp": "yesterday"}'
+                )
+            },
+        )
+        with client:
+            client.get("/")
+            login_user(test_user)
+            client.get("/")
+        assert drain_audit_outbox() == 1
+        assert outbox.entries == []
+
+    def test_events_keep_their_own_transaction(self, app, test_user):
+        written = write_audit_events(
+            [
+                {
+                    "user_id": str(test_user.id),
+                    "verb": "login",
+                    "action": None,
+                    "timestamp": "2026-01-01T12:00:00+00:00",
+                    "remote_addr": "10.0.0.1",
+                },
+                {
+                    "user_id": str(test_user.id),
+                    "verb": "edit",
+                    "action": "totp_setup",
+                    "timestamp": "2026-01-02T12:00:00+00:00",
+                    "remote_addr": "10.0.0.2",
+                },
+                {
+                    "user_id": str(uuid.uuid4()),
+                    "verb": "login",
+                    "action": None,
+                    "timestamp": "2026-01-02T12:00:00+00:00",
+                },
+            ]
+        )
+        db.session.commit()
+
+        assert written == 2
+        activities = sorted(_get_activities(test_user), key=lambda a: a.id)
+        assert [a.transaction.remote_addr for a in activities] == [
+            "10.0.0.1",
+            "10.0.0.2",
+        ]
+        assert activities[0].transaction.issued_at == datetime.datetime(
+            2026, 1, 1, 12, 0
+        )
+        assert activities[1].data["action"] == "totp_setup"
+        assert all(a.object_tx_id is not None for a in activities)
+
+    def test_falls_back_to_inline_write_without_redis(
+        self, app, client, test_user, outbox
+    ):
+        with patch(
+            "cabotage.server.audit.append_to_outbox",
+            side_effect=redis.ConnectionError,
+        ):
+            with client:
+                client.get("/")
+                login_user(test_user)
+                client.get("/")
+        assert outbox.entries == []
+        assert (
+            db.session.query(Activity)
+            .filter(Activity.object_id == test_user.id, Activity.verb == "login")
+            .count()
+            == 1
+        )
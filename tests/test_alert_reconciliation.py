@@ -3,6 +3,7 @@ from datetime import datetime
 from unittest.mock import MagicMock, patch
 
 import pytest
+from sqlalchemy import event
 
 from cabotage.server import db
 from cabotage.server.models.auth import Organization
@@ -30,6 +31,29 @@ def app():
         yield _app
 
 
+class FakeRedis:
+    """Just enough of a redis client to hold the poll state hash."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hgetall(self, key):
+        return {k.encode(): v.encode() for k, v in self.hashes.get(key, {}).items()}
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def expire(self, key, ttl):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def poll_redis():
+    fake = FakeRedis()
+    with patch("cabotage.celery.tasks.alerting.get_redis_client", return_value=fake):
+        yield fake
+
+
 @pytest.fixture
 def db_session(app):
     yield db.session
@@ -115,10 +139,10 @@ STARTS_AT = datetime(2026, 3, 30, 17, 57, 58)
 STARTS_AT_STR = "2026-03-30T17:57:58Z"
 
 
-def _run_reconcile(db_session):
+def _run_reconcile(db_session, **kwargs):
     from cabotage.celery.tasks.alerting import reconcile_alerts
 
-    reconcile_alerts()
+    reconcile_alerts(**kwargs)
     db_session.expire_all()
 
 
@@ -435,3 +459,196 @@ class TestReconcileAlerts:
 
         dispatched_ids = [c.args[0] for c in mock_dispatch.delay.call_args_list]
         assert alert_id not in dispatched_ids
+
+    @patch("cabotage.celery.tasks.alerting.requests.get")
+    def test_unchanged_alert_is_not_rewritten(self, mock_get, app, db_session):
+        fingerprint = uuid.uuid4().hex[:16]
+        mock_get.return_value = _mock_am_response([_am_v2_alert(fingerprint)])
+
+        _run_reconcile(db_session)
+        alert = Alert.query.filter_by(fingerprint=fingerprint).first()
+        assert alert.content_hash is not None
+        version_id = alert.version_id
+        updated = alert.updated
+
+        _run_reconcile(db_session, force=True)
+        alert = Alert.query.filter_by(fingerprint=fingerprint).first()
+        assert alert.version_id == version_id
+        assert alert.updated == updated
+
+    @patch("cabotage.celery.tasks.alerting.requests.get")
+    def test_batch_written_in_one_statement(self, mock_get, app, db_session):
+        fingerprints = [uuid.uuid4().hex[:16] for _ in range(5)]
+        mock_get.return_value = _mock_am_response(
+            [_am_v2_alert(fp) for fp in fingerprints]
+        )
+
+        statements = []
+
+        def _record(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("INSERT INTO ALERTS"):
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            _run_reconcile(db_session)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _record)
+
+        assert len(statements) == 1
+        assert Alert.query.filter(Alert.fingerprint.in_(fingerprints)).count() == 5
+
+    @patch("cabotage.server.alerting.ingest.UPSERT_BATCH_SIZE", 2)
+    @patch("cabotage.celery.tasks.alerting.dispatch_alert_notification")
+    @patch("cabotage.celery.tasks.alerting.requests.get")
+    def test_large_batch_split_across_statements(
+        self, mock_get, mock_dispatch, app, db_session
+    ):
+        fingerprints = [uuid.uuid4().hex[:16] for _ in range(5)]
+        mock_get.return_value = _mock_am_response(
+            [_am_v2_alert(fp) for fp in fingerprints]
+        )
+
+        statements = []
+        lookups = []
+
+        def _record(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("INSERT INTO ALERTS"):
+                statements.append(statement)
+            elif "(alerts.fingerprint, alerts.starts_at) in" in statement.lower():
+                lookups.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            _run_reconcile(db_session)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _record)
+
+        assert len(statements) == 3
+        assert len(lookups) == 3
+        alerts = Alert.query.filter(Alert.fingerprint.in_(fingerprints)).all()
+        assert len(alerts) == 5
+        dispatched = {call.args[0] for call in mock_dispatch.delay.call_args_list}
+        assert {str(alert.id) for alert in alerts} <= dispatched
+
+    @patch("cabotage.celery.tasks.alerting.requests.get")
+    def test_does_not_reopen_resolved_alert(self, mock_get, app, db_session):
+        fingerprint = uuid.uuid4().hex[:16]
+        existing = Alert(
+            fingerprint=fingerprint,
+            status="resolved",
+            alertname="ResidentDeploymentOOMKilled",
+            labels={"alertname": "ResidentDeploymentOOMKilled"},
+            annotations={},
+            starts_at=STARTS_AT,
+            ends_at=datetime(2026, 3, 30, 18, 0, 0),
+        )
+        db_session.add(existing)
+        db_session.commit()
+
+        mock_get.return_value = _mock_am_response([_am_v2_alert(fingerprint)])
+
+        _run_reconcile(db_session)
+
+        alert = Alert.query.filter_by(fingerprint=fingerprint).first()
+        assert alert.status == "resolved"
+
+
+class TestIncrementalPolling:
+    @patch("cabotage.celery.tasks.alerting.bulk_upsert_alerts", return_value=[])
+    @patch("cabotage.celery.tasks.alerting.requests.get")
+    def test_unchanged_response_skips_db_pass(
+        self, mock_get, mock_upsert, app, db_session, poll_redis
+    ):
+        mock_get.return_value = _mock_am_response([_am_v2_alert("fp-1")])
+
+        with patch("cabotage.celery.tasks.alerting.time.time", return_value=1000):
+            _run_reconcile(db_session)
+        with patch("cabotage.celery.tasks.alerting.time.time", return_value=1010):
+            _run_reconcile(db_session)
+
+        assert mock_get.call_count == 2
+        assert mock_upsert.call_count == 1
+        state = poll_redis.hashes["alertmanager:poll"]
+        assert float(state["interval"]) == 10
+        assert float(state["next_poll_at"]) == 1020
+
+    @patch("cabotage.celery.tasks.alerting.bulk_upsert_alerts", return_value=[])
+    @patch("cabotage.celery.tasks.alerting.requests.get")
+    def test_skips_fetch_until_next_poll_due(
+        self, mock_get, mock_upsert, app, db_session
+    ):
+        mock_get.return_value = _mock_am_response([])
+
+        with patch("cabotage.celery.tasks.alerting.time.time", return_value=1000):
+            _run_reconcile(db_session)
+        with patch("cabotage.celery.tasks.alerting.time.time", return_value=1001):
+            _run_reconcile(db_session)
+
+        assert mock_get.call_count == 1
+
+    @patch("cabotage.celery.tasks.alerting.bulk_upsert_alerts", return_value=[])
+    @patch("cabotage.celery.tasks.alerting.requests.get")
+    def test_change_resets_interval(
+        self, mock_get, mock_upsert, app, db_session, poll_redis
+    ):
+        poll_redis.hashes["alertmanager:poll"] = {
+            "digest": "stale",
+            "interval": "60",
+            "next_poll_at": "0",
+            "full_at": "5000",
+        }
+        mock_get.return_value = _mock_am_response([_am_v2_alert("fp-1")])
+
+        with patch("cabotage.celery.tasks.alerting.time.time", return_value=1000):
+            _run_reconcile(db_session)
+
+        assert mock_upsert.call_count == 1
+        state = poll_redis.hashes["alertmanager:poll"]
+        assert float(state["interval"]) == 5
+        assert float(state["full_at"]) == 1300
+
+    @patch("cabotage.celery.tasks.alerting.bulk_upsert_alerts", return_value=[])
+    @patch("cabotage.celery.tasks.alerting.requests.get")
+    def test_full_pass_forced_periodically(
+        self, mock_get, mock_upsert, app, db_session
+    ):
+        mock_get.return_value = _mock_am_response([_am_v2_alert("fp-1")])
+
+        with patch("cabotage.celery.tasks.alerting.time.time", return_value=1000):
+            _run_reconcile(db_session)
+        with patch("cabotage.celery.tasks.alerting.time.time", return_value=1400):
+            _run_reconcile(db_session)
+
+        assert mock_upsert.call_count == 2
+
+    def test_digest_ignores_order_and_evaluation_churn(self):
+        from cabotage.celery.tasks.alerting import alerts_digest
+
+        a = _am_v2_alert("fp-a")
+        b = _am_v2_alert("fp-b")
+        moved = {
+            **a,
+            "updatedAt": "2026-03-30T18:01:00Z",
+            "endsAt": "2026-03-30T18:05:00Z",
+        }
+        assert alerts_digest([a, b]) == alerts_digest([b, moved])
+        relabeled = {**a, "labels": {**a["labels"], "severity": "warning"}}
+        assert alerts_digest([a, b]) != alerts_digest([relabeled, b])
+
+    @patch("cabotage.celery.tasks.alerting.requests.get")
+    def test_sends_filter_and_receiver(self, mock_get, app, db_session):
+        mock_get.return_value = _mock_am_response([])
+        _app.config["ALERTMANAGER_FILTER"] = 'cabotage="true"; severity=~"crit.*"'
+        _app.config["ALERTMANAGER_RECEIVER"] = "cabotage"
+        try:
+            _run_reconcile(db_session)
+        finally:
+            _app.config["ALERTMANAGER_FILTER"] = None
+            _app.config["ALERTMANAGER_RECEIVER"] = None
+
+        params = mock_get.call_args.kwargs["params"]
+        assert params == {
+            "filter": ['cabotage="true"', 'severity=~"crit.*"'],
+            "receiver": "cabotage",
+        }
@@ -1,8 +1,11 @@
 import uuid
+from datetime import datetime, timezone
+from unittest.mock import patch
 
 import pytest
 
 from cabotage.server import db
+from cabotage.server.alerting.ingest import resolve_application
 from cabotage.server.models.auth import Organization
 from cabotage.server.models.projects import (
     Alert,
@@ -544,6 +547,66 @@ class TestResolutionPriority:
         assert alert.alertname == "SomeInfraAlert"
 
 
+# --- Resolution cache ---
+
+
+class TestResolutionCache:
+    def test_resource_prefix_set_on_insert(self, db_session, project, application):
+        assert application.resource_prefix == safe_k8s_name(
+            project.k8s_identifier, application.k8s_identifier
+        )
+
+    def test_long_resource_prefix_matches_safe_k8s_name(self, db_session, project):
+        a = Application(name="x" * 60, slug="x" * 60, project_id=project.id)
+        db_session.add(a)
+        db_session.flush()
+        assert a.resource_prefix == safe_k8s_name(
+            project.k8s_identifier, a.k8s_identifier
+        )
+        assert len(a.resource_prefix) <= 63
+
+    def test_repeat_lookups_are_cached(
+        self, db_session, org, project, application, app_env
+    ):
+        labels = {
+            "deployment": application.resource_prefix,
+            "namespace": org.k8s_identifier,
+        }
+        assert resolve_application(labels) == (application, app_env)
+        with patch("cabotage.server.alerting.ingest._resolve_uncached") as mock_resolve:
+            assert resolve_application(labels) == (application, app_env)
+        mock_resolve.assert_not_called()
+
+    def test_cached_miss_cleared_by_new_application(
+        self, db_session, org, project, environment
+    ):
+        labels = {"deployment": f"{project.k8s_identifier}-late"}
+        assert resolve_application(labels) == (None, None)
+
+        a = Application(
+            name="late", slug="late", k8s_identifier="late", project_id=project.id
+        )
+        db_session.add(a)
+        db_session.flush()
+        ae = ApplicationEnvironment(application_id=a.id, environment_id=environment.id)
+        db_session.add(ae)
+        db_session.flush()
+
+        application, _app_env = resolve_application(labels)
+        assert application == a
+
+    def test_deleted_application_not_served_from_cache(
+        self, db_session, org, project, application, app_env
+    ):
+        labels = {"deployment": application.resource_prefix}
+        assert resolve_application(labels)[0] == application
+
+        application.deleted_at = datetime.now(timezone.utc)
+        db_session.flush()
+
+        assert resolve_application(labels) == (None, None)
+
+
 # --- Upsert behavior ---
 
 
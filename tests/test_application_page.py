@@ -0,0 +1,331 @@
+"""Tests for the application detail page loader."""
+
+import time
+import uuid
+
+import pytest
+from flask_security import hash_password
+
+from cabotage.server import db
+from cabotage.server.models.auth import Organization, User
+from cabotage.server.models.auth_associations import OrganizationMember
+from cabotage.server.models.projects import (
+    Application,
+    ApplicationEnvironment,
+    Configuration,
+    Deployment,
+    Environment,
+    Image,
+    Project,
+    Release,
+)
+from cabotage.server.query_helpers import (
+    load_application_page,
+    resolve_application_path,
+)
+from cabotage.server.query_stats import capture_queries
+from cabotage.server.wsgi import app as _app
+
+# Query budget for rendering the application page, independent of how much
+# image/release/deployment history the application has.
+PAGE_QUERY_BUDGET = 16
+
+
+@pytest.fixture
+def app():
+    _app.config["TESTING"] = True
+    _app.config["WTF_CSRF_ENABLED"] = False
+    _app.config["REQUIRE_MFA"] = False
+    with _app.app_context():
+        yield _app
+    _app.config["REQUIRE_MFA"] = True
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def db_session(app):
+    yield db.session
+    db.session.rollback()
+
+
+@pytest.fixture
+def admin_user(db_session):
+    user = User(
+        username=f"admin-{uuid.uuid4().hex[:8]}",
+        email=f"admin-{uuid.uuid4().hex[:8]}@example.com",
+        password=hash_password("password123"),
+        active=True,
+        fs_uniquifier=uuid.uuid4().hex,
+    )
+    db_session.add(user)
+    db_session.flush()
+    return user
+
+
+@pytest.fixture
+def org(db_session, admin_user):
+    org = Organization(name="Test Org", slug=f"testorg-{uuid.uuid4().hex[:8]}")
+    db_session.add(org)
+    db_session.flush()
+    db_session.add(
+        OrganizationMember(organization_id=org.id, user_id=admin_user.id, admin=True)
+    )
+    db_session.flush()
+    return org
+
+
+@pytest.fixture
+def project(db_session, org):
+    project = Project(name="Test Project", organization_id=org.id)
+    db_session.add(project)
+    db_session.flush()
+    return project
+
+
+@pytest.fixture
+def environment(db_session, project):
+    environment = Environment(name="default", project_id=project.id, ephemeral=False)
+    db_session.add(environment)
+    db_session.flush()
+    return environment
+
+
+@pytest.fixture
+def application(db_session, project):
+    application = Application(
+        name="webapp",
+        slug="webapp",
+        project_id=project.id,
+        github_repository="myorg/myrepo",
+    )
+    db_session.add(application)
+    db_session.flush()
+    return application
+
+
+@pytest.fixture
+def app_env(db_session, application, environment):
+    app_env = ApplicationEnvironment(
+        application_id=application.id,
+        environment_id=environment.id,
+    )
+    db_session.add(app_env)
+    db_session.flush()
+    db_session.add(
+        Configuration(
+            application_id=application.id,
+            application_environment_id=app_env.id,
+            name="DATABASE_URL",
+            value="postgres://db",
+            secret=False,
+        )
+    )
+    db_session.flush()
+    return app_env
+
+
+def _login(client, user):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = user.fs_uniquifier
+        sess["_fresh"] = True
+        sess["fs_cc"] = "set"
+        sess["fs_paa"] = time.time()
+        sess["identity.id"] = user.id
+        sess["identity.auth_type"] = "session"
+
+
+def _make_history(db_session, application, app_env, count):
+    """Create ``count`` built image -> release -> deployment generations."""
+    for i in range(count):
+        image = Image(
+            application_id=application.id,
+            application_environment_id=app_env.id,
+            _repository_name=application.registry_repository_name(app_env),
+            build_ref=f"{i:040x}",
+            image_metadata={"sha": f"{i:040x}"},
+            built=True,
+            processes={"web": {"cmd": "gunicorn app:app", "env": []}},
+        )
+        db_session.add(image)
+        db_session.flush()
+        release = Release(
+            application_id=application.id,
+            application_environment_id=app_env.id,
+            _repository_name=application.registry_repository_name(app_env),
+            image=image.asdict,
+            configuration=Application._resolved_configuration(app_env),
+            image_changes={},
+            configuration_changes={},
+            built=True,
+        )
+        db_session.add(release)
+        db_session.flush()
+        db_session.add(
+            Deployment(
+                application_id=application.id,
+                application_environment_id=app_env.id,
+                release=release.asdict,
+                complete=True,
+            )
+        )
+        db_session.flush()
+    # A build in progress and a failed build on top of the history.
+    for built, error in ((False, True), (False, False)):
+        db_session.add(
+            Image(
+                application_id=application.id,
+                application_environment_id=app_env.id,
+                _repository_name=application.registry_repository_name(app_env),
+                build_ref="main",
+                built=built,
+                error=error,
+            )
+        )
+    db_session.flush()
+
+
+def _load(org, project, application):
+    path = resolve_application_path(org.slug, project.slug, application.slug)
+    return load_application_page(path)
+
+
+def _page_url(org, project, application):
+    return f"/projects/{org.slug}/{project.slug}/applications/{application.slug}"
+
+
+def _count_page_queries(client, db_session, url):
+    db_session.expire_all()
+    with capture_queries() as stats:
+        response = client.get(url)
+    assert response.status_code == 200
+    return stats.count
+
+
+class TestLoadApplicationPage:
+    def test_resolves_slug_path(self, db_session, org, project, application, app_env):
+        page = _load(org, project, application)
+        assert page.organization.id == org.id
+        assert page.project.id == project.id
+        assert page.application.id == application.id
+        assert page.app_env.id == app_env.id
+        assert page.images == []
+        assert page.latest_image is None
+        assert not page.has_releases
+
+    def test_unknown_slug_is_none(self, db_session, org, project, application):
+        assert resolve_application_path(org.slug, project.slug, "missing") is None
+        assert (
+            resolve_application_path("missing", project.slug, application.slug) is None
+        )
+        assert (
+            resolve_application_path(
+                org.slug, project.slug, application.slug, env_slug="missing"
+            )
+            is None
+        )
+
+    def test_env_slug_resolves_enrollment(
+        self, db_session, org, project, application, app_env, environment
+    ):
+        path = resolve_application_path(
+            org.slug, project.slug, application.slug, env_slug=environment.slug
+        )
+        assert path.app_env.id == app_env.id
+        # Environments are only surfaced for env-enabled projects.
+        assert path.environment is None
+
+    def test_latest_variants(self, db_session, org, project, application, app_env):
+        _make_history(db_session, application, app_env, 12)
+
+        page = _load(org, project, application)
+
+        images = app_env.images.order_by(Image.version.desc()).all()
+        releases = app_env.releases.order_by(Release.version.desc()).all()
+        deployments = app_env.deployments.order_by(Deployment.created.desc()).all()
+        assert [i.id for i in page.images] == [i.id for i in images[:10]]
+        assert [r.id for r in page.releases] == [r.id for r in releases[:10]]
+        assert [d.id for d in page.deployments] == [d.id for d in deployments[:10]]
+
+        assert page.latest_image is images[0]
+        assert page.latest_image_building is images[0]
+        assert page.latest_image_error is images[1]
+        assert page.latest_image_built is images[2]
+        assert page.latest_release is releases[0]
+        assert page.latest_release_built is releases[0]
+        assert page.latest_release_building is None
+        assert page.latest_deployment is deployments[0]
+        assert page.latest_deployment_completed is deployments[0]
+        assert page.has_releases
+
+        assert page.deployed_release is releases[0]
+        assert page.deployed_image is images[2]
+        assert page.latest_release_processes == {
+            "web": {"cmd": "gunicorn app:app", "env": []}
+        }
+        assert str(releases[0].id) in page.release_by_id
+        assert str(images[2].id) in page.image_by_id
+
+    def test_latest_variants_outside_recent_window(
+        self, db_session, org, project, application, app_env
+    ):
+        """The latest built image is found however many failed builds follow it."""
+        _make_history(db_session, application, app_env, 1)
+        built = app_env.images.filter_by(built=True).one()
+        for _ in range(12):
+            db_session.add(
+                Image(
+                    application_id=application.id,
+                    application_environment_id=app_env.id,
+                    _repository_name=application.registry_repository_name(app_env),
+                    build_ref="main",
+                    error=True,
+                )
+            )
+        db_session.flush()
+
+        page = _load(org, project, application)
+        assert len(page.images) == 10
+        assert built not in page.images
+        assert page.latest_image_built is built
+        assert page.deployed_image is built
+
+
+class TestApplicationPageQueries:
+    def test_renders(self, client, db_session, admin_user, org, project, application):
+        _login(client, admin_user)
+        response = client.get(_page_url(org, project, application))
+        assert response.status_code == 200
+
+    def test_env_enabled_redirects_to_default_environment(
+        self, client, db_session, admin_user, org, project, application, app_env
+    ):
+        project.environments_enabled = True
+        db_session.flush()
+        _login(client, admin_user)
+        response = client.get(_page_url(org, project, application))
+        assert response.status_code == 302
+        assert response.location.endswith(
+            f"/projects/{org.slug}/{project.slug}/env/{app_env.environment.slug}"
+            f"/applications/{application.slug}"
+        )
+
+    def test_query_count_is_bounded(
+        self, client, db_session, admin_user, org, project, application, app_env
+    ):
+        _login(client, admin_user)
+        url = _page_url(org, project, application)
+        # Warm per-session auth lookups so only the page itself is counted.
+        client.get(url)
+
+        _make_history(db_session, application, app_env, 15)
+        before = _count_page_queries(client, db_session, url)
+
+        _make_history(db_session, application, app_env, 30)
+        after = _count_page_queries(client, db_session, url)
+
+        assert after == before
+        assert after <= PAGE_QUERY_BUDGET
@@ -0,0 +1,344 @@
+"""Tests for asynchronous application scaling."""
+
+import threading
+import time
+import types
+import uuid
+from unittest.mock import patch
+
+import pytest
+from flask_security import hash_password
+
+from cabotage.celery.tasks import deploy
+from cabotage.server import db
+from cabotage.server.models.auth import Organization, User
+from cabotage.server.models.auth_associations import OrganizationMember
+from cabotage.server.models.projects import (
+    Application,
+    ApplicationEnvironment,
+    Environment,
+    Image,
+    Project,
+    Release,
+)
+from cabotage.server.wsgi import app as _app
+
+
+class FakeLock:
+    def acquire(self):
+        return True
+
+    def release(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.locks = []
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        self.locks.append(name)
+        return FakeLock()
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(
+            {k.encode(): v.encode() for k, v in mapping.items()}
+        )
+
+    def expire(self, key, ttl):
+        pass
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def status(self, operation_id):
+        return {
+            k.decode(): v.decode()
+            for k, v in self.hgetall(deploy.scale_status_key(operation_id)).items()
+        }
+
+
+@pytest.fixture
+def app():
+    _app.config["TESTING"] = True
+    _app.config["WTF_CSRF_ENABLED"] = False
+    _app.config["REQUIRE_MFA"] = False
+    with _app.app_context():
+        yield _app
+    _app.config["REQUIRE_MFA"] = True
+    _app.config["KUBERNETES_ENABLED"] = False
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def db_session(app):
+    yield db.session
+    db.session.rollback()
+
+
+@pytest.fixture
+def fake_redis():
+    fake = FakeRedis()
+    with (
+        patch.object(deploy, "get_redis_client", return_value=fake),
+        patch("cabotage.server.user.views.get_redis_client", return_value=fake),
+    ):
+        yield fake
+
+
+@pytest.fixture
+def admin_user(db_session):
+    user = User(
+        username=f"admin-{uuid.uuid4().hex[:8]}",
+        email=f"admin-{uuid.uuid4().hex[:8]}@example.com",
+        password=hash_password("password123"),
+        active=True,
+        fs_uniquifier=uuid.uuid4().hex,
+    )
+    db_session.add(user)
+    db_session.flush()
+    return user
+
+
+@pytest.fixture
+def app_env(db_session, admin_user):
+    org = Organization(name="Test Org", slug=f"testorg-{uuid.uuid4().hex[:8]}")
+    db_session.add(org)
+    db_session.flush()
+    db_session.add(
+        OrganizationMember(organization_id=org.id, user_id=admin_user.id, admin=True)
+    )
+    project = Project(name="Test Project", organization_id=org.id)
+    db_session.add(project)
+    db_session.flush()
+    environment = Environment(name="default", project_id=project.id, ephemeral=False)
+    application = Application(name="webapp", slug="webapp", project_id=project.id)
+    db_session.add_all([environment, application])
+    db_session.flush()
+    app_env = ApplicationEnvironment(
+        application_id=application.id,
+        environment_id=environment.id,
+        process_counts={"web": 1, "worker": 1, "jobnightly": 1},
+    )
+    db_session.add(app_env)
+    db_session.flush()
+    image = Image(
+        application_id=application.id,
+        application_environment_id=app_env.id,
+        _repository_name=application.registry_repository_name(app_env),
+        build_ref="0" * 40,
+        built=True,
+        processes={"web": {"cmd": "gunicorn app:app", "env": []}},
+    )
+    db_session.add(image)
+    db_session.flush()
+    db_session.add(
+        Release(
+            application_id=application.id,
+            application_environment_id=app_env.id,
+            _repository_name=application.registry_repository_name(app_env),
+            image=image.asdict,
+            configuration={},
+            image_changes={},
+            configuration_changes={},
+            built=True,
+        )
+    )
+    db_session.flush()
+    return app_env
+
+
+def _login(client, user):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = user.fs_uniquifier
+        sess["_fresh"] = True
+        sess["fs_cc"] = "set"
+        sess["fs_paa"] = time.time()
+        sess["identity.id"] = user.id
+        sess["identity.auth_type"] = "session"
+
+
+@pytest.fixture
+def k8s_ops():
+    calls = []
+    lock = threading.Lock()
+
+    def record(name):
+        def op(namespace, release, process_name, value=None, **kwargs):
+            with lock:
+                calls.append((name, process_name, kwargs.get("suspend", value)))
+
+        return op
+
+    with (
+        patch.object(deploy, "kubernetes_ext", types.SimpleNamespace()),
+        patch.object(deploy, "scale_deployment", side_effect=record("scale")),
+        patch.object(deploy, "resize_deployment", side_effect=record("resize")),
+        patch.object(deploy, "suspend_cronjob", side_effect=record("suspend")),
+        patch.object(deploy, "resize_cronjob", side_effect=record("resize_cron")),
+    ):
+        deploy.kubernetes_ext.kubernetes_client = object()
+        yield calls
+
+
+def _change(old, new):
+    return {"old_value": old, "new_value": new}
+
+
+class TestApplyScale:
+    def test_applies_every_change(self, app, app_env, fake_redis, k8s_ops):
+        changes = {
+            "web": {"process_count": _change(1, 3), "pod_class": _change("m1", "m2")},
+            "worker": {"process_count": _change(1, 0)},
+            "jobnightly": {"process_count": _change(1, 0)},
+        }
+        app_env.process_counts = {"web": 3, "worker": 0, "jobnightly": 0}
+        app_env.process_pod_classes = {"web": "m2"}
+
+        deploy.apply_scale.run("op1", str(app_env.id), changes)
+
+        assert sorted(k8s_ops) == [
+            ("resize", "web", "m2"),
+            ("scale", "web", 3),
+            ("scale", "worker", 0),
+            ("suspend", "jobnightly", True),
+        ]
+        assert fake_redis.status("op1") == {
+            "state": "done",
+            "process:web": "done",
+            "process:worker": "done",
+            "process:jobnightly": "done",
+        }
+
+    def test_applies_current_values_not_queued_ones(
+        self, app, app_env, fake_redis, k8s_ops
+    ):
+        # A later scale already committed web=5 and a new pod class; this
+        # older scale ran late and must not roll Kubernetes back to 3.
+        app_env.process_counts = {**app_env.process_counts, "web": 5}
+        app_env.process_pod_classes = {"web": "m3"}
+
+        deploy.apply_scale.run(
+            "op4",
+            str(app_env.id),
+            {"web": {"process_count": _change(1, 3), "pod_class": _change("m1", "m2")}},
+        )
+
+        assert sorted(k8s_ops) == [("resize", "web", "m3"), ("scale", "web", 5)]
+        assert fake_redis.locks == [f"scale-lock:{app_env.id}"]
+
+    def test_processes_are_patched_concurrently(self, app, app_env, fake_redis):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def scale(namespace, release, process_name, replicas, api_client=None):
+            barrier.wait()
+
+        with (
+            patch.object(deploy, "kubernetes_ext", types.SimpleNamespace()),
+            patch.object(deploy, "scale_deployment", side_effect=scale),
+        ):
+            deploy.kubernetes_ext.kubernetes_client = object()
+            deploy.apply_scale.run(
+                "op2",
+                str(app_env.id),
+                {
+                    "web": {"process_count": _change(1, 2)},
+                    "worker": {"process_count": _change(1, 2)},
+                },
+            )
+
+        assert fake_redis.status("op2")["state"] == "done"
+
+    def test_failure_is_reported_per_process(self, app, app_env, fake_redis, k8s_ops):
+        with patch.object(
+            deploy, "resize_deployment", side_effect=RuntimeError("forbidden")
+        ):
+            with pytest.raises(deploy.DeployError):
+                deploy.apply_scale.run(
+                    "op3",
+                    str(app_env.id),
+                    {
+                        "web": {"pod_class": _change("m1", "m2")},
+                        "worker": {"process_count": _change(1, 2)},
+                    },
+                )
+
+        status = fake_redis.status("op3")
+        assert status["state"] == "failed"
+        assert status["process:web"] == "failed: forbidden"
+        assert status["process:worker"] == "done"
+
+
+class TestScaleView:
+    def _url(self, app_env, suffix=""):
+        application = app_env.application
+        project = application.project
+        return (
+            f"/projects/{project.organization.slug}/{project.slug}"
+            f"/applications/{application.slug}/scale{suffix}"
+        )
+
+    def test_queues_scale_and_reports_status(
+        self, app, client, admin_user, app_env, fake_redis
+    ):
+        app.config["KUBERNETES_ENABLED"] = True
+        _login(client, admin_user)
+        with patch.object(deploy.apply_scale, "apply_async") as apply_async:
+            response = client.post(
+                self._url(app_env),
+                data={
+                    "application_id": str(app_env.application_id),
+                    "environment_id": str(app_env.environment_id),
+                    "process-count-web": "4",
+                    "process-count-worker": "1",
+                },
+                headers={"Accept": "application/json"},
+            )
+
+        assert response.status_code == 202
+        operation_id = response.json["operation_id"]
+        kwargs = apply_async.call_args.kwargs["kwargs"]
+        assert kwargs["operation_id"] == operation_id
+        assert kwargs["changes"] == {"web": {"process_count": _change(1, 4)}}
+        assert app_env.process_counts["web"] == 4
+
+        status = client.get(response.json["status_url"])
+        assert status.json == {
+            "operation_id": operation_id,
+            "state": "queued",
+            "processes": {"web": "pending"},
+        }
+
+    def test_redirect_carries_operation_id(
+        self, app, client, admin_user, app_env, fake_redis
+    ):
+        app.config["KUBERNETES_ENABLED"] = True
+        _login(client, admin_user)
+        with patch.object(deploy.apply_scale, "apply_async"):
+            response = client.post(
+                self._url(app_env),
+                data={
+                    "application_id": str(app_env.application_id),
+                    "environment_id": str(app_env.environment_id),
+                    "process-count-worker": "0",
+                },
+            )
+
+        assert response.status_code == 302
+        assert "scale_operation=" in response.location
+
+    def test_unknown_operation_is_not_found(
+        self, app, client, admin_user, app_env, fake_redis
+    ):
+        _login(client, admin_user)
+        fake_redis.hset(
+            deploy.scale_status_key("other"),
+            mapping={"state": "done", "application_id": str(uuid.uuid4())},
+        )
+        assert client.get(self._url(app_env, "/missing")).status_code == 404
+        assert client.get(self._url(app_env, "/other")).status_code == 404
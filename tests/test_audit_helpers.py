@@ -1,5 +1,8 @@
-"""Tests for audit log diff computation helpers."""
+"""Tests for audit log diff computation and export helpers."""
 
+import csv
+import io
+import json
 import uuid
 
 import pytest
@@ -10,6 +13,7 @@ from cabotage.server.audit_helpers import (
     compute_audit_changes,
     diff_versions,
     format_value,
+    stream_audit_export,
     _compute_scale_changes,
     _compute_release_changes,
 )
@@ -433,6 +437,8 @@ class TestComputeAuditChangesIntegration:
         """Fetch the AuditLog row corresponding to an Activity."""
         from cabotage.server.models.audit import AuditLog
 
+        # audit_log_entries is synced by a trigger deferred to commit.
+        db_session.execute(db.text("SET CONSTRAINTS ALL IMMEDIATE"))
         return AuditLog.query.filter_by(id=activity.id).first()
 
     def test_config_create_shows_value(self, db_session, application, app_env):
@@ -792,3 +798,80 @@ class TestReleaseConfigVerification:
         assert 1 in result
         assert result[1][0]["field"] == "config changed"
         assert result[1][0]["new"] == "MY_VAR"
+
+
+# ---------------------------------------------------------------------------
+# stream_audit_export
+# ---------------------------------------------------------------------------
+
+
+class TestStreamAuditExport:
+    def _entries(self, db_session, application, app_env, count):
+        from cabotage.server.models.audit import AuditLog
+
+        for i in range(count):
+            cfg = Configuration(
+                application_id=application.id,
+                application_environment_id=app_env.id,
+                name=f"EXPORT_VAR_{i}",
+                value=f"value-{i}",
+                secret=False,
+            )
+            db_session.add(cfg)
+            db_session.flush()
+            activity = Activity(
+                verb="create",
+                object=cfg,
+                data={"user_id": "test", "timestamp": "2026-01-01T00:00:00"},
+            )
+            db_session.add(activity)
+            db_session.flush()
+        db_session.execute(db.text("SET CONSTRAINTS ALL IMMEDIATE"))
+        return AuditLog.query.filter(AuditLog.application_id == application.id)
+
+    def test_ndjson_pages_through_everything_in_order(
+        self, db_session, application, app_env
+    ):
+        query = self._entries(db_session, application, app_env, 5)
+
+        chunks = list(stream_audit_export(query, "ndjson", batch_size=2))
+
+        assert len(chunks) == 3
+        records = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+        assert [r["object_name"] for r in records] == [
+            f"EXPORT_VAR_{i}" for i in range(5)
+        ]
+        assert records[0]["application_id"] == str(application.id)
+        assert records[0]["changes"] == [
+            {"field": "EXPORT_VAR_0", "old": None, "new": "value-0"}
+        ]
+
+    def test_no_transaction_held_between_batches(
+        self, db_session, application, app_env
+    ):
+        query = self._entries(db_session, application, app_env, 3)
+
+        open_between_batches = [
+            db_session().in_transaction()
+            for _ in stream_audit_export(query, "ndjson", batch_size=2)
+        ]
+
+        assert open_between_batches == [False, False]
+
+    def test_csv_has_header_and_one_row_per_entry(
+        self, db_session, application, app_env
+    ):
+        query = self._entries(db_session, application, app_env, 3)
+
+        body = "".join(stream_audit_export(query, "csv", batch_size=2))
+
+        rows = list(csv.DictReader(io.StringIO(body)))
+        assert len(rows) == 3
+        assert rows[0]["verb"] == "create"
+        assert json.loads(rows[0]["changes"])[0]["new"] == "value-0"
+
+    def test_empty_scope_yields_nothing(self, db_session):
+        from cabotage.server.models.audit import AuditLog
+
+        query = AuditLog.query.filter(AuditLog.application_id == uuid.uuid4())
+        assert list(stream_audit_export(query, "ndjson")) == []
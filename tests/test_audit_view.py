@@ -1,10 +1,11 @@
-"""Tests for the audit_log SQL view."""
+"""Tests for the audit_log SQL view and the audit_log_entries table."""
 
 import uuid
 
 import pytest
 
 from cabotage.server import db
+from cabotage.server.models.audit import AuditLog, AuditLogFacet
 from cabotage.server.models.auth import Organization
 from cabotage.server.models.projects import (
     Application,
@@ -274,3 +275,73 @@ class TestAuditViewFiltering:
             {"app_id": uuid.uuid4()},
         ).fetchall()
         assert len(rows) == 0
+
+
+def _fire_deferred_triggers(db_session):
+    """Run the commit-time audit_log_entries sync without committing."""
+    db_session.execute(db.text("SET CONSTRAINTS ALL IMMEDIATE"))
+
+
+class TestAuditLogEntries:
+    def _config_activity(self, db_session, application, app_env, verb="create"):
+        cfg = Configuration(
+            application_id=application.id,
+            application_environment_id=app_env.id,
+            name="MATERIALIZED_VAR",
+            value="hello",
+            secret=False,
+        )
+        db_session.add(cfg)
+        db_session.flush()
+        activity = Activity(
+            verb=verb,
+            object=cfg,
+            data={"user_id": "test-user", "timestamp": "2026-01-01T00:00:00"},
+        )
+        db_session.add(activity)
+        db_session.flush()
+        return activity
+
+    def test_entry_written_at_commit(self, db_session, application, app_env):
+        activity = self._config_activity(db_session, application, app_env)
+
+        assert db_session.get(AuditLog, activity.id) is None
+        _fire_deferred_triggers(db_session)
+
+        entry = db_session.get(AuditLog, activity.id)
+        assert entry is not None
+        assert entry.verb == "create"
+        assert entry.object_name == "MATERIALIZED_VAR"
+        assert entry.application_id == application.id
+        assert entry.project_id == application.project_id
+        assert entry.app_name == "auditapp"
+
+    def test_complete_error_not_materialized(self, db_session, application, app_env):
+        img = Image(
+            application_id=application.id,
+            application_environment_id=app_env.id,
+            _repository_name=REPOSITORY_NAME,
+            image_metadata={},
+            build_ref="main",
+        )
+        db_session.add(img)
+        activity = Activity(verb="complete", object=img, data={})
+        db_session.add(activity)
+        db_session.flush()
+        _fire_deferred_triggers(db_session)
+
+        assert db_session.get(AuditLog, activity.id) is None
+
+    def test_facets_recorded_per_scope(self, db_session, application, app_env, org):
+        self._config_activity(db_session, application, app_env)
+        _fire_deferred_triggers(db_session)
+
+        facets = {
+            (f.scope_type, f.scope_id)
+            for f in AuditLogFacet.query.filter_by(
+                verb="create", object_type="Configuration"
+            )
+        }
+        assert ("organization", org.id) in facets
+        assert ("project", application.project_id) in facets
+        assert ("application", application.id) in facets
@@ -0,0 +1,399 @@
+"""Tests for metric-driven process autoscaling."""
+
+import json
+import time
+import uuid
+from unittest.mock import patch
+
+import pytest
+from flask_security import hash_password
+
+from cabotage.celery.tasks import autoscale, deploy
+from cabotage.server import db
+from cabotage.server.autoscaling import (
+    AutoscalePolicyError,
+    MimirMetricsSource,
+    evaluate_process,
+    validate_policy,
+)
+from cabotage.server.models.auth import Organization, User
+from cabotage.server.models.auth_associations import OrganizationMember
+from cabotage.server.models.projects import (
+    Application,
+    ApplicationEnvironment,
+    Environment,
+    Project,
+    activity_plugin,
+)
+from cabotage.server.wsgi import app as _app
+
+Activity = activity_plugin.activity_cls
+
+RPS_POLICY = {"metric": "rps", "target": 10.0, "min": 1, "max": 10, "dry_run": False}
+
+SETTINGS = {"tolerance": 0.1, "scale_down_window": 300, "cooldown": 60}
+
+
+def _evaluate(current, usage, state=None, now=1000, policy=RPS_POLICY, **kwargs):
+    return evaluate_process(
+        policy, current, usage, state or {}, now=now, **{**SETTINGS, **kwargs}
+    )
+
+
+class TestValidatePolicy:
+    def test_normalizes(self):
+        assert validate_policy({"metric": "cpu", "target": "70", "max": "5"}) == {
+            "metric": "cpu",
+            "target": 70.0,
+            "min": 1,
+            "max": 5,
+            "dry_run": False,
+        }
+
+    @pytest.mark.parametrize(
+        "policy",
+        [
+            None,
+            {"metric": "memory", "target": 1, "max": 2},
+            {"metric": "cpu", "max": 2},
+            {"metric": "cpu", "target": "lots", "max": 2},
+            {"metric": "cpu", "target": 0, "max": 2},
+            {"metric": "cpu", "target": 50, "min": 0, "max": 2},
+            {"metric": "cpu", "target": 50, "min": 3, "max": 2},
+            {"metric": "cpu", "target": 50, "max": 1000},
+        ],
+    )
+    def test_rejects(self, policy):
+        with pytest.raises(AutoscalePolicyError):
+            validate_policy(policy)
+
+
+class TestEvaluateProcess:
+    def test_within_tolerance_holds(self):
+        desired, state = _evaluate(2, 21.0)
+        assert desired is None
+        assert state["recommended"] == 2
+        assert state["observed"] == 10.5
+
+    def test_scales_up_immediately(self):
+        desired, state = _evaluate(2, 50.0)
+        assert desired == 5
+        assert state["proposed"] == 5
+
+    def test_clamps_to_policy(self):
+        assert _evaluate(2, 500.0)[0] == 10
+        assert _evaluate(5, 0.0, scale_down_window=0)[0] == 1
+
+    def test_cpu_is_relative_to_pod_class_request(self):
+        policy = {**RPS_POLICY, "metric": "cpu", "target": 50.0}
+        # Two m1.small pods (125m requested each) using 250m in total.
+        desired, state = _evaluate(2, 0.25, policy=policy, pod_class="m1.small")
+        assert state["observed"] == 100.0
+        assert desired == 4
+
+    def test_scale_down_waits_for_window(self):
+        desired, state = _evaluate(6, 30.0, now=1000)
+        assert desired is None
+        assert state["below_since"] == 1000
+
+        desired, state = _evaluate(6, 40.0, state, now=1150)
+        assert desired is None
+
+        # Only as low as the highest recommendation during the window.
+        desired, state = _evaluate(6, 20.0, state, now=1300)
+        assert desired == 4
+
+    def test_scale_down_window_restarts_when_load_returns(self):
+        _, state = _evaluate(6, 30.0, now=1000)
+        _, state = _evaluate(6, 60.0, state, now=1100)
+        assert state["below_since"] is None
+        desired, state = _evaluate(6, 30.0, state, now=1300)
+        assert desired is None
+        assert state["below_since"] == 1300
+
+    def test_cooldown_after_scaling(self):
+        state = {"last_scaled_at": 970}
+        desired, state = _evaluate(2, 50.0, state, now=1000)
+        assert desired is None
+        assert state["recommended"] == 5
+        assert _evaluate(2, 50.0, state, now=1031)[0] == 5
+
+    def test_missing_data_or_stopped_process_holds(self):
+        assert _evaluate(2, None)[0] is None
+        desired, state = _evaluate(0, 50.0)
+        assert desired is None
+        assert state["recommended"] is None
+
+
+class FakeMetricsSource:
+    def __init__(self, usage):
+        self.usage = usage
+        self.calls = []
+
+    def process_usage(self, app_env, metric, processes):
+        self.calls.append((metric, sorted(processes)))
+        return {
+            name: value
+            for (m, name), value in self.usage.items()
+            if m == metric and name in processes
+        }
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(
+            {k.encode(): v.encode() for k, v in mapping.items()}
+        )
+
+    def expire(self, key, ttl):
+        pass
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+
+@pytest.fixture
+def app():
+    _app.config["TESTING"] = True
+    _app.config["WTF_CSRF_ENABLED"] = False
+    _app.config["REQUIRE_MFA"] = False
+    with _app.app_context():
+        yield _app
+    _app.config["REQUIRE_MFA"] = True
+    _app.config["KUBERNETES_ENABLED"] = False
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def db_session(app):
+    yield db.session
+    db.session.rollback()
+
+
+@pytest.fixture
+def fake_redis():
+    fake = FakeRedis()
+    with (
+        patch.object(deploy, "get_redis_client", return_value=fake),
+        patch("cabotage.server.user.views.get_redis_client", return_value=fake),
+    ):
+        yield fake
+
+
+@pytest.fixture
+def admin_user(db_session):
+    user = User(
+        username=f"admin-{uuid.uuid4().hex[:8]}",
+        email=f"admin-{uuid.uuid4().hex[:8]}@example.com",
+        password=hash_password("password123"),
+        active=True,
+        fs_uniquifier=uuid.uuid4().hex,
+    )
+    db_session.add(user)
+    db_session.flush()
+    return user
+
+
+@pytest.fixture
+def app_env(db_session, admin_user):
+    org = Organization(name="Test Org", slug=f"testorg-{uuid.uuid4().hex[:8]}")
+    db_session.add(org)
+    db_session.flush()
+    db_session.add(
+        OrganizationMember(organization_id=org.id, user_id=admin_user.id, admin=True)
+    )
+    project = Project(name="Test Project", organization_id=org.id)
+    db_session.add(project)
+    db_session.flush()
+    environment = Environment(name="default", project_id=project.id, ephemeral=False)
+    application = Application(name="webapp", slug="webapp", project_id=project.id)
+    db_session.add_all([environment, application])
+    db_session.flush()
+    app_env = ApplicationEnvironment(
+        application_id=application.id,
+        environment_id=environment.id,
+        process_counts={"web": 2, "worker": 2, "jobnightly": 1},
+        process_pod_classes={"worker": "m1.small"},
+        autoscale_policies={
+            "web": RPS_POLICY,
+            "worker": {**RPS_POLICY, "metric": "cpu", "target": 50.0},
+        },
+    )
+    db_session.add(app_env)
+    db_session.flush()
+    return app_env
+
+
+def _login(client, user):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = user.fs_uniquifier
+        sess["_fresh"] = True
+        sess["fs_cc"] = "set"
+        sess["fs_paa"] = time.time()
+        sess["identity.id"] = user.id
+        sess["identity.auth_type"] = "session"
+
+
+def _state(fake_redis, app_env, process_name):
+    raw = fake_redis.hgetall(autoscale.autoscale_state_key(app_env.id))
+    return json.loads(raw[process_name.encode()])
+
+
+class TestAutoscaleApplicationEnvironment:
+    def test_scales_through_apply_scale(self, app, app_env, fake_redis):
+        app.config["KUBERNETES_ENABLED"] = True
+        source = FakeMetricsSource({("rps", "web"): 50.0, ("cpu", "worker"): 0.125})
+
+        with patch.object(deploy.apply_scale, "apply_async") as apply_async:
+            changes = autoscale.autoscale_application_environment(
+                app_env, source, fake_redis, now=1000
+            )
+
+        assert sorted(source.calls) == [("cpu", ["worker"]), ("rps", ["web"])]
+        assert changes == {"web": {"process_count": {"old_value": 2, "new_value": 5}}}
+        assert app_env.process_counts == {"web": 5, "worker": 2, "jobnightly": 1}
+        assert apply_async.call_args.kwargs["kwargs"]["changes"] == changes
+
+        activity = Activity.query.filter_by(
+            verb="scale", object_id=app_env.application_id
+        ).one()
+        assert activity.data["trigger"] == "autoscale"
+        assert activity.data["changes"] == changes
+
+        assert _state(fake_redis, app_env, "web")["last_scaled_at"] == 1000
+        assert _state(fake_redis, app_env, "worker")["recommended"] == 2
+
+    def test_dry_run_only_proposes(self, app, app_env, fake_redis):
+        app_env.autoscale_policies = {"web": {**RPS_POLICY, "dry_run": True}}
+        source = FakeMetricsSource({("rps", "web"): 50.0})
+
+        with patch.object(autoscale, "queue_scale") as queue_scale:
+            changes = autoscale.autoscale_application_environment(
+                app_env, source, fake_redis, now=1000
+            )
+
+        assert changes == {}
+        queue_scale.assert_not_called()
+        assert app_env.process_counts["web"] == 2
+        state = _state(fake_redis, app_env, "web")
+        assert state["proposed"] == 5
+        assert "last_scaled_at" not in state
+
+    def test_state_carries_between_passes(self, app, app_env, fake_redis):
+        app_env.autoscale_policies = {"web": RPS_POLICY}
+        source = FakeMetricsSource({("rps", "web"): 5.0})
+
+        with patch.object(autoscale, "queue_scale") as queue_scale:
+            for now in (1000, 1150):
+                autoscale.autoscale_application_environment(
+                    app_env, source, fake_redis, now=now
+                )
+            queue_scale.assert_not_called()
+            autoscale.autoscale_application_environment(
+                app_env, source, fake_redis, now=1300
+            )
+
+        assert queue_scale.call_args.args[1] == {
+            "web": {"process_count": {"old_value": 2, "new_value": 1}}
+        }
+
+
+class TestMimirMetricsSource:
+    def test_cpu_usage_by_process(self, app, app_env):
+        series = [
+            {"metric": {"process": "web"}, "values": [[1, "0.1"], [2, "0.5"]]},
+            {"metric": {"process": "release"}, "values": [[2, "9"]]},
+        ]
+        with patch(
+            "cabotage.server.observe.query_mimir_range", return_value=series
+        ) as query:
+            usage = MimirMetricsSource().process_usage(app_env, "cpu", ["web"])
+
+        assert usage == {"web": 0.5}
+        promql = query.call_args.args[0]
+        assert "container_cpu_usage_seconds_total" in promql
+        assert "sum by (process)" in promql
+
+    def test_rps_without_ingress_has_no_data(self, app, app_env):
+        with patch("cabotage.server.observe.query_mimir_range") as query:
+            assert MimirMetricsSource().process_usage(app_env, "rps", ["web"]) == {}
+        query.assert_not_called()
+
+
+class TestAutoscaleView:
+    def _url(self, app_env):
+        application = app_env.application
+        project = application.project
+        return (
+            f"/projects/{project.organization.slug}/{project.slug}"
+            f"/applications/{application.slug}/autoscale"
+        )
+
+    def test_set_and_read_policy(self, client, admin_user, app_env, fake_redis):
+        _login(client, admin_user)
+        response = client.post(
+            self._url(app_env),
+            json={
+                "environment_id": str(app_env.environment_id),
+                "process": "web",
+                "policy": {"metric": "rps", "target": 20, "max": 4},
+            },
+        )
+        assert response.status_code == 200
+        assert app_env.autoscale_policies["web"]["target"] == 20.0
+
+        fake_redis.hset(
+            autoscale.autoscale_state_key(app_env.id),
+            mapping={"web": json.dumps({"observed": 31.5, "recommended": 4})},
+        )
+        signal = client.get(
+            self._url(app_env), query_string={"environment_id": app_env.environment_id}
+        ).json["processes"]["web"]
+        assert signal["current"] == 2
+        assert signal["observed"] == 31.5
+        assert signal["recommended"] == 4
+
+    def test_remove_policy(self, client, admin_user, app_env, fake_redis):
+        _login(client, admin_user)
+        response = client.post(
+            self._url(app_env),
+            json={
+                "environment_id": str(app_env.environment_id),
+                "process": "worker",
+                "policy": None,
+            },
+        )
+        assert set(response.json["processes"]) == {"web"}
+        activity = Activity.query.filter_by(
+            verb="edit", object_id=app_env.application_id
+        ).one()
+        assert activity.data["autoscale_policy"]["process"] == "worker"
+
+    @pytest.mark.parametrize(
+        "process, policy",
+        [
+            ("missing", RPS_POLICY),
+            ("jobnightly", RPS_POLICY),
+            ("web", {"metric": "cpu", "target": -1, "max": 2}),
+        ],
+    )
+    def test_rejects_invalid(
+        self, client, admin_user, app_env, fake_redis, process, policy
+    ):
+        _login(client, admin_user)
+        response = client.post(
+            self._url(app_env),
+            json={
+                "environment_id": str(app_env.environment_id),
+                "process": process,
+                "policy": policy,
+            },
+        )
+        assert response.status_code == 400
@@ -2361,6 +2361,128 @@ class TestCeleryTasks:
         assert refreshed_versions == first_versions
         mock_write.assert_not_called()
 
+    def _fake_key_slugs(self, _namespace, _prefix, configs):
+        return [
+            {
+                "config_key_slug": f"consul:test/configuration/{config.name}/1",
+                "build_key_slug": f"consul:test/configuration/{config.name}/1",
+            }
+            for config in configs
+        ]
+
+    def test_reconcile_redis_writes_env_configs_in_one_batch(self, app, environment):
+        from cabotage.celery.tasks.resources import (
+            _reconcile_redis,
+            _secret_fingerprint,
+        )
+
+        r = RedisResource(
+            service_version="8",
+            environment_id=environment.id,
+            name="Cache",
+            slug="cache",
+            size_class="cache.small",
+            storage_size=1,
+        )
+        db.session.add(r)
+        db.session.commit()
+
+        (
+            mock_custom_api,
+            mock_core_api,
+            mock_apps_api,
+            mock_rbac_api,
+        ) = self._mock_k8s_apis()
+        with (
+            patch(
+                "cabotage.celery.tasks.resources.config_writer.write_configurations",
+                side_effect=self._fake_key_slugs,
+            ) as mock_batch,
+            patch(
+                "cabotage.celery.tasks.resources.config_writer.write_configuration"
+            ) as mock_write,
+        ):
+            _reconcile_redis(
+                r, mock_core_api, mock_custom_api, mock_apps_api, mock_rbac_api
+            )
+
+        mock_batch.assert_called_once()
+        assert sorted(c.name for c in mock_batch.call_args.args[2]) == [
+            "CACHE_REDIS_HOST",
+            "CACHE_REDIS_PASSWORD",
+            "CACHE_REDIS_PORT",
+            "CACHE_REDIS_SSL_CA_CERTS",
+        ]
+        mock_write.assert_not_called()
+
+        # Only the entry that drifted is written on the next pass.
+        password = EnvironmentConfiguration.query.filter_by(
+            resource_id=r.id, name="CACHE_REDIS_PASSWORD"
+        ).one()
+        password.secret_fingerprint = "rotated"
+        db.session.commit()
+        with patch(
+            "cabotage.celery.tasks.resources.config_writer.write_configurations",
+            side_effect=self._fake_key_slugs,
+        ) as mock_batch:
+            _reconcile_redis(
+                r, mock_core_api, mock_custom_api, mock_apps_api, mock_rbac_api
+            )
+
+        assert [c.name for c in mock_batch.call_args.args[2]] == [
+            "CACHE_REDIS_PASSWORD"
+        ]
+        assert password.secret_fingerprint == _secret_fingerprint("testpassword")
+
+    def test_reconcile_redis_falls_back_to_single_writes(self, app, environment):
+        from cabotage.celery.tasks.resources import _reconcile_redis
+
+        r = RedisResource(
+            service_version="8",
+            environment_id=environment.id,
+            name="Cache",
+            slug="cache",
+            size_class="cache.small",
+            storage_size=1,
+        )
+        db.session.add(r)
+        db.session.commit()
+
+        def _write_config(_namespace, _prefix, config):
+            if config.name == "CACHE_REDIS_HOST":
+                raise RuntimeError("consul unavailable")
+            return self._fake_key_slugs(_namespace, _prefix, [config])[0]
+
+        (
+            mock_custom_api,
+            mock_core_api,
+            mock_apps_api,
+            mock_rbac_api,
+        ) = self._mock_k8s_apis()
+        with (
+            patch(
+                "cabotage.celery.tasks.resources.config_writer.write_configurations",
+                side_effect=RuntimeError("txn failed"),
+            ),
+            patch(
+                "cabotage.celery.tasks.resources.config_writer.write_configuration",
+                side_effect=_write_config,
+            ) as mock_write,
+        ):
+            _reconcile_redis(
+                r, mock_core_api, mock_custom_api, mock_apps_api, mock_rbac_api
+            )
+
+        assert mock_write.call_count == 4
+        configs = {
+            c.name: c
+            for c in EnvironmentConfiguration.query.filter_by(resource_id=r.id)
+        }
+        assert configs["CACHE_REDIS_HOST"].key_slug is None
+        assert configs["CACHE_REDIS_PORT"].key_slug == (
+            "consul:test/configuration/CACHE_REDIS_PORT/1"
+        )
+
     def test_reconcile_redis_cluster_stays_provisioning_until_operator_ready(
         self, app, environment
     ):
@@ -1,6 +1,7 @@
 """Tests for image and release build tasks."""
 
 from datetime import UTC, datetime
+import os
 import uuid
 from unittest.mock import MagicMock, patch
 
@@ -375,8 +376,11 @@ class TestBuildImageBuildkit:
             PROCFILE_BODY,
         ]
 
+        cwd = os.getcwd()
         result = _fetch_image_source(image, access_token=None)
 
+        assert os.getcwd() == cwd
+        assert result["dockerfile_env_vars"] == ["APP_ENV"]
         assert result["procfile_body"] == PROCFILE_BODY
         assert [call.kwargs["filename"] for call in mock_fetch_file.call_args_list] == [
             "services/api/Dockerfile.cabotage",
@@ -603,7 +607,7 @@ class TestBuildReleaseBuildkit:
 class TestRunImageBuild:
     """Tests for the run_image_build Celery task."""
 
-    @patch("cabotage.celery.tasks.build.run_release_build")
+    @patch("cabotage.celery.tasks.build.schedule_build")
     @patch("cabotage.celery.tasks.build.build_image_buildkit")
     @patch("cabotage.celery.tasks.build.github_app")
     def test_auto_deploy_creates_release_and_chains(
@@ -652,7 +656,9 @@ class TestRunImageBuild:
         assert releases[0].image == image.asdict
 
         # release build should have been queued
-        mock_run_release.delay.assert_called_once_with(release_id=releases[0].id)
+        mock_run_release.assert_called_once()
+        kind, release = mock_run_release.call_args.args
+        assert (kind, release.id) == ("release", releases[0].id)
 
     @patch("cabotage.celery.tasks.build.build_image_buildkit")
     @patch("cabotage.celery.tasks.build.github_app")
@@ -696,7 +702,7 @@ class TestRunImageBuild:
         ).all()
         assert len(releases) == 0
 
-    @patch("cabotage.celery.tasks.build.run_release_build")
+    @patch("cabotage.celery.tasks.build.schedule_build")
     @patch("cabotage.celery.tasks.build.build_image_buildkit")
     @patch("cabotage.celery.tasks.build.github_app")
     def test_branch_deploy_waits_for_backing_services_before_release(
@@ -754,10 +760,10 @@ class TestRunImageBuild:
             application_environment_id=branch_deploy_image.application_environment_id,
         ).all()
         assert releases == []
-        mock_run_release.delay.assert_not_called()
+        mock_run_release.assert_not_called()
 
     @patch("cabotage.celery.tasks.build.dispatch_autodeploy_notification")
-    @patch("cabotage.celery.tasks.build.run_release_build")
+    @patch("cabotage.celery.tasks.build.schedule_build")
     @patch("cabotage.celery.tasks.build.CheckRun")
     def test_resume_branch_deploy_releases_after_backing_services_ready(
         self,
@@ -809,10 +815,10 @@ class TestRunImageBuild:
         assert releases[0].release_metadata["source_image_id"] == str(
             branch_deploy_image.id
         )
-        mock_run_release.delay.assert_called_once_with(release_id=releases[0].id)
+        mock_run_release.assert_called_once_with("release", releases[0])
 
     @patch("cabotage.celery.tasks.build.dispatch_autodeploy_notification")
-    @patch("cabotage.celery.tasks.build.run_release_build")
+    @patch("cabotage.celery.tasks.build.schedule_build")
     @patch("cabotage.celery.tasks.build.CheckRun")
     def test_resume_branch_deploy_skips_deleted_app_envs(
         self,
@@ -861,7 +867,7 @@ class TestRunImageBuild:
             application_environment_id=branch_deploy_image.application_environment_id,
         ).all()
         assert releases == []
-        mock_run_release.delay.assert_not_called()
+        mock_run_release.assert_not_called()
 
     @patch("cabotage.celery.tasks.build.build_image_buildkit")
     @patch("cabotage.celery.tasks.build.github_app")
@@ -1332,7 +1338,7 @@ class TestRunOmnibusBuild:
         assert releases == []
         mock_build.assert_not_called()
 
-    @patch("cabotage.celery.tasks.build.run_omnibus_build")
+    @patch("cabotage.celery.tasks.build.schedule_build")
     def test_resume_branch_deploy_requeues_omnibus_build_when_backing_services_ready(
         self,
         mock_run_omnibus,
@@ -1368,7 +1374,7 @@ class TestRunOmnibusBuild:
 
         db_session.refresh(branch_deploy_image)
         assert "waiting_for_backing_services" not in branch_deploy_image.image_metadata
-        mock_run_omnibus.delay.assert_called_once_with(image_id=branch_deploy_image.id)
+        mock_run_omnibus.assert_called_once_with("omnibus", branch_deploy_image)
 
     @patch("cabotage.celery.tasks.build.build_omnibus_buildkit")
     @patch("cabotage.celery.tasks.build.github_app")
@@ -1441,12 +1447,12 @@ class TestRunOmnibusBuild:
                 mock_check_cls.return_value = MagicMock()
                 mock_check_cls.create.return_value = MagicMock(check_run_id=None)
                 with patch(
-                    "cabotage.celery.tasks.build.run_release_build"
+                    "cabotage.celery.tasks.build.schedule_build"
                 ) as mock_release:
                     with patch("cabotage.celery.tasks.build.run_deploy"):
                         run_omnibus_build(image_id=image.id)
 
-        mock_release.delay.assert_not_called()
+        mock_release.assert_not_called()
 
 
 # ---------------------------------------------------------------------------
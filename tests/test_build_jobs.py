@@ -13,6 +13,7 @@ import pytest
 import cabotage.celery.tasks.build as build_module
 from cabotage.celery.tasks.build import _build_namespace, build_cache_pvc_name
 from cabotage.server.models.projects import Application
+from cabotage.utils import source_snapshot
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -112,6 +113,7 @@ def _run_release_build(release, mock_core, mock_run_job):
         patch(f"{_BUILD_MODULE}.run_job", mock_run_job),
         patch(f"{_BUILD_MODULE}.BuildkitEnv", return_value=mock_bke),
         patch(f"{_BUILD_MODULE}.fetch_image_build_cache_volume_claim"),
+        patch(f"{_BUILD_MODULE}.release_build_fingerprint", return_value=None),
         patch(f"{_BUILD_MODULE}.db"),
     ):
         mock_kext.kubernetes_client = MagicMock()
@@ -137,6 +139,7 @@ def _run_image_build(image, mock_core, mock_run_job):
         patch(f"{_BUILD_MODULE}.BuildkitEnv", return_value=mock_bke),
         patch(f"{_BUILD_MODULE}.fetch_image_build_cache_volume_claim"),
         patch(f"{_BUILD_MODULE}._fetch_github_access_token", return_value="tok"),
+        patch(f"{_BUILD_MODULE}.image_build_fingerprint", return_value=None),
         patch(
             f"{_BUILD_MODULE}._fetch_image_source",
             return_value={
@@ -438,6 +441,65 @@ class TestBuildCachePVC:
         assert read_call[0][1] == "cabotage-tenant-builds"
 
 
+# ---------------------------------------------------------------------------
+# Source snapshot cache
+# ---------------------------------------------------------------------------
+
+
+class TestSourceSnapshot:
+    def _build(self, mock_app, claim):
+        mock_app.config.update(
+            BUILD_SOURCE_CACHE_CLAIM=claim,
+            BUILD_SOURCE_CACHE_IMAGE="alpine/git:2.47.2",
+            BUILD_SOURCE_CACHE_MAX_MEGABYTES=1024,
+        )
+        image = _make_image()
+        image.application.subdirectory = "services/api"
+        mock_run_job = MagicMock(return_value=(True, "logs"))
+        _run_image_build(image, MagicMock(), mock_run_job)
+        return mock_run_job.call_args[0][3].spec.template.spec
+
+    def test_snapshot_key_is_content_addressed(self):
+        key = source_snapshot.snapshot_key("org/repo", "deadbeef", "api/")
+        assert key == source_snapshot.snapshot_key("org/repo", "deadbeef", "api")
+        assert key != source_snapshot.snapshot_key("org/repo", "deadbeef")
+        assert key != source_snapshot.snapshot_key("org/repo", "cafef00d", "api")
+        assert key != source_snapshot.snapshot_key("org/fork", "deadbeef", "api")
+
+    def test_builds_from_git_without_claim(self, mock_app):
+        pod_spec = self._build(mock_app, None)
+
+        args = pod_spec.containers[0].args
+        assert "context=https://example.com/test-org/test-repo#deadbeef" in args
+        assert "--local" not in args
+        assert pod_spec.init_containers is None
+
+    def test_builds_from_snapshot_with_claim(self, mock_app):
+        pod_spec = self._build(mock_app, "build-source-cache")
+
+        key = source_snapshot.snapshot_key(
+            "test-org/test-repo", "deadbeef", "services/api"
+        )
+        path = f"/source-cache/{key}/src"
+        args = pod_spec.containers[0].args
+        assert not any(arg.startswith("context=https://") for arg in args)
+        assert f"context={path}" in args
+        assert f"dockerfile={path}" in args
+
+        (fetch,) = pod_spec.init_containers
+        env = {var.name: var.value for var in fetch.env}
+        assert env["SNAPSHOT_KEY"] == key
+        assert env["SUBDIRECTORY"] == "services/api"
+        assert env["MAX_MEGABYTES"] == "1024"
+        mounts = {m.name: m for m in pod_spec.containers[0].volume_mounts}
+        assert mounts["source-cache"].read_only is True
+        assert mounts["source-cache"].sub_path == f"{key}/src"
+        assert mounts["source-cache"].mount_path == path
+        volumes = {v.name: v for v in pod_spec.volumes}
+        claim = volumes["source-cache"].persistent_volume_claim
+        assert claim.claim_name == "build-source-cache"
+
+
 # ---------------------------------------------------------------------------
 # Docker Hub auth in BuildkitEnv
 # ---------------------------------------------------------------------------
@@ -519,3 +581,146 @@ class TestDockerHubAuth:
 
         docker_config = json.loads(bke.dockerconfigjson)
         assert "http://registry:5001/v2" in docker_config["auths"]
+
+
+# ---------------------------------------------------------------------------
+# Job waits
+# ---------------------------------------------------------------------------
+
+_DEPLOY_MODULE = "cabotage.celery.tasks.deploy"
+
+
+def _job(name="build-abc", succeeded=None, failed=None):
+    job = MagicMock()
+    job.metadata.name = name
+    job.metadata.labels = {"process": "build"}
+    job.spec.template.metadata.labels = {"build_id": "abc"}
+    job.status.succeeded = succeeded
+    job.status.failed = failed
+    return job
+
+
+def _pod(phase):
+    pod = MagicMock()
+    pod.metadata.name = "build-abc-xyz"
+    pod.status.phase = phase
+    return pod
+
+
+class _FakeWatch:
+    """Replays one batch of events per watch window."""
+
+    def __init__(self, windows):
+        self.windows = windows
+        self.calls = []
+
+    def __call__(self):
+        return self
+
+    def stream(self, fn, **kwargs):
+        self.calls.append((fn, kwargs))
+        if "follow" in kwargs:
+            return iter([b"step 1\n", b"step 2\n"])
+        return iter(self.windows.pop(0) if self.windows else [])
+
+    def stop(self):
+        pass
+
+
+class TestWatchUntil:
+    def test_returns_first_matching_object(self):
+        from cabotage.celery.tasks.deploy import _job_finished, _watch_until
+
+        done = _job(succeeded=1)
+        watch = _FakeWatch(
+            [
+                [{"type": "ADDED", "object": _job()}],
+                [{"type": "MODIFIED", "object": done}],
+            ]
+        )
+        heartbeat = MagicMock()
+        with patch(f"{_DEPLOY_MODULE}.kubernetes.watch.Watch", watch):
+            result = _watch_until(
+                MagicMock(), _job_finished, heartbeat=heartbeat, namespace="ns"
+            )
+
+        assert result is done
+        # One heartbeat between the two watch windows.
+        assert heartbeat.call_count == 1
+        assert watch.calls[0][1]["namespace"] == "ns"
+        assert watch.calls[0][1]["timeout_seconds"] <= 10
+
+    def test_times_out(self):
+        from cabotage.celery.tasks.deploy import _job_finished, _watch_until
+
+        watch = _FakeWatch([])
+        with (
+            patch(f"{_DEPLOY_MODULE}.kubernetes.watch.Watch", watch),
+            patch(f"{_DEPLOY_MODULE}.JOB_WATCH_INTERVAL", 0.01),
+        ):
+            assert _watch_until(MagicMock(), _job_finished, timeout=0.05) is None
+
+    def test_deleted_object_ends_wait(self):
+        from cabotage.celery.tasks.deploy import _job_finished, _watch_until
+
+        watch = _FakeWatch([[{"type": "DELETED", "object": _job()}]])
+        with patch(f"{_DEPLOY_MODULE}.kubernetes.watch.Watch", watch):
+            assert _watch_until(MagicMock(), _job_finished) is None
+
+
+class TestRunJob:
+    def test_waits_by_watching_job(self):
+        from cabotage.celery.tasks.deploy import run_job
+
+        job_object = _job()
+        watch = _FakeWatch([[{"type": "MODIFIED", "object": _job(failed=1)}]])
+        core, batch = MagicMock(), MagicMock()
+        with (
+            patch(f"{_DEPLOY_MODULE}.kubernetes.watch.Watch", watch),
+            patch(f"{_DEPLOY_MODULE}.fetch_job_logs", return_value="logs"),
+            patch(f"{_DEPLOY_MODULE}.db") as mock_db,
+        ):
+            result = run_job(core, batch, "ns", job_object)
+
+        assert result == (False, "logs")
+        batch.read_namespaced_job_status.assert_not_called()
+        assert watch.calls[0][1]["field_selector"] == "metadata.name=build-abc"
+        # Ending the transaction before the wait is left to the caller.
+        mock_db.session.commit.assert_not_called()
+        batch.delete_namespaced_job.assert_called()
+
+    def test_streaming_waits_for_pod_then_job(self):
+        from cabotage.celery.tasks.deploy import run_job
+
+        job_object = _job()
+        watch = _FakeWatch(
+            [
+                [
+                    {"type": "ADDED", "object": _pod("Pending")},
+                    {"type": "MODIFIED", "object": _pod("Running")},
+                ],
+                [{"type": "MODIFIED", "object": _job(succeeded=1)}],
+            ]
+        )
+        redis_client = MagicMock()
+        core, batch = MagicMock(), MagicMock()
+        with (
+            patch(f"{_DEPLOY_MODULE}.kubernetes.watch.Watch", watch),
+            patch(f"{_DEPLOY_MODULE}.db"),
+        ):
+            succeeded, logs = run_job(
+                core,
+                batch,
+                "ns",
+                job_object,
+                redis_client=redis_client,
+                log_key="buildlog:image:abc",
+                heartbeat_type="image_build",
+                heartbeat_id="1",
+            )
+
+        assert succeeded is True
+        assert logs == "Job Pod build-abc-xyz:\n  step 1\n  step 2\n"
+        core.list_namespaced_pod.assert_not_called()
+        batch.read_namespaced_job_status.assert_not_called()
+        assert watch.calls[0][1]["label_selector"] == "build_id=abc"
@@ -0,0 +1,282 @@
+"""Tests for the organization-aware build scheduler."""
+
+import json
+import types
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from cabotage.celery.tasks import build_scheduler
+from cabotage.celery.tasks.build_scheduler import (
+    QUEUED_KEY,
+    RUNNING_KEY,
+    START_TIMEOUT_SECONDS,
+    admit_builds,
+    build_priority,
+    pick_admissions,
+    schedule_build,
+    scheduled_build,
+    set_build_waiting,
+)
+from cabotage.utils.build_log_stream import heartbeat_key
+from cabotage.server.wsgi import app as _app
+
+
+class FakeLock:
+    def acquire(self, blocking=True):
+        return True
+
+    def release(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.keys = set()
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        return FakeLock()
+
+    def set(self, key, value, ex=None):
+        self.keys.add(key)
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field.encode())
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field.encode()] = value.encode()
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(field.encode(), None)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hkeys(self, key):
+        return list(self.hashes.get(key, {}))
+
+    def hlen(self, key):
+        return len(self.hashes.get(key, {}))
+
+    def exists(self, key):
+        return key in self.keys
+
+    def ids(self, key):
+        return sorted(k.decode() for k in self.hashes.get(key, {}))
+
+
+def _ticket(org, priority="production", enqueued_at=0, kind="image", id="x"):
+    return {
+        "kind": kind,
+        "id": id,
+        "organization_id": org,
+        "priority": priority,
+        "enqueued_at": enqueued_at,
+        "task_kwargs": {"image_id": id},
+        "celery_priority": 5,
+    }
+
+
+def _buildable(org="org-a", id="img-1", branch_deploy=False, ephemeral=False):
+    return types.SimpleNamespace(
+        id=id,
+        image_metadata={"branch_deploy": branch_deploy},
+        application=types.SimpleNamespace(
+            project=types.SimpleNamespace(organization_id=org)
+        ),
+        application_environment=types.SimpleNamespace(
+            environment=types.SimpleNamespace(ephemeral=ephemeral)
+        ),
+    )
+
+
+@pytest.fixture
+def app():
+    _app.config["BUILD_CONCURRENCY_LIMIT"] = 3
+    _app.config["BUILD_ORGANIZATION_CONCURRENCY_LIMIT"] = 2
+    with _app.app_context():
+        yield _app
+    _app.config["BUILD_CONCURRENCY_LIMIT"] = 20
+    _app.config["BUILD_ORGANIZATION_CONCURRENCY_LIMIT"] = 4
+
+
+@pytest.fixture
+def fake_redis():
+    fake = FakeRedis()
+    with patch.object(build_scheduler, "get_redis_client", return_value=fake):
+        yield fake
+
+
+@pytest.fixture
+def tasks():
+    started = []
+
+    def task(kind):
+        return types.SimpleNamespace(
+            apply_async=lambda kwargs, priority: started.append(
+                (kind, kwargs, priority)
+            )
+        )
+
+    with patch.object(build_scheduler, "_task", side_effect=task):
+        yield started
+
+
+class TestPickAdmissions:
+    def test_respects_global_and_organization_limits(self):
+        queued = {f"image:{i}": _ticket("a", enqueued_at=i) for i in range(5)}
+        queued["image:b"] = _ticket("b", enqueued_at=10)
+
+        admitted = pick_admissions(queued, {}, limit=3, organization_limit=2)
+
+        assert admitted == ["image:0", "image:b", "image:1"]
+
+    def test_production_goes_before_previews(self):
+        queued = {
+            "image:preview": _ticket("a", priority="preview", enqueued_at=0),
+            "image:prod": _ticket("b", enqueued_at=5),
+        }
+
+        assert pick_admissions(queued, {}, limit=1, organization_limit=2) == [
+            "image:prod"
+        ]
+
+    def test_busy_organization_waits_for_quiet_one(self):
+        running = {"image:r": _ticket("a")}
+        queued = {
+            "image:a": _ticket("a", enqueued_at=0),
+            "image:b": _ticket("b", enqueued_at=5),
+        }
+
+        assert pick_admissions(queued, running, limit=2, organization_limit=4) == [
+            "image:b"
+        ]
+
+    def test_waiting_builds_do_not_count(self):
+        running = {"image:w": {**_ticket("a", id="w"), "waiting": True}}
+        queued = {"image:a": _ticket("a")}
+
+        assert pick_admissions(queued, running, limit=1, organization_limit=1) == [
+            "image:a"
+        ]
+
+    def test_build_priority(self):
+        assert build_priority(_buildable()) == "production"
+        assert build_priority(_buildable(branch_deploy=True)) == "preview"
+        assert build_priority(_buildable(ephemeral=True)) == "preview"
+
+
+class TestScheduler:
+    def test_admits_up_to_the_limits_and_queues_the_rest(self, app, fake_redis, tasks):
+        for i in range(3):
+            schedule_build("image", _buildable(org="org-a", id=f"a{i}"))
+        schedule_build("release", _buildable(org="org-b", id="b0"), priority=0)
+
+        assert [(kind, kwargs) for kind, kwargs, _ in tasks] == [
+            ("image", {"image_id": "a0"}),
+            ("image", {"image_id": "a1"}),
+            ("release", {"release_id": "b0"}),
+        ]
+        assert tasks[-1][2] == 0
+        assert fake_redis.ids(QUEUED_KEY) == ["image:a2"]
+        assert fake_redis.ids(RUNNING_KEY) == ["image:a0", "image:a1", "release:b0"]
+
+    def test_build_that_cannot_be_sent_stays_queued(self, app, fake_redis):
+        def task(kind):
+            def apply_async(kwargs, priority):
+                raise ConnectionError("broker down")
+
+            return types.SimpleNamespace(apply_async=apply_async)
+
+        with patch.object(build_scheduler, "_task", side_effect=task):
+            schedule_build("image", _buildable(org="org-a", id="a0"))
+
+        assert fake_redis.ids(QUEUED_KEY) == ["image:a0"]
+        assert fake_redis.ids(RUNNING_KEY) == []
+
+    def test_finished_build_admits_the_next(self, app, fake_redis, tasks):
+        for i in range(3):
+            schedule_build("image", _buildable(org="org-a", id=f"a{i}"))
+
+        @scheduled_build("image")
+        def build(image_id):
+            raise RuntimeError("build failed")
+
+        with pytest.raises(RuntimeError):
+            build(image_id="a0")
+
+        assert [kwargs["image_id"] for _, kwargs, _ in tasks] == ["a0", "a1", "a2"]
+        assert fake_redis.ids(QUEUED_KEY) == []
+        assert fake_redis.ids(RUNNING_KEY) == ["image:a1", "image:a2"]
+
+    def test_reclaims_slots_of_lost_builds(self, app, fake_redis, tasks):
+        for id in ("lost", "alive"):
+            fake_redis.hset(
+                RUNNING_KEY,
+                f"image:{id}",
+                json.dumps(
+                    {**_ticket("org-a", id=id), "admitted_at": 0, "started_at": 10}
+                ),
+            )
+        fake_redis.keys.add(heartbeat_key("image_build", "alive"))
+        fake_redis.hset(
+            QUEUED_KEY, "image:next", json.dumps(_ticket("org-a", id="next"))
+        )
+
+        assert admit_builds(fake_redis, now=1000) == 1
+
+        assert fake_redis.ids(RUNNING_KEY) == ["image:alive", "image:next"]
+
+    def test_builds_waiting_for_a_worker_keep_their_slot(self, app, fake_redis, tasks):
+        fake_redis.hset(
+            RUNNING_KEY,
+            "image:waiting",
+            json.dumps({**_ticket("org-a", id="waiting"), "admitted_at": 0}),
+        )
+
+        admit_builds(fake_redis, now=START_TIMEOUT_SECONDS)
+        assert fake_redis.ids(RUNNING_KEY) == ["image:waiting"]
+
+        admit_builds(fake_redis, now=START_TIMEOUT_SECONDS + 1)
+        assert fake_redis.ids(RUNNING_KEY) == []
+
+    def test_waiting_build_gives_up_its_slot(self, app, fake_redis, tasks):
+        app.config["BUILD_ORGANIZATION_CONCURRENCY_LIMIT"] = 1
+        for i in range(2):
+            schedule_build("image", _buildable(org="org-a", id=f"a{i}"))
+        assert fake_redis.ids(QUEUED_KEY) == ["image:a1"]
+
+        set_build_waiting(fake_redis, "image", "a0", True)
+        assert fake_redis.ids(QUEUED_KEY) == []
+        assert fake_redis.ids(RUNNING_KEY) == ["image:a0", "image:a1"]
+
+        set_build_waiting(fake_redis, "image", "a0", False)
+        ticket = json.loads(fake_redis.hget(RUNNING_KEY, "image:a0"))
+        assert "waiting" not in ticket
+
+    def test_started_build_is_marked_and_sends_a_heartbeat(
+        self, app, fake_redis, tasks
+    ):
+        schedule_build("image", _buildable(id="a0"))
+        seen = {}
+
+        @scheduled_build("image")
+        def build(image_id):
+            seen.update(json.loads(fake_redis.hget(RUNNING_KEY, f"image:{image_id}")))
+            seen["heartbeat"] = fake_redis.exists(heartbeat_key("image_build", "a0"))
+
+        build(image_id="a0")
+
+        assert "started_at" in seen
+        assert seen["heartbeat"]
+        assert fake_redis.ids(RUNNING_KEY) == []
+
+    def test_starts_directly_without_redis(self, app, tasks):
+        broken = MagicMock()
+        broken.hset.side_effect = ConnectionError("no redis")
+        with patch.object(build_scheduler, "get_redis_client", return_value=broken):
+            schedule_build("omnibus", _buildable(id="img-9"))
+
+        assert tasks == [("omnibus", {"image_id": "img-9"}, 5)]
@@ -0,0 +1,171 @@
+"""Tests for dispatching builds to a pool of long-lived buildkitd daemons."""
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import cabotage.celery.tasks.build as build_module
+from cabotage.utils.buildkitd_pool import (
+    BuildkitdPool,
+    BuildkitdPoolBusy,
+    daemon_order,
+    parse_pool,
+)
+
+DAEMONS = [f"tcp://buildkitd-{i}:1234" for i in range(4)]
+
+
+class FakeLock:
+    def __init__(self, redis_client, name):
+        self.redis_client = redis_client
+        self.name = name
+
+    def acquire(self, blocking=True):
+        if self.name in self.redis_client.held:
+            return False
+        self.redis_client.held.add(self.name)
+        return True
+
+    def release(self):
+        self.redis_client.held.discard(self.name)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.held = set()
+
+    def lock(self, name, timeout=None):
+        return FakeLock(self, name)
+
+
+class TestDaemonOrder:
+    def test_parse_pool(self):
+        assert parse_pool(None) == []
+        assert parse_pool(" tcp://a:1234, ,tcp://b:1234") == [
+            "tcp://a:1234",
+            "tcp://b:1234",
+        ]
+        assert parse_pool(["tcp://a:1234"]) == ["tcp://a:1234"]
+
+    def test_removing_a_daemon_only_moves_its_applications(self):
+        keys = [f"app-{i}" for i in range(200)]
+        before = {key: daemon_order(DAEMONS, key)[0] for key in keys}
+        after = {key: daemon_order(DAEMONS[:-1], key)[0] for key in keys}
+
+        moved = {key for key in keys if before[key] != after[key]}
+        assert moved == {key for key in keys if before[key] == DAEMONS[-1]}
+        assert len(set(before.values())) == len(DAEMONS)
+
+
+class TestBuildkitdPool:
+    def test_application_sticks_to_its_daemon(self):
+        pool = BuildkitdPool(FakeRedis(), DAEMONS, max_concurrency=2)
+
+        with pool.lease("app-1", wait_timeout=0) as first:
+            pass
+        with pool.lease("app-1", wait_timeout=0) as second:
+            pass
+
+        assert first == second == daemon_order(DAEMONS, "app-1")[0]
+
+    def test_full_daemon_spills_to_the_next_one(self):
+        pool = BuildkitdPool(FakeRedis(), DAEMONS, max_concurrency=2)
+        order = daemon_order(DAEMONS, "app-1")
+
+        with pool.lease("app-1", wait_timeout=0) as first:
+            with pool.lease("app-1", wait_timeout=0) as second:
+                with pool.lease("app-1", wait_timeout=0) as third:
+                    assert [first, second, third] == [order[0], order[0], order[1]]
+
+    def test_waits_when_every_daemon_is_full(self):
+        redis_client = FakeRedis()
+        pool = BuildkitdPool(redis_client, DAEMONS[:1], max_concurrency=1)
+
+        with pool.lease("app-1", wait_timeout=0):
+            with pytest.raises(BuildkitdPoolBusy):
+                with pool.lease("app-2", wait_timeout=0.05, poll_interval=0.01):
+                    pass
+        assert redis_client.held == set()
+
+    def test_calls_on_wait_while_waiting(self):
+        pool = BuildkitdPool(FakeRedis(), DAEMONS[:1], max_concurrency=1)
+        waits = []
+
+        with pool.lease("app-1", wait_timeout=0, on_wait=lambda: waits.append(1)):
+            assert waits == []
+            with pytest.raises(BuildkitdPoolBusy):
+                with pool.lease(
+                    "app-2",
+                    wait_timeout=0.05,
+                    poll_interval=0.01,
+                    on_wait=lambda: waits.append(2),
+                ):
+                    pass
+        assert waits and set(waits) == {2}
+
+
+class TestPoolBuilds:
+    @pytest.fixture
+    def pool_app(self):
+        mock = MagicMock()
+        mock.config = {
+            "KUBERNETES_ENABLED": True,
+            "CELERY_BROKER_URL": "redis://redis:6379",
+            "BUILDKITD_POOL": ",".join(DAEMONS),
+            "BUILDKITD_POOL_MAX_CONCURRENCY": 1,
+            "BUILDKITD_POOL_WAIT_TIMEOUT": 0,
+            "BUILDKITD_VERIFY": "/etc/buildkitd/ca.crt",
+        }
+        with (
+            patch.object(build_module, "current_app", mock),
+            patch.object(build_module, "get_redis_client", return_value=FakeRedis()),
+        ):
+            yield mock
+
+    def test_release_build_runs_buildctl_against_the_pool(self, pool_app):
+        release = MagicMock()
+        release.application.id = "app-1"
+        release.build_job_id = "abc123"
+        release.version = 3
+        release.repository_name = "cabotage/org/webapp"
+        release.envconsul_configurations = {}
+        release.image = {}
+        release.release_build_context_configmap.data = {"Dockerfile": "FROM x"}
+        bke = MagicMock()
+        bke.registry = "registry:5001"
+        bke.insecure_reg = ""
+        bke.dockerconfigjson = '{"auths": {}}'
+        bke.tls_context_args.return_value = []
+        bke.verify_registry_tag.return_value = "sha256:release"
+        seen = {}
+
+        def run_and_stream(command, env, cwd, **kwargs):
+            seen["command"] = command
+            with open(os.path.join(cwd, "context", "Dockerfile")) as f:
+                seen["dockerfile"] = f.read()
+            with open(os.path.join(env["HOME"], ".docker", "config.json")) as f:
+                seen["auth"] = f.read()
+            return "built"
+
+        with (
+            patch.object(build_module, "BuildkitEnv", return_value=bke),
+            patch.object(build_module, "run_and_stream", side_effect=run_and_stream),
+            patch.object(build_module, "run_job") as run_job,
+            patch.object(build_module, "db"),
+        ):
+            result = build_module.build_release_buildkit(release)
+
+        run_job.assert_not_called()
+        assert result["release_id"] == "sha256:release"
+        assert release.release_build_log == "built"
+        command = seen["command"]
+        assert command[:4] == [
+            "buildctl",
+            f"--addr={daemon_order(DAEMONS, 'app-1')[0]}",
+            "--tlscacert",
+            "/etc/buildkitd/ca.crt",
+        ]
+        assert "context=context" in command
+        assert seen["dockerfile"] == "FROM x"
+        assert seen["auth"] == '{"auths": {}}'
@@ -0,0 +1,68 @@
+"""Tests for Celery queue routing."""
+
+import pytest
+
+import cabotage.celery.tasks  # noqa: F401 register every task
+from cabotage.celery.routing import (
+    DEFAULT_QUEUE,
+    PRIORITY_DEFAULT,
+    PRIORITY_INTERACTIVE,
+    QUEUES,
+    TASK_ROUTES,
+)
+from cabotage.server.wsgi import app as _app
+
+
+@pytest.fixture
+def celery_app():
+    return _app.extensions["celery"]
+
+
+def _route(celery_app, name):
+    return celery_app.amqp.router.route({}, name)["queue"].name
+
+
+class TestRouting:
+    @pytest.mark.parametrize(
+        "task,queue",
+        [
+            ("cabotage.celery.tasks.deploy.run_deploy", "deploys"),
+            ("cabotage.celery.tasks.build.run_image_build", "builds"),
+            ("cabotage.celery.tasks.github.process_github_hook", "webhooks"),
+            ("cabotage.celery.tasks.notify.send_notification", "notifications"),
+            ("cabotage.celery.tasks.resources.reconcile_backing_services", "reconcile"),
+            ("cabotage.celery.tasks.prune_images.prune_images", "maintenance"),
+        ],
+    )
+    def test_task_queue(self, celery_app, task, queue):
+        assert _route(celery_app, task) == queue
+
+    def test_unrouted_tasks_use_default_queue(self, celery_app):
+        assert _route(celery_app, "cabotage.celery.tasks.unknown") == DEFAULT_QUEUE
+
+    def test_every_task_is_routed(self, celery_app):
+        tasks = {
+            name for name in celery_app.tasks if name.startswith("cabotage.celery.")
+        }
+        assert tasks
+        assert tasks - set(TASK_ROUTES) == set()
+        assert set(TASK_ROUTES) - tasks == set()
+
+    def test_routes_target_declared_queues(self):
+        assert set(TASK_ROUTES.values()) <= set(QUEUES)
+
+    def test_periodic_tasks_stay_off_interactive_queues(self, celery_app):
+        for entry in celery_app.conf.beat_schedule.values():
+            # The webhook drain is scheduled as a backstop for the inbox and
+            # has to share a queue with the drains deliveries trigger.
+            if entry["task"] == "cabotage.celery.tasks.github.drain_github_hooks":
+                continue
+            assert _route(celery_app, entry["task"]) in ("reconcile", "maintenance")
+
+    def test_priorities(self, celery_app):
+        assert celery_app.conf.task_default_priority == PRIORITY_DEFAULT
+        # Redis treats lower numbers as more urgent.
+        assert PRIORITY_INTERACTIVE < PRIORITY_DEFAULT
+        steps = celery_app.conf.broker_transport_options["priority_steps"]
+        assert PRIORITY_INTERACTIVE in steps
+        assert PRIORITY_DEFAULT in steps
@@ -0,0 +1,377 @@
+"""Tests for bulk configuration import."""
+
+import base64
+import io
+import time
+import types
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask_security import hash_password
+
+from cabotage.server import db
+from cabotage.server.ext.config_writer import ConfigWriter
+from cabotage.server.models.auth import Organization, User
+from cabotage.server.models.auth_associations import OrganizationMember
+from cabotage.server.models.projects import (
+    Application,
+    ApplicationEnvironment,
+    Configuration,
+    Environment,
+    Project,
+    activity_plugin,
+)
+from cabotage.server.wsgi import app as _app
+from cabotage.utils.config_import import ConfigImportError, parse_configuration
+
+Activity = activity_plugin.activity_cls
+
+
+class TestParseConfiguration:
+    def test_env(self):
+        text = "\n".join(
+            [
+                "# comment",
+                "",
+                "PLAIN=value",
+                "export EXPORTED=1",
+                "SPACED = padded  # trailing comment",
+                "SINGLE='it''s # not a comment'",
+                'DOUBLE="line\\nbreak"',
+                "URL=postgres://u:p@db/x?a=b",
+            ]
+        )
+        assert parse_configuration(text) == {
+            "PLAIN": "value",
+            "EXPORTED": "1",
+            "SPACED": "padded",
+            "SINGLE": "it''s # not a comment",
+            "DOUBLE": "line\nbreak",
+            "URL": "postgres://u:p@db/x?a=b",
+        }
+
+    def test_json(self):
+        text = '{"NAME": "value", "PORT": 8000, "DEBUG": false}'
+        assert parse_configuration(text, "json") == {
+            "NAME": "value",
+            "PORT": "8000",
+            "DEBUG": "false",
+        }
+
+    def test_collects_every_error(self):
+        text = "\n".join(
+            [
+                "GOOD=1",
+                "1BAD=x",
+                "no equals sign",
+                "good=2",
+                "CABOTAGE_SENTINEL=x",
+                "EMPTY=",
+            ]
+        )
+        with pytest.raises(ConfigImportError) as exc:
+            parse_configuration(text)
+        assert exc.value.errors == [
+            "Line 2: invalid variable name '1BAD'",
+            "Line 3: expected NAME=value",
+            "Line 4: 'good' is defined more than once",
+            "Line 5: 'CABOTAGE_SENTINEL' is reserved",
+            "Line 6: 'EMPTY' has an empty value",
+        ]
+
+    def test_json_must_be_flat_object(self):
+        with pytest.raises(ConfigImportError):
+            parse_configuration('["A"]', "json")
+        with pytest.raises(ConfigImportError) as exc:
+            parse_configuration('{"A": {"nested": 1}}', "json")
+        assert "value must be a string" in exc.value.errors[0]
+
+    def test_nothing_to_import(self):
+        with pytest.raises(ConfigImportError):
+            parse_configuration("# only a comment\n")
+
+
+def _writer(txn_max_ops=64):
+    writer = ConfigWriter()
+    writer.consul_prefix = "cabotage"
+    writer.vault_prefix = "secret/cabotage"
+    writer.txn_max_ops = txn_max_ops
+    writer.vault_write_concurrency = 4
+    writer.consul = types.SimpleNamespace(consul_connection=MagicMock())
+    writer.vault = types.SimpleNamespace(vault_connection=MagicMock())
+    return writer
+
+
+def _config(name, value, secret=False, buildtime=False, version_id=None):
+    return types.SimpleNamespace(
+        name=name,
+        value=value,
+        secret=secret,
+        buildtime=buildtime,
+        version_id=version_id,
+    )
+
+
+class TestWriteConfigurations:
+    def test_plain_values_are_chunked_into_transactions(self):
+        writer = _writer(txn_max_ops=2)
+        configurations = [_config(f"VAR_{i}", f"value-{i}") for i in range(5)]
+
+        slugs = writer.write_configurations("ns", "prefix", configurations)
+
+        txn = writer.consul.consul_connection.txn.put
+        assert [len(call.args[0]) for call in txn.call_args_list] == [2, 2, 1]
+        first = txn.call_args_list[0].args[0][0]["KV"]
+        assert first["Verb"] == "set"
+        assert first["Key"] == "cabotage/ns/prefix/configuration/VAR_0/1/VAR_0"
+        assert base64.b64decode(first["Value"]) == b"value-0"
+        writer.consul.consul_connection.kv.put.assert_not_called()
+        assert slugs[0] == {
+            "config_key_slug": "consul:cabotage/ns/prefix/configuration/VAR_0/1",
+            "build_key_slug": "consul:cabotage/ns/prefix/configuration/VAR_0/1/VAR_0",
+        }
+
+    def test_secrets_are_written_to_vault(self):
+        writer = _writer()
+        configurations = [
+            _config("SECRET", "s3cret", secret=True, version_id=2),
+            _config("BUILD_SECRET", "b", secret=True, buildtime=True),
+        ]
+
+        slugs = writer.write_configurations("ns", "prefix", configurations)
+
+        writes = writer.vault.vault_connection.write.call_args_list
+        assert sorted((call.args[0], call.kwargs) for call in writes) == [
+            (
+                "secret/cabotage/automation/ns/prefix/configuration/BUILD_SECRET/1",
+                {"BUILD_SECRET": "b"},
+            ),
+            (
+                "secret/cabotage/automation/ns/prefix/configuration/SECRET/3",
+                {"SECRET": "s3cret"},
+            ),
+            (
+                "secret/cabotage/buildtime/ns/prefix/configuration/BUILD_SECRET/1",
+                {"BUILD_SECRET": "b"},
+            ),
+        ]
+        writer.consul.consul_connection.txn.put.assert_not_called()
+        assert slugs[0]["config_key_slug"] == (
+            "vault:secret/cabotage/automation/ns/prefix/configuration/SECRET/3"
+        )
+
+    def test_slugs_match_single_writes(self):
+        configurations = [
+            _config("PLAIN", "v", version_id=4),
+            _config("SECRET", "s", secret=True, buildtime=True),
+        ]
+        bulk = _writer().write_configurations("ns", "prefix", configurations)
+        single = [
+            _writer().write_configuration("ns", "prefix", configuration)
+            for configuration in configurations
+        ]
+        assert bulk == single
+
+    def test_vault_failure_propagates(self):
+        writer = _writer()
+        writer.vault.vault_connection.write.side_effect = RuntimeError("sealed")
+        with pytest.raises(RuntimeError):
+            writer.write_configurations(
+                "ns", "prefix", [_config("SECRET", "s", secret=True)]
+            )
+
+
+@pytest.fixture
+def app():
+    _app.config["TESTING"] = True
+    _app.config["WTF_CSRF_ENABLED"] = False
+    _app.config["REQUIRE_MFA"] = False
+    with _app.app_context():
+        yield _app
+    _app.config["REQUIRE_MFA"] = True
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def db_session(app):
+    yield db.session
+    db.session.rollback()
+
+
+@pytest.fixture
+def admin_user(db_session):
+    user = User(
+        username=f"admin-{uuid.uuid4().hex[:8]}",
+        email=f"admin-{uuid.uuid4().hex[:8]}@example.com",
+        password=hash_password("password123"),
+        active=True,
+        fs_uniquifier=uuid.uuid4().hex,
+    )
+    db_session.add(user)
+    db_session.flush()
+    return user
+
+
+@pytest.fixture
+def app_env(db_session, admin_user):
+    org = Organization(name="Test Org", slug=f"testorg-{uuid.uuid4().hex[:8]}")
+    db_session.add(org)
+    db_session.flush()
+    db_session.add(
+        OrganizationMember(organization_id=org.id, user_id=admin_user.id, admin=True)
+    )
+    project = Project(name="Test Project", organization_id=org.id)
+    db_session.add(project)
+    db_session.flush()
+    environment = Environment(name="default", project_id=project.id, ephemeral=False)
+    application = Application(name="webapp", slug="webapp", project_id=project.id)
+    db_session.add_all([environment, application])
+    db_session.flush()
+    app_env = ApplicationEnvironment(
+        application_id=application.id, environment_id=environment.id
+    )
+    db_session.add(app_env)
+    db_session.flush()
+    db_session.add_all(
+        [
+            Configuration(
+                application_id=application.id,
+                application_environment_id=app_env.id,
+                name=name,
+                value=value,
+                secret=secret,
+                key_slug=f"consul:{name}",
+            )
+            for name, value, secret in [
+                ("UNCHANGED", "same", False),
+                ("CHANGED", "old", False),
+                ("SECRET", "**secure**", True),
+            ]
+        ]
+    )
+    db_session.flush()
+    return app_env
+
+
+def _login(client, user):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = user.fs_uniquifier
+        sess["_fresh"] = True
+        sess["fs_cc"] = "set"
+        sess["fs_paa"] = time.time()
+        sess["identity.id"] = user.id
+        sess["identity.auth_type"] = "session"
+
+
+def _fake_slugs(ns, prefix, configurations):
+    return [
+        {"config_key_slug": f"new:{c.name}", "build_key_slug": f"new:{c.name}"}
+        for c in configurations
+    ]
+
+
+class TestBulkImportView:
+    def _url(self, app_env):
+        application = app_env.application
+        project = application.project
+        return (
+            f"/projects/{project.organization.slug}/{project.slug}"
+            f"/applications/{application.slug}/config/bulk"
+        )
+
+    def _configs(self, app_env):
+        return {
+            c.name: c
+            for c in Configuration.query.filter_by(
+                application_environment_id=app_env.id
+            )
+        }
+
+    def test_imports_in_one_write(self, client, admin_user, app_env):
+        _login(client, admin_user)
+        text = "\n".join(
+            [
+                "UNCHANGED=same",
+                "CHANGED=new",
+                "SECRET=**secure**",
+                "ADDED=1",
+                "TEMPLATED=${api.url}",
+            ]
+        )
+        with patch(
+            "cabotage.server.user.views.config_writer.write_configurations",
+            side_effect=_fake_slugs,
+        ) as write:
+            response = client.post(
+                self._url(app_env),
+                data={
+                    "environment_id": str(app_env.environment_id),
+                    "format": "env",
+                    "raw_text": text,
+                },
+            )
+
+        assert response.status_code == 302
+        write.assert_called_once()
+        assert [c.name for c in write.call_args.args[2]] == ["ADDED", "CHANGED"]
+
+        configs = self._configs(app_env)
+        assert configs["CHANGED"].value == "new"
+        assert configs["CHANGED"].key_slug == "new:CHANGED"
+        assert configs["UNCHANGED"].key_slug == "consul:UNCHANGED"
+        assert configs["ADDED"].value == "1"
+        assert configs["TEMPLATED"].key_slug is None
+
+        activities = Activity.query.filter_by(
+            verb="import", object_id=app_env.application_id
+        ).all()
+        assert len(activities) == 1
+        assert activities[0].data["created"] == ["ADDED", "TEMPLATED"]
+        assert activities[0].data["updated"] == ["CHANGED"]
+
+    def test_new_variables_can_be_secure(self, client, admin_user, app_env):
+        _login(client, admin_user)
+        with patch(
+            "cabotage.server.user.views.config_writer.write_configurations",
+            side_effect=_fake_slugs,
+        ):
+            client.post(
+                self._url(app_env),
+                data={
+                    "environment_id": str(app_env.environment_id),
+                    "format": "json",
+                    "upload": (io.BytesIO(b'{"TOKEN": "abc"}'), "vars.json"),
+                    "secure": "y",
+                    "buildtime": "y",
+                },
+                content_type="multipart/form-data",
+            )
+
+        token = self._configs(app_env)["TOKEN"]
+        assert token.secret is True
+        assert token.buildtime is True
+        assert token.value == "**secure**"
+
+    def test_invalid_import_writes_nothing(self, client, admin_user, app_env):
+        _login(client, admin_user)
+        with patch(
+            "cabotage.server.user.views.config_writer.write_configurations"
+        ) as write:
+            response = client.post(
+                self._url(app_env),
+                data={
+                    "environment_id": str(app_env.environment_id),
+                    "format": "env",
+                    "raw_text": "CHANGED=new\nNEW_SECRET=**secure**\n",
+                },
+            )
+
+        assert response.status_code == 302
+        write.assert_not_called()
+        assert self._configs(app_env)["CHANGED"].value == "old"
+        assert "NEW_SECRET" not in self._configs(app_env)
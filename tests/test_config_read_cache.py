@@ -0,0 +1,125 @@
+"""Tests for the per-build/deploy configuration read cache."""
+
+import threading
+import types
+
+import prometheus_client
+import pytest
+
+from cabotage.server.ext.config_writer import (
+    ConfigReadCache,
+    cached_reader,
+    config_read_cache,
+)
+from cabotage.server.wsgi import app as _app
+
+
+def _sample(**labels):
+    return (
+        prometheus_client.REGISTRY.get_sample_value(
+            "cabotage_config_reads_total", labels
+        )
+        or 0
+    )
+
+
+class FakeReader:
+    def __init__(self, fail=()):
+        self.calls = []
+        self.threads = set()
+        self.fail = set(fail)
+        self._lock = threading.Lock()
+
+    def read(self, key_slug, build=False, secret=False):
+        with self._lock:
+            self.calls.append(key_slug)
+            self.threads.add(threading.get_ident())
+        if key_slug in self.fail:
+            raise KeyError(key_slug)
+        return {"data": {key_slug.rsplit("/", 2)[-2]: f"value-of-{key_slug}"}}
+
+
+def _secret(name, buildtime=True):
+    return types.SimpleNamespace(
+        name=name,
+        secret=True,
+        buildtime=buildtime,
+        build_key_slug=f"vault:secret/buildtime/ns/prefix/configuration/{name}/1",
+    )
+
+
+@pytest.fixture
+def app():
+    with _app.app_context():
+        yield _app
+
+
+class TestConfigReadCache:
+    def test_repeat_reads_hit_the_cache(self):
+        reader = FakeReader()
+        cache = ConfigReadCache(reader)
+        hits = _sample(storage="vault", result="hit")
+        misses = _sample(storage="vault", result="miss")
+
+        for _ in range(3):
+            assert cache.read("a/KEY/1", build=True, secret=True) == {
+                "data": {"KEY": "value-of-a/KEY/1"}
+            }
+
+        assert reader.calls == ["a/KEY/1"]
+        assert _sample(storage="vault", result="hit") == hits + 2
+        assert _sample(storage="vault", result="miss") == misses + 1
+
+    def test_prefetch_reads_concurrently_once(self, app):
+        reader = FakeReader()
+        cache = ConfigReadCache(reader, max_workers=4)
+        configurations = [_secret(f"SECRET_{i}") for i in range(8)]
+        # Runtime-only secrets and plain values are never read from storage.
+        configurations += [
+            _secret("RUNTIME_ONLY", buildtime=False),
+            types.SimpleNamespace(
+                name="PLAIN", secret=False, buildtime=True, build_key_slug="x"
+            ),
+            None,
+        ]
+
+        cache.prefetch(configurations + configurations[:2])
+
+        assert len(reader.calls) == 8
+        assert threading.get_ident() not in reader.threads
+        for configuration in configurations[:8]:
+            key_slug = configuration.build_key_slug.split(":", 1)[1]
+            cache.read(key_slug, build=True, secret=True)
+        assert len(reader.calls) == 8
+
+    def test_prefetch_failure_surfaces_on_read(self, app):
+        configuration = _secret("BROKEN")
+        key_slug = configuration.build_key_slug.split(":", 1)[1]
+        reader = FakeReader(fail={key_slug})
+        cache = ConfigReadCache(reader)
+
+        cache.prefetch([configuration])
+
+        with pytest.raises(KeyError):
+            cache.read(key_slug, build=True, secret=True)
+        assert reader.calls == [key_slug, key_slug]
+
+
+class TestConfigReadScope:
+    def test_cached_reader_outside_scope_is_passthrough(self):
+        reader = FakeReader()
+        assert cached_reader(reader) is reader
+
+    def test_nested_scopes_share_one_cache(self):
+        reader = FakeReader()
+        with config_read_cache(reader) as outer:
+            assert cached_reader(reader) is outer
+            with config_read_cache(reader) as inner:
+                assert inner is outer
+            outer.read("a/KEY/1")
+        assert cached_reader(reader) is reader
+
+        with config_read_cache(reader) as fresh:
+            assert fresh is not outer
+            fresh.read("a/KEY/1")
+        assert reader.calls == ["a/KEY/1", "a/KEY/1"]
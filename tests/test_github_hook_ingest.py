@@ -0,0 +1,278 @@
+"""Tests for the webhook inbox: enqueueing, coalescing and batched draining."""
+
+import json
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from cabotage.celery.tasks import github as github_tasks
+from cabotage.server import db
+from cabotage.server.models.projects import Hook
+from cabotage.server.wsgi import app as _app
+
+OWN_APP_ID = "12345"
+
+
+@pytest.fixture
+def app():
+    _app.config["TESTING"] = True
+    with _app.app_context():
+        yield _app
+
+
+class FakeStreamRedis:
+    """Just enough of a redis client for the webhook inbox stream."""
+
+    def __init__(self):
+        self.entries = []
+        self.keys = {}
+        self.seq = 0
+
+    def xadd(self, key, fields):
+        self.seq += 1
+        entry_id = f"{self.seq}-0".encode()
+        self.entries.append(
+            (
+                entry_id,
+                {
+                    k.encode(): v if isinstance(v, bytes) else v.encode()
+                    for k, v in fields.items()
+                },
+            )
+        )
+        return entry_id
+
+    def xrange(self, key, count=None):
+        return self.entries[:count]
+
+    def xdel(self, key, *ids):
+        self.entries = [e for e in self.entries if e[0] not in ids]
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.keys:
+            return None
+        self.keys[key] = value
+        return True
+
+    def delete(self, key):
+        self.keys.pop(key, None)
+
+    def lock(self, name, timeout=None):
+        return _FakeLock()
+
+
+class _FakeLock:
+    def acquire(self, blocking=True):
+        return True
+
+    def release(self):
+        pass
+
+
+@pytest.fixture
+def inbox():
+    fake = FakeStreamRedis()
+    with patch.object(github_tasks, "get_redis_client", return_value=fake):
+        yield fake
+
+
+@pytest.fixture
+def own_app_id():
+    with patch.object(github_tasks.github_app, "app_id", OWN_APP_ID):
+        yield
+
+
+def _check_suite(sha, conclusion="success", app_id=999, delivery=None):
+    return Hook(
+        headers={
+            "X-Github-Event": "check_suite",
+            "X-Github-Delivery": delivery or uuid.uuid4().hex,
+        },
+        payload={
+            "action": "completed",
+            "installation": {"id": 1},
+            "repository": {"full_name": "myorg/myrepo"},
+            "check_suite": {
+                "head_sha": sha,
+                "conclusion": conclusion,
+                "app": {"id": app_id},
+            },
+        },
+    )
+
+
+def _push(sha, delivery=None):
+    return Hook(
+        headers={
+            "X-Github-Event": "push",
+            "X-Github-Delivery": delivery or uuid.uuid4().hex,
+        },
+        payload={
+            "installation": {"id": 1},
+            "repository": {"full_name": "myorg/myrepo"},
+            "after": sha,
+        },
+    )
+
+
+class TestCoalesceHooks:
+    def test_check_suite_storm_processes_last_success(self, app, own_app_id):
+        hooks = [
+            _check_suite("a"),
+            _check_suite("a", conclusion="failure"),
+            _check_suite("a"),
+            _check_suite("a", app_id=OWN_APP_ID),
+        ]
+        to_process, superseded = github_tasks.coalesce_hooks(hooks)
+        assert to_process == [hooks[2]]
+        assert superseded == [hooks[0], hooks[1], hooks[3]]
+
+    def test_commits_are_evaluated_separately(self, app, own_app_id):
+        hooks = [_check_suite("a"), _check_suite("b"), _check_suite("a")]
+        to_process, superseded = github_tasks.coalesce_hooks(hooks)
+        assert to_process == [hooks[1], hooks[2]]
+        assert superseded == [hooks[0]]
+
+    def test_unsuccessful_suites_keep_one(self, app, own_app_id):
+        hooks = [_check_suite("a", conclusion="failure")]
+        to_process, superseded = github_tasks.coalesce_hooks(hooks)
+        assert to_process == []
+        assert superseded == hooks
+
+    def test_other_events_are_kept(self, app, own_app_id):
+        hooks = [_push("a"), _push("b")]
+        assert github_tasks.coalesce_hooks(hooks) == (hooks, [])
+
+    def test_redelivery_is_processed_once(self, app, own_app_id):
+        hooks = [_push("a", delivery="d1"), _push("a", delivery="d1")]
+        to_process, superseded = github_tasks.coalesce_hooks(hooks)
+        assert to_process == [hooks[0]]
+        assert superseded == [hooks[1]]
+
+
+class TestEnqueueGithubHook:
+    def test_schedules_one_drain_per_window(self, app, inbox):
+        app.config["GITHUB_HOOK_COALESCE_SECONDS"] = 2
+        with patch.object(github_tasks.drain_github_hooks, "apply_async") as drain:
+            for _ in range(3):
+                github_tasks.enqueue_github_hook(
+                    inbox, {"X-Github-Event": "push"}, b"{}"
+                )
+
+        assert len(inbox.entries) == 3
+        drain.assert_called_once_with(countdown=2)
+
+    def test_drain_reopens_window(self, app, inbox):
+        with patch.object(github_tasks.drain_github_hooks, "apply_async") as drain:
+            github_tasks.enqueue_github_hook(inbox, {"X-Github-Event": "push"}, b"{}")
+            inbox.entries.clear()
+            assert github_tasks.drain_github_hooks.run() == 0
+            github_tasks.enqueue_github_hook(inbox, {"X-Github-Event": "push"}, b"{}")
+
+        assert drain.call_count == 2
+
+
+class TestDrainGithubHooks:
+    def _enqueue(self, inbox, hook):
+        inbox.xadd(
+            github_tasks.HOOK_INBOX_KEY,
+            {
+                "headers": json.dumps(hook.headers),
+                "payload": json.dumps(hook.payload).encode(),
+            },
+        )
+
+    def test_stores_all_and_processes_coalesced(self, app, inbox, own_app_id):
+        sha = uuid.uuid4().hex
+        hooks = [_push(sha)] + [_check_suite(sha) for _ in range(3)]
+        for hook in hooks:
+            self._enqueue(inbox, hook)
+
+        with patch.object(github_tasks.process_github_hook, "delay") as dispatch:
+            assert github_tasks.drain_github_hooks.run(batch_size=4) == 4
+
+        assert inbox.entries == []
+        processed = [
+            db.session.get(Hook, call.args[0]) for call in dispatch.call_args_list
+        ]
+        try:
+            assert [h.headers["X-Github-Event"] for h in processed] == [
+                "push",
+                "check_suite",
+            ]
+            assert processed[1].headers == hooks[3].headers
+            stored = Hook.query.filter(
+                Hook.headers["X-Github-Delivery"].astext.in_(
+                    [h.headers["X-Github-Delivery"] for h in hooks]
+                )
+            ).all()
+            assert len(stored) == 4
+            superseded = [h for h in stored if h.processed]
+            assert len(superseded) == 2
+            assert all(h.commit_sha == sha for h in superseded)
+        finally:
+            for hook in Hook.query.filter(
+                Hook.headers["X-Github-Delivery"].astext.in_(
+                    [h.headers["X-Github-Delivery"] for h in hooks]
+                )
+            ):
+                db.session.delete(hook)
+            db.session.commit()
+
+    def test_each_batch_dispatched_once_stored(self, app, inbox):
+        hooks = [_push(uuid.uuid4().hex) for _ in range(2)]
+        for hook in hooks:
+            self._enqueue(inbox, hook)
+
+        queued_at_dispatch = []
+
+        def dispatch(hook_id):
+            queued_at_dispatch.append((hook_id, len(inbox.entries)))
+
+        with patch.object(
+            github_tasks.process_github_hook, "delay", side_effect=dispatch
+        ):
+            assert github_tasks.drain_github_hooks.run(batch_size=1) == 2
+
+        try:
+            assert [queued for _, queued in queued_at_dispatch] == [1, 0]
+        finally:
+            for hook_id, _ in queued_at_dispatch:
+                db.session.delete(db.session.get(Hook, hook_id))
+            db.session.commit()
+
+    def test_dispatch_error_does_not_stop_batch(self, app, inbox):
+        hooks = [_push(uuid.uuid4().hex) for _ in range(2)]
+        for hook in hooks:
+            self._enqueue(inbox, hook)
+
+        calls = []
+
+        def dispatch(hook_id):
+            calls.append(hook_id)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+
+        with patch.object(
+            github_tasks.process_github_hook, "delay", side_effect=dispatch
+        ):
+            github_tasks.drain_github_hooks.run()
+
+        try:
+            assert len(calls) == 2
+        finally:
+            for hook_id in calls:
+                db.session.delete(db.session.get(Hook, hook_id))
+            db.session.commit()
+
+    def test_store_failure_leaves_entries_queued(self, app, inbox):
+        self._enqueue(inbox, _push("a"))
+        with (
+            patch.object(db.session, "commit", side_effect=RuntimeError("down")),
+            patch.object(github_tasks.process_github_hook, "delay") as dispatch,
+        ):
+            assert github_tasks.drain_github_hooks.run() == 0
+
+        assert len(inbox.entries) == 1
+        dispatch.assert_not_called()
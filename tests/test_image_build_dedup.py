@@ -0,0 +1,456 @@
+"""Tests for reusing image and release builds with identical inputs."""
+
+import json
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import cabotage.celery.tasks.build as build_module
+from cabotage.celery.tasks.build import (
+    BuildkitEnv,
+    _build_fingerprint_lock,
+    _reuse_identical_image,
+    _reuse_identical_release,
+    image_build_fingerprint,
+    release_build_fingerprint,
+)
+from cabotage.server import db
+from cabotage.server.models.auth import Organization
+from cabotage.server.models.projects import (
+    Application,
+    ApplicationEnvironment,
+    Environment,
+    Image,
+    Project,
+    Release,
+)
+from cabotage.server.wsgi import app as _app
+from cabotage.utils.build_log_stream import heartbeat_key
+
+
+@pytest.fixture
+def app():
+    with _app.app_context():
+        yield _app
+
+
+@pytest.fixture
+def db_session(app):
+    yield db.session
+    db.session.rollback()
+
+
+@pytest.fixture
+def application(db_session):
+    org = Organization(name="Test Org", slug=f"testorg-{uuid.uuid4().hex[:8]}")
+    db_session.add(org)
+    db_session.flush()
+    project = Project(name="Test Project", organization_id=org.id)
+    db_session.add(project)
+    db_session.flush()
+    application = Application(
+        name="webapp",
+        slug="webapp",
+        project_id=project.id,
+        github_repository="org/webapp",
+    )
+    db_session.add(application)
+    db_session.flush()
+    return application
+
+
+def _app_env(db_session, application, name):
+    environment = Environment(
+        name=name, project_id=application.project_id, ephemeral=False
+    )
+    db_session.add(environment)
+    db_session.flush()
+    app_env = ApplicationEnvironment(
+        application_id=application.id, environment_id=environment.id
+    )
+    db_session.add(app_env)
+    db_session.flush()
+    return app_env
+
+
+def _image(db_session, application, app_env, fingerprint=None, **kwargs):
+    image = Image(
+        application_id=application.id,
+        application_environment_id=app_env.id,
+        _repository_name=f"cabotage/test/{app_env.id}/webapp",
+        build_ref="a" * 40,
+        image_metadata={"sha": "a" * 40, "build_fingerprint": fingerprint},
+        **kwargs,
+    )
+    db_session.add(image)
+    db_session.flush()
+    return image
+
+
+class TestImageBuildFingerprint:
+    def _image(self, sha="a" * 40, subdirectory=None):
+        image = MagicMock()
+        image.commit_sha = sha
+        image.application.github_repository = "org/webapp"
+        image.application.subdirectory = subdirectory
+        return image
+
+    def test_depends_on_every_build_input(self):
+        base = image_build_fingerprint(
+            self._image(), "Dockerfile", {"A": "1", "B": "2"}, "buildkit:1"
+        )
+        assert base == image_build_fingerprint(
+            self._image(), "Dockerfile", {"B": "2", "A": "1"}, "buildkit:1"
+        )
+        for fingerprint in [
+            image_build_fingerprint(
+                self._image(sha="b" * 40),
+                "Dockerfile",
+                {"A": "1", "B": "2"},
+                "buildkit:1",
+            ),
+            image_build_fingerprint(
+                self._image(subdirectory="api"),
+                "Dockerfile",
+                {"A": "1", "B": "2"},
+                "buildkit:1",
+            ),
+            image_build_fingerprint(
+                self._image(), "Dockerfile.cabotage", {"A": "1", "B": "2"}, "buildkit:1"
+            ),
+            image_build_fingerprint(
+                self._image(), "Dockerfile", {"A": "1", "B": "3"}, "buildkit:1"
+            ),
+            image_build_fingerprint(
+                self._image(), "Dockerfile", {"A": "1", "B": "2"}, "buildkit:2"
+            ),
+        ]:
+            assert fingerprint != base
+
+    def test_unresolved_commit_has_no_fingerprint(self):
+        assert (
+            image_build_fingerprint(self._image(sha="null"), "Dockerfile", {}, "b")
+            is None
+        )
+
+
+def _release(db_session, application, app_env, fingerprint=None, **kwargs):
+    release = Release(
+        application_id=application.id,
+        application_environment_id=app_env.id,
+        _repository_name=f"cabotage/test/{app_env.id}/webapp",
+        image={"image_id": "sha256:image"},
+        configuration={},
+        image_changes={},
+        configuration_changes={},
+        release_metadata={"build_fingerprint": fingerprint},
+        **kwargs,
+    )
+    db_session.add(release)
+    db_session.flush()
+    return release
+
+
+class TestReuseIdenticalImage:
+    def test_tags_matching_image_into_other_repository(self, db_session, application):
+        production = _app_env(db_session, application, "production")
+        staging = _app_env(db_session, application, "staging")
+        source = _image(
+            db_session, application, production, "fp", image_id="sha256:built"
+        )
+        image = _image(db_session, application, staging, "fp")
+        bke = MagicMock()
+        bke.copy_registry_image.return_value = "sha256:built"
+
+        assert _reuse_identical_image(image, bke, "fp") == "sha256:built"
+
+        bke.copy_registry_image.assert_called_once_with(
+            source.repository_name,
+            f"image-{source.version}",
+            image.repository_name,
+            f"image-{image.version}",
+        )
+        assert image.image_metadata["reused_image_id"] == str(source.id)
+        assert "instead of building" in image.image_build_log
+
+    def test_ignores_unfinished_failed_and_other_fingerprints(
+        self, db_session, application
+    ):
+        production = _app_env(db_session, application, "production")
+        staging = _app_env(db_session, application, "staging")
+        _image(db_session, application, production, "fp")
+        _image(db_session, application, production, "fp", image_id="x", error=True)
+        _image(db_session, application, production, "other", image_id="x")
+        image = _image(db_session, application, staging, "fp")
+        bke = MagicMock()
+
+        assert _reuse_identical_image(image, bke, "fp") is None
+        bke.copy_registry_image.assert_not_called()
+
+    def test_copy_failure_falls_back_to_building(self, db_session, application):
+        production = _app_env(db_session, application, "production")
+        staging = _app_env(db_session, application, "staging")
+        _image(db_session, application, production, "fp", image_id="sha256:built")
+        image = _image(db_session, application, staging, "fp")
+        bke = MagicMock()
+        bke.copy_registry_image.side_effect = RuntimeError("manifest unknown")
+
+        assert _reuse_identical_image(image, bke, "fp") is None
+        assert "reused_image_id" not in image.image_metadata
+
+
+class TestReleaseBuildFingerprint:
+    CONTEXT = {
+        "Dockerfile": "FROM registry/webapp:image-3",
+        "entrypoint.sh": "#!/bin/sh",
+        "envconsul-web.hcl": "secret {}",
+    }
+
+    def test_depends_on_context_and_base_image(self):
+        release = MagicMock(image={"image_id": "sha256:image"})
+        base = release_build_fingerprint(release, self.CONTEXT, "buildkit:1")
+
+        assert (
+            release_build_fingerprint(
+                release, dict(reversed(self.CONTEXT.items())), "buildkit:1"
+            )
+            == base
+        )
+        changed = [
+            release_build_fingerprint(
+                release,
+                {**self.CONTEXT, "envconsul-web.hcl": "secret {x}"},
+                "buildkit:1",
+            ),
+            release_build_fingerprint(
+                release, {**self.CONTEXT, "envconsul-worker.hcl": ""}, "buildkit:1"
+            ),
+            release_build_fingerprint(
+                MagicMock(image={"image_id": "sha256:other"}),
+                self.CONTEXT,
+                "buildkit:1",
+            ),
+            release_build_fingerprint(release, self.CONTEXT, "buildkit:2"),
+        ]
+        assert len({base, *changed}) == 5
+
+    def test_unbuilt_image_has_no_fingerprint(self):
+        release = MagicMock(image={"image_id": None})
+        assert release_build_fingerprint(release, self.CONTEXT, "buildkit:1") is None
+
+
+class TestReuseIdenticalRelease:
+    def test_tags_matching_release(self, db_session, application):
+        production = _app_env(db_session, application, "production")
+        source = _release(
+            db_session, application, production, "fp", release_id="sha256:release"
+        )
+        _release(db_session, application, production, "fp", error=True, release_id="x")
+        release = _release(db_session, application, production, "fp")
+        bke = MagicMock()
+        bke.copy_registry_image.return_value = "sha256:release"
+
+        assert _reuse_identical_release(release, bke, "fp") == "sha256:release"
+
+        bke.copy_registry_image.assert_called_once_with(
+            source.repository_name,
+            f"release-{source.version}",
+            release.repository_name,
+            f"release-{release.version}",
+        )
+        assert release.release_metadata["reused_release_id"] == str(source.id)
+        assert "instead of building" in release.release_build_log
+
+    def test_builds_when_nothing_matches(self, db_session, application):
+        production = _app_env(db_session, application, "production")
+        _release(db_session, application, production, "other", release_id="x")
+        release = _release(db_session, application, production, "fp")
+        bke = MagicMock()
+
+        assert _reuse_identical_release(release, bke, "fp") is None
+        assert _reuse_identical_release(release, bke, None) is None
+        bke.copy_registry_image.assert_not_called()
+
+
+class FakeRegistry:
+    def __init__(self, manifests):
+        self.manifests = manifests
+        self.mounted = []
+        self.pushed = []
+
+    def client(self, host, repo, auth, insecure, tlsverify):
+        registry = self
+
+        class Client:
+            def get_manifest_and_response(self, reference):
+                return registry.manifests[reference], None
+
+            def mount_blob(self, source_repository, digest):
+                registry.mounted.append((repo, source_repository, digest))
+
+            def set_manifest(self, alias, manifest):
+                registry.pushed.append((repo, alias))
+
+            def get_digest(self, alias):
+                return "sha256:index"
+
+        return Client()
+
+
+class TestCopyRegistryImage:
+    def test_copies_index_children_before_the_tag(self, app):
+        manifest = {
+            "mediaType": "application/vnd.oci.image.manifest.v1+json",
+            "config": {"digest": "sha256:config"},
+            "layers": [{"digest": "sha256:layer"}],
+        }
+        registry = FakeRegistry(
+            {
+                "image-1": json.dumps(
+                    {
+                        "mediaType": "application/vnd.oci.image.index.v1+json",
+                        "manifests": [{"digest": "sha256:amd64"}],
+                    }
+                ),
+                "sha256:amd64": json.dumps(manifest),
+            }
+        )
+
+        with patch.object(build_module, "DXF", side_effect=registry.client):
+            digest = BuildkitEnv("cabotage/a/webapp").copy_registry_image(
+                "cabotage/a/webapp", "image-1", "cabotage/b/webapp", "image-4"
+            )
+
+        assert digest == "sha256:index"
+        assert registry.mounted == [
+            ("cabotage/b/webapp", "cabotage/a/webapp", "sha256:config"),
+            ("cabotage/b/webapp", "cabotage/a/webapp", "sha256:layer"),
+        ]
+        assert registry.pushed == [
+            ("cabotage/b/webapp", "sha256:amd64"),
+            ("cabotage/b/webapp", "image-4"),
+        ]
+
+
+class FakeLock:
+    def __init__(self, busy_polls):
+        self.busy_polls = busy_polls
+        self.blocking_timeouts = []
+        self.released = False
+
+    def acquire(self, blocking_timeout=None):
+        self.blocking_timeouts.append(blocking_timeout)
+        return len(self.blocking_timeouts) > self.busy_polls
+
+    def release(self):
+        self.released = True
+
+
+class FakeRedis:
+    def __init__(self, lock):
+        self._lock = lock
+        self.heartbeats = []
+
+    def lock(self, name, timeout=None):
+        return self._lock
+
+    def set(self, key, value, ex=None):
+        self.heartbeats.append(key)
+
+
+class TestBuildFingerprintLock:
+    def test_refreshes_heartbeat_while_waiting(self, app):
+        lock = FakeLock(busy_polls=2)
+        fake_redis = FakeRedis(lock)
+
+        with patch.object(build_module, "get_redis_client", return_value=fake_redis):
+            with _build_fingerprint_lock(
+                "image", "fp", heartbeat_type="image_build", heartbeat_id="img-1"
+            ):
+                assert not lock.released
+
+        assert lock.blocking_timeouts == [build_module.BUILD_DEDUP_POLL_INTERVAL] * 3
+        assert fake_redis.heartbeats == [heartbeat_key("image_build", "img-1")] * 3
+        assert lock.released
+
+    def test_release_build_heartbeat_is_kept_while_waiting(self, app):
+        lock = FakeLock(busy_polls=1)
+        fake_redis = FakeRedis(lock)
+        release = MagicMock(id="rel-1")
+        bke = MagicMock()
+
+        with (
+            patch.object(build_module, "get_redis_client", return_value=fake_redis),
+            patch.object(build_module, "BuildkitEnv", return_value=bke),
+            patch.object(build_module, "db"),
+            patch.object(build_module, "release_build_fingerprint", return_value="fp"),
+            patch.object(
+                build_module, "_reuse_identical_release", return_value="sha256:r"
+            ),
+        ):
+            result = build_module.build_release_buildkit(release)
+
+        assert result == {"release_id": "sha256:r"}
+        assert fake_redis.heartbeats == [heartbeat_key("release_build", "rel-1")] * 2
+        assert lock.released
+
+    def test_waiting_release_build_reuses_the_first_build(
+        self, db_session, application
+    ):
+        production = _app_env(db_session, application, "production")
+        first = _release(db_session, application, production)
+        second = _release(db_session, application, production)
+        lock = FakeLock(busy_polls=0)
+        fake_redis = FakeRedis(lock)
+        bke = MagicMock()
+        bke.copy_registry_image.return_value = "sha256:copied"
+        built = []
+
+        def run_release_build(release, bke, buildctl_command, buildctl_args):
+            built.append(release.id)
+            return "sha256:first"
+
+        with (
+            patch.object(build_module, "get_redis_client", return_value=fake_redis),
+            patch.object(build_module, "BuildkitEnv", return_value=bke),
+            patch.object(build_module, "release_build_fingerprint", return_value="fp"),
+            patch.object(build_module, "_run_release_build", run_release_build),
+            patch.object(Release, "envconsul_configurations", {}),
+            patch.object(Release, "image_snapshot", MagicMock()),
+            patch.object(
+                Release, "release_build_context_configmap", MagicMock(data={})
+            ),
+        ):
+            assert build_module.build_release_buildkit(first) == {
+                "release_id": "sha256:first"
+            }
+            # The second build was waiting on the lock while the first ran.
+            lock.busy_polls = len(lock.blocking_timeouts) + 1
+            assert build_module.build_release_buildkit(second) == {
+                "release_id": "sha256:copied"
+            }
+
+        assert built == [first.id]
+        assert first.release_id == "sha256:first"
+        bke.copy_registry_image.assert_called_once_with(
+            first.repository_name,
+            f"release-{first.version}",
+            second.repository_name,
+            f"release-{second.version}",
+        )
+        assert second.release_metadata["reused_release_id"] == str(first.id)
+
+    def test_gives_up_after_the_dedup_timeout(self, app):
+        lock = FakeLock(busy_polls=1000)
+        fake_redis = FakeRedis(lock)
+
+        with (
+            patch.object(build_module, "get_redis_client", return_value=fake_redis),
+            patch.object(build_module, "BUILD_DEDUP_TIMEOUT", 0),
+        ):
+            with _build_fingerprint_lock("image", "fp"):
+                pass
+
+        assert lock.blocking_timeouts == [0]
+        assert not lock.released
@@ -181,7 +181,7 @@ class TestObserveMetricQueries:
         application = observe_context["application"]
 
         with patch(
-            "cabotage.server.user.views._query_mimir_range", return_value=[]
+            "cabotage.server.user.views.query_mimir_range", return_value=[]
         ) as mock_query:
             resp = client.get(
                 f"/projects/{org.slug}/{project.slug}/env/{environment.slug}/applications/{application.slug}/observe/metric?metric=cpu"
@@ -200,7 +200,7 @@ class TestObserveMetricQueries:
         environment = observe_context["environment"]
 
         with patch(
-            "cabotage.server.user.views._query_mimir_range", return_value=[]
+            "cabotage.server.observe.query_mimir_range", return_value=[]
         ) as mock_query:
             resp = client.get(
                 f"/projects/{org.slug}/{project.slug}/environments/{environment.slug}/observe/metric?metric=cpu"
@@ -221,7 +221,7 @@ class TestObserveMetricQueries:
         environment = observe_context["environment"]
 
         with patch(
-            "cabotage.server.user.views._query_mimir_range", return_value=[]
+            "cabotage.server.observe.query_mimir_range", return_value=[]
         ) as mock_query:
             resp = client.get(
                 f"/projects/{org.slug}/{project.slug}/environments/{environment.slug}/observe/metric?metric=cpu&workload=backing_services&group=service"
@@ -254,7 +254,7 @@ class TestObserveMetricQueries:
         db.session.commit()
 
         with patch(
-            "cabotage.server.user.views._query_mimir_range", return_value=[]
+            "cabotage.server.observe.query_mimir_range", return_value=[]
         ) as mock_query:
             resp = client.get(
                 f"/projects/{org.slug}/{project.slug}/environments/{environment.slug}/observe/metric?metric=cpu&workload=backing_services&service={resource.id}"
@@ -272,7 +272,7 @@ class TestObserveMetricQueries:
         project = observe_context["project"]
 
         with patch(
-            "cabotage.server.user.views._query_mimir_range", return_value=[]
+            "cabotage.server.observe.query_mimir_range", return_value=[]
         ) as mock_query:
             resp = client.get(
                 f"/projects/{org.slug}/{project.slug}/observe/metric?metric=cpu"
@@ -293,7 +293,7 @@ class TestObserveMetricQueries:
         application = observe_context["application"]
 
         with patch(
-            "cabotage.server.user.views._query_mimir_range", return_value=[]
+            "cabotage.server.observe.query_mimir_range", return_value=[]
         ) as mock_query:
             resp = client.get(
                 f"/projects/{org.slug}/{project.slug}/observe/metric?metric=cpu&workload=backing_services&application={application.slug}"
@@ -311,7 +311,7 @@ class TestObserveMetricQueries:
         org = observe_context["org"]
 
         with patch(
-            "cabotage.server.user.views._query_mimir_range", return_value=[]
+            "cabotage.server.observe.query_mimir_range", return_value=[]
         ) as mock_query:
             resp = client.get(f"/organizations/{org.slug}/observe/metric?metric=cpu")
 
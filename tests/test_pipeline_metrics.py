@@ -0,0 +1,183 @@
+"""Tests for Celery task, pipeline stage and external call metrics."""
+
+import datetime
+import time
+import types
+
+import prometheus_client
+import pytest
+import requests
+
+from cabotage.celery import metrics as celery_metrics
+from cabotage.server import metrics
+from cabotage.server.wsgi import app as _app
+
+
+def _sample(name, **labels):
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def app():
+    with _app.app_context():
+        yield _app
+    _app.config["METRICS_ORGANIZATION_LABELS"] = True
+
+
+def _task(name, **request):
+    request.setdefault("is_eager", False)
+    return types.SimpleNamespace(name=name, request=types.SimpleNamespace(**request))
+
+
+class TestKubernetesResource:
+    @pytest.mark.parametrize(
+        "url,resource",
+        [
+            ("https://k8s/api/v1/namespaces", "namespaces"),
+            ("https://k8s/api/v1/namespaces/org-a", "namespaces"),
+            ("https://k8s/api/v1/namespaces/org-a/pods", "pods"),
+            ("https://k8s/api/v1/namespaces/org-a/pods/web-1/log?follow=1", "pods/log"),
+            (
+                "https://k8s/apis/apps/v1/namespaces/org-a/deployments/web",
+                "deployments",
+            ),
+            (
+                "https://k8s/apis/apps/v1/namespaces/org-a/deployments/web/scale",
+                "deployments/scale",
+            ),
+            ("https://k8s/apis/batch/v1/jobs", "jobs"),
+            ("https://k8s/apis", "discovery"),
+        ],
+    )
+    def test_resource(self, url, resource):
+        assert metrics.kubernetes_resource(url) == resource
+
+
+class TestPipelineStage:
+    def test_records_outcome(self, app):
+        labels = {"stage": "test_stage", "organization": "acme"}
+        success = _sample(
+            "cabotage_pipeline_stage_seconds_count", outcome="success", **labels
+        )
+        error = _sample(
+            "cabotage_pipeline_stage_seconds_count", outcome="error", **labels
+        )
+
+        with metrics.time_stage("test_stage", "acme"):
+            pass
+        with pytest.raises(RuntimeError):
+            with metrics.time_stage("test_stage", "acme"):
+                raise RuntimeError("boom")
+
+        assert (
+            _sample(
+                "cabotage_pipeline_stage_seconds_count", outcome="success", **labels
+            )
+            == success + 1
+        )
+        assert (
+            _sample("cabotage_pipeline_stage_seconds_count", outcome="error", **labels)
+            == error + 1
+        )
+
+    def test_organization_label_can_be_disabled(self, app):
+        app.config["METRICS_ORGANIZATION_LABELS"] = False
+        labels = {"stage": "unlabelled_stage", "outcome": "success"}
+        before = _sample(
+            "cabotage_pipeline_stage_seconds_count", organization="", **labels
+        )
+
+        with metrics.time_stage("unlabelled_stage", "acme"):
+            pass
+
+        assert (
+            _sample("cabotage_pipeline_stage_seconds_count", organization="", **labels)
+            == before + 1
+        )
+
+
+class TestReconcileLoop:
+    def test_times_each_pass(self):
+        @metrics.timed_reconcile("test_loop")
+        def reconcile():
+            metrics.reconcile_rows("test_loop", 7)
+            return "done"
+
+        before = _sample("cabotage_reconcile_seconds_count", loop="test_loop")
+        rows = _sample("cabotage_reconcile_rows_sum", loop="test_loop")
+
+        assert reconcile() == "done"
+        assert reconcile.__name__ == "reconcile"
+        assert (
+            _sample("cabotage_reconcile_seconds_count", loop="test_loop") == before + 1
+        )
+        assert _sample("cabotage_reconcile_rows_sum", loop="test_loop") == rows + 7
+
+
+class TestExternalCalls:
+    def test_session_hook_records_latency(self):
+        session = metrics.instrument_session(requests.Session(), "test_service")
+        request = requests.Request("GET", "https://example.com").prepare()
+        response = requests.Response()
+        response.request = request
+        response.elapsed = datetime.timedelta(milliseconds=250)
+        before = _sample(
+            "cabotage_external_call_seconds_sum",
+            service="test_service",
+            operation="GET",
+        )
+
+        for hook in session.hooks["response"]:
+            hook(response)
+
+        assert _sample(
+            "cabotage_external_call_seconds_sum",
+            service="test_service",
+            operation="GET",
+        ) == pytest.approx(before + 0.25)
+
+
+class TestCeleryTaskMetrics:
+    def test_publish_stamps_enqueued_at(self):
+        headers = {}
+        celery_metrics._stamp_enqueued_at(headers=headers)
+        assert headers[celery_metrics.ENQUEUED_AT_HEADER] <= time.time()
+
+    def test_queue_wait_and_duration(self):
+        name = "tests.queued_task"
+        task = _task(name, **{celery_metrics.ENQUEUED_AT_HEADER: time.time() - 5})
+        waits = _sample("cabotage_task_queue_wait_seconds_count", task=name)
+        wait_sum = _sample("cabotage_task_queue_wait_seconds_sum", task=name)
+        runs = _sample(
+            "cabotage_task_duration_seconds_count", task=name, state="SUCCESS"
+        )
+
+        celery_metrics._task_started(task_id="abc", task=task)
+        celery_metrics._task_finished(task_id="abc", task=task, state="SUCCESS")
+
+        assert _sample("cabotage_task_queue_wait_seconds_count", task=name) == waits + 1
+        assert _sample("cabotage_task_queue_wait_seconds_sum", task=name) >= (
+            wait_sum + 5
+        )
+        assert (
+            _sample("cabotage_task_duration_seconds_count", task=name, state="SUCCESS")
+            == runs + 1
+        )
+        assert "abc" not in celery_metrics._started
+
+    def test_eager_task_has_no_queue_wait(self):
+        name = "tests.eager_task"
+        task = _task(
+            name, is_eager=True, **{celery_metrics.ENQUEUED_AT_HEADER: time.time()}
+        )
+
+        celery_metrics._task_started(task_id="eager", task=task)
+        celery_metrics._task_finished(task_id="eager", task=task, state="SUCCESS")
+
+        assert _sample("cabotage_task_queue_wait_seconds_count", task=name) == 0
+
+    def test_signal_without_task_is_ignored(self):
+        celery_metrics._task_started(task_id="missing", task=None)
+        celery_metrics._task_finished(task_id="missing", task=None, state="SUCCESS")
+
+        assert "missing" not in celery_metrics._started
@@ -402,8 +402,7 @@ class TestProcessDeploymentHook:
         result = process_deployment_hook(hook)
         assert result is False
 
-    @patch("cabotage.celery.tasks.github.run_omnibus_build")
-    @patch("cabotage.celery.tasks.github.run_image_build")
+    @patch("cabotage.celery.tasks.github.schedule_build")
     @patch("cabotage.celery.tasks.github.post_deployment_status_update")
     @patch("cabotage.celery.tasks.github.github_session")
     @patch("cabotage.celery.tasks.github.github_app")
@@ -412,8 +411,7 @@ class TestProcessDeploymentHook:
         mock_gh_app,
         mock_session,
         mock_post_status,
-        mock_build,
-        mock_omnibus_build,
+        mock_schedule_build,
         db_session,
         project,
         environment,
@@ -443,7 +441,8 @@ class TestProcessDeploymentHook:
         result = process_deployment_hook(hook)
         assert result is True
         assert hook.commit_sha == commit_sha
-        mock_build.delay.assert_called_once()
+        mock_schedule_build.assert_called_once()
+        assert mock_schedule_build.call_args[0][0] == "image"
         assert mock_post_status.call_count == 2  # in_progress + in_progress
 
     @patch("cabotage.celery.tasks.github.github_session")
@@ -0,0 +1,400 @@
+"""Tests for registry garbage collection: live sets, planning, and fan-out."""
+
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from cabotage.celery.tasks.prune_images import (
+    RepositoryToken,
+    _live_tags,
+    _merge_summaries,
+    _plan_gc,
+    _prunable_aliases,
+    _prune_repository,
+    prune_images,
+)
+from cabotage.server import db
+from cabotage.server.models.auth import Organization
+from cabotage.server.models.projects import (
+    Application,
+    ApplicationEnvironment,
+    Deployment,
+    Environment,
+    Image,
+    Project,
+    Release,
+)
+from cabotage.server.wsgi import app as _app
+
+
+@pytest.fixture
+def app():
+    _app.config["TESTING"] = True
+    with _app.app_context():
+        yield _app
+
+
+@pytest.fixture
+def db_session(app):
+    yield db.session
+    db.session.rollback()
+
+
+@pytest.fixture
+def app_env(db_session):
+    org = Organization(name="Test Org", slug=f"testorg-{uuid.uuid4().hex[:8]}")
+    db_session.add(org)
+    db_session.flush()
+    project = Project(name="Test Project", organization_id=org.id)
+    db_session.add(project)
+    db_session.flush()
+    environment = Environment(name="production", project_id=project.id)
+    db_session.add(environment)
+    db_session.flush()
+    application = Application(name="webapp", slug="webapp", project_id=project.id)
+    db_session.add(application)
+    db_session.flush()
+    ae = ApplicationEnvironment(
+        application_id=application.id, environment_id=environment.id
+    )
+    db_session.add(ae)
+    db_session.flush()
+    return ae
+
+
+def _image(db_session, app_env, built=True, error=False):
+    image = Image(
+        application_id=app_env.application_id,
+        application_environment_id=app_env.id,
+        _repository_name="cabotage/org/project/webapp",
+        build_ref="main",
+        built=built,
+        error=error,
+    )
+    db_session.add(image)
+    db_session.flush()
+    return image
+
+
+def _release(db_session, app_env, image, built=True):
+    release = Release(
+        application_id=app_env.application_id,
+        application_environment_id=app_env.id,
+        _repository_name="cabotage/org/project/webapp",
+        image=image.asdict,
+        configuration={},
+        image_changes={},
+        configuration_changes={},
+        built=built,
+    )
+    db_session.add(release)
+    db_session.flush()
+    return release
+
+
+def _deploy(db_session, app_env, release, complete=True, error=False):
+    deployment = Deployment(
+        application_id=app_env.application_id,
+        application_environment_id=app_env.id,
+        release=release.asdict,
+        complete=complete,
+        error=error,
+    )
+    db_session.add(deployment)
+    db_session.flush()
+    return deployment
+
+
+def _fake_client(manifests, failing=()):
+    """A DXF stand-in; ``manifests`` maps tag -> (digest, {blob: size})."""
+    client = MagicMock()
+    client.list_aliases.return_value = list(manifests)
+
+    def get_manifest_and_response(alias):
+        digest, blobs = manifests[alias]
+        response = MagicMock()
+        response.headers = {"Docker-Content-Digest": digest}
+        return alias, response
+
+    def get_alias(manifest=None, sizes=False):
+        return list(manifests[manifest][1].items())
+
+    def del_alias(digest):
+        if digest in failing:
+            raise requests.exceptions.HTTPError("boom")
+        return []
+
+    client.get_manifest_and_response.side_effect = get_manifest_and_response
+    client.get_alias.side_effect = get_alias
+    client.del_alias.side_effect = del_alias
+    return client
+
+
+def _prune(manifests, live_tags, failing=(), **kwargs):
+    client = _fake_client(manifests, failing=failing)
+    with patch(
+        "cabotage.celery.tasks.prune_images._registry_client",
+        return_value=client,
+    ):
+        summary = _prune_repository("org/app", live_tags, **kwargs)
+    return client, summary
+
+
+# ---------------------------------------------------------------------------
+# Alias selection and planning
+# ---------------------------------------------------------------------------
+
+
+class TestPrunableAliases:
+    def test_natural_sort_and_buildcache_excluded(self):
+        aliases = [
+            "image-10",
+            "image-9",
+            "image-buildcache",
+            "release-buildcache",
+            "latest",
+            "image-2",
+        ]
+        assert _prunable_aliases(aliases) == ["image-2", "image-9", "image-10"]
+
+
+class TestPlanGC:
+    def test_deletes_unreferenced_manifests(self):
+        plan = _plan_gc(
+            {
+                "image-1": ("sha256:a", {"l1": 100, "l2": 5}),
+                "image-2": ("sha256:b", {"l1": 100, "l3": 7}),
+            },
+            {"image-2"},
+        )
+        assert plan["digests"] == ["sha256:a"]
+        assert plan["tags"] == 1
+        assert plan["retained"] == 1
+        # l1 is shared with the live image, so only l2 is reclaimed.
+        assert plan["bytes"] == 5
+
+    def test_shared_digest_with_live_tag_is_kept(self):
+        plan = _plan_gc(
+            {
+                "image-3": ("sha256:a", {"l1": 100}),
+                "release-3": ("sha256:a", {"l1": 100}),
+            },
+            {"release-3"},
+        )
+        assert plan["digests"] == []
+        assert plan["retained"] == 2
+        assert plan["bytes"] == 0
+
+    def test_dead_tags_sharing_digest_deleted_once(self):
+        plan = _plan_gc(
+            {
+                "image-1": ("sha256:a", {"l1": 100}),
+                "release-1": ("sha256:a", {"l1": 100}),
+                "image-2": ("sha256:b", {"l2": 1}),
+            },
+            {"image-2"},
+        )
+        assert plan["digests"] == ["sha256:a"]
+        assert plan["tags"] == 2
+        assert plan["bytes"] == 100
+
+
+# ---------------------------------------------------------------------------
+# _live_tags
+# ---------------------------------------------------------------------------
+
+
+class TestLiveTags:
+    def test_keeps_deployed_recent_and_building(self, db_session, app_env):
+        images = [_image(db_session, app_env) for _ in range(4)]
+        releases = [_release(db_session, app_env, image) for image in images]
+        # An old release is deployed (rollback target), then the newest.
+        _deploy(db_session, app_env, releases[0])
+        _deploy(db_session, app_env, releases[3])
+        _image(db_session, app_env, built=False)
+        _image(db_session, app_env, built=False, error=True)
+
+        tags = _live_tags(app_env, retain=2)
+
+        # image-2/release-2 were never deployed and have aged out; image-6
+        # failed to build.
+        assert tags == {
+            "image-1",
+            "release-1",
+            "image-3",
+            "release-3",
+            "image-4",
+            "release-4",
+            "image-5",
+        }
+
+    def test_current_deployment_kept_even_if_running(self, db_session, app_env):
+        images = [_image(db_session, app_env) for _ in range(3)]
+        releases = [_release(db_session, app_env, image) for image in images]
+        _deploy(db_session, app_env, releases[0], complete=False)
+
+        tags = _live_tags(app_env, retain=0)
+
+        assert tags == {"image-1", "release-1"}
+
+
+# ---------------------------------------------------------------------------
+# RepositoryToken
+# ---------------------------------------------------------------------------
+
+
+class TestRepositoryToken:
+    @patch(
+        "cabotage.celery.tasks.prune_images.generate_docker_registry_jwt",
+        side_effect=["token-1", "token-2"],
+    )
+    def test_token_is_minted_once(self, mock_jwt):
+        token = RepositoryToken("org/app")
+        dxf = MagicMock()
+        token.auth(dxf, None)
+        token.auth(dxf, None)
+        assert dxf.token == "token-1"
+        assert mock_jwt.call_count == 1
+        assert mock_jwt.call_args.kwargs["access"][0]["name"] == "org/app"
+
+    @patch(
+        "cabotage.celery.tasks.prune_images.generate_docker_registry_jwt",
+        side_effect=["token-1", "token-2"],
+    )
+    def test_token_refreshed_after_ttl(self, mock_jwt):
+        token = RepositoryToken("org/app", ttl=0)
+        assert token.get() == "token-1"
+        assert token.get() == "token-2"
+
+
+# ---------------------------------------------------------------------------
+# _prune_repository
+# ---------------------------------------------------------------------------
+
+
+class TestPruneRepository:
+    MANIFESTS = {
+        "image-1": ("sha256:a", {"l1": 100, "l2": 50}),
+        "image-2": ("sha256:b", {"l1": 100, "l3": 10}),
+        "release-1": ("sha256:c", {"l4": 20}),
+        "release-2": ("sha256:d", {"l5": 30}),
+        "image-buildcache": ("sha256:e", {"l6": 1000}),
+    }
+
+    def test_deletes_everything_outside_live_set(self, app):
+        client, summary = _prune(
+            self.MANIFESTS, {"image-2", "release-2"}, concurrency=2
+        )
+
+        deleted = sorted(c.args[0] for c in client.del_alias.call_args_list)
+        assert deleted == ["sha256:a", "sha256:c"]
+        assert summary["deleted"] == 2
+        assert summary["manifests"] == 2
+        assert summary["retained"] == 2
+        assert summary["bytes"] == 70
+        assert summary["errors"] == 0
+
+    def test_nothing_to_delete_skips_manifest_lookups(self, app):
+        manifests = {"image-1": ("sha256:a", {}), "release-1": ("sha256:b", {})}
+        client, summary = _prune(manifests, {"image-1", "release-1"})
+
+        client.get_manifest_and_response.assert_not_called()
+        assert summary["retained"] == 2
+
+    def test_dry_run_does_not_delete(self, app):
+        client, summary = _prune(self.MANIFESTS, {"release-2"}, dry_run=True)
+
+        client.del_alias.assert_not_called()
+        assert summary["deleted"] == 3
+        assert summary["bytes"] == 180
+
+    def test_failed_deletes_not_counted_as_reclaimed(self, app):
+        client, summary = _prune(
+            self.MANIFESTS, {"image-2", "release-2"}, failing={"sha256:a"}
+        )
+
+        assert summary["deleted"] == 1
+        assert summary["manifests"] == 1
+        assert summary["bytes"] == 20
+        assert summary["errors"] == 1
+
+    def test_uninspectable_live_tag_aborts(self, app):
+        client = _fake_client(self.MANIFESTS)
+        client.get_manifest_and_response.side_effect = requests.exceptions.HTTPError(
+            "nope"
+        )
+        with patch(
+            "cabotage.celery.tasks.prune_images._registry_client",
+            return_value=client,
+        ):
+            summary = _prune_repository("org/app", {"image-2"})
+
+        client.del_alias.assert_not_called()
+        assert summary["deleted"] == 0
+        assert summary["errors"] >= 1
+
+    def test_list_failure_returns_error_summary(self, app):
+        client = MagicMock()
+        client.list_aliases.side_effect = requests.exceptions.HTTPError("nope")
+        with patch(
+            "cabotage.celery.tasks.prune_images._registry_client",
+            return_value=client,
+        ):
+            summary = _prune_repository("org/app", set())
+
+        assert summary["errors"] == 1
+        assert summary["deleted"] == 0
+
+
+# ---------------------------------------------------------------------------
+# Fan-out
+# ---------------------------------------------------------------------------
+
+
+class TestPruneImages:
+    def test_merge_summaries(self):
+        totals = _merge_summaries(
+            [
+                {
+                    "deleted": 2,
+                    "manifests": 2,
+                    "retained": 5,
+                    "bytes": 10,
+                    "errors": 0,
+                },
+                {
+                    "deleted": 1,
+                    "manifests": 1,
+                    "retained": 5,
+                    "bytes": 7,
+                    "errors": 1,
+                },
+            ]
+        )
+        assert totals == {
+            "repositories": 2,
+            "deleted": 3,
+            "manifests": 3,
+            "retained": 10,
+            "bytes": 17,
+            "errors": 1,
+        }
+
+    def test_dispatches_one_task_per_chunk(self, app):
+        chunks = [["a", "b"], ["c"]]
+        with (
+            patch(
+                "cabotage.celery.tasks.prune_images._application_id_chunks",
+                return_value=iter(chunks),
+            ) as mock_chunks,
+            patch(
+                "cabotage.celery.tasks.prune_images.prune_application_repositories"
+            ) as mock_task,
+        ):
+            assert prune_images(dry_run=True, after="x", chunk_size=2) == 2
+
+        mock_chunks.assert_called_once_with(2, after="x")
+        assert [c.args[0] for c in mock_task.delay.call_args_list] == chunks
+        assert all(c.kwargs["dry_run"] for c in mock_task.delay.call_args_list)
@@ -0,0 +1,292 @@
+"""Tests for per-request SQL instrumentation and endpoint query budgets."""
+
+import time
+import uuid
+
+import pytest
+from flask_security import hash_password
+
+from cabotage.server import db
+from cabotage.server.models.auth import Organization, User
+from cabotage.server.models.auth_associations import OrganizationMember
+from cabotage.server.models.projects import (
+    Application,
+    ApplicationEnvironment,
+    Deployment,
+    Environment,
+    Image,
+    Project,
+    Release,
+)
+from cabotage.server.query_stats import (
+    QueryStats,
+    capture_queries,
+    fingerprint,
+    query_budget as _query_budget,
+)
+from cabotage.server.wsgi import app as _app
+
+
+@pytest.fixture
+def app():
+    _app.config["TESTING"] = True
+    _app.config["WTF_CSRF_ENABLED"] = False
+    _app.config["REQUIRE_MFA"] = False
+    with _app.app_context():
+        yield _app
+    _app.config["REQUIRE_MFA"] = True
+    _app.config["QUERY_STATS_HEADERS"] = False
+    _app.config["METRICS_ENABLED"] = False
+    _app.config["METRICS_TOKEN"] = None
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def db_session(app):
+    yield db.session
+    db.session.rollback()
+
+
+@pytest.fixture
+def query_budget(db_session):
+    """Assert the block stays within a query budget, starting from a cold session."""
+
+    def _budget(max_queries, max_repeats=None):
+        db_session.expire_all()
+        return _query_budget(max_queries, max_repeats=max_repeats)
+
+    return _budget
+
+
+@pytest.fixture
+def admin_user(db_session):
+    user = User(
+        username=f"admin-{uuid.uuid4().hex[:8]}",
+        email=f"admin-{uuid.uuid4().hex[:8]}@example.com",
+        password=hash_password("password123"),
+        active=True,
+        fs_uniquifier=uuid.uuid4().hex,
+    )
+    db_session.add(user)
+    db_session.flush()
+    return user
+
+
+@pytest.fixture
+def org(db_session, admin_user):
+    org = Organization(name="Test Org", slug=f"testorg-{uuid.uuid4().hex[:8]}")
+    db_session.add(org)
+    db_session.flush()
+    db_session.add(
+        OrganizationMember(organization_id=org.id, user_id=admin_user.id, admin=True)
+    )
+    db_session.flush()
+    return org
+
+
+@pytest.fixture
+def project(db_session, org):
+    project = Project(name="Test Project", organization_id=org.id)
+    db_session.add(project)
+    db_session.flush()
+    return project
+
+
+@pytest.fixture
+def applications(db_session, project):
+    """A few applications, each with some build/release/deploy history."""
+    environment = Environment(name="default", project_id=project.id, ephemeral=False)
+    db_session.add(environment)
+    db_session.flush()
+    apps = []
+    for n in range(3):
+        application = Application(
+            name=f"webapp{n}",
+            slug=f"webapp{n}",
+            project_id=project.id,
+            github_repository="myorg/myrepo",
+        )
+        db_session.add(application)
+        db_session.flush()
+        app_env = ApplicationEnvironment(
+            application_id=application.id, environment_id=environment.id
+        )
+        db_session.add(app_env)
+        db_session.flush()
+        for i in range(4):
+            image = Image(
+                application_id=application.id,
+                application_environment_id=app_env.id,
+                _repository_name=application.registry_repository_name(app_env),
+                build_ref=f"{i:040x}",
+                image_metadata={"sha": f"{i:040x}"},
+                built=True,
+                processes={"web": {"cmd": "gunicorn app:app", "env": []}},
+            )
+            db_session.add(image)
+            db_session.flush()
+            release = Release(
+                application_id=application.id,
+                application_environment_id=app_env.id,
+                _repository_name=application.registry_repository_name(app_env),
+                image=image.asdict,
+                configuration={},
+                image_changes={},
+                configuration_changes={},
+                built=True,
+            )
+            db_session.add(release)
+            db_session.flush()
+            db_session.add(
+                Deployment(
+                    application_id=application.id,
+                    application_environment_id=app_env.id,
+                    release=release.asdict,
+                    complete=True,
+                )
+            )
+            db_session.flush()
+        apps.append(application)
+    return apps
+
+
+def _login(client, user):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = user.fs_uniquifier
+        sess["_fresh"] = True
+        sess["fs_cc"] = "set"
+        sess["fs_paa"] = time.time()
+        sess["identity.id"] = user.id
+        sess["identity.auth_type"] = "session"
+
+
+class TestFingerprint:
+    def test_in_lists_collapse(self):
+        a = "SELECT * FROM t WHERE id IN (%(id_1_1)s, %(id_1_2)s)"
+        b = "SELECT * FROM t WHERE id IN (%(id_1_1)s)"
+        assert fingerprint(a) == fingerprint(b)
+
+    def test_literals_and_whitespace_ignored(self):
+        a = "SELECT *\n  FROM t WHERE name = 'a' LIMIT 10"
+        b = "SELECT * FROM t WHERE name = 'b''c' LIMIT 50"
+        assert fingerprint(a) == fingerprint(b)
+
+    def test_different_tables_differ(self):
+        assert fingerprint("SELECT * FROM a") != fingerprint("SELECT * FROM b")
+
+
+class TestQueryStats:
+    def test_repeated_statements(self):
+        stats = QueryStats()
+        for _ in range(3):
+            stats.record("SELECT * FROM t WHERE id = %(id_1)s", 0.01)
+        stats.record("SELECT * FROM u", 0.01)
+        assert stats.count == 4
+        assert stats.repeated_count == 2
+        assert stats.repeated() == [("SELECT * FROM t WHERE id = %(id_1)s", 3)]
+
+    def test_capture_records_into_enclosing_capture(self, db_session):
+        with capture_queries() as outer:
+            db_session.execute(db.text("SELECT 1"))
+            with capture_queries() as inner:
+                db_session.execute(db.text("SELECT 2"))
+        assert inner.count == 1
+        assert outer.count == 2
+        assert outer.duration >= inner.duration
+
+    def test_budget_exceeded(self, db_session):
+        with pytest.raises(AssertionError, match="Query budget of 1 exceeded"):
+            with _query_budget(1):
+                db_session.execute(db.text("SELECT 1"))
+                db_session.execute(db.text("SELECT 2"))
+
+    def test_repeat_budget_exceeded(self, db_session):
+        with pytest.raises(AssertionError, match="repeated more than 2 times"):
+            with _query_budget(10, max_repeats=2):
+                for n in range(3):
+                    db_session.execute(db.text(f"SELECT {n}"))
+
+
+class TestRequestInstrumentation:
+    def test_headers(self, app, client, db_session, admin_user, org):
+        app.config["QUERY_STATS_HEADERS"] = True
+        _login(client, admin_user)
+        with capture_queries() as stats:
+            response = client.get(f"/organizations/{org.slug}")
+        assert response.status_code == 200
+        assert int(response.headers["X-DB-Query-Count"]) == stats.count > 0
+        assert "X-DB-Time-Ms" in response.headers
+        assert "X-DB-Repeated-Queries" in response.headers
+
+    def test_headers_off_by_default(self, client, db_session, admin_user, org):
+        _login(client, admin_user)
+        response = client.get(f"/organizations/{org.slug}")
+        assert "X-DB-Query-Count" not in response.headers
+
+    def test_metrics_endpoint_disabled(self, client):
+        assert client.get("/metrics").status_code == 404
+
+    def test_metrics_endpoint(self, app, client, db_session, admin_user, org):
+        app.config["METRICS_ENABLED"] = True
+        app.config["METRICS_TOKEN"] = "s3cret"
+        _login(client, admin_user)
+        client.get(f"/organizations/{org.slug}")
+
+        assert client.get("/metrics").status_code == 401
+        response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+        assert response.status_code == 200
+        assert b'cabotage_request_db_queries_count{endpoint="user.organization"}' in (
+            response.data
+        )
+
+
+class TestEndpointQueryBudgets:
+    """Key pages stay within a fixed number of queries.
+
+    Budgets include the handful of queries every authenticated request makes
+    (user, memberships, identities). The fixture history has several
+    applications, releases and deployments, so a per-row query shows up as a
+    repeat as well as blowing the total.
+    """
+
+    @pytest.fixture(autouse=True)
+    def _setup(self, client, admin_user, org, project, applications):
+        _login(client, admin_user)
+        # Warm per-session auth lookups so only the page itself is counted.
+        client.get("/")
+
+    def _get(self, client, url):
+        response = client.get(url)
+        assert response.status_code == 200
+
+    def test_organization(self, client, org, query_budget):
+        with query_budget(12, max_repeats=2):
+            self._get(client, f"/organizations/{org.slug}")
+
+    def test_project(self, client, org, project, query_budget):
+        with query_budget(22, max_repeats=2):
+            self._get(client, f"/projects/{org.slug}/{project.slug}")
+
+    def test_application(self, client, org, project, applications, query_budget):
+        with query_budget(18, max_repeats=2):
+            self._get(
+                client,
+                f"/projects/{org.slug}/{project.slug}/applications/"
+                f"{applications[0].slug}",
+            )
+
+    def test_audit(self, client, org, project, query_budget):
+        with query_budget(12, max_repeats=2):
+            self._get(client, f"/projects/{org.slug}/{project.slug}/audit")
+
+    def test_releases(self, client, org, project, applications, query_budget):
+        with query_budget(20, max_repeats=2):
+            self._get(
+                client,
+                f"/projects/{org.slug}/{project.slug}/applications/"
+                f"{applications[0].slug}/releases",
+            )
@@ -28,8 +28,10 @@ from cabotage.server.models.projects import (
     Project,
     Release,
     ReleaseSnapshot,
+    _refresh_candidate_fingerprints,
     activity_plugin,
 )
+from cabotage.server.models.utils import release_state_fingerprint
 from cabotage.server.wsgi import app as _app
 
 Activity = activity_plugin.activity_cls
@@ -2185,3 +2187,108 @@ class TestIngressChangeDetails:
             "settings" in d and "enabled" in d and "session_affinity" in d
             for d in detail_lines
         )
+
+
+# ---------------------------------------------------------------------------
+# Release state fingerprints
+# ---------------------------------------------------------------------------
+
+
+class TestReleaseFingerprint:
+    """Fingerprint-based drift detection agrees with the full diff."""
+
+    def _deploy_candidate(self, db_session, application, app_env):
+        release = application.create_release(app_env)
+        db_session.add(release)
+        db_session.flush()
+        return _make_deployment(db_session, application, app_env, release)
+
+    def test_ignored_keys_do_not_affect_fingerprint(self):
+        old = {
+            "image": {"web": {"id": "1", "commit_sha": "abc", "ref": "x"}},
+            "configuration": {"FOO": {"id": "1", "version_id": 1}},
+            "ingresses": {"web": {"id": "1", "enabled": True}},
+        }
+        new = {
+            "image": {"web": {"id": "2", "commit_sha": "def", "ref": "x"}},
+            "configuration": {"FOO": {"id": "2", "version_id": 1}},
+            "ingresses": {"web": {"id": "2", "enabled": True}},
+        }
+        assert release_state_fingerprint(old) == release_state_fingerprint(new)
+
+        new["configuration"]["FOO"]["version_id"] = 2
+        assert release_state_fingerprint(old) != release_state_fingerprint(new)
+
+    def test_deployment_records_release_fingerprint(
+        self, db_session, application, app_env, built_image
+    ):
+        deployment = self._deploy_candidate(db_session, application, app_env)
+        assert deployment.release_fingerprint == release_state_fingerprint(
+            deployment.release
+        )
+        assert deployment.release_fingerprint == (
+            application.release_candidate_fingerprint(app_env)
+        )
+        assert not app_env.has_undeployed_changes(deployment)
+
+    def test_no_deployment_has_undeployed_changes(
+        self, db_session, application, app_env, built_image
+    ):
+        assert app_env.has_undeployed_changes()
+
+    def test_config_change_refreshes_candidate_fingerprint(
+        self, db_session, application, app_env, built_image
+    ):
+        deployment = self._deploy_candidate(db_session, application, app_env)
+        _refresh_candidate_fingerprints(db_session)
+        assert app_env.candidate_fingerprint == deployment.release_fingerprint
+
+        db_session.add(
+            Configuration(
+                application_id=application.id,
+                application_environment_id=app_env.id,
+                name="NEW_VAR",
+                value="1",
+                secret=False,
+            )
+        )
+        db_session.flush()
+        _refresh_candidate_fingerprints(db_session)
+
+        assert app_env.candidate_fingerprint != deployment.release_fingerprint
+        assert app_env.has_undeployed_changes(deployment)
+        _, config_diff, _ = application.ready_for_deployment_in_env(app_env)
+        assert "NEW_VAR" in config_diff.added()
+
+    def test_ingress_host_change_marks_candidate_stale(
+        self, db_session, application, app_env, built_image
+    ):
+        ingress = Ingress(application_environment_id=app_env.id, name="web")
+        db_session.add(ingress)
+        db_session.flush()
+        deployment = self._deploy_candidate(db_session, application, app_env)
+        _refresh_candidate_fingerprints(db_session)
+        assert not app_env.has_undeployed_changes(deployment)
+
+        db_session.add(IngressHost(ingress_id=ingress.id, hostname="new.example.com"))
+        db_session.flush()
+        _refresh_candidate_fingerprints(db_session)
+
+        assert app_env.has_undeployed_changes(deployment)
+
+    def test_legacy_deployment_falls_back_to_release(
+        self, db_session, application, app_env, built_image
+    ):
+        deployment = self._deploy_candidate(db_session, application, app_env)
+        deployment.release_fingerprint = None
+        assert deployment.deployed_fingerprint == release_state_fingerprint(
+            deployment.release
+        )
+
+    def test_missing_candidate_fingerprint_is_computed(
+        self, db_session, application, app_env, built_image
+    ):
+        deployment = self._deploy_candidate(db_session, application, app_env)
+        app_env.candidate_fingerprint = None
+
+        assert not app_env.has_undeployed_changes(deployment)